@@ -2,7 +2,8 @@
 AI Response Cache Module
 
 Provides disk-based caching for AI responses to speed up development and reduce API calls.
-Uses SHA-256 hashing of prompts to create cache keys.
+Uses SHA-256 hashing of prompts to create cache keys. Keys can be scoped, e.g. by
+catalog version, so responses built from older catalog data are not reused.
 """
 
 import hashlib
@@ -25,16 +26,19 @@ class AIResponseCache:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def _hash_prompt(self, prompt: str) -> str:
+    def _hash_prompt(self, prompt: str, scope: Optional[str] = None) -> str:
         """
         Create a SHA-256 hash of the prompt for use as cache key.
 
         Args:
             prompt: The prompt text to hash
+            scope: Optional scope (e.g. catalog version) mixed into the key
 
         Returns:
             Hexadecimal string representation of the hash
         """
+        if scope:
+            prompt = f"[scope:{scope}]\n{prompt}"
         return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
 
     def _get_cache_path(self, prompt_hash: str) -> Path:
@@ -49,17 +53,18 @@ class AIResponseCache:
         """
         return self.cache_dir / f"{prompt_hash}.json"
 
-    def get(self, prompt: str) -> Optional[str]:
+    def get(self, prompt: str, scope: Optional[str] = None) -> Optional[str]:
         """
         Retrieve a cached response for the given prompt.
 
         Args:
             prompt: The prompt text to look up
+            scope: Optional scope the response was cached under
 
         Returns:
             Cached response string if found, None otherwise
         """
-        prompt_hash = self._hash_prompt(prompt)
+        prompt_hash = self._hash_prompt(prompt, scope)
         cache_path = self._get_cache_path(prompt_hash)
 
         if not cache_path.exists():
@@ -76,19 +81,21 @@ class AIResponseCache:
             print(f"Warning: Failed to read cache file {cache_path}: {e}")
             return None
 
-    def set(self, prompt: str, response: str) -> None:
+    def set(self, prompt: str, response: str, scope: Optional[str] = None) -> None:
         """
         Store a response in the cache.
 
         Args:
             prompt: The prompt text (will be hashed for the key)
             response: The AI response to cache
+            scope: Optional scope (e.g. catalog version) to cache the response under
         """
-        prompt_hash = self._hash_prompt(prompt)
+        prompt_hash = self._hash_prompt(prompt, scope)
         cache_path = self._get_cache_path(prompt_hash)
 
         cache_data = {
             "prompt_hash": prompt_hash,
+            "scope": scope,
             "prompt": prompt,  # Store full prompt for debugging
             "response": response,
             "timestamp": datetime.now().isoformat(),
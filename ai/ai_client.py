@@ -3,20 +3,23 @@
 # Required packages
 import base64
 import os
+import threading
 import time
 from datetime import datetime
-from openai import AzureOpenAI
-from azure.identity import (
-    ChainedTokenCredential,
-    AzureCliCredential,
-    ManagedIdentityCredential,
-    get_bearer_token_provider,
-)
 from prompt_types import PromptType
 from ai.ai_cache import get_cache
+from ai.metrics import get_metrics_registry
+from ai.resilience import AIError, get_resilient_caller
+from ai.single_flight import get_single_flight
+from ai.routing import complete_structured_data, get_model_router
+from objects.response_schemas import get_response_format
+
+# NOTE: openai and azure.identity are imported lazily in _load_ai_sdk() so that
+# catalog-only pages never pay for importing the AI stack.
 
 # Global client instance
 _client = None
+_client_lock = threading.Lock()
 
 # Enable/disable caching (set to False to bypass cache)
 USE_CACHE = True
@@ -24,120 +27,367 @@ USE_CACHE = True
 # Delay for cached responses (in seconds) to simulate AI processing
 CACHE_DELAY_SECONDS = 3
 
+# Endpoint, API version and token scope of the TRAPI deployment
+AI_TOKEN_SCOPE = "api://trapi/.default"
+AI_API_VERSION = "2024-10-21"  # Ensure this is a valid API version see: https://learn.microsoft.com/en-us/azure/ai-services/openai/api-version-deprecation#latest-ga-api-release
+AI_INSTANCE = "gcr/shared"  # See https://aka.ms/trapi/models for the instance name
+AI_ENDPOINT = os.environ.get("KRAITIF_AI_ENDPOINT", f"https://trapi.research.microsoft.com/{AI_INSTANCE}")
+
+# API key for endpoints that take one instead of an Azure AD token, e.g. the
+# fake server in ai/fake_llm_server.py (KRAITIF_AI_ENDPOINT=http://127.0.0.1:8011)
+AI_API_KEY = os.environ.get("KRAITIF_AI_API_KEY")
+
+# Deployments, token limits and timeouts per prompt type are set in ai/routing.py
+
+
+def _load_ai_sdk():
+    """Import the AI SDK modules on first use and return (AzureOpenAI, azure.identity)."""
+    from openai import AzureOpenAI
+    import azure.identity as identity
+
+    return AzureOpenAI, identity
+
 
 def get_ai_client():
     """Get or create the AzureOpenAI client instance."""
     global _client
     if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_ai_client()
+    return _client
+
+
+def _create_ai_client():
+    """Import the AI SDK and build the AzureOpenAI client."""
+    AzureOpenAI, identity = _load_ai_sdk()
+
+    if AI_API_KEY:
+        auth = {"api_key": AI_API_KEY}
+    else:
         # Authenticate by trying az login first, then a managed identity, if one exists on the system)
-        scope = "api://trapi/.default"
-        credential = get_bearer_token_provider(
-            ChainedTokenCredential(
-                AzureCliCredential(),
-                ManagedIdentityCredential(),
+        auth = {"azure_ad_token_provider": identity.get_bearer_token_provider(
+            identity.ChainedTokenCredential(
+                identity.AzureCliCredential(),
+                identity.ManagedIdentityCredential(),
             ),
-            scope,
-        )
-
-        api_version = "2024-10-21"  # Ensure this is a valid API version see: https://learn.microsoft.com/en-us/azure/ai-services/openai/api-version-deprecation#latest-ga-api-release
-        instance = "gcr/shared"  # See https://aka.ms/trapi/models for the instance name
-        endpoint = f"https://trapi.research.microsoft.com/{instance}"
-
-        # Create an AzureOpenAI Client
-        _client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            azure_ad_token_provider=credential,
-            api_version=api_version,
-        )
-    return _client
+            AI_TOKEN_SCOPE,
+        )}
+
+    # Create an AzureOpenAI Client (retries are left to ai/resilience.py)
+    return AzureOpenAI(
+        azure_endpoint=AI_ENDPOINT,
+        api_version=AI_API_VERSION,
+        max_retries=0,
+        **auth,
+    )
+
+
+def warm_up_ai_client():
+    """
+    Import the AI SDK and build the client ahead of the first generation request.
+
+    Returns:
+        bool: True if the client is ready, False if warm-up failed
+    """
+    try:
+        get_ai_client()
+        return True
+    except Exception as e:
+        # Warm-up is best effort; the first generation request will retry
+        print(f"Warning: AI client warm-up failed: {e}")
+        return False
 
 
-def get_ai_response(prompt, prompt_type, chat_history=None, context_data=None, selected_context=None):
+def start_ai_warmup_thread(wait_until_ready=None):
+    """
+    Warm up the AI client on a background daemon thread.
+
+    Args:
+        wait_until_ready (callable): Optional blocking callable run before warm-up,
+                                     e.g. to wait until the server is listening
+
+    Returns:
+        threading.Thread: The started warm-up thread
+    """
+
+    def _warm_up():
+        if wait_until_ready is not None:
+            wait_until_ready()
+        warm_up_ai_client()
+
+    thread = threading.Thread(target=_warm_up, name="ai-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_ai_response(prompt, prompt_type, chat_history=None, context_data=None, selected_context=None, catalog_version=None):
     """
     Get AI response with optional structured data extraction and debugging.
 
+    Concurrent calls with the same prompt and catalog version (and no chat
+    history) wait on one upstream completion and share its result.
+
     Args:
         prompt (str): The user's message
         prompt_type (PromptType): The type of prompt for debugging categorization
         chat_history (list): Optional list of previous messages
         context_data (dict): Optional context data (can be all available topics or specific context)
         selected_context (dict): Optional selected context from user selections
+        catalog_version (str): Optional catalog version the prompt was built from; scopes the cache key
 
     Returns:
-        tuple: (ai_response_text, structured_data, prompt_info)
-               - ai_response_text: Clean text response for display in chat
-               - structured_data: Extracted JSON structure or None
-               - prompt_info: Dict with info about the prompt sent to AI
+        str: The AI response text, or an AIError ("Error: ..." text with the
+             error kind) if the completion failed after retries
     """
+    if chat_history:
+        return _get_ai_response(prompt, prompt_type, chat_history, context_data, selected_context, catalog_version)
 
+    # Identical prompts in flight at the same time share one completion
+    return get_single_flight().do(
+        get_cache()._hash_prompt(prompt, catalog_version),
+        lambda: _get_ai_response(prompt, prompt_type, None, context_data, selected_context, catalog_version),
+        recheck=lambda: _get_cached_response(prompt, prompt_type, None, catalog_version),
+    )
+
+
+def _get_ai_response(prompt, prompt_type, chat_history, context_data, selected_context, catalog_version):
+    """Get AI response from the cache or a completion (the body of get_ai_response() without coalescing)."""
     try:
         # Check cache first (if enabled and no chat history)
-        if USE_CACHE and not chat_history:
-            cache = get_cache()
-            cached_response = cache.get(prompt)
-            if cached_response:
-                # Add delay to simulate AI processing for better UX
-                time.sleep(CACHE_DELAY_SECONDS)
-
-                print(f"[CACHE HIT] Using cached response for {prompt_type.value}")
-                print("===============PROMPT (CACHED)=================")
-                print(prompt)
-                print("===============RESPONSE (CACHED)==============")
-                print(cached_response)
-                return cached_response
+        cached_response = _get_cached_response(prompt, prompt_type, chat_history, catalog_version)
+        if cached_response:
+            # Add delay to simulate AI processing for better UX
+            time.sleep(CACHE_DELAY_SECONDS)
+            return cached_response
 
         client = get_ai_client()
-        deployment_name = "gpt-4o_2024-08-06"
-
-        # Build messages array
-        messages = []
-        if chat_history:
-            messages.extend(chat_history)
-
-        # Add the current user message
-        messages.append(
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        )
-
-        # Do a chat completion and capture the response
-        response = client.chat.completions.create(
-            model=deployment_name,
-            messages=messages,
-        )
+        router = get_model_router()
+        route = router.route(prompt_type)
+
+        # Do a chat completion (retrying transient failures) and capture the response
+        start = time.perf_counter()
+        try:
+            response = get_resilient_caller().call(route.deployment, lambda: client.chat.completions.create(
+                messages=build_messages(prompt, chat_history),
+                **route.request_options(get_response_format(prompt_type)),
+            ))
+        except Exception:
+            router.observe(prompt_type, time.perf_counter() - start, ok=False)
+            raise
+        router.observe(prompt_type, time.perf_counter() - start)
+        get_metrics_registry().record_usage(prompt_type, getattr(response, "usage", None))
 
         # Parse out the message
-        response = response.choices[0].message.content
+        choice = response.choices[0]
+        response = finish_response(choice.message.content, choice.finish_reason, route, prompt_type)
 
-        print("===============PROMPT=================")
-        print(prompt)
-        print("===============RESPONSE=================")
-        print(response)
+        _record_response(prompt, response, prompt_type, chat_history, catalog_version)
+        return response
+
+    except Exception as e:
+        return _record_error(prompt, e, prompt_type)
 
-        # Save to cache (if enabled and no chat history)
-        if USE_CACHE and not chat_history:
-            cache = get_cache()
-            cache.set(prompt, response)
-            print(f"[CACHE SAVE] Saved response for {prompt_type.value}")
 
-        # Save prompt and response to debug files
-        _save_debug_files(prompt, response, prompt_type)
+def stream_ai_response(prompt, prompt_type, chat_history=None, context_data=None, selected_context=None, catalog_version=None):
+    """
+    Stream an AI response as it is generated.
+
+    Takes the same arguments as get_ai_response() and is coalesced with it.
+    Cached responses, and responses shared with an identical prompt already in
+    flight, are yielded as a single piece without the simulated delay.
 
+    Args:
+        prompt (str): The user's message
+        prompt_type (PromptType): The type of prompt for debugging categorization
+        chat_history (list): Optional list of previous messages
+        context_data (dict): Optional context data
+        selected_context (dict): Optional selected context from user selections
+        catalog_version (str): Optional catalog version the prompt was built from; scopes the cache key
+
+    Yields:
+        str: Pieces of the response text as they arrive
+
+    Returns:
+        str: The complete response text, exactly as get_ai_response() would have
+             returned it (an AIError if the completion failed)
+    """
+    if chat_history:
+        return (yield from _stream_ai_response(
+            prompt, prompt_type, chat_history, context_data, selected_context, catalog_version
+        ))
+
+    single_flight = get_single_flight()
+    key = get_cache()._hash_prompt(prompt, catalog_version)
+    flight, leader = single_flight.claim(key)
+    if not leader:
+        # An identical prompt is already being completed; its text arrives in one piece
+        response = flight.wait()
+        if response is None:
+            # Its consumer went away before the end; start over
+            return (yield from stream_ai_response(
+                prompt, prompt_type, chat_history, context_data, selected_context, catalog_version
+            ))
+        yield response
         return response
 
-    except Exception as e:
-        # Return error message instead of raising
-        error_msg = f"Error: {str(e)}"
-        # Still save debug files for errors
+    response = None
+    try:
+        with single_flight.process_lock(key) as waited:
+            if waited:
+                response = _get_cached_response(prompt, prompt_type, None, catalog_version)
+            if response is not None:
+                yield response
+            else:
+                response = yield from _stream_ai_response(
+                    prompt, prompt_type, None, context_data, selected_context, catalog_version
+                )
+    finally:
+        # None if the consumer stopped reading early
+        flight.resolve(response)
+    return response
+
+
+def _stream_ai_response(prompt, prompt_type, chat_history, context_data, selected_context, catalog_version):
+    """Stream an AI response from the cache or a completion (stream_ai_response() without coalescing)."""
+    try:
+        cached_response = _get_cached_response(prompt, prompt_type, chat_history, catalog_version)
+        if cached_response:
+            yield cached_response
+            return cached_response
+
+        client = get_ai_client()
+        router = get_model_router()
+        route = router.route(prompt_type)
+        start = time.perf_counter()
+        parts = []
+        finish_reason = None
+        usage = None
         try:
-            _save_debug_files(prompt, error_msg, prompt_type)
-        except:
-            pass  # Don't let debug file saving errors break the main flow
-        return error_msg
+            # Only opening the stream is retried; text already relayed cannot be taken back
+            stream = get_resilient_caller().call(route.deployment, lambda: client.chat.completions.create(
+                messages=build_messages(prompt, chat_history),
+                stream=True,
+                stream_options={"include_usage": True},
+                **route.request_options(get_response_format(prompt_type)),
+            ))
+            try:
+                for chunk in stream:
+                    # The usage arrives on a final chunk without choices
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    if chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield parts[-1]
+            finally:
+                # Stop the upstream completion if the consumer went away
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+        except Exception:
+            router.observe(prompt_type, time.perf_counter() - start, ok=False)
+            raise
+        router.observe(prompt_type, time.perf_counter() - start)
+        get_metrics_registry().record_usage(prompt_type, usage)
+
+        streamed = "".join(parts)
+        response = finish_response(streamed, finish_reason, route, prompt_type)
+        if len(response) > len(streamed):
+            # Relay the closing tag put back after the stop sequence
+            yield response[len(streamed):]
+        _record_response(prompt, response, prompt_type, chat_history, catalog_version)
+        return response
+
+    except Exception as e:
+        return _record_error(prompt, e, prompt_type)
+
+
+def build_messages(prompt, chat_history=None):
+    """
+    Build the messages array sent with a chat completion.
+
+    Args:
+        prompt (str): The user's message
+        chat_history (list): Optional list of previous messages
+
+    Returns:
+        list: Previous messages followed by the current user message
+    """
+    messages = []
+    if chat_history:
+        messages.extend(chat_history)
+
+    # Add the current user message
+    messages.append(
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+            ],
+        }
+    )
+    return messages
+
+
+def finish_response(text, finish_reason, route, prompt_type):
+    """
+    Turn the text of a finished completion into the response returned to callers.
+
+    Args:
+        text (str): Completion text (None if the completion produced none)
+        finish_reason (str): Why the completion stopped ("stop", "length", ...)
+        route (ModelRoute): Route the completion ran on
+        prompt_type (PromptType): The type of prompt
+
+    Returns:
+        str: The text with the </STRUCTURED_DATA> tag cut off by the stop sequence put back
+    """
+    if finish_reason == "length":
+        print(f"Warning: {prompt_type.value} response was cut off at max_tokens ({route.max_tokens})")
+    return complete_structured_data(text or "", route)
+
+
+def _get_cached_response(prompt, prompt_type, chat_history, catalog_version):
+    """Return the cached response for a prompt, or None (cache disabled, chat history or miss)."""
+    if not USE_CACHE or chat_history:
+        return None
+    cached_response = get_cache().get(prompt, scope=catalog_version)
+    get_metrics_registry().record_cache_lookup(prompt_type, bool(cached_response))
+    if cached_response:
+        print(f"[CACHE HIT] Using cached response for {prompt_type.value}")
+        print("===============PROMPT (CACHED)=================")
+        print(prompt)
+        print("===============RESPONSE (CACHED)==============")
+        print(cached_response)
+    return cached_response
+
+
+def _record_response(prompt, response, prompt_type, chat_history, catalog_version):
+    """Log a completion, save it to the cache (if enabled and no chat history) and to the debug files."""
+    print("===============PROMPT=================")
+    print(prompt)
+    print("===============RESPONSE=================")
+    print(response)
+
+    if USE_CACHE and not chat_history:
+        get_cache().set(prompt, response, scope=catalog_version)
+        print(f"[CACHE SAVE] Saved response for {prompt_type.value}")
+
+    # Save prompt and response to debug files
+    _save_debug_files(prompt, response, prompt_type)
+
+
+def _record_error(prompt, error, prompt_type):
+    """Turn a failed completion into the AIError returned instead of raising."""
+    error_msg = AIError.from_exception(error)
+    # Still save debug files for errors
+    try:
+        _save_debug_files(prompt, error_msg, prompt_type)
+    except:
+        pass  # Don't let debug file saving errors break the main flow
+    return error_msg
 
 
 def _save_debug_files(prompt, response, prompt_type):
@@ -0,0 +1,323 @@
+"""
+Async AI Client
+
+Asyncio counterpart of ai_client.get_ai_response() and stream_ai_response()
+built on AsyncAzureOpenAI.
+
+All async completions run on one event loop per process, served by a
+dedicated daemon thread (AIEventLoop). Generation jobs (ai/generation_jobs.py)
+are submitted to the loop and the request that started them returns at once,
+so the upstream connections, token refreshes and the wait for a 30-90 second
+completion are multiplexed on that loop instead of each holding a worker
+thread. The number of completions in flight at once is bounded by
+KRAITIF_AI_MAX_IN_FLIGHT (default 256).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Optional
+from ai import ai_client
+from ai.metrics import get_metrics_registry
+from ai.resilience import get_resilient_caller
+from ai.routing import get_model_router
+from objects.response_schemas import get_response_format
+
+# Default maximum number of completions in flight on the event loop
+DEFAULT_MAX_IN_FLIGHT = 256
+
+# Global async client instance (only usable on the AI event loop)
+_async_client = None
+_async_client_lock = threading.Lock()
+
+
+def _load_async_ai_sdk():
+    """Import the async AI SDK modules on first use and return (AsyncAzureOpenAI, azure.identity.aio)."""
+    from openai import AsyncAzureOpenAI
+    import azure.identity.aio as identity
+
+    return AsyncAzureOpenAI, identity
+
+
+def get_async_ai_client():
+    """
+    Get or create the AsyncAzureOpenAI client instance.
+
+    The client's connection pool is bound to the event loop it is first used
+    on, so it must only be used from coroutines running on the AI event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        with _async_client_lock:
+            if _async_client is None:
+                _async_client = _create_async_ai_client()
+    return _async_client
+
+
+def _create_async_ai_client():
+    """Import the async AI SDK and build the AsyncAzureOpenAI client."""
+    AsyncAzureOpenAI, identity = _load_async_ai_sdk()
+
+    if ai_client.AI_API_KEY:
+        auth = {"api_key": ai_client.AI_API_KEY}
+    else:
+        # Authenticate by trying az login first, then a managed identity (tokens are refreshed on the loop)
+        auth = {"azure_ad_token_provider": identity.get_bearer_token_provider(
+            identity.ChainedTokenCredential(
+                identity.AzureCliCredential(),
+                identity.ManagedIdentityCredential(),
+            ),
+            ai_client.AI_TOKEN_SCOPE,
+        )}
+
+    return AsyncAzureOpenAI(
+        azure_endpoint=ai_client.AI_ENDPOINT,
+        api_version=ai_client.AI_API_VERSION,
+        max_retries=0,
+        **auth,
+    )
+
+
+async def get_ai_response_async(prompt, prompt_type, chat_history=None, context_data=None, selected_context=None,
+                                catalog_version=None):
+    """
+    Get AI response without blocking the event loop.
+
+    Takes the same arguments and returns the same response text (or AIError) as
+    ai_client.get_ai_response(). Cache lookups and debug files are disk I/O and
+    run on worker threads; retry backoff sleeps on the loop.
+
+    Args:
+        prompt (str): The user's message
+        prompt_type (PromptType): The type of prompt for debugging categorization
+        chat_history (list): Optional list of previous messages
+        context_data (dict): Optional context data
+        selected_context (dict): Optional selected context from user selections
+        catalog_version (str): Optional catalog version the prompt was built from; scopes the cache key
+
+    Returns:
+        str: The AI response text
+    """
+    try:
+        cached_response = await asyncio.to_thread(
+            ai_client._get_cached_response, prompt, prompt_type, chat_history, catalog_version
+        )
+        if cached_response:
+            # Add delay to simulate AI processing for better UX
+            await asyncio.sleep(ai_client.CACHE_DELAY_SECONDS)
+            return cached_response
+
+        # Building the client imports the SDK, so do it off the loop the first time
+        client = _async_client or await asyncio.to_thread(get_async_ai_client)
+
+        router = get_model_router()
+        route = router.route(prompt_type)
+        start = time.perf_counter()
+        try:
+            response = await get_resilient_caller().call_async(
+                route.deployment,
+                lambda: client.chat.completions.create(
+                    messages=ai_client.build_messages(prompt, chat_history),
+                    **route.request_options(get_response_format(prompt_type)),
+                ),
+                asyncio.sleep,
+            )
+        except Exception:
+            router.observe(prompt_type, time.perf_counter() - start, ok=False)
+            raise
+        router.observe(prompt_type, time.perf_counter() - start)
+        get_metrics_registry().record_usage(prompt_type, getattr(response, "usage", None))
+        choice = response.choices[0]
+        response = ai_client.finish_response(choice.message.content, choice.finish_reason, route, prompt_type)
+
+        await asyncio.to_thread(
+            ai_client._record_response, prompt, response, prompt_type, chat_history, catalog_version
+        )
+        return response
+
+    except Exception as e:
+        return await asyncio.to_thread(ai_client._record_error, prompt, e, prompt_type)
+
+
+async def stream_ai_response_async(prompt, prompt_type, on_text, chat_history=None, context_data=None,
+                                   selected_context=None, catalog_version=None):
+    """
+    Stream an AI response without blocking the event loop.
+
+    Async counterpart of ai_client.stream_ai_response(): pieces of the response
+    are passed to on_text as they arrive and the complete response text (or
+    AIError) is returned.
+
+    Args:
+        prompt (str): The user's message
+        prompt_type (PromptType): The type of prompt for debugging categorization
+        on_text (callable): Called with each piece of response text
+        chat_history (list): Optional list of previous messages
+        context_data (dict): Optional context data
+        selected_context (dict): Optional selected context from user selections
+        catalog_version (str): Optional catalog version the prompt was built from; scopes the cache key
+
+    Returns:
+        str: The complete response text
+    """
+    try:
+        cached_response = await asyncio.to_thread(
+            ai_client._get_cached_response, prompt, prompt_type, chat_history, catalog_version
+        )
+        if cached_response:
+            on_text(cached_response)
+            return cached_response
+
+        client = _async_client or await asyncio.to_thread(get_async_ai_client)
+        router = get_model_router()
+        route = router.route(prompt_type)
+        start = time.perf_counter()
+        parts = []
+        finish_reason = None
+        usage = None
+        try:
+            # Only opening the stream is retried; text already relayed cannot be taken back
+            stream = await get_resilient_caller().call_async(
+                route.deployment,
+                lambda: client.chat.completions.create(
+                    messages=ai_client.build_messages(prompt, chat_history),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **route.request_options(get_response_format(prompt_type)),
+                ),
+                asyncio.sleep,
+            )
+            try:
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    if chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        on_text(parts[-1])
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    await close()
+        except Exception:
+            router.observe(prompt_type, time.perf_counter() - start, ok=False)
+            raise
+        router.observe(prompt_type, time.perf_counter() - start)
+        get_metrics_registry().record_usage(prompt_type, usage)
+
+        streamed = "".join(parts)
+        response = ai_client.finish_response(streamed, finish_reason, route, prompt_type)
+        if len(response) > len(streamed):
+            on_text(response[len(streamed):])
+        await asyncio.to_thread(
+            ai_client._record_response, prompt, response, prompt_type, chat_history, catalog_version
+        )
+        return response
+
+    except Exception as e:
+        return await asyncio.to_thread(ai_client._record_error, prompt, e, prompt_type)
+
+
+class AIEventLoop:
+    """Dedicated event-loop thread that runs async completions for the whole process."""
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        """
+        Initialize the event loop worker (the thread starts on first use).
+
+        Args:
+            max_in_flight: Maximum number of coroutines running at once; later ones wait their turn
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def start(self) -> None:
+        """Start the event loop thread if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                # Cancel the coroutines still running so their futures resolve
+                tasks = asyncio.all_tasks(loop)
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=_run, name="ai-event-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the event loop thread (coroutines still running are cancelled)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+
+    def submit(self, coroutine: Awaitable[Any]) -> Future:
+        """
+        Schedule a coroutine on the event loop from any thread.
+
+        Args:
+            coroutine: Coroutine to run
+
+        Returns:
+            concurrent.futures.Future resolving to the coroutine's result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._run_limited(coroutine), self._loop)
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the event loop and wait for its result."""
+        return self.submit(coroutine).result(timeout)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of coroutines currently running on the loop (not counting those waiting their turn)."""
+        return self._in_flight
+
+    async def _run_limited(self, coroutine: Awaitable[Any]) -> Any:
+        """Run a coroutine once fewer than max_in_flight others are running."""
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                return await coroutine
+            finally:
+                self._in_flight -= 1
+
+
+# Global event loop worker instance
+_ai_event_loop: Optional[AIEventLoop] = None
+_ai_event_loop_lock = threading.Lock()
+
+
+def get_ai_event_loop() -> AIEventLoop:
+    """Get or create the process-wide AI event loop worker."""
+    global _ai_event_loop
+    if _ai_event_loop is None:
+        with _ai_event_loop_lock:
+            if _ai_event_loop is None:
+                _ai_event_loop = AIEventLoop(
+                    max_in_flight=int(os.environ.get("KRAITIF_AI_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                )
+    return _ai_event_loop
+
@@ -0,0 +1,669 @@
+"""
+Fake LLM Server
+
+A local stand-in for the chat completions API that get_ai_client() talks to,
+for load and latency testing the generation pipeline without the TRAPI
+endpoint. It answers every prompt type with well-formed structured data
+(plot lines, characters with valid enum values, a chapter plan and chapters
+with prose, a summary and a continuity state) built from the names and
+archetypes found in the prompt.
+
+What the server does is set by a FakeLLMConfig:
+
+- latency: time to the first token drawn from a fixed, uniform or lognormal
+  distribution, then tokens_per_second for the rest of the completion
+- streaming: "stream": true requests get server-sent event chunks paced at
+  that rate, with a final usage chunk if stream_options asks for it
+- failures: a share of requests (or every request over max_concurrent) get
+  429 with Retry-After, another share 500
+- malformed output: a share of responses are truncated (finish_reason
+  "length"), invalid JSON, wrapped in commentary or use unknown enum values
+
+Requests with a json_schema response_format get bare JSON, as the real API
+does; others get the JSON between <STRUCTURED_DATA> tags, cut at the stop
+sequence. Point the app at the server with:
+
+    python -m ai.fake_llm_server --port 8011
+    KRAITIF_AI_ENDPOINT=http://127.0.0.1:8011 KRAITIF_AI_API_KEY=fake python launch.py
+
+GET /stats returns the server's request counts as JSON.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from objects.archetype import ArchetypeEnum
+from objects.emotional_function import EmotionalFunctionEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.prompt_budget import CHARS_PER_TOKEN, estimate_tokens
+from objects.response_schemas import RESPONSE_SCHEMAS
+from prompt_types import PromptType
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Ways a malformed response is broken
+MALFORMED_MODES = ("truncated", "invalid_json", "commentary", "unknown_enums")
+
+# Characters per streamed chunk (about four tokens)
+STREAM_CHUNK_CHARS = 4 * CHARS_PER_TOKEN
+
+NAMES = ("Aria Vale", "Tomas Reed", "Mira Okafor", "Elias Thorn", "Sela Marr", "Corin Ash", "Nadia Frost",
+         "Bram Holloway")
+PLACES = ("the old harbor", "the northern pass", "the sunken library", "the market square", "the lighthouse",
+          "the forest road", "the abandoned mill", "the council hall")
+OBJECTS = ("the brass compass", "a sealed letter", "the silver key", "the cracked lantern", "the family ring",
+           "an unmarked map")
+TITLES = ("Departure", "The Crossing", "Old Debts", "A Door Left Open", "Smoke on the Water", "The Long Night",
+          "What the Map Hid", "Broken Oaths", "The Turning Tide", "Embers", "The Last Gate", "Homecoming")
+SENTENCES = (
+    "{name} paused at the edge of {place}, listening for anything that did not belong.",
+    "The air in {place} smelled of rain and old smoke.",
+    "{name} turned {object} over and over, feeling its weight.",
+    "\"We can't stay here,\" {name} said quietly.",
+    "{other} did not answer at once, and the silence said more than words.",
+    "Somewhere beyond {place}, a bell rang twice and fell still.",
+    "{name} remembered the promise made long ago and felt it tighten like a knot.",
+    "Shadows lengthened across the floor as {other} studied the map.",
+    "\"Trust me,\" {other} said, though the words sounded thin.",
+    "Every step toward {place} felt heavier than the last.",
+    "{name} caught the glint of {object} and knew it had been moved.",
+    "For a moment the world seemed to hold its breath.",
+)
+# Narrative functions of a chapter plan, spread from the first chapter to the last
+ARC_FUNCTIONS = ("Setting Introduction", "Inciting Incident", "Rising Tension", "Subplot Activation",
+                 "Midpoint Turn", "Setback", "Truth Revelation", "Confrontation", "Climax", "Denouement")
+THREAD_STATUSES = ("pending", "escalated", "resolved")
+
+_BULLET = re.compile(r"^  • (.+)$")
+_PROTAGONIST = re.compile(r"^Protagonist: (.+)$", re.MULTILINE)
+_PROTAGONIST_ARCHETYPE = re.compile(r"^Protagonist Archetype: (.+)$", re.MULTILINE)
+_TARGET_CHAPTER = re.compile(r"TARGET CHAPTER TO GENERATE:\s*Chapter (\d+): (.*)")
+_SCHEMA_PROMPT_TYPES = {name: prompt_type for prompt_type, (name, _) in RESPONSE_SCHEMAS.items()}
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake server."""
+
+    # Time to the first token: "fixed", "uniform" (within +/- spread of the
+    # value) or "lognormal" (median latency_seconds, sigma latency_spread)
+    latency: str = "lognormal"
+    latency_seconds: float = 0.8
+    latency_spread: float = 0.5
+    # Generation speed after the first token (0 for no delay)
+    tokens_per_second: float = 80.0
+    # Share of requests answered with 429 and the Retry-After they get
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    # Requests in progress above which further requests get 429 (0 for no limit)
+    max_concurrent: int = 0
+    # Share of requests answered with 500
+    error_rate: float = 0.0
+    # Share of responses broken in one of MALFORMED_MODES
+    malformed_rate: float = 0.0
+    # Size of the generated content
+    plot_lines: int = 5
+    chapters: int = 12
+    chapter_words: int = 1000
+    # Seed for repeatable runs (None for a random run)
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        """Validate the latency distribution."""
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency} (use one of {LATENCY_DISTRIBUTIONS})")
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """
+        Draw a time to the first token.
+
+        Args:
+            rng: Random number generator to draw from
+
+        Returns:
+            Seconds to wait before the first token
+        """
+        if self.latency == "uniform":
+            return max(0.0, rng.uniform(self.latency_seconds * (1 - self.latency_spread),
+                                        self.latency_seconds * (1 + self.latency_spread)))
+        if self.latency == "lognormal" and self.latency_seconds > 0:
+            return rng.lognormvariate(0.0, self.latency_spread) * self.latency_seconds
+        return self.latency_seconds
+
+    def generation_seconds(self, completion_tokens: int) -> float:
+        """Get the time to generate a completion after its first token."""
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return completion_tokens / self.tokens_per_second
+
+
+def detect_prompt_type(prompt: str, response_format: Optional[Dict[str, Any]] = None) -> PromptType:
+    """
+    Work out which prompt type a request is for.
+
+    Args:
+        prompt: Text of the user message
+        response_format: The request's response_format, if any
+
+    Returns:
+        The response_format schema's prompt type, otherwise the one whose output format the prompt asks for
+    """
+    schema_name = ((response_format or {}).get("json_schema") or {}).get("name")
+    if schema_name in _SCHEMA_PROMPT_TYPES:
+        return _SCHEMA_PROMPT_TYPES[schema_name]
+    if '"chapter_text"' in prompt:
+        return PromptType.CHAPTER
+    if '"chapters"' in prompt:
+        return PromptType.CHAPTER_OUTLINE
+    if '"expanded_plot_line"' in prompt:
+        return PromptType.CHARACTERS
+    return PromptType.PLOT_LINES
+
+
+class StoryContentGenerator:
+    """Builds plausible structured data for a prompt."""
+
+    def __init__(self, prompt: str, config: FakeLLMConfig, rng: random.Random):
+        """
+        Initialize the generator.
+
+        Args:
+            prompt: Text of the user message, read for character names and chapter numbers
+            config: Server configuration (content sizes)
+            rng: Random number generator for the content
+        """
+        self.prompt = prompt
+        self.config = config
+        self.rng = rng
+        self.names = self._character_names() or list(rng.sample(NAMES, 4))
+
+    def generate(self, prompt_type: PromptType, unknown_enums: bool = False) -> Dict[str, Any]:
+        """
+        Build the structured data of a response.
+
+        Args:
+            prompt_type: Prompt type to answer
+            unknown_enums: Use enum values the enums do not contain
+
+        Returns:
+            Data in the shape of the prompt type's response schema
+        """
+        if prompt_type == PromptType.CHARACTERS:
+            data = self.characters()
+        elif prompt_type == PromptType.CHAPTER_OUTLINE:
+            data = self.chapter_plan()
+        elif prompt_type == PromptType.CHAPTER:
+            data = self.chapter()
+        else:
+            data = self.plot_lines()
+        if unknown_enums:
+            for item in data.get("characters", []) + data.get("chapters", []):
+                for key in ("archetype", "functional_role", "emotional_function", "narrative_function"):
+                    if item.get(key):
+                        item[key] = f"Unlisted {item[key]}"
+        return data
+
+    def plot_lines(self) -> Dict[str, Any]:
+        """Build a plot lines response."""
+        plot_lines = []
+        for _ in range(self.config.plot_lines):
+            place, thing = self.rng.choice(PLACES), self.rng.choice(OBJECTS)
+            plot_lines.append({
+                "name": f"{self.rng.choice(TITLES)} at {place.replace('the ', '').title()}",
+                "plotline": f"{self.prose(60)}\n\nWhen {thing} resurfaces at {place}, old loyalties are tested. "
+                            f"{self.prose(50)}",
+            })
+        return {"plotlines": plot_lines}
+
+    def characters(self) -> Dict[str, Any]:
+        """Build a characters response, using the archetypes the prompt names."""
+        archetypes = self._archetypes()
+        roles = [FunctionalRoleEnum.PROTAGONIST] + [role for role in FunctionalRoleEnum
+                                                     if role != FunctionalRoleEnum.PROTAGONIST]
+        count = min(max(len(archetypes), 3), len(NAMES))
+        names = (self.names + [name for name in NAMES if name not in self.names])[:count]
+        characters = []
+        for index, name in enumerate(names):
+            archetype = archetypes[index] if index < len(archetypes) else self.rng.choice(list(ArchetypeEnum)).value
+            characters.append({
+                "name": name,
+                "archetype": archetype,
+                "functional_role": (roles[0] if index == 0 else self.rng.choice(roles[1:])).value,
+                "emotional_function": self.rng.choice(list(EmotionalFunctionEnum)).value,
+                "backstory": f"{name} grew up near {self.rng.choice(PLACES)}. {self.prose(35)}",
+                "character_arc": f"{name} learns to let go of {self.rng.choice(OBJECTS)}. {self.prose(25)}",
+            })
+        return {"expanded_plot_line": "\n\n".join(self.prose(120) for _ in range(3)), "characters": characters}
+
+    def chapter_plan(self) -> Dict[str, Any]:
+        """Build a chapter plan whose narrative functions follow a story arc."""
+        count = self.config.chapters
+        chapters = []
+        for number in range(1, count + 1):
+            impacted = self.rng.sample(self.names, min(2, len(self.names)))
+            chapters.append({
+                "chapter_number": number,
+                "title": TITLES[(number - 1) % len(TITLES)],
+                "overview": self.prose(45),
+                "character_impact": [{"character": name, "effect": self.prose(15)} for name in impacted],
+                "point_of_view": impacted[0],
+                "narrative_function": ARC_FUNCTIONS[(number - 1) * len(ARC_FUNCTIONS) // count],
+                "foreshadow_or_echo": f"The first mention of {self.rng.choice(OBJECTS)}.",
+                "scene_highlights": self.prose(20),
+            })
+        return {"chapters": chapters}
+
+    def chapter(self) -> Dict[str, Any]:
+        """Build a generated chapter with prose, a summary and the continuity state after it."""
+        match = _TARGET_CHAPTER.search(self.prompt)
+        number = int(match.group(1)) if match else 1
+        visited = self.rng.sample(PLACES, 3)
+        objects = self.rng.sample(OBJECTS, 2)
+        paragraphs = []
+        words = 0
+        while words < self.config.chapter_words:
+            paragraph = self.prose(self.rng.randint(60, 120))
+            paragraphs.append(paragraph)
+            words += len(paragraph.split())
+        return {
+            "chapter_text": "\n\n".join(paragraphs),
+            "chapter_summary": f"In chapter {number}, {self.names[0]} reaches {visited[-1]}. {self.prose(40)}",
+            "continuity_state": {
+                "characters": [
+                    {
+                        "name": name,
+                        "current_location": self.rng.choice(visited),
+                        "status": self.rng.choice(("wary", "injured", "hopeful", "grieving", "determined")),
+                        "inventory": [objects[0]] if index == 0 else [],
+                    }
+                    for index, name in enumerate(self.names)
+                ],
+                "objects": [
+                    {"name": objects[0], "holder": self.names[0], "location": visited[-1]},
+                    {"name": objects[1], "holder": None, "location": visited[0]},
+                ],
+                "locations_visited": visited,
+                "open_plot_threads": [
+                    {
+                        "id": f"Thread{index + 1}",
+                        "description": f"Who moved {self.rng.choice(OBJECTS)} from {self.rng.choice(PLACES)}?",
+                        "status": self.rng.choice(THREAD_STATUSES),
+                    }
+                    for index in range(self.rng.randint(1, 3))
+                ],
+            },
+        }
+
+    def prose(self, words: int) -> str:
+        """Get sentences of roughly the given number of words about the story's characters."""
+        sentences = []
+        count = 0
+        while count < words:
+            sentence = self.rng.choice(SENTENCES).format(
+                name=self.names[0], other=self.rng.choice(self.names[1:] or self.names),
+                place=self.rng.choice(PLACES), object=self.rng.choice(OBJECTS),
+            )
+            sentences.append(sentence)
+            count += len(sentence.split())
+        return " ".join(sentences)
+
+    def _character_names(self) -> List[str]:
+        """Get the protagonist and secondary character names from the story configuration."""
+        names = _PROTAGONIST.findall(self.prompt)[:1]
+        names += _bullets_after(self.prompt, "Secondary Characters:")
+        return [name.strip() for name in names]
+
+    def _archetypes(self) -> List[str]:
+        """Get the protagonist and secondary archetypes named in the prompt (known ones only)."""
+        known = {archetype.value for archetype in ArchetypeEnum}
+        archetypes = _PROTAGONIST_ARCHETYPE.findall(self.prompt)[:1]
+        for heading in ("Secondary Character Archetypes:", "Suggested Secondary Character Archetypes"):
+            archetypes += _bullets_after(self.prompt, heading)
+        return [archetype.strip() for archetype in archetypes if archetype.strip() in known]
+
+
+def _bullets_after(text: str, heading: str) -> List[str]:
+    """Get the "  • " bullets in the block that starts with a heading line."""
+    bullets = []
+    in_block = False
+    for line in text.splitlines():
+        if line.startswith(heading):
+            in_block = True
+        elif in_block:
+            if not line.strip():
+                break
+            match = _BULLET.match(line)
+            if match:
+                bullets.append(match.group(1))
+    return bullets
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    """Get the text of a chat message whose content is a string or a list of content parts."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def render_response(data: Dict[str, Any], structured: bool, stop: Optional[List[str]] = None) -> str:
+    """
+    Render structured data the way the API returns it.
+
+    Args:
+        data: Structured data of the response
+        structured: True if the request asked for a json_schema response_format (bare JSON)
+        stop: Stop sequences of the request; the text ends before the first one
+
+    Returns:
+        Completion text
+    """
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if structured:
+        return text
+    text = f"<STRUCTURED_DATA>\n{text}\n</STRUCTURED_DATA>"
+    for sequence in stop or []:
+        if sequence and sequence in text:
+            text = text[:text.index(sequence)]
+    return text
+
+
+def break_response(text: str, mode: str) -> Tuple[str, str]:
+    """
+    Break a completion text in one of MALFORMED_MODES.
+
+    Args:
+        text: Well-formed completion text
+        mode: How to break it ("unknown_enums" is applied to the data, so the text is kept)
+
+    Returns:
+        tuple: (completion text, finish_reason)
+    """
+    if mode == "truncated":
+        return text[:len(text) * 3 // 5], "length"
+    if mode == "invalid_json":
+        return text.replace('",\n', '"\n', 1), "stop"
+    if mode == "commentary":
+        return f"Sure! Here is what you asked for:\n\n```json\n{text.strip()}\n```\n\nLet me know if you want changes.", "stop"
+    return text, "stop"
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """HTTP server answering chat completions as configured."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: Optional[FakeLLMConfig] = None):
+        """
+        Initialize the server.
+
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            config: Server behaviour (defaults to FakeLLMConfig())
+        """
+        super().__init__(address, _FakeLLMRequestHandler)
+        self.config = config or FakeLLMConfig()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._active = 0
+        self._next_id = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as KRAITIF_AI_ENDPOINT."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self) -> Tuple[int, Optional[int], Optional[str], random.Random]:
+        """
+        Admit a request and decide its fate.
+
+        Returns:
+            tuple: (request number, error status or None, malformed mode or None, random number generator)
+        """
+        with self._lock:
+            self._next_id += 1
+            rng = random.Random(self._rng.random())
+            if self.config.max_concurrent and self._active >= self.config.max_concurrent:
+                return self._next_id, 429, None, rng
+            if rng.random() < self.config.rate_limit_rate:
+                return self._next_id, 429, None, rng
+            if rng.random() < self.config.error_rate:
+                return self._next_id, 500, None, rng
+            self._active += 1
+            malformed = rng.choice(MALFORMED_MODES) if rng.random() < self.config.malformed_rate else None
+            return self._next_id, None, malformed, rng
+
+    def release(self) -> None:
+        """Mark an admitted request as finished."""
+        with self._lock:
+            self._active -= 1
+
+    def count(self, prompt_type: str, outcome: str) -> None:
+        """Count a request outcome for a prompt type."""
+        with self._lock:
+            counts = self._stats.setdefault(prompt_type, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the request counts per prompt type and outcome."""
+        with self._lock:
+            return {
+                "requests": self._next_id,
+                "active": self._active,
+                "prompt_types": {prompt_type: dict(counts) for prompt_type, counts in self._stats.items()},
+            }
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class _FakeLLMRequestHandler(BaseHTTPRequestHandler):
+    """Handles one HTTP request for a FakeLLMServer."""
+
+    protocol_version = "HTTP/1.1"
+    server: FakeLLMServer
+
+    def log_message(self, format, *args):
+        """Keep request logs out of benchmark output."""
+
+    def do_GET(self):
+        """Serve /health and /stats."""
+        path = self.path.split("?", 1)[0]
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/stats":
+            self._send_json(200, self.server.get_stats())
+        else:
+            self._send_error(404, "not_found", f"No route for {path}")
+
+    def do_POST(self):
+        """Answer /chat/completions under any prefix (Azure deployments or /v1)."""
+        path = self.path.split("?", 1)[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if not path.endswith("/chat/completions"):
+            self._send_error(404, "not_found", f"No route for {path}")
+            return
+        try:
+            request = json.loads(body or b"{}")
+            prompt = "\n".join(_message_text(message) for message in request.get("messages", []))
+        except (ValueError, AttributeError) as e:
+            self._send_error(400, "invalid_request", f"Invalid request body: {e}")
+            return
+
+        response_format = request.get("response_format")
+        prompt_type = detect_prompt_type(prompt, response_format)
+        request_id, status, malformed, rng = self.server.admit()
+        if status == 429:
+            self.server.count(prompt_type.value, "rate_limited")
+            retry_after = self.server.config.retry_after_seconds
+            self._send_error(429, "429", "Rate limit is exceeded. Try again later.", {
+                "Retry-After": str(max(1, round(retry_after))),
+                "retry-after-ms": str(int(retry_after * 1000)),
+            })
+            return
+        if status == 500:
+            self.server.count(prompt_type.value, "server_error")
+            self._send_error(500, "server_error", "The server had an error while processing your request.")
+            return
+
+        try:
+            self._complete(request, prompt, prompt_type, request_id, malformed, rng)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. its timeout); nothing left to send
+            self.server.count(prompt_type.value, "disconnected")
+        finally:
+            self.server.release()
+
+    def _complete(self, request, prompt, prompt_type, request_id, malformed, rng):
+        """Generate and send a completion."""
+        config = self.server.config
+        structured = (request.get("response_format") or {}).get("type") == "json_schema"
+        stop = request.get("stop")
+        if isinstance(stop, str):
+            stop = [stop]
+
+        content_rng = random.Random(f"{config.seed}:{prompt}") if config.seed is not None else rng
+        data = StoryContentGenerator(prompt, config, content_rng).generate(prompt_type, malformed == "unknown_enums")
+        text = render_response(data, structured, stop)
+        text, finish_reason = break_response(text, malformed) if malformed else (text, "stop")
+
+        # A completion longer than max_tokens stops there, as the real API does
+        max_tokens = request.get("max_completion_tokens") or request.get("max_tokens")
+        if max_tokens and estimate_tokens(text) > max_tokens:
+            text, finish_reason = text[:max_tokens * CHARS_PER_TOKEN], "length"
+
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.server.count(prompt_type.value, malformed or "ok")
+
+        completion = {
+            "id": f"chatcmpl-fake-{request_id}",
+            "created": int(time.time()),
+            "model": request.get("model") or "fake",
+        }
+        time.sleep(config.sample_latency(rng))
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._stream(completion, text, finish_reason, usage if include_usage else None)
+            return
+
+        time.sleep(config.generation_seconds(usage["completion_tokens"]))
+        self._send_json(200, {
+            **completion,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion, text, finish_reason, usage):
+        """Send a completion as server-sent event chunks paced at the configured speed."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            event = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):X}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(choices, **extra):
+            return json.dumps({**completion, "object": "chat.completion.chunk", "choices": choices, **extra})
+
+        delay = self.server.config.generation_seconds(1) * STREAM_CHUNK_CHARS / CHARS_PER_TOKEN
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            delta = {"content": text[start:start + STREAM_CHUNK_CHARS]}
+            if start == 0:
+                delta["role"] = "assistant"
+            send_event(chunk([{"index": 0, "delta": delta, "finish_reason": None}]))
+            if delay:
+                time.sleep(delay)
+        send_event(chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}]))
+        if usage is not None:
+            send_event(chunk([], usage=usage))
+        send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        """Send a JSON response."""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, code, message, headers=None):
+        """Send an error in the API's error format."""
+        self._send_json(status, {"error": {"code": code, "message": message}}, headers)
+
+
+def start_fake_llm_server(config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1",
+                          port: int = 0) -> FakeLLMServer:
+    """
+    Start a fake server on a background daemon thread.
+
+    Args:
+        config: Server behaviour (defaults to FakeLLMConfig())
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free port, see server.url)
+
+    Returns:
+        The running server; call stop() when done
+    """
+    server = FakeLLMServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    """Run the fake server from the command line."""
+    defaults = FakeLLMConfig()
+    parser = argparse.ArgumentParser(description="Fake chat completions server for offline load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    for field in fields(FakeLLMConfig):
+        option = "--" + field.name.replace("_", "-")
+        if field.name == "latency":
+            parser.add_argument(option, choices=LATENCY_DISTRIBUTIONS, default=defaults.latency)
+        elif field.name == "seed":
+            parser.add_argument(option, type=int, default=None)
+        else:
+            parser.add_argument(option, type=type(getattr(defaults, field.name)), default=getattr(defaults, field.name))
+    args = parser.parse_args(argv)
+
+    config = FakeLLMConfig(**{field.name: getattr(args, field.name) for field in fields(FakeLLMConfig)})
+    server = FakeLLMServer((args.host, args.port), config)
+    print(f"Fake LLM server listening on {server.url}")
+    print(f"Point the app at it with KRAITIF_AI_ENDPOINT={server.url} KRAITIF_AI_API_KEY=fake")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Generation Jobs
+
+Completions that run in the background while the browser polls for them.
+
+A generation route started with "Prefer: respond-async" submits its prompt as
+a GenerationJob and answers at once with 202 and the job's poll URL. The
+completion is streamed by stream_ai_response_async() on the AI event loop
+(ai/async_client.py), so no request thread waits for it. The job keeps the
+pieces of one response field (the chapter prose, or the chapter titles of a
+plan) as they arrive, and the complete response once the stream ends; the
+poll that first sees it finished parses and stores the result for the
+story, in that poll's request.
+
+Jobs live in the memory of the process that started them: polls must reach
+the same process (one process per session, or a threaded single process).
+Finished jobs are forgotten KRAITIF_GENERATION_JOB_TTL seconds (default 600)
+after they end, and unfinished ones after KRAITIF_GENERATION_JOB_MAX_AGE
+seconds (default 1800).
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+from ai.async_client import get_ai_event_loop, stream_ai_response_async
+from ai.resilience import AIError
+from ai.response_stream import StreamingFieldExtractor
+
+# Seconds a finished job is kept for its polls
+DEFAULT_JOB_TTL_SECONDS = 600
+
+# Seconds after which a job is forgotten even if its completion never ended
+DEFAULT_JOB_MAX_AGE_SECONDS = 1800
+
+
+class GenerationJob:
+    """One background completion and the progress seen so far."""
+
+    def __init__(self, prompt_type, owner: str, field: Optional[str] = None,
+                 context: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the job.
+
+        Args:
+            prompt_type: PromptType of the prompt
+            owner: ID of the story the job was started for; only its session may poll the job
+            field: Name of the response field relayed as it is written, or None to relay nothing
+            context: Values the route needs to finish the job (chapter number, story version, ...)
+        """
+        self.job_id = uuid.uuid4().hex
+        self.prompt_type = prompt_type
+        self.owner = owner
+        self.context = context or {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Complete response text (or AIError) once the completion ended
+        self.response: Optional[str] = None
+        # Payload built from the response by the first poll after the job ended
+        self.result: Optional[Dict[str, Any]] = None
+        # Held while the result is built, so it is built once
+        self.finish_lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._extractor = StreamingFieldExtractor(field) if field else None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        """True once the completion ended and the response is set."""
+        return self.finished_at is not None
+
+    def add_text(self, text: str) -> None:
+        """Record a streamed piece of the response (called on the AI event loop)."""
+        if self._extractor is None:
+            return
+        with self._lock:
+            for index, piece in self._extractor.feed(text):
+                self._events.append({"index": index, "text": piece})
+
+    def get_events(self, after: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the relayed pieces of the response field.
+
+        Args:
+            after: Number of pieces the poller has already seen
+
+        Returns:
+            List of {"index", "text"} pieces after the first `after` ones
+        """
+        with self._lock:
+            return self._events[max(0, after):]
+
+    def set_response(self, response: str) -> None:
+        """Store the complete response text and mark the job as ended."""
+        self.response = response
+        self.finished_at = time.time()
+
+
+class GenerationJobs:
+    """Registry of the generation jobs started in this process."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS,
+                 max_age_seconds: float = DEFAULT_JOB_MAX_AGE_SECONDS, event_loop=None):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl_seconds: Seconds a finished job is kept for its polls
+            max_age_seconds: Seconds after which a job is forgotten even if it never ended
+            event_loop: AIEventLoop running the completions (default: the process-wide one)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._event_loop = event_loop
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: str, prompt_type, owner: str, catalog_version: Optional[str] = None,
+               field: Optional[str] = None, context: Optional[Dict[str, Any]] = None) -> GenerationJob:
+        """
+        Start a completion on the AI event loop without waiting for it.
+
+        Args:
+            prompt: Prompt to send
+            prompt_type: PromptType of the prompt
+            owner: ID of the story the job is started for
+            catalog_version: Catalog version the prompt was built from; scopes the response cache
+            field: Name of the response field relayed as it is written
+            context: Values needed to finish the job
+
+        Returns:
+            The running GenerationJob
+        """
+        self.prune()
+        job = GenerationJob(prompt_type, owner, field, context)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        event_loop = self._event_loop or get_ai_event_loop()
+        future = event_loop.submit(stream_ai_response_async(
+            prompt, prompt_type, job.add_text, catalog_version=catalog_version
+        ))
+        future.add_done_callback(lambda done: self._complete(job, done))
+        return job
+
+    @staticmethod
+    def _complete(job: GenerationJob, future: Future) -> None:
+        """Store the response of a job whose completion ended."""
+        try:
+            response = future.result()
+        except BaseException as e:
+            # stream_ai_response_async() returns its errors; only cancellation gets here
+            response = AIError.from_exception(e)
+        job.set_response(response)
+
+    def get(self, job_id: str, owner: str) -> Optional[GenerationJob]:
+        """
+        Get a job for polling.
+
+        Args:
+            job_id: Job identifier
+            owner: ID of the story of the polling session
+
+        Returns:
+            The job, or None if it is unknown, expired or belongs to another story
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def prune(self) -> int:
+        """
+        Forget expired jobs.
+
+        Returns:
+            Number of jobs forgotten
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if (job.done and now - job.finished_at > self.ttl_seconds)
+                or now - job.created_at > self.max_age_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get the number of running and finished jobs held."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        running = sum(1 for job in jobs if not job.done)
+        return {"running": running, "finished": len(jobs) - running}
+
+    def collect_metrics(self, writer: Any) -> None:
+        """
+        Add the job and event loop metric families to a Prometheus exposition.
+
+        Args:
+            writer: Exposition writer with family() and sample() (MetricsRegistry.add_collector())
+        """
+        metrics = self.get_metrics()
+        writer.family("kraitif_generation_jobs", "gauge", "Generation jobs held by this process by state.")
+        for state in ("running", "finished"):
+            writer.sample("kraitif_generation_jobs", {"state": state}, metrics[state])
+        event_loop = self._event_loop or get_ai_event_loop()
+        writer.family("kraitif_ai_event_loop_in_flight", "gauge", "Completions running on the AI event loop.")
+        writer.sample("kraitif_ai_event_loop_in_flight", {}, event_loop.in_flight)
+
+
+# Global registry instance
+_generation_jobs: Optional[GenerationJobs] = None
+_generation_jobs_lock = threading.Lock()
+
+
+def get_generation_jobs() -> GenerationJobs:
+    """Get or create the process-wide generation job registry."""
+    global _generation_jobs
+    if _generation_jobs is None:
+        with _generation_jobs_lock:
+            if _generation_jobs is None:
+                _generation_jobs = GenerationJobs(
+                    ttl_seconds=float(os.environ.get("KRAITIF_GENERATION_JOB_TTL", DEFAULT_JOB_TTL_SECONDS)),
+                    max_age_seconds=float(os.environ.get("KRAITIF_GENERATION_JOB_MAX_AGE",
+                                                         DEFAULT_JOB_MAX_AGE_SECONDS)),
+                )
+    return _generation_jobs
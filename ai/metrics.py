@@ -0,0 +1,294 @@
+"""
+Metrics Registry
+
+Counters and histograms for AI generation, exposed in the Prometheus text
+exposition format by the /metrics endpoint. Recorded per PromptType:
+
+- prompt and completion token counts (from the completion's usage)
+- response cache hits and misses
+- parse successes and failures of the structured data
+- request latency of each Flask route (time until the response starts)
+
+Recording is a dictionary update under a lock, so it costs about a
+microsecond on the request path. Metrics the AI components already keep
+(upstream latency per route, retry decisions, circuit breakers and
+single-flight counts) are read from them when /metrics is scraped rather
+than recorded twice. Other parts of the app add their own families through
+collectors registered with add_collector().
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ai.resilience import get_resilient_caller
+from ai.routing import get_model_router
+from ai.single_flight import get_single_flight
+
+# Upper bounds of the token count histogram buckets
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+# Upper bounds (seconds) of the HTTP request latency histogram buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds (the registry's lock guards it)."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the histogram with cumulative bucket counts, like LatencyHistogram.to_dict()."""
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+class MetricsRegistry:
+    """Records generation metrics and renders them for Prometheus."""
+
+    def __init__(self):
+        """Initialize empty counters and histograms."""
+        self._lock = threading.Lock()
+        self._cache_lookups: Dict[Tuple[str, str], int] = {}
+        self._parses: Dict[Tuple[str, str], int] = {}
+        self._tokens: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+        self._responses: Dict[Tuple[str, str, str], int] = {}
+        self._collectors: List[Callable[[Any], None]] = []
+
+    def add_collector(self, collector: Callable[[Any], None]) -> None:
+        """
+        Register a function adding metric families when the registry is rendered.
+
+        Args:
+            collector: Called with the exposition writer (family(), sample() and histogram()) on each render
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def record_cache_lookup(self, prompt_type, hit: bool) -> None:
+        """
+        Count a response cache lookup.
+
+        Args:
+            prompt_type: PromptType of the prompt looked up
+            hit: True if a cached response was found
+        """
+        key = (prompt_type.value, "hit" if hit else "miss")
+        with self._lock:
+            self._cache_lookups[key] = self._cache_lookups.get(key, 0) + 1
+
+    def record_parse(self, prompt_type, ok: bool) -> None:
+        """
+        Count an attempt to parse a response's structured data.
+
+        Args:
+            prompt_type: PromptType of the response
+            ok: True if the parser found the data it expected
+        """
+        key = (prompt_type.value, "success" if ok else "failure")
+        with self._lock:
+            self._parses[key] = self._parses.get(key, 0) + 1
+
+    def record_usage(self, prompt_type, usage: Any) -> None:
+        """
+        Record the token counts of a completion.
+
+        Args:
+            prompt_type: PromptType of the completion
+            usage: The completion's usage (prompt_tokens and completion_tokens); ignored if missing
+        """
+        counts = []
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if isinstance(tokens, int):
+                counts.append((kind, tokens))
+        if not counts:
+            return
+        with self._lock:
+            for kind, tokens in counts:
+                histogram = self._tokens.get((prompt_type.value, kind))
+                if histogram is None:
+                    histogram = self._tokens[(prompt_type.value, kind)] = Histogram(TOKEN_BUCKETS)
+                histogram.observe(tokens)
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        """
+        Record the latency of an HTTP request.
+
+        Args:
+            route: URL rule the request matched (not the URL, to keep the label set small)
+            method: HTTP method
+            status: Response status code
+            seconds: Time from the start of the request to the response
+        """
+        with self._lock:
+            histogram = self._requests.get((route, method))
+            if histogram is None:
+                histogram = self._requests[(route, method)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+            key = (route, method, str(status))
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get a snapshot of the recorded counters and histograms."""
+        with self._lock:
+            return {
+                "cache_lookups": dict(self._cache_lookups),
+                "parses": dict(self._parses),
+                "tokens": {key: histogram.to_dict() for key, histogram in self._tokens.items()},
+                "requests": {key: histogram.to_dict() for key, histogram in self._requests.items()},
+                "responses": dict(self._responses),
+            }
+
+    def render(self) -> str:
+        """
+        Render the recorded metrics and those of the AI components.
+
+        Returns:
+            Metrics in the Prometheus text exposition format
+        """
+        metrics = self.get_metrics()
+        writer = _PrometheusWriter()
+
+        writer.family("kraitif_ai_cache_lookups_total", "counter", "AI response cache lookups by result.")
+        for (prompt_type, result), count in sorted(metrics["cache_lookups"].items()):
+            writer.sample("kraitif_ai_cache_lookups_total", {"prompt_type": prompt_type, "result": result}, count)
+
+        writer.family("kraitif_ai_parses_total", "counter", "Structured data parses of AI responses by result.")
+        for (prompt_type, result), count in sorted(metrics["parses"].items()):
+            writer.sample("kraitif_ai_parses_total", {"prompt_type": prompt_type, "result": result}, count)
+
+        writer.family("kraitif_ai_tokens", "histogram", "Tokens per AI completion by kind.")
+        for (prompt_type, kind), histogram in sorted(metrics["tokens"].items()):
+            writer.histogram("kraitif_ai_tokens", {"prompt_type": prompt_type, "kind": kind}, histogram)
+
+        routes = get_model_router().get_metrics()
+        writer.family("kraitif_ai_upstream_latency_seconds", "histogram",
+                      "Upstream AI completion latency per prompt type route, including retries.")
+        for prompt_type, route in sorted(routes.items()):
+            labels = {"prompt_type": prompt_type, "deployment": route["deployment"]}
+            writer.histogram("kraitif_ai_upstream_latency_seconds", labels, route["latency"])
+        writer.family("kraitif_ai_upstream_errors_total", "counter", "Failed AI completions per prompt type route.")
+        for prompt_type, route in sorted(routes.items()):
+            labels = {"prompt_type": prompt_type, "deployment": route["deployment"]}
+            writer.sample("kraitif_ai_upstream_errors_total", labels, route["latency"]["errors"])
+
+        resilience = get_resilient_caller().get_metrics()
+        writer.family("kraitif_ai_attempts_total", "counter", "AI completion calls made upstream per deployment.")
+        for deployment, count in sorted(resilience["attempts"].items()):
+            writer.sample("kraitif_ai_attempts_total", {"deployment": deployment}, count)
+        writer.family("kraitif_ai_retry_decisions_total", "counter",
+                      "Decisions taken after failed AI completion calls.")
+        for entry in resilience["decisions"]:
+            labels = {"deployment": entry["deployment"], "kind": entry["kind"], "decision": entry["decision"]}
+            writer.sample("kraitif_ai_retry_decisions_total", labels, entry["count"])
+        writer.family("kraitif_ai_backoff_seconds_total", "counter", "Time spent waiting between AI retries.")
+        writer.sample("kraitif_ai_backoff_seconds_total", {}, resilience["backoff_seconds"])
+        writer.family("kraitif_ai_circuit_breaker_state", "gauge", "1 for the current state of each circuit breaker.")
+        for deployment, breaker in sorted(resilience["circuit_breakers"].items()):
+            for state in ("closed", "open", "half_open"):
+                value = 1 if breaker["state"] == state else 0
+                writer.sample("kraitif_ai_circuit_breaker_state", {"deployment": deployment, "state": state}, value)
+
+        single_flight = get_single_flight().get_metrics()
+        writer.family("kraitif_ai_single_flight_total", "counter", "Coalesced AI completions by role.")
+        for role in ("leaders", "followers", "process_waits"):
+            writer.sample("kraitif_ai_single_flight_total", {"role": role}, single_flight[role])
+        writer.family("kraitif_ai_in_flight", "gauge", "Distinct AI prompts currently being completed.")
+        writer.sample("kraitif_ai_in_flight", {}, single_flight["in_flight"])
+
+        writer.family("kraitif_http_request_duration_seconds", "histogram",
+                      "Time until the response starts, per Flask route.")
+        for (route, method), histogram in sorted(metrics["requests"].items()):
+            writer.histogram("kraitif_http_request_duration_seconds", {"route": route, "method": method}, histogram)
+        writer.family("kraitif_http_responses_total", "counter", "HTTP responses per Flask route and status.")
+        for (route, method, status), count in sorted(metrics["responses"].items()):
+            labels = {"route": route, "method": method, "status": status}
+            writer.sample("kraitif_http_responses_total", labels, count)
+
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector(writer)
+
+        return writer.text()
+
+
+class _PrometheusWriter:
+    """Builds a Prometheus text exposition."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        """Start a metric family."""
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, labels: Dict[str, Any], value: float) -> None:
+        """Add one sample."""
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, labels: Dict[str, Any], histogram: Dict[str, Any]) -> None:
+        """Add the samples of a histogram given as cumulative buckets, count and sum."""
+        for bound, count in histogram["buckets"]:
+            self.sample(f"{name}_bucket", {**labels, "le": _format_value(bound)}, count)
+        self.sample(f"{name}_bucket", {**labels, "le": "+Inf"}, histogram["count"])
+        self.sample(f"{name}_sum", labels, histogram["sum"])
+        self.sample(f"{name}_count", labels, histogram["count"])
+
+    def text(self) -> str:
+        """Get the exposition text."""
+        return "\n".join(self._lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    """Format a label set, escaping backslashes, quotes and newlines in the values."""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value or bucket bound."""
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return str(value)
+
+
+# Global registry instance
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get or create the process-wide metrics registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
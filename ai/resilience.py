@@ -0,0 +1,544 @@
+"""
+AI Call Resilience
+
+Retries, backoff and circuit breaking around upstream completions.
+
+A failed completion is classified by kind (rate limited, server error,
+timeout, ...). Transient kinds are retried with bounded exponential backoff
+and full jitter, waiting at least as long as the service asked in its
+Retry-After header. Each deployment has a circuit breaker: after repeated
+transient failures it opens and calls fail fast until a cool-down has passed,
+then a single probe call decides whether it closes again.
+
+When a completion finally fails, get_ai_response() returns an AIError instead
+of raising. AIError is a str holding the same "Error: ..." text as before, so
+existing callers keep working, while routes can tell it apart with
+isinstance() and report its kind. Every retry decision is counted in
+ResilienceMetrics.
+
+The SDK is never imported here; errors are classified by their status code,
+headers and class names.
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Error kinds
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+CIRCUIT_OPEN = "circuit_open"
+CLIENT_ERROR = "client_error"
+UNKNOWN = "unknown"
+
+# Kinds worth retrying; they also count against the deployment's circuit breaker
+TRANSIENT_KINDS = frozenset({RATE_LIMITED, SERVER_ERROR, TIMEOUT, CONNECTION})
+
+# HTTP statuses treated as transient besides 429 and 5xx
+_TRANSIENT_STATUSES = frozenset({408, 409})
+
+# Messages shown to the user for each kind
+_USER_MESSAGES = {
+    RATE_LIMITED: "The AI service is busy right now. Please try again in a moment.",
+    SERVER_ERROR: "The AI service had a temporary problem. Please try again.",
+    TIMEOUT: "The AI service took too long to respond. Please try again.",
+    CONNECTION: "Could not reach the AI service. Please check the connection and try again.",
+    CIRCUIT_OPEN: "The AI service is unavailable right now. Please try again shortly.",
+}
+
+# Retry decisions recorded in the metrics
+RETRY = "retry"
+GIVE_UP = "give_up"
+REJECTED = "rejected"
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AIRequestFailed(Exception):
+    """Raised by the retry layer when a completion has failed for good."""
+
+    def __init__(self, kind: str, message: str, deployment: str, attempts: int = 1,
+                 status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.message = message
+        self.deployment = deployment
+        self.attempts = attempts
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AIRequestFailed):
+    """Raised without calling upstream while a deployment's circuit breaker is open."""
+
+    def __init__(self, deployment: str, retry_after: float):
+        super().__init__(
+            CIRCUIT_OPEN, f"Circuit breaker open for {deployment}", deployment, attempts=0, retry_after=retry_after
+        )
+
+
+class AIError(str):
+    """
+    Typed error result of a failed completion.
+
+    The string value is the "Error: ..." message that get_ai_response() has
+    always returned, so parsers and templates treat it as before; the
+    attributes say what went wrong.
+    """
+
+    kind: str
+    status_code: Optional[int]
+    retry_after: Optional[float]
+    attempts: int
+    deployment: Optional[str]
+
+    def __new__(cls, kind: str, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None,
+                attempts: int = 1, deployment: Optional[str] = None):
+        error = super().__new__(cls, f"Error: {message}")
+        error.kind = kind
+        error.status_code = status_code
+        error.retry_after = retry_after
+        error.attempts = attempts
+        error.deployment = deployment
+        return error
+
+    @classmethod
+    def from_exception(cls, error: Exception) -> "AIError":
+        """
+        Build the error result for an exception raised while getting a completion.
+
+        Args:
+            error: AIRequestFailed from the retry layer, or any other exception
+
+        Returns:
+            AIError describing the failure
+        """
+        if isinstance(error, AIRequestFailed):
+            return cls(error.kind, error.message, error.status_code, error.retry_after, error.attempts,
+                       error.deployment)
+        kind, status_code, retry_after = classify_error(error)
+        return cls(kind, str(error), status_code, retry_after)
+
+    @property
+    def retryable(self) -> bool:
+        """True if trying again later may succeed."""
+        return self.kind in TRANSIENT_KINDS or self.kind == CIRCUIT_OPEN
+
+    @property
+    def user_message(self) -> str:
+        """Message to show the user."""
+        return _USER_MESSAGES.get(self.kind, str(self))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the JSON payload reported to the browser for this failure."""
+        return {
+            "success": False,
+            "error": self.user_message,
+            "error_kind": self.kind,
+            "retryable": self.retryable,
+            "retry_after": self.retry_after,
+        }
+
+
+def classify_error(error: Exception):
+    """
+    Classify an exception raised by a completion call.
+
+    Args:
+        error: Exception raised by the SDK (or anything else)
+
+    Returns:
+        tuple: (kind, HTTP status code or None, Retry-After seconds or None)
+    """
+    status_code = getattr(error, "status_code", None)
+    if not isinstance(status_code, int):
+        status_code = None
+    retry_after = parse_retry_after(getattr(getattr(error, "response", None), "headers", None))
+
+    class_names = {cls.__name__ for cls in type(error).__mro__}
+    if status_code == 429:
+        kind = RATE_LIMITED
+    elif status_code is not None and (status_code >= 500 or status_code in _TRANSIENT_STATUSES):
+        kind = SERVER_ERROR
+    elif status_code is not None:
+        kind = CLIENT_ERROR
+    elif "APITimeoutError" in class_names or isinstance(error, TimeoutError):
+        kind = TIMEOUT
+    elif "APIConnectionError" in class_names or isinstance(error, ConnectionError):
+        kind = CONNECTION
+    else:
+        kind = UNKNOWN
+    return kind, status_code, retry_after
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Read the delay a response asked for from its retry-after-ms or Retry-After header.
+
+    Args:
+        headers: Response headers (a mapping with case-insensitive get(), or None)
+
+    Returns:
+        Seconds to wait, or None if the response did not say
+    """
+    if not headers:
+        return None
+    try:
+        milliseconds = headers.get("retry-after-ms")
+        if milliseconds is not None:
+            return max(0.0, float(milliseconds) / 1000)
+        value = headers.get("retry-after")
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    # An HTTP date
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class RetryPolicy:
+    """Bounded exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 20.0,
+                 max_retry_after: float = 60.0):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts: Calls made at most per completion, including the first
+            base_delay: Backoff ceiling in seconds before the first retry; doubles after each retry
+            max_delay: Largest backoff ceiling in seconds
+            max_retry_after: Longest Retry-After in seconds worth waiting for; longer ones give up at once
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Get the delay before the next attempt.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first call)
+            retry_after: Delay the service asked for, if any
+
+        Returns:
+            Seconds to wait, or None if the completion should not be retried
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """Fails calls to one deployment fast after repeated transient failures."""
+
+    def __init__(self, deployment: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the breaker (closed).
+
+        Args:
+            deployment: Deployment the breaker guards
+            failure_threshold: Consecutive transient failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before letting a probe call through
+            clock: Monotonic time source
+        """
+        self.deployment = deployment
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> Optional[float]:
+        """
+        Ask whether a call may go upstream now.
+
+        Returns:
+            None if the call may proceed, otherwise the seconds until the breaker lets a probe through
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return None
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if self._state == OPEN and remaining <= 0:
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._state == HALF_OPEN and not self._probing:
+                # Exactly one probe call at a time decides whether the breaker closes
+                self._probing = True
+                return None
+            return max(remaining, 0.0)
+
+    def record_success(self) -> None:
+        """Record a successful call; closes the breaker."""
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"AI circuit breaker for {self.deployment} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, kind: str) -> None:
+        """
+        Record a failed call.
+
+        Only transient failures count towards opening the breaker; a failed
+        probe re-opens it at once.
+
+        Args:
+            kind: Error kind of the failure
+        """
+        with self._lock:
+            if kind not in TRANSIENT_KINDS:
+                # The deployment answered; the request itself was at fault
+                if self._state == HALF_OPEN:
+                    self._probing = False
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"Warning: AI circuit breaker for {self.deployment} opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the breaker state and its consecutive failure count."""
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures}
+
+
+class ResilienceMetrics:
+    """Counts completion attempts and retry decisions per deployment and error kind."""
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.attempts: Dict[str, int] = {}
+        self.decisions: Dict[tuple, int] = {}
+        self.backoff_seconds = 0.0
+
+    def record_attempt(self, deployment: str) -> None:
+        """Count a call made upstream."""
+        with self._lock:
+            self.attempts[deployment] = self.attempts.get(deployment, 0) + 1
+
+    def record_decision(self, deployment: str, kind: str, decision: str, delay: float = 0.0) -> None:
+        """
+        Count a retry decision.
+
+        Args:
+            deployment: Deployment called
+            kind: Error kind that led to the decision
+            decision: "retry", "give_up" or "rejected" (circuit breaker open)
+            delay: Backoff slept before the retry
+        """
+        with self._lock:
+            key = (deployment, kind, decision)
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+            self.backoff_seconds += delay
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the attempt and decision counters."""
+        with self._lock:
+            return {
+                "attempts": dict(self.attempts),
+                "decisions": [
+                    {"deployment": deployment, "kind": kind, "decision": decision, "count": count}
+                    for (deployment, kind, decision), count in sorted(self.decisions.items())
+                ],
+                "backoff_seconds": self.backoff_seconds,
+            }
+
+
+class ResilientCaller:
+    """Runs completion calls under a retry policy and per-deployment circuit breakers."""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 metrics: Optional[ResilienceMetrics] = None):
+        """
+        Initialize the caller.
+
+        Args:
+            policy: Retry policy (defaults to RetryPolicy())
+            failure_threshold: Consecutive transient failures that open a deployment's breaker
+            reset_timeout: Seconds a breaker stays open before a probe call
+            metrics: Counters to record decisions in (defaults to a new ResilienceMetrics)
+        """
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics or ResilienceMetrics()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
+    def get_breaker(self, deployment: str) -> CircuitBreaker:
+        """Get or create the circuit breaker of a deployment."""
+        breaker = self._breakers.get(deployment)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self._breakers.get(deployment)
+                if breaker is None:
+                    breaker = CircuitBreaker(deployment, self.failure_threshold, self.reset_timeout)
+                    self._breakers[deployment] = breaker
+        return breaker
+
+    def call(self, deployment: str, function: Callable[[], Any], sleep: Callable[[float], None] = time.sleep) -> Any:
+        """
+        Call function, retrying transient failures.
+
+        Args:
+            deployment: Deployment the call goes to
+            function: Makes one upstream call and returns its result
+            sleep: Sleeps for the backoff delay
+
+        Returns:
+            The function's result
+
+        Raises:
+            AIRequestFailed: The call failed for good (CircuitOpenError if it was never attempted)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._admit(deployment)
+            try:
+                result = function()
+            except Exception as e:
+                delay = self._after_failure(deployment, e, attempt)
+                sleep(delay)
+                continue
+            self.get_breaker(deployment).record_success()
+            return result
+
+    async def call_async(self, deployment: str, function: Callable[[], Awaitable[Any]],
+                         sleep: Callable[[float], Awaitable[None]]) -> Any:
+        """
+        Await function(), retrying transient failures without blocking the event loop.
+
+        Args:
+            deployment: Deployment the call goes to
+            function: Returns an awaitable making one upstream call
+            sleep: Waits for the backoff delay (asyncio.sleep)
+
+        Returns:
+            The awaited result
+
+        Raises:
+            AIRequestFailed: The call failed for good (CircuitOpenError if it was never attempted)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._admit(deployment)
+            try:
+                result = await function()
+            except Exception as e:
+                delay = self._after_failure(deployment, e, attempt)
+                await sleep(delay)
+                continue
+            self.get_breaker(deployment).record_success()
+            return result
+
+    def _admit(self, deployment: str) -> None:
+        """Check the deployment's breaker before a call and count the attempt."""
+        wait = self.get_breaker(deployment).allow()
+        if wait is not None:
+            self.metrics.record_decision(deployment, CIRCUIT_OPEN, REJECTED)
+            raise CircuitOpenError(deployment, wait)
+        self.metrics.record_attempt(deployment)
+
+    def _after_failure(self, deployment: str, error: Exception, attempt: int) -> float:
+        """
+        Record a failed call and decide whether to retry it.
+
+        Returns:
+            Seconds to wait before the next attempt
+
+        Raises:
+            AIRequestFailed: The completion should not be retried
+        """
+        kind, status_code, retry_after = classify_error(error)
+        breaker = self.get_breaker(deployment)
+        breaker.record_failure(kind)
+        delay = None
+        # A retry would only be rejected once this failure has opened the breaker
+        if kind in TRANSIENT_KINDS and breaker.state == CLOSED:
+            delay = self.policy.backoff(attempt, retry_after)
+        if delay is None:
+            self.metrics.record_decision(deployment, kind, GIVE_UP)
+            raise AIRequestFailed(kind, str(error), deployment, attempt, status_code, retry_after) from error
+
+        self.metrics.record_decision(deployment, kind, RETRY, delay)
+        status = f"HTTP {status_code}" if status_code is not None else kind
+        print(f"Warning: AI completion failed ({status}); retrying in {delay:.1f}s "
+              f"(attempt {attempt + 1}/{self.policy.max_attempts})")
+        return delay
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the decision counters and the state of every circuit breaker."""
+        metrics = self.metrics.get_metrics()
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        metrics["circuit_breakers"] = {
+            deployment: breaker.get_metrics() for deployment, breaker in sorted(breakers.items())
+        }
+        return metrics
+
+
+# Global caller instance
+_resilient_caller: Optional[ResilientCaller] = None
+_resilient_caller_lock = threading.Lock()
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """Get or create the process-wide resilient caller, configured from the environment."""
+    global _resilient_caller
+    if _resilient_caller is None:
+        with _resilient_caller_lock:
+            if _resilient_caller is None:
+                _resilient_caller = ResilientCaller(
+                    policy=RetryPolicy(
+                        max_attempts=int(os.environ.get("KRAITIF_AI_MAX_ATTEMPTS", 4)),
+                        base_delay=float(os.environ.get("KRAITIF_AI_RETRY_BASE_SECONDS", 1.0)),
+                        max_delay=float(os.environ.get("KRAITIF_AI_RETRY_MAX_SECONDS", 20.0)),
+                    ),
+                    failure_threshold=int(os.environ.get("KRAITIF_AI_BREAKER_THRESHOLD", 5)),
+                    reset_timeout=float(os.environ.get("KRAITIF_AI_BREAKER_RESET_SECONDS", 30.0)),
+                )
+    return _resilient_caller
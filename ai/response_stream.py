@@ -0,0 +1,142 @@
+"""
+Streamed Response Fields
+
+The generation prompts ask for a single JSON object inside <STRUCTURED_DATA>
+tags, with the chapter prose (or the chapter titles of an outline) as
+string fields of that object. StreamingFieldExtractor picks the decoded
+text of one such field out of a response while the response is still being
+streamed, so the prose can be shown as it is written. The complete response
+is still parsed by the regular parsers once the stream ends.
+"""
+
+import json
+from typing import List, Tuple
+
+# Parser states
+_OUTSIDE = 0       # Between JSON tokens (or in text around the JSON block)
+_IN_STRING = 1     # Inside a string that may turn out to be the field's key
+_AFTER_KEY = 2     # After a string equal to the field name, before its ':'
+_BEFORE_VALUE = 3  # After the field's ':', before the opening quote of its value
+_IN_VALUE = 4      # Inside the field's string value
+
+_WHITESPACE = " \t\r\n"
+
+
+class StreamingFieldExtractor:
+    """Pulls the values of one string field out of a JSON response while it is being streamed."""
+
+    def __init__(self, field: str):
+        """
+        Initialize the extractor.
+
+        Args:
+            field: Name of the string field whose values are extracted (at any depth)
+        """
+        self.field = field
+        # Number of values of the field seen so far
+        self.count = 0
+        self._state = _OUTSIDE
+        self._string: List[str] = []
+        self._escape = ""
+
+    def feed(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Process the next piece of the response.
+
+        Args:
+            text: Response text streamed since the last call
+
+        Returns:
+            List of (occurrence index, decoded text) pieces of the field's values found in text
+        """
+        pieces: List[Tuple[int, str]] = []
+        value: List[str] = []
+        for character in text:
+            state = self._state
+            if state == _IN_VALUE:
+                if self._escape:
+                    if _awaits_low_surrogate(self._escape) and not _continues_escape(self._escape + character):
+                        # A lone high surrogate; the character is handled normally below
+                        value.append(_decode_escape(self._escape))
+                        self._escape = ""
+                    else:
+                        self._escape += character
+                        if _is_complete_escape(self._escape):
+                            value.append(_decode_escape(self._escape))
+                            self._escape = ""
+                        continue
+                if character == "\\":
+                    self._escape = character
+                elif character == '"':
+                    self._flush(pieces, value)
+                    self.count += 1
+                    self._state = _OUTSIDE
+                else:
+                    value.append(character)
+            elif state == _IN_STRING:
+                if self._escape:
+                    self._escape = ""
+                    self._string.append(character)
+                elif character == "\\":
+                    self._escape = character
+                    self._string.append(character)
+                elif character == '"':
+                    self._state = _AFTER_KEY if "".join(self._string) == self.field else _OUTSIDE
+                    self._string = []
+                else:
+                    self._string.append(character)
+            elif state == _AFTER_KEY:
+                if character == ":":
+                    self._state = _BEFORE_VALUE
+                elif character not in _WHITESPACE:
+                    # The string was a value (or text), not the field's key
+                    self._state = _IN_STRING if character == '"' else _OUTSIDE
+            elif state == _BEFORE_VALUE:
+                if character == '"':
+                    self._state = _IN_VALUE
+                elif character not in _WHITESPACE:
+                    # The field holds something other than a string
+                    self._state = _OUTSIDE
+            elif character == '"':
+                self._state = _IN_STRING
+        self._flush(pieces, value)
+        return pieces
+
+    def _flush(self, pieces: List[Tuple[int, str]], value: List[str]) -> None:
+        """Move the value text decoded so far into pieces."""
+        if value:
+            pieces.append((self.count, "".join(value)))
+            value.clear()
+
+
+def _awaits_low_surrogate(escape: str) -> bool:
+    """Return True if escape is a \\uXXXX high surrogate that a low surrogate escape may still follow."""
+    if len(escape) < 6 or escape[1] != "u":
+        return False
+    try:
+        return 0xD800 <= int(escape[2:6], 16) <= 0xDBFF
+    except ValueError:
+        return False
+
+
+def _continues_escape(escape: str) -> bool:
+    """Return True if the text after a high surrogate escape can still be a \\uXXXX escape."""
+    tail = escape[6:]
+    return tail[:2] == "\\u"[:len(tail)]
+
+
+def _is_complete_escape(escape: str) -> bool:
+    """Return True once an escape sequence (starting with the backslash) has all its characters."""
+    if escape[1] != "u":
+        return True
+    if len(escape) == 6:
+        return not _awaits_low_surrogate(escape)
+    return len(escape) >= 12
+
+
+def _decode_escape(escape: str) -> str:
+    """Decode a JSON escape sequence (invalid ones decode to nothing)."""
+    try:
+        return json.loads(f'"{escape}"')
+    except ValueError:
+        return ""
@@ -0,0 +1,252 @@
+"""
+AI Model Routing
+
+Routing table mapping each PromptType to the deployment and request settings
+its completions use: max output tokens, temperature, request timeout and stop
+sequences. Plot lines and character lists are short structured answers that
+run on a faster, cheaper deployment; chapter prose gets the largest output
+budget and the longest timeout.
+
+Routes with structured_output send the prompt type's JSON schema as the
+response_format (objects/response_schemas.py), so the response is a bare
+schema-valid JSON object. Routes without it stop at </STRUCTURED_DATA>, so
+nothing after the JSON block is generated; the stop sequence itself is not
+returned by the API, so complete_structured_data() puts the closing tag back
+for the parsers.
+
+The defaults can be overridden per prompt type from a JSON file named by
+KRAITIF_AI_ROUTES, e.g.:
+
+    {"chapter": {"deployment": "gpt-4o_2024-11-20", "max_tokens": 8000},
+     "plot_lines": {"temperature": 1.0, "structured_output": false}}
+
+Each route's upstream latency is recorded in a histogram (see get_metrics()).
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional
+from prompt_types import PromptType
+
+STRUCTURED_DATA_START = "<STRUCTURED_DATA>"
+STRUCTURED_DATA_END = "</STRUCTURED_DATA>"
+
+# Deployments
+DEFAULT_DEPLOYMENT = "gpt-4o_2024-08-06"
+FAST_DEPLOYMENT = "gpt-4o-mini_2024-07-18"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0)
+
+
+@dataclass
+class ModelRoute:
+    """Deployment and request settings for one prompt type."""
+
+    deployment: str = DEFAULT_DEPLOYMENT
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None
+    stop: List[str] = field(default_factory=lambda: [STRUCTURED_DATA_END])
+    structured_output: bool = True
+
+    def request_options(self, response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get the chat completion arguments for this route (unset ones are left to the API).
+
+        Args:
+            response_format: JSON schema response_format of the prompt type; used
+                             instead of the stop sequences if the route has structured_output
+        """
+        options = {"model": self.deployment}
+        if self.structured_output and response_format:
+            options["response_format"] = response_format
+        if self.max_tokens is not None:
+            options["max_tokens"] = self.max_tokens
+        if self.temperature is not None:
+            options["temperature"] = self.temperature
+        if self.timeout is not None:
+            options["timeout"] = self.timeout
+        if self.stop and "response_format" not in options:
+            options["stop"] = list(self.stop)
+        return options
+
+
+DEFAULT_ROUTES: Dict[PromptType, ModelRoute] = {
+    PromptType.PLOT_LINES: ModelRoute(FAST_DEPLOYMENT, max_tokens=2000, temperature=1.0, timeout=60.0),
+    PromptType.CHARACTERS: ModelRoute(FAST_DEPLOYMENT, max_tokens=4000, temperature=0.9, timeout=90.0),
+    PromptType.CHAPTER_OUTLINE: ModelRoute(DEFAULT_DEPLOYMENT, max_tokens=6000, temperature=0.8, timeout=120.0),
+    PromptType.CHAPTER: ModelRoute(DEFAULT_DEPLOYMENT, max_tokens=8000, temperature=0.9, timeout=240.0),
+}
+
+
+def load_routes(path: Optional[str] = None) -> Dict[PromptType, ModelRoute]:
+    """
+    Build the routing table from the defaults and an optional JSON override file.
+
+    Args:
+        path: JSON file mapping prompt type values to route fields to override
+
+    Returns:
+        Dictionary of PromptType to ModelRoute covering every prompt type
+    """
+    routes = {prompt_type: DEFAULT_ROUTES.get(prompt_type, ModelRoute()) for prompt_type in PromptType}
+    if not path:
+        return routes
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not load AI routes from {path}: {e}")
+        return routes
+    if not isinstance(overrides, dict):
+        print(f"Warning: AI routes file {path} must hold a JSON object")
+        return routes
+
+    known_fields = {route_field.name for route_field in fields(ModelRoute)}
+    for name, settings in overrides.items():
+        try:
+            prompt_type = PromptType(name)
+        except ValueError:
+            print(f"Warning: Unknown prompt type '{name}' in AI routes file {path}")
+            continue
+        if not isinstance(settings, dict):
+            print(f"Warning: AI route '{name}' in {path} must be a JSON object")
+            continue
+        unknown = set(settings) - known_fields
+        if unknown:
+            print(f"Warning: Ignoring unknown settings {sorted(unknown)} for AI route '{name}'")
+        settings = {key: value for key, value in settings.items() if key in known_fields}
+        if isinstance(settings.get("stop"), str):
+            settings["stop"] = [settings["stop"]]
+        routes[prompt_type] = replace(routes[prompt_type], **settings)
+    return routes
+
+
+def complete_structured_data(text: str, route: ModelRoute) -> str:
+    """
+    Put back the closing tag a route's stop sequence cut off.
+
+    Args:
+        text: Response text as returned by the API
+        route: Route the completion ran on
+
+    Returns:
+        Text with </STRUCTURED_DATA> appended if the block was left open
+    """
+    if STRUCTURED_DATA_END not in route.stop:
+        return text
+    start = text.rfind(STRUCTURED_DATA_START)
+    if start != -1 and text.find(STRUCTURED_DATA_END, start) == -1:
+        return text + STRUCTURED_DATA_END
+    return text
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        """Record one completion's latency (caller holds the router's lock)."""
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        if not ok:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the histogram with cumulative bucket counts."""
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative.append((bound, running))
+        return {
+            "buckets": cumulative,
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "errors": self.errors,
+        }
+
+
+class ModelRouter:
+    """Looks up routes and records per-route latency."""
+
+    def __init__(self, routes: Optional[Dict[PromptType, ModelRoute]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Routing table (defaults to load_routes())
+        """
+        self.routes = routes if routes is not None else load_routes()
+        self._lock = threading.Lock()
+        self._latency: Dict[PromptType, LatencyHistogram] = {}
+
+    def route(self, prompt_type: PromptType) -> ModelRoute:
+        """Get the route for a prompt type."""
+        route = self.routes.get(prompt_type)
+        if route is None:
+            route = ModelRoute()
+        return route
+
+    def observe(self, prompt_type: PromptType, seconds: float, ok: bool = True) -> None:
+        """
+        Record the upstream latency of one completion.
+
+        Args:
+            prompt_type: Prompt type (route) of the completion
+            seconds: Time from sending the request to the complete response
+            ok: False if the completion failed
+        """
+        with self._lock:
+            histogram = self._latency.get(prompt_type)
+            if histogram is None:
+                histogram = self._latency[prompt_type] = LatencyHistogram()
+            histogram.observe(seconds, ok)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get each route's settings and latency histogram, keyed by prompt type value."""
+        with self._lock:
+            latency = {prompt_type: histogram.to_dict() for prompt_type, histogram in self._latency.items()}
+        return {
+            prompt_type.value: {
+                "deployment": route.deployment,
+                "max_tokens": route.max_tokens,
+                "temperature": route.temperature,
+                "timeout": route.timeout,
+                "structured_output": route.structured_output,
+                "latency": latency.get(prompt_type, LatencyHistogram().to_dict()),
+            }
+            for prompt_type, route in self.routes.items()
+        }
+
+
+# Global router instance
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create the process-wide router (routes overridden by KRAITIF_AI_ROUTES)."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(load_routes(os.environ.get("KRAITIF_AI_ROUTES")))
+    return _router
@@ -0,0 +1,215 @@
+"""
+Single-Flight Request Coalescing
+
+Identical prompts submitted at the same time (two users with the same
+configuration, or one user double-clicking) would each start a 30-90 second
+upstream completion; the response cache only helps once the first one has
+finished. SingleFlight lets the first request for a key run the completion
+(the leader) while identical requests arriving meanwhile (followers) wait for
+it and share its result.
+
+Keys are the response cache's prompt hashes, so prompts coalesce exactly
+when they would share a cache entry.
+
+Coalescing is in-process by default. With a lock directory, leaders also
+take a per-key advisory file lock, so a leader in another process holding
+the same key makes this one wait; once it gets the lock it re-checks the
+response cache, where the other process has stored the result.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from ai.ai_cache import get_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process coalescing only
+    fcntl = None
+
+
+class Flight:
+    """One in-flight computation that followers can wait on."""
+
+    def __init__(self, key: str, owner: "SingleFlight"):
+        self.key = key
+        self._owner = owner
+        self._done = threading.Event()
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the leader's result.
+
+        Returns:
+            The result, or None if the leader gave up without one
+
+        Raises:
+            The leader's exception, if it failed
+        """
+        self._done.wait(timeout)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def resolve(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's result (or exception) to the followers."""
+        self._result = result
+        self._error = error
+        self._owner._finish(self)
+
+    def abandon(self) -> None:
+        """End the flight without a result; followers get None and compute their own."""
+        self.resolve(None)
+
+
+class SingleFlight:
+    """Coalesces concurrent computations of the same key."""
+
+    def __init__(self, lock_directory: Optional[str] = None):
+        """
+        Initialize the coalescer.
+
+        Args:
+            lock_directory: Directory for per-key lock files shared with other processes
+                            (in-process coalescing only if omitted)
+        """
+        self.lock_directory = lock_directory if fcntl is not None else None
+        if self.lock_directory:
+            os.makedirs(self.lock_directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Flight] = {}
+
+        # Metrics
+        self.leaders = 0
+        self.followers = 0
+        self.process_waits = 0
+
+    def claim(self, key: str) -> Tuple[Flight, bool]:
+        """
+        Join the flight for a key, starting one if none is in progress.
+
+        The leader must call resolve() or abandon() on the flight; followers
+        call wait().
+
+        Args:
+            key: Key identifying the computation
+
+        Returns:
+            tuple: (flight, True if the caller is the leader and must compute the result)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight, False
+            flight = Flight(key, self)
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def do(self, key: str, function: Callable[[], Any], recheck: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Compute function() once for all concurrent callers with the same key.
+
+        Args:
+            key: Key identifying the computation
+            function: Computes the result
+            recheck: Called after waiting for another process's leader; a result
+                     other than None is used instead of calling function
+
+        Returns:
+            The shared result
+        """
+        flight, leader = self.claim(key)
+        if not leader:
+            result = flight.wait()
+            if result is not None:
+                return result
+            # The leader gave up without a result
+            return self.do(key, function, recheck)
+
+        try:
+            with self.process_lock(key) as waited:
+                result = recheck() if waited and recheck is not None else None
+                if result is None:
+                    result = function()
+        except BaseException as e:
+            flight.resolve(error=e)
+            raise
+        flight.resolve(result)
+        return result
+
+    @contextmanager
+    def process_lock(self, key: str) -> Iterator[bool]:
+        """
+        Hold the key's lock file, excluding leaders of the same key in other processes.
+
+        Yields:
+            bool: True if another process held the lock and this one waited for it
+        """
+        if not self.lock_directory:
+            yield False
+            return
+        with open(os.path.join(self.lock_directory, f"{key}.lock"), "a") as lock_file:
+            waited = False
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                waited = True
+                with self._lock:
+                    self.process_waits += 1
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield waited
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _finish(self, flight: Flight) -> None:
+        """Remove a leader's flight and wake its followers."""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight._done.set()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        return len(self._flights)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get leader, follower and cross-process wait counts."""
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "process_waits": self.process_waits,
+                "in_flight": len(self._flights),
+            }
+
+
+# Global single-flight instance
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Get or create the process-wide coalescer.
+
+    Set KRAITIF_AI_SINGLE_FLIGHT_PROCESSES=1 to also coalesce with other
+    processes sharing the response cache directory (lock files go in its
+    .inflight subdirectory).
+    """
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                lock_directory = None
+                if os.environ.get("KRAITIF_AI_SINGLE_FLIGHT_PROCESSES", "0") == "1":
+                    lock_directory = str(get_cache().cache_dir / ".inflight")
+                _single_flight = SingleFlight(lock_directory)
+    return _single_flight
@@ -12,12 +12,12 @@ IMPORTANT: When making changes to the project please makes sure to consults the
 Please also update the design_spec and architecture_spec documents to reflext any changes that would help an AI coding agent
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, make_response
-from objects.story_types import StoryTypeRegistry
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, g,
+    stream_with_context,
+)
+from objects.catalog import Catalog, get_catalog
 from objects.story import Story
-from objects.genre import GenreRegistry
-from objects.archetype import ArchetypeRegistry
-from objects.style import StyleRegistry
 from prompt import Prompt
 from objects.plot_line import PlotLine, parse_plot_lines_from_ai_response
 from objects.character_parser import parse_characters_from_ai_response
@@ -26,49 +26,83 @@ from objects.chapter_parser import (
     validate_chapter_character_names,
     parse_single_chapter_from_ai_response,
 )
-from ai.ai_client import get_ai_response
+from ai.ai_client import get_ai_response, get_ai_client, stream_ai_response
+from ai.generation_jobs import get_generation_jobs
+from ai.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_metrics_registry
+from ai.resilience import AIError
+from ai.response_stream import StreamingFieldExtractor
 from prompt_types import PromptType
-import os
-import uuid
+from storage import StoryPatch, StoryVersionConflict, get_story_store, get_story_cache, get_story_janitor
+from export import StoryImportError, get_exporter, get_story_importer
+from werkzeug.exceptions import RequestEntityTooLarge
 import json
-import tempfile
-import atexit
-import glob
+import os
 import time
+import uuid
+from functools import partial
 
 app = Flask(__name__)
 app.secret_key = "kraitif_story_selection_key"  # For session management
 
-# Create a temporary directory for storing story data
-STORY_DATA_DIR = tempfile.mkdtemp(prefix="kraitif_stories_")
+# Story persistence backend (SQLite by default; set KRAITIF_STORY_STORE=file for
+# per-story JSON files in a temporary directory)
+story_store = get_story_store()
 
+# Hydrated stories reused across requests while their stored version is unchanged
+story_cache = get_story_cache()
 
-# Clean up temporary files on exit
-def cleanup_temp_files():
-    """Clean up temporary story files on application exit."""
-    import shutil
+# Removes stories idle for KRAITIF_STORY_MAX_AGE seconds (default 24 hours) on a
+# background thread started by the first save; its sweeps are reported on /metrics
+story_janitor = get_story_janitor()
+get_metrics_registry().add_collector(story_janitor.collect_metrics)
 
-    if os.path.exists(STORY_DATA_DIR):
-        shutil.rmtree(STORY_DATA_DIR, ignore_errors=True)
+# Completions requested with "Prefer: respond-async" run as generation jobs on the
+# AI event loop instead of a request thread; pages poll /generation-jobs/<id>
+generation_jobs = get_generation_jobs()
+get_metrics_registry().add_collector(generation_jobs.collect_metrics)
 
+# Uploaded save files are read into the story store incrementally; they are
+# limited to KRAITIF_MAX_UPLOAD_MB (default 32) and KRAITIF_MAX_UPLOAD_CHAPTERS
+# chapters (default 500). The request limit leaves room for the multipart framing.
+story_importer = get_story_importer()
+app.config["MAX_CONTENT_LENGTH"] = story_importer.max_bytes + 64 * 1024
 
-atexit.register(cleanup_temp_files)
+# Load the shared, read-only catalog snapshot at start-up
+get_catalog()
 
-# Initialize the story types registry
-registry = StoryTypeRegistry()
 
-# Initialize the genre registry
-genre_registry = GenreRegistry()
+@app.before_request
+def bind_request_catalog():
+    """Pin the current catalog snapshot for the whole request, even if it is reloaded meanwhile."""
+    g.catalog = get_catalog()
+    g.request_started = time.perf_counter()
 
-# Initialize the archetype registry
-archetype_registry = ArchetypeRegistry()
 
-# Initialize the style registry
-style_registry = StyleRegistry()
+@app.after_request
+def record_request_latency(response):
+    """Record the request's latency under the route it matched (streams: until the stream starts)."""
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        get_metrics_registry().observe_request(
+            route, request.method, response.status_code, time.perf_counter() - started
+        )
+    return response
+
+
+def get_request_catalog() -> Catalog:
+    """Get the catalog snapshot pinned to the current request."""
+    return g.get("catalog") or get_catalog()
 
 # Initialize the prompt generator
 prompt_generator = Prompt()
 
+# Fast-start mode (default) defers importing the AI SDK and building the client
+# until the first generation request. Set KRAITIF_FAST_START=0 to load it eagerly.
+FAST_START = os.environ.get("KRAITIF_FAST_START", "1") != "0"
+if not FAST_START:
+    get_ai_client()
+
 
 # Custom Jinja2 filter for formatting emotional arc as arrows
 @app.template_filter("arrow_format")
@@ -98,54 +132,82 @@ def get_story_id():
     return session["story_id"]
 
 
-def get_story_file_path(story_id):
-    """Get the file path for a story ID."""
-    return os.path.join(STORY_DATA_DIR, f"story_{story_id}.json")
+def load_story_data(story_id):
+    """Load story data from the story store."""
+    return story_store.load(story_id)
 
 
-def load_story_from_file(story_id):
-    """Load story data from file."""
-    file_path = get_story_file_path(story_id)
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+def save_story_data(story_id, story_data):
+    """Save story data to the story store and return its new version (None on failure)."""
+    return story_store.save(story_id, story_data)
 
 
-def save_story_to_file(story_id, story_data):
-    """Save story data to file."""
-    file_path = get_story_file_path(story_id)
-    try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(story_data, f, ensure_ascii=False, indent=2)
-        return True
-    except IOError:
-        return False
+def delete_story_data(story_id):
+    """Delete a story from the story store and the story cache."""
+    story_cache.discard(story_id)
+    story_janitor.forget(story_id)
+    story_store.delete(story_id)
 
 
-def cleanup_old_story_files():
-    """Clean up story files older than 24 hours."""
-    try:
-        cutoff_time = time.time() - (24 * 60 * 60)  # 24 hours ago
-        for file_path in glob.glob(os.path.join(STORY_DATA_DIR, "story_*.json")):
-            if os.path.getctime(file_path) < cutoff_time:
-                os.remove(file_path)
-    except Exception:
-        pass  # Ignore cleanup errors
+def track_story(story_id, story, version):
+    """Remember the story a request is using so it can be returned to the cache afterwards."""
+    if "stories" not in g:
+        g.stories = {}
+    g.stories[story_id] = (story, version)
 
 
-def get_story_from_session():
-    """Get or create a Story object from session data."""
-    story = Story()
+def get_tracked_version(story_id, story):
+    """Get the store version this request loaded or last saved the story at."""
+    tracked = g.get("stories", {}).get(story_id)
+    if tracked is not None and tracked[0] is story:
+        return tracked[1]
+    return None
+
+
+@app.teardown_request
+def release_stories(exception=None):
+    """Return this request's stories to the cache if they still match what is stored."""
+    for story_id, (story, version) in g.pop("stories", {}).items():
+        # Stories changed without being saved no longer match the stored version
+        if story.is_tracked() and not story.is_dirty():
+            story_cache.checkin(story_id, story, version)
 
-    # Get story ID and load data from file
+
+def get_story_from_session(include_details=False):
+    """
+    Get or create a Story object from session data.
+
+    Args:
+        include_details: Load every chapter's text and continuity state up front, in the
+                         same read as the rest of the story, for pages that show them all;
+                         otherwise each chapter fetches them the first time they are read
+
+    Returns:
+        The Story
+    """
+    catalog = get_request_catalog()
     story_id = get_story_id()
-    story_data = load_story_from_file(story_id)
 
-    # If no file data exists, try to get from session (backward compatibility)
+    # Reuse the story hydrated by an earlier request if nothing was written since
+    version = story_store.get_version(story_id)
+    story = story_cache.checkout(story_id, version, catalog.version)
+    # A cached story with unloaded details would fetch them one chapter at a time
+    if story is not None and include_details and not all(c.details_loaded() for c in story.chapters):
+        story = None
+    if story is not None:
+        track_story(story_id, story, version)
+        if "story_data" not in session:
+            update_session_story_data(story)
+        return story
+
+    story = Story(catalog=catalog)
+
+    # Load the story from the story store; unless asked for, chapter texts and
+    # continuity states are fetched only when a page reads them
+    story_data, version = story_store.load_versioned(story_id, include_details=include_details)
+    stored = bool(story_data)
+
+    # If no stored data exists, try to get from session (backward compatibility)
     if not story_data:
         story_data = session.get("story_data", {})
 
@@ -199,27 +261,21 @@ def get_story_from_session():
         from objects.chapter import Chapter
 
         for chapter_data in chapters_data:
-            chapter = Chapter.from_dict(chapter_data)
+            detail_loader = None
+            if stored and not include_details:
+                detail_loader = partial(story_store.load_chapter_details, story_id, chapter_data.get("chapter_number"))
+            chapter = Chapter.from_dict(chapter_data, detail_loader=detail_loader)
             if chapter:
                 story.add_chapter(chapter)
 
         # Ensure session story_data is populated for template access with minimal data
         if "story_data" not in session:
-            minimal_story_data = {
-                "story_type_name": story.story_type_name,
-                "subtype_name": story.subtype_name,
-                "key_theme": story.key_theme,
-                "core_arc": story.core_arc,
-                "genre_name": story.genre.name if story.genre else None,
-                "sub_genre_name": story.sub_genre.name if story.sub_genre else None,
-                "writing_style_name": story.writing_style.name if story.writing_style else None,
-                "protagonist_archetype": story.protagonist_archetype.value if story.protagonist_archetype else None,
-                "secondary_archetypes": (
-                    [archetype.value for archetype in story.secondary_archetypes] if story.secondary_archetypes else []
-                ),
-            }
-            session["story_data"] = minimal_story_data
-            session.modified = True
+            update_session_story_data(story)
+
+        # Only data that came from the store can be patched on the next save
+        if stored:
+            story.mark_clean()
+            track_story(story_id, story, version)
 
     return story
 
@@ -227,7 +283,7 @@ def get_story_from_session():
 def get_protagonist_archetype_object(story):
     """Get the protagonist archetype object from the story."""
     if story.protagonist_archetype:
-        return archetype_registry.get_archetype(story.protagonist_archetype.value)
+        return get_request_catalog().archetypes.get_archetype(story.protagonist_archetype.value)
     return None
 
 
@@ -241,17 +297,30 @@ def get_secondary_archetype_objects(story):
     if story.secondary_archetypes:
         secondary_objects = []
         for archetype_enum in story.secondary_archetypes:
-            archetype = archetype_registry.get_archetype(archetype_enum.value)
+            archetype = get_request_catalog().archetypes.get_archetype(archetype_enum.value)
             if archetype:
                 secondary_objects.append(archetype)
         return secondary_objects
     return []
 
 
-def save_story_to_session(story):
-    """Save Story object to file-based storage."""
-    story_id = get_story_id()
-    story_data = {
+# Story attributes stored in the header under a different key
+STORY_HEADER_KEYS = {
+    "genre": "genre_name",
+    "sub_genre": "sub_genre_name",
+    "writing_style": "writing_style_name",
+}
+
+
+def build_story_header(story, fields=None):
+    """
+    Build the story-level fields persisted alongside characters and chapters.
+
+    Args:
+        story: Story object
+        fields: Story attribute names to include (all fields if None)
+    """
+    header = {
         "story_type_name": story.story_type_name,
         "subtype_name": story.subtype_name,
         "key_theme": story.key_theme,
@@ -263,13 +332,51 @@ def save_story_to_session(story):
         "secondary_archetypes": [archetype.value for archetype in story.secondary_archetypes],
         "selected_plot_line": story.selected_plot_line.to_dict() if story.selected_plot_line else None,
         "expanded_plot_line": story.expanded_plot_line,
-        "characters": [char.to_dict() for char in story.characters],
-        "chapters": [chapter.to_dict() for chapter in story.chapters],
     }
+    if fields is None:
+        return header
+    keys = {STORY_HEADER_KEYS.get(field, field) for field in fields}
+    return {key: value for key, value in header.items() if key in keys}
+
+
+def build_story_data(story):
+    """Build the complete story data dictionary stored in the story store."""
+    story_data = build_story_header(story)
+    story_data["characters"] = [char.to_dict() for char in story.characters]
+    story_data["chapters"] = [chapter.to_dict() for chapter in story.chapters]
+    return story_data
+
+
+def build_story_patch(story):
+    """Build a StoryPatch holding only what changed since the story was loaded or saved."""
+    changed_characters, character_count = story.get_character_changes()
+    changed_chapters, changed_continuity, removed_chapters = story.get_chapter_changes()
+
+    chapters = []
+    for chapter in changed_chapters:
+        chapter_data = chapter.to_dict(load_details=False)
+        chapter_data.pop("continuity_state", None)
+        changed_fields = chapter.get_changed_fields()
+        if changed_fields is not None and "chapter_text" not in changed_fields:
+            # The stored text is unchanged (or was never loaded)
+            chapter_data.pop("chapter_text", None)
+        chapters.append(chapter_data)
+
+    return StoryPatch(
+        header=build_story_header(story, story.get_changed_fields()) if story.is_header_dirty() else None,
+        characters={position: character.to_dict() for position, character in changed_characters.items()},
+        character_count=character_count,
+        chapters=chapters,
+        continuity_states={
+            chapter.chapter_number: chapter.continuity_state.to_dict() if chapter.continuity_state else None
+            for chapter in changed_continuity
+        },
+        removed_chapters=removed_chapters,
+    )
 
-    # Save to file instead of session
-    save_story_to_file(story_id, story_data)
 
+def update_session_story_data(story):
+    """Store the minimal story data used by templates in the session, if it changed."""
     # Save only minimal data to session for template access (left panel display only)
     # This prevents large cookies while preserving left panel functionality
     minimal_story_data = {
@@ -285,11 +392,50 @@ def save_story_to_session(story):
             [archetype.value for archetype in story.secondary_archetypes] if story.secondary_archetypes else []
         ),
     }
-    session["story_data"] = minimal_story_data
-    session.modified = True
+    # Rewriting an identical cookie on every request is pure overhead
+    if session.get("story_data") != minimal_story_data:
+        session["story_data"] = minimal_story_data
+        session.modified = True
+
 
-    # Clean up old files periodically
-    cleanup_old_story_files()
+def save_story_to_session(story):
+    """
+    Save Story object to the story store, writing only what changed when possible.
+
+    Raises:
+        StoryVersionConflict: If another request saved the story after this one loaded it
+    """
+    story_id = get_story_id()
+
+    if story.is_tracked() and not story.is_dirty():
+        # Nothing changed since the story was loaded or last saved
+        update_session_story_data(story)
+        return
+
+    # Stories loaded from the store only write their changed fields and rows;
+    # new stories (or ones recovered from the session) and vanished ones are
+    # stored in full
+    if story.is_tracked():
+        try:
+            version = story_store.apply_patch(
+                story_id, build_story_patch(story), expected_version=get_tracked_version(story_id, story)
+            )
+        except StoryVersionConflict:
+            # Another request saved the story after this one loaded it; this
+            # request's changes were made to an outdated story, so they are
+            # refused rather than written over (or merged into) the newer one
+            story_cache.discard(story_id)
+            raise
+        if not version and story_store.get_version(story_id) is None:
+            version = save_story_data(story_id, build_story_data(story))
+    else:
+        version = save_story_data(story_id, build_story_data(story))
+    if version:
+        story.mark_clean()
+        track_story(story_id, story, version)
+        story_janitor.touch(story_id)
+
+    update_session_story_data(story)
 
 
 def get_next_incomplete_step(story):
@@ -360,16 +506,10 @@ def index():
     if not referrer or not referrer.startswith(app_domain):
         # Clear the story file if it exists
         if "story_id" in session:
-            story_id = session["story_id"]
-            file_path = get_story_file_path(story_id)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except OSError:
-                    pass
+            delete_story_data(session["story_id"])
         session.clear()
 
-    story_types = registry.get_all_story_types()
+    story_types = get_request_catalog().story_types.get_all_story_types()
 
     # Get story and objects for left panel
     story = get_story_from_session()
@@ -390,7 +530,7 @@ def index():
 @app.route("/story_type/<story_type_name>")
 def story_type_detail(story_type_name):
     """Show details and subtypes for a specific story type."""
-    story_type = registry.get_story_type(story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story_type_name)
     if not story_type:
         return redirect(url_for("index"))
 
@@ -430,7 +570,7 @@ def story_type_detail(story_type_name):
 @app.route("/subtype/<story_type_name>/<subtype_name>")
 def subtype_detail(story_type_name, subtype_name):
     """Show subtype detail page with current story progress."""
-    story_type = registry.get_story_type(story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story_type_name)
     if not story_type:
         return redirect(url_for("index"))
 
@@ -451,7 +591,7 @@ def subtype_detail(story_type_name, subtype_name):
 
     # Get session data for the template
     story_id = get_story_id()
-    saved_selections = load_story_from_file(story_id)
+    saved_selections = load_story_data(story_id)
 
     # Get objects for left panel
     protagonist_archetype_obj = get_protagonist_archetype_object(story)
@@ -482,7 +622,7 @@ def key_theme_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access key themes
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
     if not story_type:
         flash("Invalid story type.", "error")
         return redirect(url_for("index"))
@@ -535,7 +675,7 @@ def core_arc_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access core arcs
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
     if not story_type:
         flash("Invalid story type.", "error")
         return redirect(url_for("index"))
@@ -588,7 +728,7 @@ def genre_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access details for the left panel
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
 
     # Get the subtype object
     subtype = story_type.get_subtype(story.subtype_name) if story.subtype_name else None
@@ -598,7 +738,7 @@ def genre_selection():
     writing_style_obj = get_writing_style_object(story)
     secondary_archetype_objs = get_secondary_archetype_objects(story)
 
-    genres = genre_registry.get_all_genres()
+    genres = get_request_catalog().genres.get_all_genres()
     return render_template(
         "genre_selection.html",
         genres=genres,
@@ -642,7 +782,7 @@ def subgenre_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access details for the left panel
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
 
     # Get the subtype object
     subtype = story_type.get_subtype(story.subtype_name) if story.subtype_name else None
@@ -697,7 +837,7 @@ def writing_style_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access details for the left panel
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
 
     # Get the subtype object
     subtype = story_type.get_subtype(story.subtype_name) if story.subtype_name else None
@@ -759,35 +899,21 @@ def protagonist_archetype_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access details for the left panel
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
 
     # Get the subtype object
     subtype = story_type.get_subtype(story.subtype_name) if story_type and story.subtype_name else None
 
-    # Get typical and other archetypes
-    typical_archetypes = story.get_typical_archetypes()
-    other_archetype_names = story.get_other_archetypes()
-
-    # Get archetype objects with descriptions
-    typical_archetype_objects = []
-    for name in typical_archetypes:
-        archetype = archetype_registry.get_archetype(name)
-        if archetype:
-            typical_archetype_objects.append(archetype)
-
-    other_archetype_objects = []
-    for name in other_archetype_names:
-        archetype = archetype_registry.get_archetype(name)
-        if archetype:
-            other_archetype_objects.append(archetype)
+    # Typical and other archetype objects are precomputed per sub-genre by the catalog
+    partition = story.get_archetype_partition()
 
     return render_template(
         "protagonist_archetype_selection.html",
         story=story,
         story_type=story_type,
         subtype=subtype,
-        typical_archetypes=typical_archetype_objects,
-        other_archetypes=other_archetype_objects,
+        typical_archetypes=partition.typical,
+        other_archetypes=partition.other,
         protagonist_archetype_obj=get_protagonist_archetype_object(story),
         writing_style_obj=get_writing_style_object(story),
         secondary_archetype_objs=get_secondary_archetype_objects(story),
@@ -836,37 +962,22 @@ def secondary_archetype_selection():
         return redirect(url_for("index"))
 
     # Get the story type to access details for the left panel
-    story_type = registry.get_story_type(story.story_type_name)
+    story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
 
     # Get the subtype object
     subtype = story_type.get_subtype(story.subtype_name) if story_type and story.subtype_name else None
 
-    # Get typical and other archetypes, including the already selected protagonist
-    typical_archetypes = story.get_typical_archetypes()
-    other_archetype_names = story.get_other_archetypes()
-
-    # Don't remove protagonist archetype - we want to show it as disabled
-
-    # Get archetype objects with descriptions
-    typical_archetype_objects = []
-    for name in typical_archetypes:
-        archetype = archetype_registry.get_archetype(name)
-        if archetype:
-            typical_archetype_objects.append(archetype)
-
-    other_archetype_objects = []
-    for name in other_archetype_names:
-        archetype = archetype_registry.get_archetype(name)
-        if archetype:
-            other_archetype_objects.append(archetype)
+    # Typical and other archetype objects, including the already selected protagonist
+    # (shown as disabled), are precomputed per sub-genre by the catalog
+    partition = story.get_archetype_partition()
 
     return render_template(
         "secondary_archetype_selection.html",
         story=story,
         story_type=story_type,
         subtype=subtype,
-        typical_archetypes=typical_archetype_objects,
-        other_archetypes=other_archetype_objects,
+        typical_archetypes=partition.typical,
+        other_archetypes=partition.other,
         protagonist_archetype_obj=get_protagonist_archetype_object(story),
         writing_style_obj=get_writing_style_object(story),
         secondary_archetype_objs=get_secondary_archetype_objects(story),
@@ -987,15 +1098,48 @@ def edit_plot_line():
     return redirect(url_for("secondary_archetype_selection"))
 
 
+@app.route("/api/search")
+def search_catalog():
+    """Search archetypes, styles, genres and story types for as-you-type selection filtering."""
+    query = request.args.get("q", "").strip()
+    kinds = [kind for kind in request.args.getlist("kind") if kind]
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        limit = 20
+    limit = max(1, min(limit, 200))
+
+    results = get_request_catalog().search(query, kinds=kinds or None, limit=limit) if query else []
+
+    return jsonify(
+        {
+            "query": query,
+            "results": [result.to_dict() for result in results],
+        }
+    )
+
+
+@app.route("/metrics")
+def metrics():
+    """Expose AI generation and request metrics in the Prometheus text format."""
+    return Response(get_metrics_registry().render(), content_type=METRICS_CONTENT_TYPE)
+
+
 @app.route("/save")
 def save_story():
-    """Save current story to JSON file."""
+    """Download the current story: the JSON save file, or a manuscript with ?format=md|html|epub."""
+    export_format = request.args.get("format", "json")
+    exporter = get_exporter(export_format)
+    if exporter is None:
+        flash(f"Unknown export format: {export_format}", "error")
+        return redirect(url_for("index"))
+
     story = get_story_from_session()
-    json_data = story.to_json()
 
-    response = make_response(json_data)
-    response.headers["Content-Type"] = "application/json"
-    response.headers["Content-Disposition"] = "attachment; filename=kraitif_story.json"
+    # Chapters are written (and their texts read from the store) while the
+    # response streams, so long books are never held in memory as a whole
+    response = Response(stream_with_context(exporter.iter_chunks(story)), mimetype=exporter.mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=kraitif_story.{exporter.extension}"
 
     return response
 
@@ -1014,48 +1158,58 @@ def load_story():
 
     if file and file.filename.endswith(".json"):
         try:
-            content = file.read().decode("utf-8")
-            story = Story()
-            if story.from_json(content):
-                save_story_to_session(story)
-                flash("Story loaded successfully!", "success")
-
-                # Determine the next incomplete step and redirect appropriately
-                next_step = get_next_incomplete_step(story)
-
-                if next_step == "index":
-                    return redirect(url_for("index"))
-                elif next_step == "story_type":
-                    # If we have a story type name, redirect to that story type detail page
-                    if story.story_type_name:
-                        return redirect(url_for("story_type_detail", story_type_name=story.story_type_name))
-                    else:
-                        return redirect(url_for("index"))
-                elif next_step == "key_theme_selection":
-                    return redirect(url_for("key_theme_selection"))
-                elif next_step == "core_arc_selection":
-                    return redirect(url_for("core_arc_selection"))
-                elif next_step == "genre_selection":
-                    return redirect(url_for("genre_selection"))
-                elif next_step == "subgenre_selection":
-                    return redirect(url_for("subgenre_selection"))
-                elif next_step == "writing_style_selection":
-                    return redirect(url_for("writing_style_selection"))
-                elif next_step == "protagonist_archetype_selection":
-                    return redirect(url_for("protagonist_archetype_selection"))
-                elif next_step == "secondary_archetype_selection":
-                    return redirect(url_for("secondary_archetype_selection"))
-                elif next_step == "plot_line_selected":
-                    return redirect(url_for("plot_line_selected"))
-                elif next_step == "chapter_plan":
-                    return redirect(url_for("chapter_plan"))
-                elif next_step == "complete_story_selection":
-                    return redirect(url_for("complete_story_selection"))
+            # The upload is validated and stored under a new ID as it is read, and
+            # only replaces the current story once all of it has been accepted
+            story_id = str(uuid.uuid4())
+            story_importer.import_story(
+                file.stream, story_store, story_id, build_story_header, catalog=get_request_catalog()
+            )
+            previous_story_id = session.get("story_id")
+            session["story_id"] = story_id
+            session.pop("story_data", None)
+            if previous_story_id:
+                delete_story_data(previous_story_id)
+            story_janitor.touch(story_id)
+
+            story = get_story_from_session()
+            flash("Story loaded successfully!", "success")
+
+            # Determine the next incomplete step and redirect appropriately
+            next_step = get_next_incomplete_step(story)
+
+            if next_step == "index":
+                return redirect(url_for("index"))
+            elif next_step == "story_type":
+                # If we have a story type name, redirect to that story type detail page
+                if story.story_type_name:
+                    return redirect(url_for("story_type_detail", story_type_name=story.story_type_name))
                 else:
-                    # Fallback to index if something goes wrong
                     return redirect(url_for("index"))
+            elif next_step == "key_theme_selection":
+                return redirect(url_for("key_theme_selection"))
+            elif next_step == "core_arc_selection":
+                return redirect(url_for("core_arc_selection"))
+            elif next_step == "genre_selection":
+                return redirect(url_for("genre_selection"))
+            elif next_step == "subgenre_selection":
+                return redirect(url_for("subgenre_selection"))
+            elif next_step == "writing_style_selection":
+                return redirect(url_for("writing_style_selection"))
+            elif next_step == "protagonist_archetype_selection":
+                return redirect(url_for("protagonist_archetype_selection"))
+            elif next_step == "secondary_archetype_selection":
+                return redirect(url_for("secondary_archetype_selection"))
+            elif next_step == "plot_line_selected":
+                return redirect(url_for("plot_line_selected"))
+            elif next_step == "chapter_plan":
+                return redirect(url_for("chapter_plan"))
+            elif next_step == "complete_story_selection":
+                return redirect(url_for("complete_story_selection"))
             else:
-                flash("Invalid story file format", "error")
+                # Fallback to index if something goes wrong
+                return redirect(url_for("index"))
+        except StoryImportError as e:
+            flash(str(e), "error")
         except Exception as e:
             flash(f"Error loading file: {str(e)}", "error")
     else:
@@ -1064,24 +1218,204 @@ def load_story():
     return redirect(url_for("index"))
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    """Reject uploads over the configured size limit before they are read."""
+    flash(f"File is too large (the limit is {story_importer.max_bytes // 2 ** 20} MB)", "error")
+    return redirect(url_for("index"))
+
+
+# Shown when a change is refused because the story was saved by another request meanwhile
+STORY_CONFLICT_MESSAGE = "The story was changed in another window or tab. Please reload the page and try again."
+
+
+def story_conflict_payload():
+    """Build the JSON payload reporting a refused change to a story saved meanwhile."""
+    return {"success": False, "error": STORY_CONFLICT_MESSAGE, "conflict": True}
+
+
+@app.errorhandler(StoryVersionConflict)
+def story_version_conflict(error):
+    """Refuse a change to a story that another request saved after this one loaded it."""
+    print(f"Warning: {error}; change refused")
+    if request.is_json or request.accept_mimetypes.best == "application/json":
+        return jsonify(story_conflict_payload()), 409
+    flash(STORY_CONFLICT_MESSAGE, "error")
+    return redirect(request.referrer or url_for("index"))
+
+
 @app.route("/new")
 def new_story():
     """Clear all story selections and start a new story."""
     # Clear the story file if it exists
     if "story_id" in session:
-        story_id = session["story_id"]
-        file_path = get_story_file_path(story_id)
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except OSError:
-                pass
+        delete_story_data(session["story_id"])
 
     session.clear()
     flash("New story started. All previous selections have been cleared.", "success")
     return redirect(url_for("index"))
 
 
+def wants_event_stream():
+    """Return True if the browser asked for the response as Server-Sent Events."""
+    return request.accept_mimetypes.best_match(["application/json", "text/event-stream"]) == "text/event-stream"
+
+
+def format_sse(event, data):
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_generation(prompt_text, prompt_type, story, field, finish):
+    """
+    Relay a completion to the browser as Server-Sent Events while it is generated.
+
+    Sends a "start" event at once, a "text" event ({"index", "text"}) for each
+    piece of the given string field of the response (the chapter prose, or one
+    chapter title per index), and finally a "result" event carrying the same
+    payload as the non-streaming JSON response, built by finish() from the
+    complete response text.
+
+    Args:
+        prompt_text: Prompt to send
+        prompt_type: PromptType of the prompt
+        story: Story object the prompt was built from
+        field: Name of the response field to relay as it is written
+        finish: Function taking the complete response text and returning the result payload
+    """
+
+    def generate():
+        yield format_sse("start", {"prompt_type": prompt_type.value})
+        extractor = StreamingFieldExtractor(field)
+        stream = stream_ai_response(prompt_text, prompt_type, catalog_version=story.catalog_version)
+        while True:
+            try:
+                text = next(stream)
+            except StopIteration as stop:
+                ai_response = stop.value
+                break
+            for index, piece in extractor.feed(text):
+                yield format_sse("text", {"index": index, "text": piece})
+        try:
+            result = finish(ai_response)
+        except StoryVersionConflict as e:
+            print(f"Warning: {e}; change refused")
+            result = story_conflict_payload()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        yield format_sse("result", result)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def wants_async_job():
+    """Return True if the browser asked to poll for the result instead of waiting for it (RFC 7240)."""
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def submit_generation_job(prompt_text, prompt_type, story, field=None, **context):
+    """
+    Start a completion as a generation job and answer with where to poll for it.
+
+    The request returns at once; the completion runs on the AI event loop and
+    the first poll that finds it finished stores its result (finish_generation_job()).
+
+    Args:
+        prompt_text: Prompt to send
+        prompt_type: PromptType of the prompt; also selects how the response is stored
+        story: Story object the prompt was built from
+        field: Name of the response field to pass on to the polls as it is written
+        **context: Values needed to store the response (chapter_number)
+
+    Returns:
+        202 response with the job ID and poll URL
+    """
+    story_id = get_story_id()
+    job = generation_jobs.submit(
+        prompt_text, prompt_type, story_id, catalog_version=story.catalog_version, field=field,
+        context=dict(context, version=get_tracked_version(story_id, story)),
+    )
+    return jsonify({
+        "success": True,
+        "job_id": job.job_id,
+        "poll_url": url_for("generation_job_status", job_id=job.job_id),
+    }), 202
+
+
+@app.route("/generation-jobs/<job_id>")
+def generation_job_status(job_id):
+    """
+    Report a generation job's progress, and its result once the completion has ended.
+
+    The "after" query parameter is the number of text pieces the page already
+    has. The response holds the pieces ({"index", "text"}) that followed, "next"
+    for the next poll, "done" and, when done, the "result" payload the route
+    returns without a job.
+    """
+    job = generation_jobs.get(job_id, get_story_id())
+    if job is None:
+        return jsonify({"success": False, "error": "The generation job is unknown or has expired."}), 404
+
+    after = max(0, request.args.get("after", 0, type=int))
+    # Checked before reading the pieces, so the last poll gets all of them
+    done = job.done
+    events = job.get_events(after)
+    payload = {"done": done, "events": events, "next": after + len(events)}
+    if done:
+        payload["result"] = finish_generation_job(job)
+    return jsonify(payload)
+
+
+def finish_generation_job(job):
+    """
+    Parse and store the response of a finished generation job, once.
+
+    Args:
+        job: Finished GenerationJob of the session's story
+
+    Returns:
+        dict: Response payload for the browser (the same for every poll)
+    """
+    with job.finish_lock:
+        if job.result is None:
+            try:
+                job.result = _finish_generation_job(job)
+            except StoryVersionConflict as e:
+                print(f"Warning: {e}; change refused")
+                job.result = story_conflict_payload()
+            except Exception as e:
+                job.result = {"success": False, "error": str(e)}
+        return job.result
+
+
+def _finish_generation_job(job):
+    """Store a finished job's response in the story (finish_generation_job() without the once-only guard)."""
+    story = get_story_from_session()
+
+    # The prompt was built from the story as it was when the job started
+    if get_tracked_version(job.owner, story) != job.context["version"]:
+        print(f"Warning: Story {job.owner} was saved while generation job {job.job_id} ran; result refused")
+        return story_conflict_payload()
+
+    if job.prompt_type == PromptType.CHAPTER:
+        chapter_number = job.context["chapter_number"]
+        existing_chapter = story.get_chapter(chapter_number)
+        if not existing_chapter:
+            return {"success": False, "error": f"Chapter {chapter_number} does not exist in the story plan."}
+        return finish_chapter(story, existing_chapter, job.response)
+
+    finish = {
+        PromptType.PLOT_LINES: finish_plot_lines,
+        PromptType.CHARACTERS: finish_characters,
+        PromptType.CHAPTER_OUTLINE: finish_chapter_plan,
+    }[job.prompt_type]
+    return finish(story, job.response)
+
+
 @app.route("/generate-plot-lines", methods=["POST"])
 def generate_plot_lines():
     """Generate plot lines using AI based on the current story configuration."""
@@ -1095,25 +1429,41 @@ def generate_plot_lines():
         # Generate the prompt text
         prompt_text = prompt_generator.generate_plot_prompt(story)
 
+        # Run the completion in the background if the page polls for it
+        if wants_async_job():
+            return submit_generation_job(prompt_text, PromptType.PLOT_LINES, story)
+
         # Get AI response
-        ai_response = get_ai_response(prompt_text, PromptType.PLOT_LINES)
+        ai_response = get_ai_response(prompt_text, PromptType.PLOT_LINES, catalog_version=story.catalog_version)
+        return jsonify(finish_plot_lines(story, ai_response))
 
-        # Parse plot lines from the response
-        plot_lines = parse_plot_lines_from_ai_response(ai_response)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
 
-        # Convert to dictionaries for JSON response
-        plot_lines_data = [plot_line.to_dict() for plot_line in plot_lines]
 
-        return jsonify(
-            {
-                "success": True,
-                "plot_lines": plot_lines_data,
-                "ai_response": ai_response,  # Include for debugging if needed
-            }
-        )
+def finish_plot_lines(story, ai_response):
+    """
+    Parse generated plot lines.
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+    Args:
+        story: Story object the plot lines were generated for
+        ai_response: Complete AI response text
+
+    Returns:
+        dict: Response payload for the browser
+    """
+    if isinstance(ai_response, AIError):
+        return ai_response.to_dict()
+
+    # Parse plot lines from the response
+    plot_lines = parse_plot_lines_from_ai_response(ai_response)
+    get_metrics_registry().record_parse(PromptType.PLOT_LINES, bool(plot_lines))
+
+    return {
+        "success": True,
+        "plot_lines": [plot_line.to_dict() for plot_line in plot_lines],
+        "ai_response": ai_response,  # Include for debugging if needed
+    }
 
 
 @app.route("/select-plot-line", methods=["POST"])
@@ -1144,6 +1494,9 @@ def select_plot_line():
         else:
             return jsonify({"success": False, "error": "Failed to set selected plot line"}), 400
 
+    except StoryVersionConflict:
+        # Answered with 409 by story_version_conflict()
+        raise
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -1162,7 +1515,7 @@ def plot_line_selected():
     story_type = None
     subtype = None
     if story.story_type_name:
-        story_type = registry.get_story_type(story.story_type_name)
+        story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
         if story_type and story.subtype_name:
             subtype = story_type.get_subtype(story.subtype_name)
 
@@ -1179,9 +1532,9 @@ def plot_line_selected():
         protagonist_archetype_obj=protagonist_archetype_obj,
         secondary_archetype_objs=secondary_archetype_objs,
         writing_style_obj=writing_style_obj,
-        genre_registry=genre_registry,
-        archetype_registry=archetype_registry,
-        style_registry=style_registry,
+        genre_registry=get_request_catalog().genres,
+        archetype_registry=get_request_catalog().archetypes,
+        style_registry=get_request_catalog().styles,
     )
 
 
@@ -1202,35 +1555,58 @@ def generate_characters():
         # Generate the prompt text
         prompt_text = prompt_generator.generate_character_prompt(story)
 
+        # Run the completion in the background if the page polls for it
+        if wants_async_job():
+            return submit_generation_job(prompt_text, PromptType.CHARACTERS, story)
+
         # Get AI response
-        ai_response = get_ai_response(prompt_text, PromptType.CHARACTERS)
+        ai_response = get_ai_response(prompt_text, PromptType.CHARACTERS, catalog_version=story.catalog_version)
+        return jsonify(finish_characters(story, ai_response))
 
-        # Parse characters and expanded plot line from the response
-        expanded_plot_line, characters = parse_characters_from_ai_response(ai_response)
+    except StoryVersionConflict:
+        # Answered with 409 by story_version_conflict()
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
 
-        # Update the story with the results
-        if expanded_plot_line:
-            story.set_expanded_plot_line(expanded_plot_line)
 
-        # Clear existing characters and add new ones
-        story.characters.clear()
-        for character in characters:
-            story.add_character(character)
+def finish_characters(story, ai_response):
+    """
+    Parse and store generated characters and the expanded plot line.
 
-        # Save to session
-        save_story_to_session(story)
+    Args:
+        story: Story object the characters were generated for
+        ai_response: Complete AI response text
 
-        return jsonify(
-            {
-                "success": True,
-                "expanded_plot_line": expanded_plot_line,
-                "characters": [char.to_dict() for char in characters],
-                "ai_response": ai_response,  # Include for debugging if needed
-            }
-        )
+    Returns:
+        dict: Response payload for the browser
+    """
+    if isinstance(ai_response, AIError):
+        # Keep the existing characters rather than clearing them
+        return ai_response.to_dict()
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+    # Parse characters and expanded plot line from the response
+    expanded_plot_line, characters = parse_characters_from_ai_response(ai_response)
+    get_metrics_registry().record_parse(PromptType.CHARACTERS, bool(characters))
+
+    # Update the story with the results
+    if expanded_plot_line:
+        story.set_expanded_plot_line(expanded_plot_line)
+
+    # Clear existing characters and add new ones
+    story.characters.clear()
+    for character in characters:
+        story.add_character(character)
+
+    # Save to session
+    save_story_to_session(story)
+
+    return {
+        "success": True,
+        "expanded_plot_line": expanded_plot_line,
+        "characters": [char.to_dict() for char in characters],
+        "ai_response": ai_response,  # Include for debugging if needed
+    }
 
 
 @app.route("/expanded-story")
@@ -1251,7 +1627,7 @@ def expanded_story():
     story_type = None
     subtype = None
     if story.story_type_name:
-        story_type = registry.get_story_type(story.story_type_name)
+        story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
         if story_type and story.subtype_name:
             subtype = story_type.get_subtype(story.subtype_name)
 
@@ -1268,16 +1644,16 @@ def expanded_story():
         protagonist_archetype_obj=protagonist_archetype_obj,
         secondary_archetype_objs=secondary_archetype_objs,
         writing_style_obj=writing_style_obj,
-        genre_registry=genre_registry,
-        archetype_registry=archetype_registry,
-        style_registry=style_registry,
+        genre_registry=get_request_catalog().genres,
+        archetype_registry=get_request_catalog().archetypes,
+        style_registry=get_request_catalog().styles,
     )
 
 
 @app.route("/chapter-plan")
 def chapter_plan():
     """Show the chapter plan page with detailed chapter outlines."""
-    story = get_story_from_session()
+    story = get_story_from_session(include_details=True)
 
     # Check if we have the required data
     if not story.selected_plot_line:
@@ -1296,7 +1672,7 @@ def chapter_plan():
     story_type = None
     subtype = None
     if story.story_type_name:
-        story_type = registry.get_story_type(story.story_type_name)
+        story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
         if story_type and story.subtype_name:
             subtype = story_type.get_subtype(story.subtype_name)
 
@@ -1313,9 +1689,9 @@ def chapter_plan():
         protagonist_archetype_obj=protagonist_archetype_obj,
         secondary_archetype_objs=secondary_archetype_objs,
         writing_style_obj=writing_style_obj,
-        genre_registry=genre_registry,
-        archetype_registry=archetype_registry,
-        style_registry=style_registry,
+        genre_registry=get_request_catalog().genres,
+        archetype_registry=get_request_catalog().archetypes,
+        style_registry=get_request_catalog().styles,
         is_chapter_plan_page=True,
     )
 
@@ -1337,44 +1713,71 @@ def generate_chapters():
         # Generate the prompt text using chapter outline prompt
         prompt_text = prompt_generator.generate_chapter_outline_prompt(story)
 
+        # Run the completion in the background if the page polls for it
+        if wants_async_job():
+            return submit_generation_job(prompt_text, PromptType.CHAPTER_OUTLINE, story, "title")
+
+        # Stream the chapter titles as they are written if the browser asked for events
+        if wants_event_stream():
+            return stream_generation(
+                prompt_text, PromptType.CHAPTER_OUTLINE, story, "title", partial(finish_chapter_plan, story)
+            )
+
         # Get AI response
-        ai_response = get_ai_response(prompt_text, PromptType.CHAPTER_OUTLINE)
+        ai_response = get_ai_response(prompt_text, PromptType.CHAPTER_OUTLINE, catalog_version=story.catalog_version)
+        return jsonify(finish_chapter_plan(story, ai_response))
 
-        # Parse chapters from the response
-        chapters = parse_chapters_from_ai_response(ai_response)
+    except StoryVersionConflict:
+        # Answered with 409 by story_version_conflict()
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
 
-        # Validate that all character names in chapters exist in story
-        story_character_names = [char.name for char in story.characters]
-        missing_characters = validate_chapter_character_names(chapters, story_character_names)
 
-        if missing_characters:
-            return jsonify(
-                {
-                    "success": False,
-                    "error": "character_validation",
-                    "missing_characters": missing_characters,
-                    "message": f'Some characters referenced in chapters do not exist in the story: {", ".join(missing_characters)}',
-                }
-            )
+def finish_chapter_plan(story, ai_response):
+    """
+    Parse, validate and store a generated chapter plan.
 
-        # Clear existing chapters and add new ones
-        story.chapters.clear()
-        for chapter in chapters:
-            story.add_chapter(chapter)
+    Args:
+        story: Story object the plan was generated for
+        ai_response: Complete AI response text
 
-        # Save to session
-        save_story_to_session(story)
+    Returns:
+        dict: Response payload for the browser
+    """
+    if isinstance(ai_response, AIError):
+        # Keep the existing plan rather than replacing it with nothing
+        return ai_response.to_dict()
 
-        return jsonify(
-            {
-                "success": True,
-                "chapters": [chapter.to_dict() for chapter in chapters],
-                "ai_response": ai_response,  # Include for debugging if needed
-            }
-        )
+    # Parse chapters from the response
+    chapters = parse_chapters_from_ai_response(ai_response)
+    get_metrics_registry().record_parse(PromptType.CHAPTER_OUTLINE, bool(chapters))
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+    # Validate that all character names in chapters exist in story
+    story_character_names = [char.name for char in story.characters]
+    missing_characters = validate_chapter_character_names(chapters, story_character_names)
+
+    if missing_characters:
+        return {
+            "success": False,
+            "error": "character_validation",
+            "missing_characters": missing_characters,
+            "message": f'Some characters referenced in chapters do not exist in the story: {", ".join(missing_characters)}',
+        }
+
+    # Clear existing chapters and add new ones
+    story.chapters.clear()
+    for chapter in chapters:
+        story.add_chapter(chapter)
+
+    # Save to session
+    save_story_to_session(story)
+
+    return {
+        "success": True,
+        "chapters": [chapter.to_dict() for chapter in chapters],
+        "ai_response": ai_response,  # Include for debugging if needed
+    }
 
 
 @app.route("/generate-chapter/<int:chapter_number>", methods=["POST"])
@@ -1402,60 +1805,92 @@ def generate_chapter(chapter_number):
         # Generate the prompt text using chapter prompt
         prompt_text = prompt_generator.generate_chapter_prompt(story, chapter_number)
 
+        # Run the completion in the background if the page polls for it
+        if wants_async_job():
+            return submit_generation_job(
+                prompt_text, PromptType.CHAPTER, story, "chapter_text", chapter_number=chapter_number
+            )
+
+        # Stream the prose as it is written if the browser asked for events
+        if wants_event_stream():
+            return stream_generation(
+                prompt_text, PromptType.CHAPTER, story, "chapter_text",
+                partial(finish_chapter, story, existing_chapter),
+            )
+
         # Get AI response
-        ai_response = get_ai_response(prompt_text, PromptType.CHAPTER)
+        ai_response = get_ai_response(prompt_text, PromptType.CHAPTER, catalog_version=story.catalog_version)
+        return jsonify(finish_chapter(story, existing_chapter, ai_response))
 
-        # Parse chapter from the response
-        generated_chapter = parse_single_chapter_from_ai_response(ai_response, chapter_number)
+    except StoryVersionConflict:
+        # Answered with 409 by story_version_conflict()
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
 
-        if not generated_chapter:
-            return jsonify({"success": False, "error": "Failed to parse chapter from AI response"})
 
-        # Validate that all character names in chapter exist in story
-        story_character_names = [char.name for char in story.characters]
-        chapter_missing_chars = []
+def finish_chapter(story, existing_chapter, ai_response):
+    """
+    Parse, validate and store a generated chapter.
 
-        # Check continuity state for character references
-        if generated_chapter.continuity_state:
-            for cont_char in generated_chapter.continuity_state.characters:
-                if cont_char.name.lower() not in [name.lower() for name in story_character_names]:
-                    chapter_missing_chars.append(cont_char.name)
+    Args:
+        story: Story object the chapter belongs to
+        existing_chapter: Planned chapter to fill in
+        ai_response: Complete AI response text
 
-        if chapter_missing_chars:
-            return jsonify(
-                {
-                    "success": False,
-                    "error": "character_validation",
-                    "missing_characters": chapter_missing_chars,
-                    "message": f'Some characters referenced in chapter do not exist in the story: {", ".join(chapter_missing_chars)}',
-                }
-            )
+    Returns:
+        dict: Response payload for the browser
+    """
+    if isinstance(ai_response, AIError):
+        return ai_response.to_dict()
 
-        # Update the existing chapter with generated content
-        existing_chapter.chapter_text = generated_chapter.chapter_text
-        existing_chapter.summary = generated_chapter.summary
-        existing_chapter.continuity_state = generated_chapter.continuity_state
+    chapter_number = existing_chapter.chapter_number
 
-        # Save to session
-        save_story_to_session(story)
+    # Parse chapter from the response
+    generated_chapter = parse_single_chapter_from_ai_response(ai_response, chapter_number)
+    get_metrics_registry().record_parse(PromptType.CHAPTER, generated_chapter is not None)
 
-        return jsonify(
-            {
-                "success": True,
-                "chapter": existing_chapter.to_dict(),
-                "redirect_url": url_for("chapter_detail", chapter_number=chapter_number),
-                "ai_response": ai_response,  # Include for debugging if needed
-            }
-        )
+    if not generated_chapter:
+        return {"success": False, "error": "Failed to parse chapter from AI response"}
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+    # Validate that all character names in chapter exist in story
+    story_character_names = [char.name for char in story.characters]
+    chapter_missing_chars = []
+
+    # Check continuity state for character references
+    if generated_chapter.continuity_state:
+        for cont_char in generated_chapter.continuity_state.characters:
+            if cont_char.name.lower() not in [name.lower() for name in story_character_names]:
+                chapter_missing_chars.append(cont_char.name)
+
+    if chapter_missing_chars:
+        return {
+            "success": False,
+            "error": "character_validation",
+            "missing_characters": chapter_missing_chars,
+            "message": f'Some characters referenced in chapter do not exist in the story: {", ".join(chapter_missing_chars)}',
+        }
+
+    # Update the existing chapter with generated content
+    existing_chapter.chapter_text = generated_chapter.chapter_text
+    existing_chapter.summary = generated_chapter.summary
+    existing_chapter.continuity_state = generated_chapter.continuity_state
+
+    # Only the updated chapter's rows are written
+    save_story_to_session(story)
+
+    return {
+        "success": True,
+        "chapter": existing_chapter.to_dict(),
+        "redirect_url": url_for("chapter_detail", chapter_number=chapter_number),
+        "ai_response": ai_response,  # Include for debugging if needed
+    }
 
 
 @app.route("/chapter/<int:chapter_number>")
 def chapter_detail(chapter_number):
     """Show details for a specific chapter."""
-    story = get_story_from_session()
+    story = get_story_from_session(include_details=True)
 
     # Check if we have the required data
     if not story.chapters:
@@ -1472,7 +1907,7 @@ def chapter_detail(chapter_number):
     story_type = None
     subtype = None
     if story.story_type_name:
-        story_type = registry.get_story_type(story.story_type_name)
+        story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
         if story_type and story.subtype_name:
             subtype = story_type.get_subtype(story.subtype_name)
 
@@ -1491,9 +1926,9 @@ def chapter_detail(chapter_number):
         protagonist_archetype_obj=protagonist_archetype_obj,
         secondary_archetype_objs=secondary_archetype_objs,
         writing_style_obj=writing_style_obj,
-        genre_registry=genre_registry,
-        archetype_registry=archetype_registry,
-        style_registry=style_registry,
+        genre_registry=get_request_catalog().genres,
+        archetype_registry=get_request_catalog().archetypes,
+        style_registry=get_request_catalog().styles,
         is_chapter_detail_page=True,
     )
 
@@ -1650,7 +2085,7 @@ def complete_story_selection():
     story_type = None
     subtype = None
     if story.story_type_name and story.subtype_name:
-        story_type = registry.get_story_type(story.story_type_name)
+        story_type = get_request_catalog().story_types.get_story_type(story.story_type_name)
         if story_type:
             subtype = story_type.get_subtype(story.subtype_name)
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-request Story construction.
+
+Compares the old behaviour, where every Story built its own registries from the
+data files, against the shared process-wide catalog snapshot.
+
+Usage:
+    python3 benchmarks/bench_catalog.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects.catalog import Catalog, get_catalog
+from objects.story import Story
+
+
+def build_story(catalog):
+    """Hydrate a story the way get_story_from_session() does for a typical request."""
+    story = Story(catalog=catalog)
+    story.story_type_name = "The Quest"
+    story.subtype_name = "Spiritual Quest"
+    story.set_genre("Fantasy")
+    story.set_sub_genre("High Fantasy")
+    story.set_writing_style("Lyrical")
+    story.set_protagonist_archetype("Chosen One")
+    return story
+
+
+def per_request_registries():
+    """Old path: every request re-reads and re-parses all data files."""
+    return build_story(Catalog())
+
+
+def per_request_shared():
+    """New path: every request reuses the shared catalog snapshot."""
+    return build_story(get_catalog())
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    # Warm the shared catalog so only per-request cost is measured
+    get_catalog()
+
+    before = timeit.timeit(per_request_registries, number=iterations)
+    after = timeit.timeit(per_request_shared, number=iterations)
+
+    before_us = before / iterations * 1e6
+    after_us = after / iterations * 1e6
+
+    print(f"Story hydration, {iterations} iterations")
+    print(f"  per-story registries : {before_us:10.1f} us/request")
+    print(f"  shared catalog       : {after_us:10.1f} us/request")
+    if after_us > 0:
+        print(f"  speedup              : {before_us / after_us:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Start-up timing report for the two catalog load paths.
+
+Each sample runs in a fresh interpreter so that import and load costs are
+measured the way a newly scaled-up worker would see them.
+
+Usage:
+    python3 benchmarks/bench_catalog_startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script run in each child interpreter; prints import and load times in ms
+CHILD_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import objects.catalog as catalog_module
+imported = time.perf_counter()
+catalog_module.load_catalog(use_bundle={use_bundle})
+loaded = time.perf_counter()
+print((imported - start) * 1000, (loaded - imported) * 1000)
+"""
+
+
+def sample(use_bundle):
+    """Run one cold start and return (import_ms, load_ms)."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", CHILD_SCRIPT.format(use_bundle=use_bundle)],
+        cwd=ROOT_DIR,
+    )
+    import_ms, load_ms = output.decode("utf-8").split()
+    return float(import_ms), float(load_ms)
+
+
+def report(label, samples):
+    """Print median timings for a list of samples."""
+    import_ms = statistics.median(s[0] for s in samples)
+    load_ms = statistics.median(s[1] for s in samples)
+    print(f"  {label:<14} import {import_ms:8.2f} ms   load {load_ms:8.2f} ms   total {import_ms + load_ms:8.2f} ms")
+    return import_ms + load_ms
+
+
+def main():
+    """Compare JSON parsing against the compiled bundle."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    # Make sure the bundle is fresh before timing the bundle path
+    sys.path.insert(0, ROOT_DIR)
+    from objects.catalog import build_bundle
+    build_bundle()
+
+    json_samples = [sample(False) for _ in range(runs)]
+    bundle_samples = [sample(True) for _ in range(runs)]
+
+    print(f"Catalog cold start, median of {runs} fresh interpreters")
+    json_total = report("parse JSON", json_samples)
+    bundle_total = report("load bundle", bundle_samples)
+    if bundle_total > 0:
+        print(f"  speedup        {json_total / bundle_total:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
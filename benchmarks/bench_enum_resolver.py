@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark enum resolution while parsing AI character responses.
+
+Builds a STRUCTURED_DATA response with thousands of synthetic characters whose
+archetype, functional role and emotional function names are spelled the way
+the AI tends to return them (exact, different case, extra punctuation, partial
+names and typos), then compares the previous linear-scan helpers against the
+shared EnumResolver.
+
+Usage:
+    python3 benchmarks/bench_enum_resolver.py [characters]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import objects.character_parser as character_parser
+from objects.character_parser import parse_characters_from_ai_response
+from objects.archetype import ArchetypeEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.emotional_function import EmotionalFunctionEnum
+
+
+def legacy_find(enum_cls, text, word_matching=False):
+    """The previous linear-scan lookup from character_parser."""
+    clean = text.strip()
+    for member in enum_cls:
+        if member.value == clean:
+            return member
+    for member in enum_cls:
+        if member.value.lower() == clean.lower():
+            return member
+    for member in enum_cls:
+        if clean.lower() in member.value.lower() or member.value.lower() in clean.lower():
+            return member
+    if word_matching:
+        words = set(clean.lower().split())
+        for member in enum_cls:
+            enum_words = set(member.value.lower().split())
+            if words <= enum_words:
+                return member
+            if len(words) == len(enum_words):
+                matches = 0
+                for word in words:
+                    for enum_word in enum_words:
+                        if word in enum_word or enum_word in word:
+                            matches += 1
+                            break
+                if matches == len(words):
+                    return member
+    return None
+
+
+def vary(name, rng):
+    """Return a spelling of an enum value like the ones seen in AI output."""
+    choice = rng.random()
+    if choice < 0.5:
+        return name
+    if choice < 0.7:
+        return name.lower()
+    if choice < 0.8:
+        return f" {name.upper()} "
+    if choice < 0.9 and " " in name:
+        return name.split(" ")[-1]
+    if len(name) > 6:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    return name
+
+
+def build_response(count, seed=7):
+    """Build an AI response containing count synthetic characters."""
+    rng = random.Random(seed)
+    archetypes = [a.value for a in ArchetypeEnum]
+    roles = [r.value for r in FunctionalRoleEnum]
+    emotions = [e.value for e in EmotionalFunctionEnum]
+    characters = [
+        {
+            "name": f"Character {i}",
+            "archetype": vary(rng.choice(archetypes), rng),
+            "functional_role": vary(rng.choice(roles), rng),
+            "emotional_function": vary(rng.choice(emotions), rng),
+            "backstory": "A backstory.",
+            "character_arc": "An arc.",
+        }
+        for i in range(count)
+    ]
+    data = {"expanded_plot_line": "Plot.", "characters": characters}
+    return f"<STRUCTURED_DATA>\n{json.dumps(data)}\n</STRUCTURED_DATA>"
+
+
+def time_parse(response):
+    """Parse the response and return (seconds, characters parsed)."""
+    start = time.perf_counter()
+    _, characters = parse_characters_from_ai_response(response)
+    return time.perf_counter() - start, len(characters)
+
+
+def main():
+    """Run both resolvers over the same synthetic response."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    response = build_response(count)
+
+    resolver_find = (
+        character_parser._find_archetype_enum,
+        character_parser._find_functional_role_enum,
+        character_parser._find_emotional_function_enum,
+    )
+    try:
+        character_parser._find_archetype_enum = lambda s: legacy_find(ArchetypeEnum, s)
+        character_parser._find_functional_role_enum = lambda s: legacy_find(FunctionalRoleEnum, s, True)
+        character_parser._find_emotional_function_enum = lambda s: legacy_find(EmotionalFunctionEnum, s)
+        legacy_seconds, legacy_parsed = time_parse(response)
+    finally:
+        (
+            character_parser._find_archetype_enum,
+            character_parser._find_functional_role_enum,
+            character_parser._find_emotional_function_enum,
+        ) = resolver_find
+
+    resolver_seconds, resolver_parsed = time_parse(response)
+
+    print(f"Parsing {count} synthetic characters")
+    print(f"  linear scans  : {legacy_seconds * 1000:8.1f} ms ({legacy_parsed} resolved)")
+    print(f"  enum resolver : {resolver_seconds * 1000:8.1f} ms ({resolver_parsed} resolved)")
+    if resolver_seconds > 0:
+        print(f"  speed-up      : {legacy_seconds / resolver_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load test of the generation routes against the fake LLM server.
+
+Starts ai/fake_llm_server.py in process and points the app at it through
+KRAITIF_AI_ENDPOINT and KRAITIF_AI_API_KEY, with a throwaway story
+database. Each simulated user then walks the generation flow through the
+Flask routes (plot lines, plot line selection, characters, chapter plan and
+the first chapters, streamed as the browser requests them) on its own
+thread, so the whole pipeline is measured: sessions, the story store,
+prompt building, the AI client with routing, retries and single-flight,
+parsing and saving. The response cache is turned off so every generation
+reaches the server.
+
+Usage:
+    python3 benchmarks/bench_generation_pipeline.py [users] [chapters per user]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from ai.fake_llm_server import FakeLLMConfig, start_fake_llm_server
+
+# Fast enough for a laptop run, slow enough that requests overlap
+FAKE_CONFIG = FakeLLMConfig(latency="lognormal", latency_seconds=0.2, latency_spread=0.4, tokens_per_second=2000,
+                            rate_limit_rate=0.02, retry_after_seconds=0.2, malformed_rate=0.02, seed=7)
+
+
+def run_user(app_module, user, chapters, timings):
+    """Walk one user's story through the generation routes, recording each route's latency."""
+    client = app_module.app.test_client()
+    story_id = str(uuid.uuid4())
+    with client.session_transaction() as session:
+        session["story_id"] = story_id
+
+    # Seed the wizard selections so the generation routes accept the story
+    from objects.story import Story
+    story = Story()
+    story.set_story_type_selection("The Quest", "Spiritual Quest", key_theme=f"Finding home (reader {user})")
+    story.set_genre("Fantasy")
+    story.set_sub_genre("High Fantasy")
+    story.set_writing_style("Lyrical")
+    with app_module.app.test_request_context():
+        app_module.save_story_data(story_id, app_module.build_story_data(story))
+
+    def post(route, label, **kwargs):
+        start = time.perf_counter()
+        response = client.post(route, **kwargs)
+        body = response.get_data(as_text=True)
+        ok = response.status_code == 200 and '"error"' not in body
+        timings.setdefault(label, []).append((time.perf_counter() - start, ok))
+        return response
+
+    plot_lines = post("/generate-plot-lines", "plot lines").get_json() or {}
+    choices = plot_lines.get("plot_lines") or [{"name": "Fallback", "plotline": "A journey home."}]
+    post("/select-plot-line", "select plot line", json=choices[0])
+    post("/generate-characters", "characters")
+    post("/generate-chapters", "chapter plan")
+    for number in range(1, chapters + 1):
+        post(f"/generate-chapter/{number}", "chapter (streamed)", headers={"Accept": "text/event-stream"})
+
+
+def report(timings, elapsed, stats):
+    """Print latency percentiles per route and the server's request counts."""
+    print(f"  {'route':<20} {'count':>5} {'failed':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for label, samples in timings.items():
+        seconds = sorted(sample for sample, _ in samples)
+        failed = sum(1 for _, ok in samples if not ok)
+        p95 = seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))]
+        print(f"  {label:<20} {len(seconds):>5} {failed:>6} {statistics.median(seconds) * 1000:9.1f} "
+              f"{p95 * 1000:9.1f} {seconds[-1] * 1000:9.1f}")
+    requests = sum(len(samples) for samples in timings.values())
+    print(f"  {requests} requests in {elapsed:.2f} s ({requests / elapsed:.1f} requests/s)")
+    print(f"  fake server: {stats['requests']} completions {stats['prompt_types']}")
+
+
+def main():
+    """Run the simulated users against the fake server and report."""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    chapters = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    server = start_fake_llm_server(FAKE_CONFIG)
+    temp_dir = tempfile.mkdtemp()
+    os.environ["KRAITIF_AI_ENDPOINT"] = server.url
+    os.environ["KRAITIF_AI_API_KEY"] = "fake"
+    os.environ["KRAITIF_STORY_DB"] = os.path.join(temp_dir, "stories.db")
+    try:
+        import app as app_module
+        import ai.ai_client as ai_client
+        ai_client.USE_CACHE = False
+        # Build the client first so the SDK import is not timed as the first request
+        ai_client.warm_up_ai_client()
+
+        # The routes log prompts and responses; keep them out of the report
+        timings = {}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=users) as executor:
+            for future in [executor.submit(run_user, app_module, user, chapters, timings) for user in range(users)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        print(f"{users} users, {chapters} chapters each, against {server.url}")
+        report(timings, elapsed, server.get_stats())
+    finally:
+        server.stop()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Time from `python launch.py` until the first request is served.
+
+Compares fast-start mode (AI stack imported on first generation request)
+against eager mode (AI SDK imported and client built at app import).
+
+Usage:
+    python3 benchmarks/bench_launch.py [runs]
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    """Return a currently unused local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(fast_start, timeout=60.0):
+    """Launch the app and return seconds until GET / succeeds."""
+    port = free_port()
+    env = dict(os.environ)
+    env.update(
+        {
+            "KRAITIF_PORT": str(port),
+            "KRAITIF_DEBUG": "0",
+            "KRAITIF_FAST_START": "1" if fast_start else "0",
+            "KRAITIF_AI_WARMUP": "0",
+        }
+    )
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "launch.py"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/"
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("Server did not answer in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    """Run both modes and print the median time to first request."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    results = {}
+    for label, fast_start in (("fast-start", True), ("eager AI stack", False)):
+        samples = [time_to_first_request(fast_start) for _ in range(runs)]
+        results[label] = statistics.median(samples)
+
+    print(f"Time from launch to first served request, median of {runs} runs")
+    for label, seconds in results.items():
+        print(f"  {label:<15} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark story hydration with eager and lazy chapter details.
+
+Stores a story with the given number of fully generated chapters, then times
+get_story_from_session() with the story cache disabled, as on a page that does
+not read chapter texts. Eager hydration loads every text and continuity state;
+lazy hydration loads chapter headers only. Peak allocated memory per request is
+measured with tracemalloc.
+
+Usage:
+    python3 benchmarks/bench_lazy_chapters.py [chapters] [requests]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DIR = tempfile.mkdtemp()
+os.environ["KRAITIF_STORY_STORE"] = "sqlite"
+os.environ["KRAITIF_STORY_DB"] = os.path.join(TEMP_DIR, "stories.db")
+
+from flask import session
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.continuity_state import ContinuityState
+from storage import StoryCache
+
+CHAPTER_TEXT = ("The road wound on through the hills as the company pressed forward. " * 450).strip()
+
+
+def build_story(chapter_count):
+    """Build a story with chapter_count generated chapters."""
+    story = Story()
+    story.set_story_type_selection("The Quest", "Spiritual Quest")
+    story.set_genre("Fantasy")
+    for number in range(1, chapter_count + 1):
+        state = ContinuityState()
+        for location in range(10):
+            state.add_location(f"Location {number}.{location}")
+        story.add_chapter(Chapter(
+            chapter_number=number, title=f"Chapter {number}", overview="Overview. " * 20,
+            chapter_text=CHAPTER_TEXT, summary="Summary. " * 20, continuity_state=state,
+        ))
+    return story
+
+
+def load_story():
+    """Run one request that loads the story."""
+    with app.test_request_context():
+        session["story_id"] = "bench"
+        get_story_from_session()
+
+
+def time_requests(count):
+    """Time count requests and measure the peak memory of one."""
+    start = time.perf_counter()
+    for _ in range(count):
+        load_story()
+    elapsed = (time.perf_counter() - start) / count
+
+    tracemalloc.start()
+    load_story()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """Compare eager and lazy hydration."""
+    chapter_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    store = app_module.story_store
+    lazy_load = store.load_versioned
+    try:
+        with app.test_request_context():
+            session["story_id"] = "bench"
+            save_story_to_session(build_story(chapter_count))
+        app_module.story_cache = StoryCache(max_entries=0)
+
+        store.load_versioned = lambda story_id, include_details=True: lazy_load(story_id)
+        eager_time, eager_peak = time_requests(request_count)
+        store.load_versioned = lazy_load
+        lazy_time, lazy_peak = time_requests(request_count)
+    finally:
+        store.close()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    print(f"Hydrating a {chapter_count}-chapter story without the cache, {request_count} requests")
+    print(f"  eager details : {eager_time * 1000:8.3f} ms/request  peak {eager_peak / 1024:8.1f} KiB")
+    print(f"  lazy details  : {lazy_time * 1000:8.3f} ms/request  peak {lazy_peak / 1024:8.1f} KiB")
+    if lazy_time > 0:
+        print(f"  speed-up      : {eager_time / lazy_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
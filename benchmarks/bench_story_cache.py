@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request story hydration with and without the story cache.
+
+Stores a story with the given number of fully generated chapters, then times
+get_story_from_session() across repeated requests, first rebuilding the Story
+every time and then reusing the cached one.
+
+Usage:
+    python3 benchmarks/bench_story_cache.py [chapters] [requests]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DIR = tempfile.mkdtemp()
+os.environ["KRAITIF_STORY_STORE"] = "sqlite"
+os.environ["KRAITIF_STORY_DB"] = os.path.join(TEMP_DIR, "stories.db")
+
+from flask import session
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.continuity_state import ContinuityState
+from storage import StoryCache
+
+CHAPTER_TEXT = ("The road wound on through the hills as the company pressed forward. " * 450).strip()
+
+
+def build_story(chapter_count):
+    """Build a story with chapter_count generated chapters."""
+    story = Story()
+    story.set_story_type_selection("The Quest", "Spiritual Quest")
+    story.set_genre("Fantasy")
+    for number in range(1, chapter_count + 1):
+        state = ContinuityState()
+        state.add_location(f"Location {number}")
+        story.add_chapter(Chapter(
+            chapter_number=number, title=f"Chapter {number}", overview="Overview. " * 20,
+            chapter_text=CHAPTER_TEXT, summary="Summary. " * 20, continuity_state=state,
+        ))
+    return story
+
+
+def time_requests(count):
+    """Time count requests that each load the story."""
+    start = time.perf_counter()
+    for _ in range(count):
+        with app.test_request_context():
+            session["story_id"] = "bench"
+            get_story_from_session()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    """Compare hydration cost with and without the cache."""
+    chapter_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    try:
+        with app.test_request_context():
+            session["story_id"] = "bench"
+            save_story_to_session(build_story(chapter_count))
+
+        app_module.story_cache = StoryCache(max_entries=0)
+        uncached = time_requests(request_count)
+        app_module.story_cache = StoryCache()
+        cached = time_requests(request_count)
+    finally:
+        app_module.story_store.close()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    print(f"Loading a {chapter_count}-chapter story, {request_count} requests")
+    print(f"  hydrate every request : {uncached * 1000:8.3f} ms/request")
+    print(f"  story cache           : {cached * 1000:8.3f} ms/request")
+    if cached > 0:
+        print(f"  speed-up              : {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark story serialization: indented JSON, compact JSON and the binary codec.
+
+Builds synthetic stories with fully generated chapters (text, continuity
+state, character impacts) and reports encode time, decode time and encoded
+size for each format.
+
+Usage:
+    python3 benchmarks/bench_story_codec.py [chapter counts...] [--repeat N]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import codec
+
+WORDS = ("the road wound on through hills as company pressed forward while storm gathered over pass "
+         "and old mentor spoke softly of kingdom lost beneath mountain where dragon slept dreaming fire "
+         "she drew sword he hesitated they ran together into night").split()
+ARCHETYPES = ["The Hero", "The Mentor", "The Shadow", "The Trickster"]
+
+
+def chapter_text(number, words=5000):
+    """Build a chapter's worth of varied prose (seeded, so runs are comparable)."""
+    rng = random.Random(number)
+    sentences = []
+    while words > 0:
+        length = rng.randint(6, 20)
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        words -= length
+    return " ".join(sentences)
+
+
+def build_story(chapter_count):
+    """Build story data with chapter_count generated chapters."""
+    characters = [
+        {
+            "name": f"Character {n}",
+            "archetype": ARCHETYPES[n % len(ARCHETYPES)],
+            "functional_role": "Protagonist" if n == 0 else "Ally",
+            "emotional_function": "The Heart",
+            "backstory": "Raised in the northern hills. " * 10,
+            "character_arc": "Learns to trust others. " * 5,
+        }
+        for n in range(6)
+    ]
+    chapters = [
+        {
+            "chapter_number": number,
+            "title": f"Chapter {number}",
+            "overview": "Overview. " * 20,
+            "character_impact": [{"name": c["name"], "impact": "Grows. " * 5} for c in characters[:3]],
+            "point_of_view": "Character 0",
+            "narrative_function": "Rising Action",
+            "foreshadow_or_echo": "The broken sword.",
+            "scene_highlights": "A storm at the pass.",
+            "summary": "Summary. " * 20,
+            "continuity_state": {
+                "characters": [{"name": c["name"], "status": "alive", "location": "The pass"} for c in characters],
+                "objects": [{"name": "Sword", "holder": "Character 0"}],
+                "locations_visited": [f"Location {n}" for n in range(1, number + 1)][-10:],
+                "open_plot_threads": [{"description": "The missing heir", "status": "open"}],
+            },
+            "chapter_text": chapter_text(number),
+        }
+        for number in range(1, chapter_count + 1)
+    ]
+    return {
+        "story_type_name": "The Quest",
+        "subtype_name": "Spiritual Quest",
+        "genre_name": "Fantasy",
+        "protagonist_archetype": "The Hero",
+        "secondary_archetypes": ["The Mentor", "The Shadow"],
+        "characters": characters,
+        "chapters": chapters,
+    }
+
+
+FORMATS = [
+    ("json indent=2", lambda data: json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"), json.loads),
+    ("json compact", lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+     json.loads),
+    ("binary", lambda data: codec.encode(data, compress_text=False), codec.decode),
+    ("binary+zlib", codec.encode, codec.decode),
+]
+
+
+def measure(function, argument, repeat):
+    """Return the best time of repeat calls and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    """Compare formats on stories of several sizes."""
+    args = sys.argv[1:]
+    repeat = 5
+    if "--repeat" in args:
+        index = args.index("--repeat")
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+    chapter_counts = [int(arg) for arg in args] or [10, 50, 200]
+
+    for chapter_count in chapter_counts:
+        story = build_story(chapter_count)
+        print(f"{chapter_count}-chapter story (best of {repeat})")
+        print(f"  {'format':<14} {'encode ms':>10} {'decode ms':>10} {'bytes':>12} {'ratio':>7}")
+        baseline = None
+        for name, encode, decode in FORMATS:
+            encode_time, blob = measure(encode, story, repeat)
+            decode_time, decoded = measure(decode, blob, repeat)
+            assert decoded == story, name
+            baseline = baseline or len(blob)
+            print(f"  {name:<14} {encode_time * 1000:10.2f} {decode_time * 1000:10.2f} "
+                  f"{len(blob):12,d} {baseline / len(blob):6.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
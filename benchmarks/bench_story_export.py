@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory and time of story exports.
+
+Stores stories with the given numbers of fully generated chapters, hydrates
+each one as /save does, then consumes every export format chunk by chunk (as
+a streamed response would) and compares it with building Story.to_json() in
+memory. Peak allocated memory is measured with tracemalloc.
+
+Usage:
+    python3 benchmarks/bench_story_export.py [chapter counts...]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DIR = tempfile.mkdtemp()
+os.environ["KRAITIF_STORY_STORE"] = "sqlite"
+os.environ["KRAITIF_STORY_DB"] = os.path.join(TEMP_DIR, "stories.db")
+
+from flask import session
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.continuity_state import ContinuityState
+from export import get_exporter, get_export_formats
+
+CHAPTER_TEXT = "\n\n".join(["The road wound on through the hills as the company pressed forward. " * 15] * 30)
+
+
+def build_story(chapter_count):
+    """Build a story with chapter_count generated chapters."""
+    story = Story()
+    story.set_story_type_selection("The Quest", "Spiritual Quest")
+    story.set_genre("Fantasy")
+    for number in range(1, chapter_count + 1):
+        state = ContinuityState()
+        state.add_location(f"Location {number}")
+        story.add_chapter(Chapter(
+            chapter_number=number, title=f"Chapter {number}", overview="Overview. " * 20,
+            chapter_text=CHAPTER_TEXT, summary="Summary. " * 20, continuity_state=state,
+        ))
+    return story
+
+
+def measure(function):
+    """Return the time and peak allocated memory of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def consume(chunks):
+    """Read a chunk stream like a response would, returning the total size."""
+    return sum(len(chunk) for chunk in chunks)
+
+
+def main():
+    """Compare export memory across book lengths."""
+    chapter_counts = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200]
+    try:
+        for chapter_count in chapter_counts:
+            story_id = f"bench-{chapter_count}"
+            with app.test_request_context():
+                session["story_id"] = story_id
+                save_story_to_session(build_story(chapter_count))
+
+            def hydrate():
+                app_module.story_cache.discard(story_id)
+                with app.test_request_context():
+                    session["story_id"] = story_id
+                    return get_story_from_session()
+
+            print(f"{chapter_count}-chapter story")
+            elapsed, peak = measure(lambda: len(hydrate().to_json()))
+            print(f"  {'to_json (in memory)':<22} {elapsed * 1000:8.1f} ms  peak {peak / 1024:9.1f} KiB")
+            for export_format in get_export_formats():
+                exporter = get_exporter(export_format)
+                elapsed, peak = measure(lambda: consume(exporter.iter_chunks(hydrate())))
+                print(f"  {'stream ' + export_format:<22} {elapsed * 1000:8.1f} ms  peak {peak / 1024:9.1f} KiB")
+            print()
+    finally:
+        app_module.story_store.close()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory and time of loading uploaded save files.
+
+Exports stories with the given numbers of fully generated chapters as save
+files, then loads each one as the original /load did (read the whole file,
+Story.from_json() and a full save) and with the streaming importer, which
+validates and stores chapters in batches as they are read. Peak allocated
+memory is measured with tracemalloc.
+
+Usage:
+    python3 benchmarks/bench_story_import.py [chapter counts...]
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, build_story_data, build_story_header
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.continuity_state import ContinuityState
+from export import StoryImporter, get_exporter
+from storage import SqliteStoryStore
+
+CHAPTER_TEXT = "\n\n".join(["The road wound on through the hills as the company pressed forward. " * 15] * 30)
+
+
+def build_save_file(chapter_count):
+    """Build the save file of a story with chapter_count generated chapters."""
+    story = Story()
+    story.set_story_type_selection("The Quest", "Spiritual Quest")
+    story.set_genre("Fantasy")
+    for number in range(1, chapter_count + 1):
+        state = ContinuityState()
+        state.add_location(f"Location {number}")
+        story.add_chapter(Chapter(
+            chapter_number=number, title=f"Chapter {number}", overview="Overview. " * 20,
+            chapter_text=CHAPTER_TEXT, summary="Summary. " * 20, continuity_state=state,
+        ))
+    return get_exporter("json").export(story)
+
+
+def measure(function):
+    """Return the time and peak allocated memory of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """Compare whole-file and streaming loads across book lengths."""
+    chapter_counts = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200]
+    temp_dir = tempfile.mkdtemp()
+    store = SqliteStoryStore(os.path.join(temp_dir, "stories.db"))
+    importer = StoryImporter(max_bytes=2 ** 31, max_chapters=10000)
+    try:
+        with app.test_request_context():
+            for chapter_count in chapter_counts:
+                save_file = build_save_file(chapter_count)
+
+                def load_whole():
+                    story = Story()
+                    story.from_json(io.BytesIO(save_file).read().decode("utf-8"))
+                    store.save("whole", build_story_data(story))
+
+                def load_streaming():
+                    store.delete("streamed")
+                    importer.import_story(io.BytesIO(save_file), store, "streamed", build_story_header)
+
+                print(f"{chapter_count}-chapter save file ({len(save_file) / 2 ** 20:.1f} MiB)")
+                for label, function in (("whole file", load_whole), ("streaming import", load_streaming)):
+                    elapsed, peak = measure(function)
+                    print(f"  {label:<18} {elapsed * 1000:8.1f} ms  peak {peak / 1024:9.1f} KiB")
+                print()
+    finally:
+        store.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
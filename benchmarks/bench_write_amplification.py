@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark story write amplification across the wizard flow.
+
+Walks one story through the selection steps, character generation, a chapter
+plan and the generation of every chapter, loading and saving the story the way
+the Flask routes do. For each save it counts the bytes the previous approach
+wrote (the whole story as indented JSON) and the bytes the story store is
+asked to write now (only the changed parts when the story was loaded from the
+store).
+
+Usage:
+    python3 benchmarks/bench_write_amplification.py [chapters]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DIR = tempfile.mkdtemp()
+os.environ["KRAITIF_STORY_STORE"] = "sqlite"
+os.environ["KRAITIF_STORY_DB"] = os.path.join(TEMP_DIR, "stories.db")
+
+import app as app_module
+from app import app, get_story_from_session, build_story_data
+from objects.chapter import Chapter
+from objects.character import Character
+from objects.continuity_state import ContinuityState
+from objects.plot_line import PlotLine
+from objects.archetype import ArchetypeEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.emotional_function import EmotionalFunctionEnum
+from storage import SqliteStoryStore
+
+# Roughly 3,000 words of generated prose per chapter
+CHAPTER_TEXT = ("The road wound on through the hills as the company pressed forward. " * 450).strip()
+
+
+def encoded_size(data):
+    """Size of data encoded the way the SQLite store encodes rows."""
+    return len(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+class CountingStore(SqliteStoryStore):
+    """SQLite store that counts the bytes it is asked to write."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.bytes_written = 0
+        self.full_saves = 0
+        self.patches = 0
+
+    def save(self, story_id, story_data):
+        self.bytes_written += encoded_size(story_data)
+        self.full_saves += 1
+        return super().save(story_id, story_data)
+
+    def apply_patch(self, story_id, patch):
+        self.bytes_written += sum(encoded_size(part) for part in (
+            patch.header, patch.characters, patch.chapters, patch.continuity_states
+        ) if part)
+        self.patches += 1
+        return super().apply_patch(story_id, patch)
+
+
+def wizard_steps(chapter_count):
+    """Yield (step name, mutation) pairs in the order a user walks through the app."""
+    yield "story type", lambda s: s.set_story_type_selection(
+        "The Quest", "Spiritual Quest", "Finding inner peace", "Growth through trials")
+    yield "genre", lambda s: s.set_genre("Fantasy")
+    yield "sub-genre", lambda s: s.set_sub_genre("High Fantasy")
+    yield "writing style", lambda s: s.set_writing_style("Lyrical")
+    yield "protagonist", lambda s: s.set_protagonist_archetype("Chosen One")
+    yield "secondary", lambda s: s.set_secondary_archetypes(["Wise Mentor", "Loyal Companion"])
+    yield "plot line", lambda s: s.set_selected_plot_line(
+        PlotLine(name="The Quest", plotline="A chosen one must recover a lost artifact."))
+
+    def add_characters(story):
+        story.set_expanded_plot_line("An expanded plot line. " * 40)
+        story.characters.clear()
+        for i in range(6):
+            story.add_character(Character(
+                name=f"Character {i}",
+                archetype=ArchetypeEnum.WISE_MENTOR,
+                functional_role=FunctionalRoleEnum.MENTOR,
+                emotional_function=EmotionalFunctionEnum.MEDIATOR,
+                backstory="A long backstory. " * 20,
+                character_arc="A character arc. " * 10,
+            ))
+    yield "characters", add_characters
+
+    def add_chapter_plan(story):
+        story.chapters.clear()
+        for number in range(1, chapter_count + 1):
+            story.add_chapter(Chapter(
+                chapter_number=number,
+                title=f"Chapter {number}",
+                overview="What happens in this chapter. " * 8,
+                character_impact=[{"character": "Character 0", "effect": "Grows braver"}],
+            ))
+    yield "chapter plan", add_chapter_plan
+
+    for number in range(1, chapter_count + 1):
+        def generate_chapter(story, number=number):
+            chapter = story.get_chapter(number)
+            chapter.chapter_text = CHAPTER_TEXT
+            chapter.summary = "A summary of the chapter. " * 6
+            state = ContinuityState()
+            state.add_location(f"Location {number}")
+            chapter.continuity_state = state
+        yield f"chapter {number}", generate_chapter
+
+
+def main():
+    """Walk the wizard and compare bytes written per save."""
+    chapter_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    store = CountingStore(os.path.join(TEMP_DIR, "bench.db"))
+    app_module.story_store = store
+
+    legacy_bytes = 0
+    saves = 0
+    try:
+        with app.test_request_context():
+            start = time.perf_counter()
+            for _, mutate in wizard_steps(chapter_count):
+                story = get_story_from_session()
+                mutate(story)
+                legacy_bytes += len(json.dumps(build_story_data(story), ensure_ascii=False, indent=2).encode("utf-8"))
+                app_module.save_story_to_session(story)
+                saves += 1
+            elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    print(f"Wizard flow with {chapter_count} chapters ({saves} saves)")
+    print(f"  full JSON rewrites : {legacy_bytes / 1024:10.1f} KiB")
+    print(f"  changed parts only : {store.bytes_written / 1024:10.1f} KiB "
+          f"({store.full_saves} full saves, {store.patches} patches)")
+    if store.bytes_written:
+        print(f"  reduction          : {legacy_bytes / store.bytes_written:10.1f}x")
+    print(f"  wall time          : {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
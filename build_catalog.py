@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Build step for the compiled catalog bundle.
+
+Parses every file in data/ and writes data/catalog.bundle so that workers can
+load the catalog without re-parsing JSON. The app rebuilds a stale bundle on its
+own; run this during deployment to keep that work off worker start-up.
+
+Usage:
+    python3 build_catalog.py [bundle_path]
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from objects.catalog import BUNDLE_PATH, build_bundle, compute_source_hash
+
+
+def main():
+    """Compile the catalog bundle."""
+    path = sys.argv[1] if len(sys.argv) > 1 else BUNDLE_PATH
+    source_hash = compute_source_hash()
+    build_bundle(path, source_hash)
+    size = os.path.getsize(path)
+    print(f"Wrote catalog bundle: {os.path.abspath(path)}")
+    print(f"  Source hash: {source_hash}")
+    print(f"  Size: {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,16 @@ Demonstration of Story Types and SubTypes, plus Archetypes and Writing Styles
 This script demonstrates how to use the story types, subtypes, archetypes, and writing styles classes.
 """
 
-from objects.story_types import StoryTypeRegistry
-from objects.archetype import ArchetypeRegistry
-from objects.style import StyleRegistry
+from objects.catalog import get_catalog
 
 
 def main():
     """Main demonstration function."""
     print("=== Story Types and SubTypes Demo ===\n")
     
-    # Create registry
-    registry = StoryTypeRegistry()
+    # Use the shared catalog snapshot
+    catalog = get_catalog()
+    registry = catalog.story_types
     
     # Show all story types
     print("Available Story Types:")
@@ -71,8 +70,8 @@ def main():
     # === NEW ARCHETYPE DEMO ===
     print("\n=== Character Archetypes Demo ===")
     
-    # Create archetype registry
-    archetype_registry = ArchetypeRegistry()
+    # Get archetype registry
+    archetype_registry = catalog.archetypes
     
     # Show archetype statistics
     all_archetypes = archetype_registry.get_all_archetypes()
@@ -101,8 +100,8 @@ def main():
     # === NEW WRITING STYLES DEMO ===
     print("\n=== Writing Styles Demo ===")
     
-    # Create style registry
-    style_registry = StyleRegistry()
+    # Get style registry
+    style_registry = catalog.styles
     
     # Show style statistics
     all_styles = style_registry.get_all_styles()
@@ -0,0 +1,20 @@
+"""
+Export package for Kraitif - streaming story downloads (JSON, Markdown, HTML, EPUB)
+and streaming imports of uploaded save files.
+"""
+
+from .exporters import (
+    StoryExporter, JsonExporter, MarkdownExporter, HtmlExporter,
+    register_exporter, get_exporter, get_export_formats
+)
+from .epub import EpubExporter
+from .json_stream import JsonStreamReader, JsonStreamError
+from .story_import import StoryImporter, StoryImportError, get_story_importer
+
+__all__ = [
+    'StoryExporter', 'JsonExporter', 'MarkdownExporter', 'HtmlExporter',
+    'register_exporter', 'get_exporter', 'get_export_formats',
+    'EpubExporter',
+    'JsonStreamReader', 'JsonStreamError',
+    'StoryImporter', 'StoryImportError', 'get_story_importer'
+]
@@ -0,0 +1,141 @@
+"""
+EPUB Exporter
+
+This module implements the EPUB 3 manuscript export. The archive is written
+with zipfile to a buffer that is emptied after every chapter, so the
+download streams like the other formats: zipfile falls back to data
+descriptors on an unseekable output and needs nothing from earlier entries
+except the central directory it writes at the end.
+"""
+
+import html
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Iterator, List
+from .exporters import (
+    StoryExporter, HTML_STYLE, get_story_title, register_exporter, render_html_chapter_body,
+    render_html_front_matter,
+)
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+XHTML_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="style.css"/>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def chapter_file_name(chapter_number: int) -> str:
+    """Get the archive name of a chapter's XHTML document."""
+    return f"chapter_{chapter_number}.xhtml"
+
+
+class _ChunkBuffer:
+    """Unseekable file object that collects what zipfile writes until it is taken."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        """Return and forget everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class EpubExporter(StoryExporter):
+    """Manuscript as an EPUB 3 book with one document per chapter."""
+
+    name = "epub"
+    mimetype = "application/epub+zip"
+    extension = "epub"
+
+    def iter_chunks(self, story: Any) -> Iterator[bytes]:
+        """Write the package documents and title page, then each chapter document."""
+        title = html.escape(get_story_title(story))
+        chapters = [(chapter.chapter_number, chapter.title) for chapter in story.chapters]
+        buffer = _ChunkBuffer()
+
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            # The mimetype entry must come first and be stored uncompressed
+            archive.writestr(zipfile.ZipInfo("mimetype"), self.mimetype, compress_type=zipfile.ZIP_STORED)
+            archive.writestr("META-INF/container.xml", CONTAINER_XML)
+            archive.writestr("OEBPS/content.opf", self._render_package(title, chapters))
+            archive.writestr("OEBPS/nav.xhtml", self._render_navigation(title, chapters))
+            archive.writestr("OEBPS/style.css", HTML_STYLE)
+            archive.writestr("OEBPS/title.xhtml", XHTML_PAGE.format(
+                title=title, body=f"<h1>{title}</h1>\n{render_html_front_matter(story)}"
+            ))
+            yield buffer.take()
+
+            for chapter in self.iter_chapters(story):
+                heading = html.escape(f"Chapter {chapter['chapter_number']}: {chapter['title']}")
+                archive.writestr(f"OEBPS/{chapter_file_name(chapter['chapter_number'])}", XHTML_PAGE.format(
+                    title=heading, body=f"<h2>{heading}</h2>\n{render_html_chapter_body(chapter)}"
+                ))
+                yield buffer.take()
+        yield buffer.take()
+
+    @staticmethod
+    def _render_package(title: str, chapters: List[tuple]) -> str:
+        """Render the OPF package document listing every chapter."""
+        modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        manifest = [
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+            '<item id="style" href="style.css" media-type="text/css"/>',
+            '<item id="title" href="title.xhtml" media-type="application/xhtml+xml"/>',
+        ]
+        spine = ['<itemref idref="title"/>']
+        for number, _chapter_title in chapters:
+            manifest.append(
+                f'<item id="chapter-{number}" href="{chapter_file_name(number)}" media-type="application/xhtml+xml"/>'
+            )
+            spine.append(f'<itemref idref="chapter-{number}"/>')
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'<dc:identifier id="book-id">urn:uuid:{uuid.uuid4()}</dc:identifier>\n'
+            f"<dc:title>{title}</dc:title>\n<dc:language>en</dc:language>\n"
+            f'<meta property="dcterms:modified">{modified}</meta>\n'
+            "</metadata>\n"
+            f"<manifest>\n{chr(10).join(manifest)}\n</manifest>\n"
+            f"<spine>\n{chr(10).join(spine)}\n</spine>\n"
+            "</package>\n"
+        )
+
+    @staticmethod
+    def _render_navigation(title: str, chapters: List[tuple]) -> str:
+        """Render the navigation document (table of contents)."""
+        items = ['<li><a href="title.xhtml">Title Page</a></li>']
+        for number, chapter_title in chapters:
+            label = html.escape(f"Chapter {number}: {chapter_title}")
+            items.append(f'<li><a href="{chapter_file_name(number)}">{label}</a></li>')
+        body = f'<nav epub:type="toc" id="toc">\n<h1>{title}</h1>\n<ol>\n' + "\n".join(items) + "\n</ol>\n</nav>"
+        return XHTML_PAGE.format(title=title, body=body)
+
+
+register_exporter(EpubExporter())
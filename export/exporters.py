@@ -0,0 +1,248 @@
+"""
+Story Exporters
+
+This module implements the formats a story can be downloaded in from /save:
+the JSON save file that /load reads back, and Markdown and single-file HTML
+manuscripts. The EPUB manuscript lives in export/epub.py.
+
+Exporters produce their output as a stream of byte chunks, one chapter at a
+time. Chapters hydrated without their text are read from the story store as
+they are written out and not kept, so peak memory does not grow with the
+length of the book.
+"""
+
+import html
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Title used when the story has no selected plot line
+DEFAULT_TITLE = "Untitled Story"
+
+
+def get_story_title(story: Any) -> str:
+    """Get the title of a story's manuscript."""
+    if story.selected_plot_line and story.selected_plot_line.name:
+        return story.selected_plot_line.name
+    return DEFAULT_TITLE
+
+
+def get_story_metadata(story: Any) -> List[Tuple[str, str]]:
+    """
+    Get the story selections shown at the start of a manuscript.
+
+    Args:
+        story: Story object
+
+    Returns:
+        List of (label, value) pairs for the selections that are set
+    """
+    story_type = " / ".join(name for name in (story.story_type_name, story.subtype_name) if name)
+    genre = " / ".join(item.name for item in (story.genre, story.sub_genre) if item)
+    metadata = [
+        ("Story type", story_type),
+        ("Genre", genre),
+        ("Writing style", story.writing_style.name if story.writing_style else ""),
+        ("Theme", story.key_theme or ""),
+        ("Arc", story.core_arc or ""),
+    ]
+    return [(label, value) for label, value in metadata if value]
+
+
+def split_paragraphs(text: Optional[str]) -> List[str]:
+    """Split chapter text into paragraphs at blank lines."""
+    if not text:
+        return []
+    paragraphs = []
+    for block in text.replace("\r\n", "\n").split("\n\n"):
+        block = block.strip()
+        if block:
+            paragraphs.append(block)
+    return paragraphs
+
+
+def _indent_tail(text: str, spaces: int) -> str:
+    """Indent every line but the first (json.dumps output nested inside an outer value)."""
+    return text.replace("\n", "\n" + " " * spaces)
+
+
+class StoryExporter:
+    """Base class for export formats."""
+
+    # Format name used in /save?format=...
+    name = ""
+    # Content type of the download
+    mimetype = "application/octet-stream"
+    # Extension of the downloaded file
+    extension = ""
+
+    def iter_chunks(self, story: Any) -> Iterator[bytes]:
+        """
+        Produce the export of a story as a stream of byte chunks.
+
+        Args:
+            story: Story object
+
+        Returns:
+            Iterator of encoded chunks, roughly one per chapter
+        """
+        raise NotImplementedError
+
+    def export(self, story: Any) -> bytes:
+        """Produce the whole export of a story at once."""
+        return b"".join(self.iter_chunks(story))
+
+    @staticmethod
+    def iter_chapters(story: Any) -> Iterator[Dict[str, Any]]:
+        """Yield each chapter's dictionary, reading unloaded texts from the story store."""
+        for chapter in list(story.chapters):
+            yield chapter.to_export_dict()
+
+
+class JsonExporter(StoryExporter):
+    """Story save file in the same format as Story.to_json()."""
+
+    name = "json"
+    mimetype = "application/json"
+    extension = "json"
+
+    def iter_chunks(self, story: Any) -> Iterator[bytes]:
+        """Write Story.to_json() output with chapters serialized one at a time."""
+        items = list(story.to_dict(include_chapters=False).items())
+        yield b"{"
+        for index, (key, value) in enumerate(items):
+            yield f"\n  {json.dumps(key)}: ".encode("utf-8")
+            if key == "chapters":
+                yield from self._iter_chapter_list(story)
+            else:
+                yield _indent_tail(json.dumps(value, indent=2), 2).encode("utf-8")
+            if index < len(items) - 1:
+                yield b","
+        yield b"\n}"
+
+    def _iter_chapter_list(self, story: Any) -> Iterator[bytes]:
+        """Write the chapters list as json.dumps(indent=2) would at the second level."""
+        empty = True
+        for chapter_data in self.iter_chapters(story):
+            prefix = "[\n    " if empty else ",\n    "
+            empty = False
+            yield (prefix + _indent_tail(json.dumps(chapter_data, indent=2), 4)).encode("utf-8")
+        yield b"[]" if empty else b"\n  ]"
+
+
+class MarkdownExporter(StoryExporter):
+    """Manuscript as a Markdown document."""
+
+    name = "md"
+    mimetype = "text/markdown; charset=utf-8"
+    extension = "md"
+
+    def iter_chunks(self, story: Any) -> Iterator[bytes]:
+        """Write the title, story selections, characters and then each chapter."""
+        parts = [f"# {get_story_title(story)}\n"]
+        metadata = get_story_metadata(story)
+        if metadata:
+            parts.append("\n" + "".join(f"- **{label}:** {value}\n" for label, value in metadata))
+        if story.characters:
+            parts.append("\n## Characters\n\n")
+            for character in story.characters:
+                line = f"- **{character.name}** ({character.archetype.value}, {character.functional_role.value})"
+                if character.backstory:
+                    line += f": {character.backstory}"
+                parts.append(line + "\n")
+        yield "".join(parts).encode("utf-8")
+
+        for chapter in self.iter_chapters(story):
+            parts = [f"\n## Chapter {chapter['chapter_number']}: {chapter['title']}\n\n"]
+            paragraphs = split_paragraphs(chapter.get("chapter_text"))
+            if paragraphs:
+                parts.append("\n\n".join(paragraphs) + "\n")
+            else:
+                parts.append(f"*{chapter['overview']}*\n")
+            yield "".join(parts).encode("utf-8")
+
+
+# Styling of the HTML manuscript
+HTML_STYLE = """
+body { max-width: 40em; margin: 2em auto; padding: 0 1em; font-family: Georgia, serif; line-height: 1.6; }
+h1, h2 { font-family: Helvetica, Arial, sans-serif; }
+h2 { margin-top: 3em; page-break-before: always; }
+.metadata dt { font-weight: bold; }
+.overview { font-style: italic; color: #555; }
+"""
+
+
+def render_html_front_matter(story: Any) -> str:
+    """Render the story selections and characters as HTML (shared by the HTML and EPUB manuscripts)."""
+    parts = []
+    metadata = get_story_metadata(story)
+    if metadata:
+        parts.append('<dl class="metadata">')
+        for label, value in metadata:
+            parts.append(f"<dt>{html.escape(label)}</dt><dd>{html.escape(value)}</dd>")
+        parts.append("</dl>")
+    if story.characters:
+        parts.append("<h2>Characters</h2><ul>")
+        for character in story.characters:
+            description = f"{character.archetype.value}, {character.functional_role.value}"
+            item = f"<li><strong>{html.escape(character.name)}</strong> ({html.escape(description)})"
+            if character.backstory:
+                item += f": {html.escape(character.backstory)}"
+            parts.append(item + "</li>")
+        parts.append("</ul>")
+    return "\n".join(parts)
+
+
+def render_html_chapter_body(chapter: Dict[str, Any]) -> str:
+    """Render a chapter's text as HTML paragraphs (its overview if it has no text yet)."""
+    paragraphs = split_paragraphs(chapter.get("chapter_text"))
+    if not paragraphs:
+        return f'<p class="overview">{html.escape(chapter["overview"])}</p>'
+    return "\n".join(f"<p>{html.escape(paragraph)}</p>" for paragraph in paragraphs)
+
+
+class HtmlExporter(StoryExporter):
+    """Manuscript as a single self-contained HTML page."""
+
+    name = "html"
+    mimetype = "text/html; charset=utf-8"
+    extension = "html"
+
+    def iter_chunks(self, story: Any) -> Iterator[bytes]:
+        """Write the page head and front matter, then each chapter as a section."""
+        title = html.escape(get_story_title(story))
+        yield (
+            f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{title}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+            f"<h1>{title}</h1>\n{render_html_front_matter(story)}\n"
+        ).encode("utf-8")
+        for chapter in self.iter_chapters(story):
+            heading = html.escape(f"Chapter {chapter['chapter_number']}: {chapter['title']}")
+            yield (
+                f'<section id="chapter-{chapter["chapter_number"]}">\n<h2>{heading}</h2>\n'
+                f"{render_html_chapter_body(chapter)}\n</section>\n"
+            ).encode("utf-8")
+        yield b"</body>\n</html>\n"
+
+
+# Registered exporters by format name
+_exporters: Dict[str, StoryExporter] = {}
+
+
+def register_exporter(exporter: StoryExporter) -> None:
+    """Make an exporter available under its format name."""
+    _exporters[exporter.name] = exporter
+
+
+def get_exporter(name: str) -> Optional[StoryExporter]:
+    """Get the exporter for a format name, or None if the format is unknown."""
+    return _exporters.get((name or "").lower())
+
+
+def get_export_formats() -> List[str]:
+    """Get the names of all registered export formats."""
+    return list(_exporters)
+
+
+register_exporter(JsonExporter())
+register_exporter(MarkdownExporter())
+register_exporter(HtmlExporter())
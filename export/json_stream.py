@@ -0,0 +1,175 @@
+"""
+Streaming JSON Reader
+
+This module reads a JSON document from a binary stream a chunk at a time, so
+an uploaded save file can be walked object key by object key and list item
+by list item without holding the whole document (or the object tree built
+from it) in memory. Each value handed out is decoded with the standard
+library's json.JSONDecoder.raw_decode() once enough of it has been read.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator, Optional
+
+# Bytes read from the stream at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# A decoding error this close to the end of the buffered text may just be a
+# value cut off by the chunk boundary (the longest such token is a \uXXXX
+# surrogate pair); further back it is a real syntax error
+_TRUNCATION_MARGIN = 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# What can follow a decoded number in the same number token ("1" of "1.5",
+# "1e5" or "1E+5" cut by the chunk boundary)
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JsonStreamError(ValueError):
+    """Raised when the streamed document is not valid JSON or exceeds a size limit."""
+
+
+class JsonStreamReader:
+    """Incremental reader for a JSON document in a binary stream."""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_bytes: Optional[int] = None, max_value_bytes: Optional[int] = None):
+        """
+        Initialize the reader.
+
+        Args:
+            stream: Binary file object holding UTF-8 encoded JSON
+            chunk_size: Number of bytes read from the stream at a time
+            max_bytes: Maximum size of the whole document (no limit if None)
+            max_value_bytes: Maximum size of a single value returned by read_value()
+                             (no limit if None); checked on the decoded text
+        """
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.max_value_bytes = max_value_bytes
+        self.bytes_read = 0
+        self._stream = stream
+        self._text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        # Characters dropped from the front of the buffer so far (for error positions)
+        self._offset = 0
+        self._eof = False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it ('' at the end)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def read_value(self) -> Any:
+        """
+        Read and decode the next complete JSON value.
+
+        Returns:
+            The decoded value
+
+        Raises:
+            JsonStreamError: If the value is invalid, cut off or larger than max_value_bytes
+        """
+        if not self.peek():
+            raise self._error("Unexpected end of file")
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+                # A number followed by nothing but number characters may continue in the next chunk
+                is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self._eof or not (is_number and _NUMBER_TAIL.fullmatch(self._buffer, end)):
+                    self._check_value_size(end - self._pos)
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                cut_off = (e.pos >= len(self._buffer) - _TRUNCATION_MARGIN
+                           or e.msg.startswith("Unterminated string"))
+                if self._eof or not cut_off:
+                    raise self._error(e.msg, e.pos) from e
+            self._check_value_size(len(self._buffer) - self._pos)
+            self._fill()
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Iterate over the keys of the next value, which must be an object.
+
+        The caller must consume each key's value (with read_value(), iter_object()
+        or iter_array()) before asking for the next key.
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expecting property name enclosed in double quotes")
+            key = self.read_value()
+            self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def iter_array(self) -> Iterator[Any]:
+        """Iterate over the decoded items of the next value, which must be an array."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self._expect(",]") == "]":
+                return
+
+    def expect_end(self) -> None:
+        """Raise JsonStreamError unless only whitespace is left in the stream."""
+        if self.peek():
+            raise self._error("Extra data")
+
+    def _expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of characters, and return it."""
+        character = self.peek()
+        if not character or character not in characters:
+            expected = " or ".join(repr(c) for c in characters)
+            raise self._error(f"Expecting {expected}")
+        self._pos += 1
+        return character
+
+    def _check_value_size(self, size: int) -> None:
+        """Raise JsonStreamError if a value at the current position has grown past max_value_bytes."""
+        if self.max_value_bytes is not None and size > self.max_value_bytes:
+            raise self._error(f"Value is larger than {self.max_value_bytes} bytes")
+
+    def _fill(self) -> bool:
+        """Append the next chunk of the stream to the buffer. Returns False at the end of the stream."""
+        if self._eof:
+            return False
+        data = self._stream.read(self.chunk_size)
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        try:
+            if not data:
+                self._eof = True
+                self._buffer += self._text_decoder.decode(b"", final=True)
+                return False
+            self.bytes_read += len(data)
+            if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+                raise JsonStreamError(f"File is larger than {self.max_bytes} bytes")
+            self._buffer += self._text_decoder.decode(data)
+        except UnicodeDecodeError as e:
+            raise JsonStreamError("File is not valid UTF-8") from e
+        return True
+
+    def _error(self, message: str, pos: Optional[int] = None) -> JsonStreamError:
+        """Build an error pointing at a buffer position (the current one by default)."""
+        position = self._offset + (self._pos if pos is None else pos)
+        return JsonStreamError(f"{message} at character {position}")
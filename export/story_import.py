@@ -0,0 +1,201 @@
+"""
+Story Import
+
+This module reads a JSON save file uploaded to /load straight into the story
+store. The file is parsed incrementally with JsonStreamReader: story fields
+and characters are collected and validated as they arrive, and chapters are
+validated one at a time and written to the store in small batches, so the
+whole document is never held in memory. The first invalid record stops the
+import, and the upload's size and chapter count are bounded.
+
+The story is written under a new story ID and removed again if the import
+fails, so a rejected upload never replaces or damages the current story.
+"""
+
+import os
+import threading
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.character import Character
+from storage import StoryPatch, StoryStore
+from .json_stream import JsonStreamError, JsonStreamReader
+
+# Story data keys read from the save file as lists of records
+CHARACTERS_KEY = "characters"
+CHAPTERS_KEY = "chapters"
+
+# Default maximum size of an uploaded save file
+DEFAULT_MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+
+# Default maximum number of chapters in an uploaded story
+DEFAULT_MAX_CHAPTERS = 500
+
+# Maximum size of a single story field, character or chapter in the file
+DEFAULT_MAX_RECORD_BYTES = 4 * 1024 * 1024
+
+# Chapters written to the store per transaction
+DEFAULT_BATCH_SIZE = 20
+
+
+class StoryImportError(ValueError):
+    """Raised when an uploaded story file is invalid or exceeds the upload limits."""
+
+
+class StoryImporter:
+    """Validates uploaded save files and writes them into a story store."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, max_chapters: int = DEFAULT_MAX_CHAPTERS,
+                 max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the importer.
+
+        Args:
+            max_bytes: Maximum size of an uploaded file
+            max_chapters: Maximum number of chapters in an uploaded story
+            max_record_bytes: Maximum size of a single story field, character or chapter
+            batch_size: Number of chapters written to the store at a time
+        """
+        self.max_bytes = max_bytes
+        self.max_chapters = max_chapters
+        self.max_record_bytes = max_record_bytes
+        self.batch_size = max(1, batch_size)
+
+    def import_story(self, stream: BinaryIO, store: StoryStore, story_id: str,
+                     build_header: Callable[[Story], Dict[str, Any]], catalog: Any = None) -> int:
+        """
+        Read a save file from a stream and store it as a new story.
+
+        Args:
+            stream: Binary file object holding the save file
+            store: Story store to write the story to
+            story_id: ID to store the story under (must not be in use)
+            build_header: Function building the stored story fields from a Story
+            catalog: Catalog snapshot to resolve the story's selections against
+
+        Returns:
+            Number of chapters imported
+
+        Raises:
+            StoryImportError: If the file is invalid or too large; nothing is left stored
+        """
+        reader = JsonStreamReader(stream, max_bytes=self.max_bytes, max_value_bytes=self.max_record_bytes)
+        try:
+            return self._read_story(reader, store, story_id, build_header, catalog)
+        except JsonStreamError as e:
+            store.delete(story_id)
+            raise StoryImportError(str(e)) from e
+        except BaseException:
+            store.delete(story_id)
+            raise
+
+    def _read_story(self, reader: JsonStreamReader, store: StoryStore, story_id: str,
+                    build_header: Callable[[Story], Dict[str, Any]], catalog: Any) -> int:
+        """Stream the top-level object, storing the story as soon as its chapters start."""
+        if reader.peek() != "{":
+            raise StoryImportError("Invalid story file format")
+
+        fields: Dict[str, Any] = {}
+        chapter_numbers: Set[int] = set()
+        stored = False
+        for key in reader.iter_object():
+            if key == CHARACTERS_KEY:
+                fields[key] = self._read_characters(reader)
+            elif key == CHAPTERS_KEY:
+                # Chapters are patched into the stored story, so store what came before them
+                if not stored:
+                    self._store(store.save(story_id, self._build_story_data(fields, build_header, catalog)))
+                    stored = True
+                self._import_chapters(reader, store, story_id, chapter_numbers)
+            else:
+                fields[key] = reader.read_value()
+        reader.expect_end()
+
+        story_data = self._build_story_data(fields, build_header, catalog)
+        if not stored:
+            self._store(store.save(story_id, story_data))
+        else:
+            # Fields after the chapters list are only known now
+            characters = story_data.pop(CHARACTERS_KEY)
+            story_data.pop(CHAPTERS_KEY)
+            self._store(store.apply_patch(story_id, StoryPatch(
+                header=story_data,
+                characters=dict(enumerate(characters)),
+                character_count=len(characters),
+            )))
+        return len(chapter_numbers)
+
+    @staticmethod
+    def _read_characters(reader: JsonStreamReader) -> List[Dict[str, Any]]:
+        """Read and validate the characters list, stopping at the first invalid character."""
+        characters = []
+        for position, character_data in enumerate(reader.iter_array(), 1):
+            character = Character.from_dict(character_data) if isinstance(character_data, dict) else None
+            if character is None:
+                raise StoryImportError(f"Character {position} in the file is invalid")
+            characters.append(character.to_dict())
+        return characters
+
+    def _import_chapters(self, reader: JsonStreamReader, store: StoryStore, story_id: str,
+                         chapter_numbers: Set[int]) -> None:
+        """Validate chapters one at a time and write them to the store in batches."""
+        batch = []
+        for position, chapter_data in enumerate(reader.iter_array(), len(chapter_numbers) + 1):
+            if len(chapter_numbers) >= self.max_chapters:
+                raise StoryImportError(f"Story has more than {self.max_chapters} chapters")
+            chapter = Chapter.from_dict(chapter_data)
+            if chapter is None:
+                raise StoryImportError(f"Chapter {position} in the file is invalid")
+            if chapter.chapter_number in chapter_numbers:
+                raise StoryImportError(f"Chapter {chapter.chapter_number} appears more than once")
+            chapter_numbers.add(chapter.chapter_number)
+            batch.append(chapter.to_dict())
+            if len(batch) >= self.batch_size:
+                self._write_chapters(store, story_id, batch)
+                batch = []
+        if batch:
+            self._write_chapters(store, story_id, batch)
+
+    def _write_chapters(self, store: StoryStore, story_id: str, chapters: List[Dict[str, Any]]) -> None:
+        """Add a batch of chapters and their continuity states to the stored story."""
+        patch = StoryPatch()
+        for chapter_data in chapters:
+            patch.continuity_states[chapter_data["chapter_number"]] = chapter_data.pop("continuity_state", None)
+            patch.chapters.append(chapter_data)
+        self._store(store.apply_patch(story_id, patch))
+
+    @staticmethod
+    def _build_story_data(fields: Dict[str, Any], build_header: Callable[[Story], Dict[str, Any]],
+                          catalog: Any) -> Dict[str, Any]:
+        """Validate the story fields read so far into stored story data without chapters."""
+        story = Story(catalog=catalog)
+        if not story.from_dict(dict(fields, characters=[], chapters=[])):
+            raise StoryImportError("Invalid story file format")
+        story_data = build_header(story)
+        story_data[CHARACTERS_KEY] = fields.get(CHARACTERS_KEY, [])
+        story_data[CHAPTERS_KEY] = []
+        return story_data
+
+    @staticmethod
+    def _store(version: Any) -> None:
+        """Raise StoryImportError if a store write failed."""
+        if not version:
+            raise StoryImportError("The story could not be stored")
+
+
+# Global importer instance
+_story_importer: Optional[StoryImporter] = None
+_story_importer_lock = threading.Lock()
+
+
+def get_story_importer() -> StoryImporter:
+    """Get or create the process-wide story importer."""
+    global _story_importer
+    if _story_importer is None:
+        with _story_importer_lock:
+            if _story_importer is None:
+                _story_importer = StoryImporter(
+                    max_bytes=int(float(os.environ.get("KRAITIF_MAX_UPLOAD_MB", DEFAULT_MAX_UPLOAD_BYTES / 2 ** 20)) * 2 ** 20),
+                    max_chapters=int(os.environ.get("KRAITIF_MAX_UPLOAD_CHAPTERS", DEFAULT_MAX_CHAPTERS)),
+                )
+    return _story_importer
@@ -4,28 +4,83 @@ Launch script for the Story Types Flask application.
 
 This script starts the Flask web server for the Story Types application.
 
+Environment variables:
+    KRAITIF_PORT        Port to listen on (default: 5000)
+    KRAITIF_DEBUG       Run Flask in debug mode with the reloader (default: 1)
+    KRAITIF_FAST_START  Defer importing the AI stack until first use (default: 1)
+    KRAITIF_AI_WARMUP   Warm up the AI client in the background once the server
+                        is listening (default: 0)
+    KRAITIF_CATALOG_WATCH
+                        Reload the catalog when files in data/ change (default: 1).
+                        Sending SIGHUP to the server also reloads it.
+    KRAITIF_STORY_JANITOR
+                        Expire idle stories on a background thread (default: 1)
+    KRAITIF_STORY_MAX_AGE
+                        Seconds a story may stay idle before it is removed
+                        (default: 86400)
+
 NOTE: For easier startup with automatic virtual environment setup and dependency
 installation, use the start.sh script instead:
     ./start.sh
 """
 
 import os
+import signal
+import socket
 import sys
+import time
 
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app
+from ai.ai_client import start_ai_warmup_thread
+from objects.catalog import start_catalog_watcher, request_catalog_reload
+from storage import get_story_janitor
+
+
+def wait_for_server(port, timeout=30.0):
+    """Block until the local server accepts connections or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
 
 
 def main():
     """Launch the Flask application."""
+    port = int(os.environ.get("KRAITIF_PORT", "5000"))
+    debug = os.environ.get("KRAITIF_DEBUG", "1") != "0"
+    warm_up = os.environ.get("KRAITIF_AI_WARMUP", "0") == "1"
+    watch_catalog = os.environ.get("KRAITIF_CATALOG_WATCH", "1") != "0"
+
     print("Starting Story Types Flask Application...")
-    print("Open your web browser to http://localhost:5000")
+    print(f"Open your web browser to http://localhost:{port}")
     print("Press Ctrl+C to stop the server")
 
+    # With the reloader, only the serving child process should warm up
+    is_serving_process = not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    if warm_up and is_serving_process:
+        start_ai_warmup_thread(wait_until_ready=lambda: wait_for_server(port))
+
+    # Catalog hot reload: watch data/ and reload on SIGHUP, without restarting
+    if is_serving_process:
+        if watch_catalog:
+            start_catalog_watcher()
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: request_catalog_reload())
+
+    # Expire idle stories in the background, starting with any left from earlier runs
+    janitor = get_story_janitor()
+    if is_serving_process and janitor.autostart:
+        janitor.start()
+
     try:
-        app.run(debug=True, host="0.0.0.0", port=5000)
+        app.run(debug=debug, host="0.0.0.0", port=port)
     except KeyboardInterrupt:
         print("\nShutting down the server...")
     except Exception as e:
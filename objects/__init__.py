@@ -4,6 +4,7 @@ Objects package for Kraitif - contains all story-related data models and busines
 
 # Import all main objects and registries for easy access
 from .story import Story
+from .catalog import Catalog, ArchetypePartition, get_catalog
 from .story_types import StoryTypeRegistry
 from .archetype import ArchetypeRegistry, ArchetypeEnum
 from .genre import GenreRegistry
@@ -19,9 +20,12 @@ from .continuity_character import ContinuityCharacter
 from .continuity_object import ContinuityObject
 from .plot_thread import PlotThread
 from .plot_line import PlotLine, parse_plot_lines_from_ai_response
+from .response_schemas import get_response_format
+from .prompt_budget import PromptText, TokenBudgeter
 
 __all__ = [
     'Story',
+    'Catalog', 'ArchetypePartition', 'get_catalog',
     'StoryTypeRegistry',
     'ArchetypeRegistry', 'ArchetypeEnum',
     'GenreRegistry',
@@ -33,5 +37,7 @@ __all__ = [
     'parse_characters_from_ai_response',
     'Chapter',
     'ContinuityState', 'ContinuityCharacter', 'ContinuityObject', 'PlotThread',
-    'PlotLine', 'parse_plot_lines_from_ai_response'
+    'PlotLine', 'parse_plot_lines_from_ai_response',
+    'get_response_format',
+    'PromptText', 'TokenBudgeter'
 ]
\ No newline at end of file
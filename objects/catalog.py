@@ -0,0 +1,406 @@
+"""
+Catalog Implementation
+
+This module implements a process-wide, read-only snapshot of all narrative data
+registries. The data files are parsed once per process and the resulting
+registries are shared by every Story, the Flask app and the command-line tools.
+
+To keep worker start-up fast, the parsed catalog is also compiled into a single
+pickle bundle keyed by a content hash of the source files. The bundle is used
+when its hash matches the data files and rebuilt automatically when it doesn't.
+
+Every snapshot carries a version derived from that hash. reload_catalog() builds
+a new snapshot and swaps it in atomically; requests that already hold the old
+snapshot keep using it until they finish. start_catalog_watcher() reloads
+automatically when the data files change.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional, Iterable, List, Dict, Tuple
+from .story_types import StoryTypeRegistry
+from .genre import GenreRegistry, SubGenre
+from .archetype import Archetype, ArchetypeRegistry, ArchetypeEnum
+from .style import StyleRegistry
+from .emotional_function import EmotionalFunctionRegistry
+from .functional_role import FunctionalRoleRegistry
+from .narrative_function import NarrativeFunctionRegistry
+from .search_index import SearchIndex, SearchResult
+
+
+# Directory containing the narrative data files
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Default location of the compiled catalog bundle
+BUNDLE_PATH = os.path.join(DATA_DIR, "catalog.bundle")
+
+# Data files compiled into the bundle
+SOURCE_FILES = (
+    "story_types.json",
+    "genres.json",
+    "archetypes.jsonl",
+    "styles.json",
+    "emotional_functions.json",
+    "functional_roles.json",
+    "narrative_functions.json",
+)
+
+# Bump whenever the pickled Catalog layout changes so stale bundles are rebuilt
+CATALOG_FORMAT_VERSION = 4
+
+# Enable/disable the compiled bundle (set KRAITIF_CATALOG_BUNDLE=0 to always parse JSON)
+USE_BUNDLE = os.environ.get("KRAITIF_CATALOG_BUNDLE", "1") != "0"
+
+# Number of source hash characters used as the catalog version
+VERSION_LENGTH = 16
+
+# Seconds between checks of the data files by the catalog watcher
+WATCH_INTERVAL = 2.0
+
+
+@dataclass(frozen=True)
+class ArchetypePartition:
+    """Typical and remaining archetypes for a single sub-genre, resolved once at catalog load."""
+    typical_names: Tuple[str, ...] = ()
+    typical: Tuple[Archetype, ...] = ()
+    typical_entries: Tuple[Tuple[str, Optional[Archetype]], ...] = ()
+    other_names: Tuple[str, ...] = ()
+    other: Tuple[Archetype, ...] = ()
+    invalid_names: Tuple[str, ...] = ()
+
+
+EMPTY_PARTITION = ArchetypePartition()
+
+_ARCHETYPE_ENUM_VALUES = frozenset(archetype.value for archetype in ArchetypeEnum)
+
+
+def build_archetype_partition(sub_genre: SubGenre, archetypes: ArchetypeRegistry) -> ArchetypePartition:
+    """
+    Split the archetype registry into a sub-genre's typical archetypes and the rest.
+
+    Args:
+        sub_genre: Sub-genre whose typical archetype names should be resolved
+        archetypes: Registry used to resolve names into Archetype objects
+
+    Returns:
+        ArchetypePartition with the typical archetypes in sub-genre order and the
+        remaining archetypes sorted by name
+    """
+    typical_names = tuple(sub_genre.archetypes)
+    typical_entries = tuple((name, archetypes.get_archetype(name)) for name in typical_names)
+    typical = tuple(archetype for _, archetype in typical_entries if archetype)
+
+    typical_set = set(typical_names)
+    other = tuple(sorted(
+        (archetype for archetype in archetypes.get_all_archetypes() if archetype.name not in typical_set),
+        key=lambda archetype: archetype.name
+    ))
+
+    return ArchetypePartition(
+        typical_names=typical_names,
+        typical=typical,
+        typical_entries=typical_entries,
+        other_names=tuple(archetype.name for archetype in other),
+        other=other,
+        invalid_names=tuple(name for name in typical_names if name not in _ARCHETYPE_ENUM_VALUES)
+    )
+
+
+class Catalog:
+    """Read-only snapshot of every narrative data registry."""
+
+    def __init__(self, version: Optional[str] = None):
+        """
+        Load all registries from the data directory.
+
+        Args:
+            version: Catalog version (defaults to the hash of the current data files)
+        """
+        self.version = version or compute_source_hash()[:VERSION_LENGTH]
+        self.story_types = StoryTypeRegistry()
+        self.genres = GenreRegistry()
+        self.archetypes = ArchetypeRegistry()
+        self.styles = StyleRegistry()
+        self.emotional_functions = EmotionalFunctionRegistry()
+        self.functional_roles = FunctionalRoleRegistry()
+        self.narrative_functions = NarrativeFunctionRegistry()
+        self.search_index = SearchIndex.from_catalog(self)
+        self.archetype_partitions: Dict[Tuple[str, str], ArchetypePartition] = {
+            (genre.name, sub_genre.name): build_archetype_partition(sub_genre, self.archetypes)
+            for genre in self.genres.get_all_genres()
+            for sub_genre in genre.subgenres
+        }
+        # Names that cannot be stored on a Story because ArchetypeEnum does not know them
+        self.invalid_archetype_names: Dict[str, Tuple[str, ...]] = {
+            f"{genre_name} / {sub_genre_name}": partition.invalid_names
+            for (genre_name, sub_genre_name), partition in self.archetype_partitions.items()
+            if partition.invalid_names
+        }
+        unknown_registry_names = tuple(
+            name for name in self.archetypes.list_archetype_names() if name not in _ARCHETYPE_ENUM_VALUES
+        )
+        if unknown_registry_names:
+            self.invalid_archetype_names["archetypes.jsonl"] = unknown_registry_names
+        if self.invalid_archetype_names:
+            count = sum(len(names) for names in self.invalid_archetype_names.values())
+            print(f"Warning: {count} archetype names are not ArchetypeEnum values "
+                  f"(see Catalog.invalid_archetype_names)")
+        self._frozen = True
+
+    def get_archetype_partition(self, genre_name: str, sub_genre: Optional[SubGenre]) -> ArchetypePartition:
+        """
+        Get the precomputed archetype partition for a sub-genre.
+
+        Args:
+            genre_name: Name of the genre the sub-genre belongs to
+            sub_genre: The selected sub-genre (None returns an empty partition)
+
+        Returns:
+            ArchetypePartition for the sub-genre
+        """
+        if sub_genre is None:
+            return EMPTY_PARTITION
+        partition = self.archetype_partitions.get((genre_name, sub_genre.name))
+        if partition is None:
+            # Sub-genre was not loaded from this catalog's data files
+            partition = build_archetype_partition(sub_genre, self.archetypes)
+        return partition
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[SearchResult]:
+        """Search every registry using the prebuilt inverted index."""
+        return self.search_index.search(query, kinds=kinds, limit=limit)
+
+    def __setattr__(self, name, value):
+        """Prevent registries from being replaced once the snapshot is built."""
+        if getattr(self, "_frozen", False):
+            raise AttributeError("Catalog is read-only")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        """Prevent registries from being removed once the snapshot is built."""
+        raise AttributeError("Catalog is read-only")
+
+
+def compute_source_hash(data_dir: str = DATA_DIR) -> str:
+    """
+    Compute a SHA-256 hash over the catalog source files.
+
+    Args:
+        data_dir: Directory containing the data files
+
+    Returns:
+        Hexadecimal digest covering the format version, file names and contents
+    """
+    digest = hashlib.sha256()
+    digest.update(f"catalog-format:{CATALOG_FORMAT_VERSION}".encode("utf-8"))
+    for filename in SOURCE_FILES:
+        digest.update(filename.encode("utf-8"))
+        file_path = os.path.join(data_dir, filename)
+        try:
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def build_bundle(path: str = BUNDLE_PATH, source_hash: Optional[str] = None) -> Catalog:
+    """
+    Parse the data files and write them to a compiled catalog bundle.
+
+    The bundle is written to a temporary file and renamed into place so that
+    concurrently starting workers never observe a partially written bundle.
+
+    Args:
+        path: Destination of the bundle file
+        source_hash: Precomputed source hash (computed if omitted)
+
+    Returns:
+        The freshly parsed Catalog
+    """
+    if source_hash is None:
+        source_hash = compute_source_hash()
+    catalog = Catalog(version=source_hash[:VERSION_LENGTH])
+    payload = {
+        "source_hash": source_hash,
+        "catalog": catalog,
+    }
+
+    bundle_dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".catalog_", suffix=".tmp", dir=bundle_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return catalog
+
+
+def load_bundle(path: str = BUNDLE_PATH, source_hash: Optional[str] = None) -> Optional[Catalog]:
+    """
+    Load a compiled catalog bundle if it matches the current source files.
+
+    Args:
+        path: Location of the bundle file
+        source_hash: Expected source hash (computed if omitted)
+
+    Returns:
+        The bundled Catalog, or None if the bundle is missing, stale or unreadable
+    """
+    if source_hash is None:
+        source_hash = compute_source_hash()
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(payload, dict) or payload.get("source_hash") != source_hash:
+        return None
+    catalog = payload.get("catalog")
+    if not isinstance(catalog, Catalog):
+        return None
+    return catalog
+
+
+def load_catalog(use_bundle: Optional[bool] = None, path: str = BUNDLE_PATH) -> Catalog:
+    """
+    Load a catalog, preferring the compiled bundle when it is up to date.
+
+    Args:
+        use_bundle: Whether to use the compiled bundle (defaults to USE_BUNDLE)
+        path: Location of the bundle file
+
+    Returns:
+        A Catalog loaded from the bundle or parsed from the data files
+    """
+    if use_bundle is None:
+        use_bundle = USE_BUNDLE
+    source_hash = compute_source_hash()
+    version = source_hash[:VERSION_LENGTH]
+    if not use_bundle:
+        return Catalog(version=version)
+
+    catalog = load_bundle(path, source_hash)
+    if catalog is not None:
+        return catalog
+
+    # Bundle is missing or stale - rebuild it, but never fail start-up over it
+    try:
+        return build_bundle(path, source_hash)
+    except OSError as e:
+        print(f"Warning: Could not write catalog bundle {path}: {e}")
+        return Catalog(version=version)
+
+
+# Global catalog instance
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+# Serializes reloads so only one replacement snapshot is built at a time
+_reload_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """
+    Get or create the current process-wide catalog snapshot.
+
+    The returned snapshot never changes; after a reload, later calls return the
+    new snapshot while holders of the old one keep a consistent view.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def reload_catalog(force: bool = False) -> bool:
+    """
+    Rebuild the catalog from the data files and swap it in atomically.
+
+    The new snapshot is fully built (and its bundle written) before it replaces
+    the current one. If the data files fail to load, e.g. while an edit is only
+    half saved, the current snapshot stays in place.
+
+    Args:
+        force: Rebuild even if the data files are unchanged
+
+    Returns:
+        True if a new catalog version was installed, False otherwise
+    """
+    global _catalog
+    with _reload_lock:
+        current = get_catalog()
+        if not force and compute_source_hash()[:VERSION_LENGTH] == current.version:
+            return False
+        try:
+            new_catalog = load_catalog()
+        except Exception as e:
+            print(f"Warning: Catalog reload failed, keeping version {current.version}: {e}")
+            return False
+        with _catalog_lock:
+            _catalog = new_catalog
+    print(f"Catalog reloaded: {current.version} -> {new_catalog.version}")
+    return True
+
+
+def _source_mtimes(data_dir: str = DATA_DIR) -> tuple:
+    """Return the modification times of the catalog source files."""
+    mtimes = []
+    for filename in SOURCE_FILES:
+        try:
+            mtimes.append(os.stat(os.path.join(data_dir, filename)).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def start_catalog_watcher(interval: float = WATCH_INTERVAL,
+                          stop_event: Optional[threading.Event] = None) -> threading.Thread:
+    """
+    Start a daemon thread that reloads the catalog when the data files change.
+
+    Only file modification times are polled; the content hash is checked by
+    reload_catalog() before anything is rebuilt.
+
+    Args:
+        interval: Seconds between checks
+        stop_event: Optional event that stops the watcher when set
+
+    Returns:
+        The started watcher thread
+    """
+    stop = stop_event or threading.Event()
+
+    def watch():
+        last_mtimes = _source_mtimes()
+        while not stop.wait(interval):
+            mtimes = _source_mtimes()
+            if mtimes != last_mtimes:
+                last_mtimes = mtimes
+                reload_catalog()
+
+    thread = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+def request_catalog_reload() -> threading.Thread:
+    """
+    Reload the catalog on a background thread (e.g. from a signal handler).
+
+    Returns:
+        The started reload thread
+    """
+    thread = threading.Thread(target=reload_catalog, name="catalog-reload", daemon=True)
+    thread.start()
+    return thread
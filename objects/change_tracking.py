@@ -0,0 +1,59 @@
+"""
+Change Tracking Implementation
+
+This module implements a small mixin that records whether an object's public
+attributes changed since it was last persisted. Story, Chapter, Character and
+ContinuityState use it so saves can skip unchanged objects entirely.
+
+Assigning an attribute marks the object dirty only if the value actually
+changes, and records the attribute's name so callers can persist just the
+changed fields. In-place mutation of list attributes is not observed; methods
+that mutate lists call mark_dirty() themselves.
+"""
+
+from typing import FrozenSet, Optional, Set
+
+
+class ChangeTracking:
+    """Mixin that tracks assignments to public attributes since the last mark_clean()."""
+
+    # Attributes whose changes are tracked separately (e.g. child collections)
+    _untracked_fields: FrozenSet[str] = frozenset()
+
+    # Objects start dirty until they are marked clean after loading or saving
+    _clean: bool = False
+
+    # Names of attributes assigned new values since the last mark_clean()
+    # (None while unknown: never marked clean, or marked dirty explicitly)
+    _changed_fields: Optional[Set[str]] = None
+
+    def __setattr__(self, name, value):
+        """Set an attribute, marking the object dirty if a tracked value changes."""
+        changed_fields = self._changed_fields
+        if changed_fields is not None and not name.startswith("_") and name not in self._untracked_fields:
+            missing = object()
+            current = self.__dict__.get(name, missing)
+            if current is missing or (current is not value and current != value):
+                changed_fields.add(name)
+                object.__setattr__(self, "_clean", False)
+        object.__setattr__(self, name, value)
+
+    def is_dirty(self) -> bool:
+        """Return True if a tracked attribute changed since the last mark_clean()."""
+        return not self._clean
+
+    def get_changed_fields(self) -> Optional[FrozenSet[str]]:
+        """Return the attributes changed since the last mark_clean(), or None if unknown."""
+        if self._changed_fields is None:
+            return None
+        return frozenset(self._changed_fields)
+
+    def mark_dirty(self) -> None:
+        """Mark the object as changed (e.g. after mutating a list attribute in place)."""
+        object.__setattr__(self, "_clean", False)
+        object.__setattr__(self, "_changed_fields", None)
+
+    def mark_clean(self) -> None:
+        """Mark the object as persisted."""
+        object.__setattr__(self, "_clean", True)
+        object.__setattr__(self, "_changed_fields", set())
@@ -3,19 +3,36 @@ Chapter Implementation
 
 This module implements a Chapter object that represents a chapter in a story
 with metadata about narrative function, character impact, and other elements.
+
+Chapters hydrated from the story store may leave their text and continuity
+state unloaded; both are fetched with the chapter's detail loader the first
+time either is read.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
 import json
 from .narrative_function import NarrativeFunctionEnum
 from .continuity_state import ContinuityState
+from .enum_resolver import get_enum_resolver
+from .change_tracking import ChangeTracking
+
+# Minimum similarity for a misspelled narrative function name to be accepted
+NARRATIVE_FUNCTION_MIN_CONFIDENCE = 0.75
 
 
 @dataclass
-class Chapter:
+class Chapter(ChangeTracking):
     """Represents a chapter in a story with narrative metadata, summary, and continuity state."""
     
+    # The continuity state is persisted separately and tracks its own changes
+    _untracked_fields = frozenset(['continuity_state'])
+    _clean_continuity_state = None
+    
+    # Fields that may be left unloaded until first access, and the function fetching them
+    _lazy_fields = frozenset(['chapter_text', 'continuity_state'])
+    _detail_loader = None
+    
     chapter_number: int
     title: str
     overview: str
@@ -26,7 +43,8 @@ class Chapter:
     scene_highlights: Optional[str] = None
     summary: Optional[str] = None
     continuity_state: ContinuityState = field(default_factory=ContinuityState)
-    chapter_text: Optional[str] = None
+    # No class-level default, so an unloaded text falls through to __getattr__
+    chapter_text: Optional[str] = field(default_factory=lambda: None)
     
     def __post_init__(self):
         """Validate the chapter data after initialization."""
@@ -39,6 +57,45 @@ class Chapter:
         if not self.overview or not self.overview.strip():
             raise ValueError("Chapter overview cannot be empty")
     
+    def __getattr__(self, name: str) -> Any:
+        """Fetch unloaded chapter details on first access."""
+        if name in self._lazy_fields and self._detail_loader is not None:
+            self.load_details()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    def is_loaded(self, name: str) -> bool:
+        """Return True unless the field is still waiting to be fetched by the detail loader."""
+        return name in self.__dict__ or name not in self._lazy_fields
+    
+    def details_loaded(self) -> bool:
+        """Return True if neither the text nor the continuity state waits for the detail loader."""
+        return all(self.is_loaded(name) for name in self._lazy_fields)
+    
+    def load_details(self) -> None:
+        """Fetch the unloaded chapter text and continuity state with the detail loader."""
+        loader = self._detail_loader
+        if loader is None:
+            return
+        object.__setattr__(self, "_detail_loader", None)
+        details = loader()
+        if details is None:
+            print(f"Warning: Failed to load details of chapter {self.chapter_number}")
+            details = {}
+        
+        # Loaded values are what is stored, so they do not count as changes
+        if 'chapter_text' not in self.__dict__:
+            chapter_text = details.get('chapter_text')
+            object.__setattr__(self, 'chapter_text', str(chapter_text) if chapter_text else None)
+        if 'continuity_state' not in self.__dict__:
+            continuity_data = details.get('continuity_state')
+            continuity_state = ContinuityState.from_dict(continuity_data) if continuity_data else None
+            if continuity_state is None:
+                continuity_state = ContinuityState()
+            continuity_state.mark_clean()
+            object.__setattr__(self, 'continuity_state', continuity_state)
+            object.__setattr__(self, '_clean_continuity_state', continuity_state)
+    
     def add_character_impact(self, character: str, effect: str) -> bool:
         """Add a character impact entry. Returns True if successful."""
         if not character or not character.strip():
@@ -51,6 +108,7 @@ class Chapter:
             if impact.get('character', '').lower() == character.lower():
                 # Update existing entry
                 impact['effect'] = effect
+                self.mark_dirty()
                 return True
         
         # Add new entry
@@ -58,6 +116,7 @@ class Chapter:
             'character': character.strip(),
             'effect': effect.strip()
         })
+        self.mark_dirty()
         return True
     
     def remove_character_impact(self, character: str) -> bool:
@@ -68,6 +127,7 @@ class Chapter:
         for i, impact in enumerate(self.character_impact):
             if impact.get('character', '').lower() == character.lower():
                 self.character_impact.pop(i)
+                self.mark_dirty()
                 return True
         return False
     
@@ -87,15 +147,39 @@ class Chapter:
             self.narrative_function = None
             return True
             
-        try:
-            self.narrative_function = NarrativeFunctionEnum(narrative_function)
-            return True
-        except ValueError:
+        # Only exact, normalized or close (typo-level) matches are accepted here
+        enum_value = get_enum_resolver(NarrativeFunctionEnum).resolve(
+            narrative_function, allow_partial=False, min_confidence=NARRATIVE_FUNCTION_MIN_CONFIDENCE
+        )
+        if enum_value is None:
             return False
+        self.narrative_function = enum_value
+        return True
+    
+    def is_continuity_dirty(self) -> bool:
+        """Return True if the continuity state was replaced or changed since the last mark_clean()."""
+        if not self.is_loaded('continuity_state'):
+            return False
+        return (self.continuity_state is not self._clean_continuity_state
+                or self.continuity_state.is_dirty())
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert chapter to dictionary for JSON serialization."""
-        return {
+    def mark_clean(self) -> None:
+        """Mark the chapter and its continuity state as persisted."""
+        super().mark_clean()
+        if self.is_loaded('continuity_state'):
+            object.__setattr__(self, "_clean_continuity_state", self.continuity_state)
+            self.continuity_state.mark_clean()
+    
+    def to_dict(self, load_details: bool = True) -> Dict[str, Any]:
+        """
+        Convert chapter to dictionary for JSON serialization.
+        
+        Args:
+            load_details: Fetch unloaded fields; if False they are left out of the dictionary
+        """
+        if load_details:
+            self.load_details()
+        data = {
             'chapter_number': self.chapter_number,
             'title': self.title,
             'overview': self.overview,
@@ -105,13 +189,55 @@ class Chapter:
             'foreshadow_or_echo': self.foreshadow_or_echo,
             'scene_highlights': self.scene_highlights,
             'summary': self.summary,
-            'continuity_state': self.continuity_state.to_dict(),
-            'chapter_text': self.chapter_text
         }
+        if self.is_loaded('continuity_state'):
+            data['continuity_state'] = self.continuity_state.to_dict()
+        if self.is_loaded('chapter_text'):
+            data['chapter_text'] = self.chapter_text
+        return data
+    
+    def to_export_dict(self) -> Dict[str, Any]:
+        """
+        Convert chapter to the same dictionary as to_dict(), without keeping unloaded details.
+        
+        Details that are not loaded are read with the detail loader and dropped once
+        the dictionary is no longer used, so exporting a long book chapter by chapter
+        never holds more than one chapter's text.
+        """
+        data = self.to_dict(load_details=False)
+        if self.is_loaded('chapter_text') and self.is_loaded('continuity_state'):
+            return data
+        
+        details = self._detail_loader() or {}
+        if self.is_loaded('continuity_state'):
+            continuity_state = self.continuity_state
+        else:
+            continuity_data = details.get('continuity_state')
+            continuity_state = ContinuityState.from_dict(continuity_data) if continuity_data else None
+            if continuity_state is None:
+                continuity_state = ContinuityState()
+        if self.is_loaded('chapter_text'):
+            chapter_text = self.chapter_text
+        else:
+            chapter_text = details.get('chapter_text')
+            chapter_text = str(chapter_text) if chapter_text else None
+        
+        data.pop('chapter_text', None)
+        data['continuity_state'] = continuity_state.to_dict()
+        data['chapter_text'] = chapter_text
+        return data
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> Optional['Chapter']:
-        """Create a chapter from dictionary data. Returns None if invalid."""
+    def from_dict(cls, data: Dict[str, Any],
+                  detail_loader: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional['Chapter']:
+        """
+        Create a chapter from dictionary data. Returns None if invalid.
+        
+        Args:
+            data: Chapter dictionary
+            detail_loader: Function returning the stored chapter_text and continuity_state;
+                           if given, those keys missing from data are loaded on first access
+        """
         try:
             if not isinstance(data, dict):
                 return None
@@ -169,6 +295,13 @@ class Chapter:
                 if continuity_state is not None:
                     chapter.continuity_state = continuity_state
             
+            # Leave details the data does not hold to the loader
+            if detail_loader is not None:
+                for name in cls._lazy_fields:
+                    if name not in data:
+                        object.__delattr__(chapter, name)
+                object.__setattr__(chapter, '_detail_loader', detail_loader)
+            
             return chapter
             
         except (ValueError, TypeError):
@@ -10,6 +10,7 @@ import re
 from typing import List, Optional, Dict, Any
 from .chapter import Chapter
 from .narrative_function import NarrativeFunctionEnum
+from .structured_data import decode_json_response
 
 
 def parse_chapters_from_ai_response(ai_response: str) -> List[Chapter]:
@@ -79,13 +80,12 @@ def _extract_json_from_response(ai_response: str) -> Optional[Dict[str, Any]]:
     if not ai_response:
         return None
     
-    try:
-        # First try to parse the entire response as JSON
-        return json.loads(ai_response.strip())
-    except json.JSONDecodeError:
-        pass
+    # Structured output responses are the JSON object itself
+    data = decode_json_response(ai_response)
+    if data is not None:
+        return data
     
-    # Look for JSON block between markers
+    # Fall back to looking for a JSON block between markers
     patterns = [
         r'<STRUCTURED_DATA>\s*(\{.*?\})\s*</STRUCTURED_DATA>',
         r'```json\s*(\{.*?\})\s*```',
@@ -10,10 +10,11 @@ from dataclasses import dataclass
 from .archetype import ArchetypeEnum
 from .functional_role import FunctionalRoleEnum
 from .emotional_function import EmotionalFunctionEnum
+from .change_tracking import ChangeTracking
 
 
 @dataclass
-class Character:
+class Character(ChangeTracking):
     """Represents a character in a story with all their attributes."""
     name: str
     archetype: ArchetypeEnum
@@ -12,13 +12,15 @@ from .character import Character
 from .archetype import ArchetypeEnum
 from .functional_role import FunctionalRoleEnum
 from .emotional_function import EmotionalFunctionEnum
+from .enum_resolver import get_enum_resolver
+from .structured_data import decode_json_response
 
 
 def parse_characters_from_ai_response(ai_response: str) -> Tuple[Optional[str], List[Character]]:
     """
     Parse characters and expanded plot line from AI response containing structured data.
     
-    The AI response should contain a JSON block with the format:
+    The AI response should be (or contain) a JSON block with the format:
     <STRUCTURED_DATA>
     {
       "expanded_plot_line": "Detailed plot description...",
@@ -47,24 +49,12 @@ def parse_characters_from_ai_response(ai_response: str) -> Tuple[Optional[str],
     characters = []
     
     try:
-        # Extract the structured data section
-        pattern = r'<STRUCTURED_DATA>\s*({.*?})\s*</STRUCTURED_DATA>'
-        match = re.search(pattern, ai_response, re.DOTALL)
-        
-        if not match:
-            # Try without the tags in case AI doesn't include them
-            # Look for JSON-like structure with characters array
-            json_pattern = r'{\s*"expanded_plot_line".*?"characters"\s*:\s*\[.*?\]\s*}'
-            match = re.search(json_pattern, ai_response, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-            else:
-                return None, []
-        else:
-            json_str = match.group(1)
-        
-        # Parse the JSON
-        data = json.loads(json_str)
+        # Structured output responses are the JSON object itself
+        data = decode_json_response(ai_response)
+        if data is None:
+            data = _extract_structured_data(ai_response)
+        if data is None:
+            return None, []
         
         # Extract expanded plot line
         expanded_plot_line = data.get('expanded_plot_line')
@@ -85,6 +75,28 @@ def parse_characters_from_ai_response(ai_response: str) -> Tuple[Optional[str],
     return expanded_plot_line, characters
 
 
+def _extract_structured_data(ai_response: str) -> Optional[Dict[str, Any]]:
+    """Extract and decode the JSON block from a free-text response (fallback for responses without a schema)."""
+    # Extract the structured data section
+    pattern = r'<STRUCTURED_DATA>\s*({.*?})\s*</STRUCTURED_DATA>'
+    match = re.search(pattern, ai_response, re.DOTALL)
+    
+    if not match:
+        # Try without the tags in case AI doesn't include them
+        # Look for JSON-like structure with characters array
+        json_pattern = r'{\s*"expanded_plot_line".*?"characters"\s*:\s*\[.*?\]\s*}'
+        match = re.search(json_pattern, ai_response, re.DOTALL)
+        if match:
+            json_str = match.group(0)
+        else:
+            return None
+    else:
+        json_str = match.group(1)
+    
+    # Parse the JSON
+    return json.loads(json_str)
+
+
 def _create_character_from_dict(data: Dict[str, Any]) -> Optional[Character]:
     """
     Create a Character object from a dictionary with proper enum conversion.
@@ -138,86 +150,14 @@ def _create_character_from_dict(data: Dict[str, Any]) -> Optional[Character]:
 
 def _find_archetype_enum(archetype_str: str) -> Optional[ArchetypeEnum]:
     """Find ArchetypeEnum by string value with flexible matching."""
-    archetype_str_clean = archetype_str.strip()
-    
-    # First try exact match
-    for archetype in ArchetypeEnum:
-        if archetype.value == archetype_str_clean:
-            return archetype
-    
-    # Try case-insensitive match
-    for archetype in ArchetypeEnum:
-        if archetype.value.lower() == archetype_str_clean.lower():
-            return archetype
-    
-    # Try partial match (if the AI value is contained in or contains the enum value)
-    for archetype in ArchetypeEnum:
-        if (archetype_str_clean.lower() in archetype.value.lower() or 
-            archetype.value.lower() in archetype_str_clean.lower()):
-            return archetype
-    
-    return None
+    return get_enum_resolver(ArchetypeEnum).resolve(archetype_str)
 
 
 def _find_functional_role_enum(role_str: str) -> Optional[FunctionalRoleEnum]:
     """Find FunctionalRoleEnum by string value with flexible matching."""
-    role_str_clean = role_str.strip()
-    
-    # First try exact match
-    for role in FunctionalRoleEnum:
-        if role.value == role_str_clean:
-            return role
-    
-    # Try case-insensitive match
-    for role in FunctionalRoleEnum:
-        if role.value.lower() == role_str_clean.lower():
-            return role
-    
-    # Try partial match
-    for role in FunctionalRoleEnum:
-        if (role_str_clean.lower() in role.value.lower() or 
-            role.value.lower() in role_str_clean.lower()):
-            return role
-    
-    # Try word-based matching for common variations
-    role_words = set(role_str_clean.lower().split())
-    for role in FunctionalRoleEnum:
-        enum_words = set(role.value.lower().split())
-        # Check if all input words match enum words (allowing for partial word matches)
-        if role_words <= enum_words:  # All input words are in enum words
-            return role
-        # Check for specific common cases like "Support" vs "Supporting"
-        if len(role_words) == len(enum_words):
-            matches = 0
-            for input_word in role_words:
-                for enum_word in enum_words:
-                    if input_word in enum_word or enum_word in input_word:
-                        matches += 1
-                        break
-            if matches == len(role_words):
-                return role
-    
-    return None
+    return get_enum_resolver(FunctionalRoleEnum).resolve(role_str)
 
 
 def _find_emotional_function_enum(function_str: str) -> Optional[EmotionalFunctionEnum]:
     """Find EmotionalFunctionEnum by string value with flexible matching."""
-    function_str_clean = function_str.strip()
-    
-    # First try exact match
-    for function in EmotionalFunctionEnum:
-        if function.value == function_str_clean:
-            return function
-    
-    # Try case-insensitive match
-    for function in EmotionalFunctionEnum:
-        if function.value.lower() == function_str_clean.lower():
-            return function
-    
-    # Try partial match
-    for function in EmotionalFunctionEnum:
-        if (function_str_clean.lower() in function.value.lower() or 
-            function.value.lower() in function_str_clean.lower()):
-            return function
-    
-    return None
\ No newline at end of file
+    return get_enum_resolver(EmotionalFunctionEnum).resolve(function_str)
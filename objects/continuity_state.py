@@ -10,10 +10,11 @@ from typing import List, Dict, Optional, Any
 from .continuity_character import ContinuityCharacter
 from .continuity_object import ContinuityObject
 from .plot_thread import PlotThread
+from .change_tracking import ChangeTracking
 
 
 @dataclass
-class ContinuityState:
+class ContinuityState(ChangeTracking):
     """Represents the continuity state of the story at a specific point."""
     characters: List[ContinuityCharacter] = field(default_factory=list)
     objects: List[ContinuityObject] = field(default_factory=list)
@@ -32,9 +33,11 @@ class ContinuityState:
                 existing.current_location = character.current_location
                 existing.status = character.status
                 existing.inventory = character.inventory.copy()
+                self.mark_dirty()
                 return True
         
         self.characters.append(character)
+        self.mark_dirty()
         return True
     
     def remove_character(self, name: str) -> bool:
@@ -42,6 +45,7 @@ class ContinuityState:
         for i, character in enumerate(self.characters):
             if character.name.lower() == name.lower():
                 self.characters.pop(i)
+                self.mark_dirty()
                 return True
         return False
     
@@ -63,9 +67,11 @@ class ContinuityState:
                 # Update existing object
                 existing.holder = obj.holder
                 existing.location = obj.location
+                self.mark_dirty()
                 return True
         
         self.objects.append(obj)
+        self.mark_dirty()
         return True
     
     def remove_object(self, name: str) -> bool:
@@ -73,6 +79,7 @@ class ContinuityState:
         for i, obj in enumerate(self.objects):
             if obj.name.lower() == name.lower():
                 self.objects.pop(i)
+                self.mark_dirty()
                 return True
         return False
     
@@ -90,6 +97,7 @@ class ContinuityState:
         location = location.strip()
         if location not in self.locations_visited:
             self.locations_visited.append(location)
+            self.mark_dirty()
             return True
         return False
     
@@ -97,6 +105,7 @@ class ContinuityState:
         """Remove a location from the visited locations. Returns True if successful."""
         if location in self.locations_visited:
             self.locations_visited.remove(location)
+            self.mark_dirty()
             return True
         return False
     
@@ -111,9 +120,11 @@ class ContinuityState:
                 # Update existing thread
                 existing.description = thread.description
                 existing.status = thread.status
+                self.mark_dirty()
                 return True
         
         self.open_plot_threads.append(thread)
+        self.mark_dirty()
         return True
     
     def remove_plot_thread(self, thread_id: str) -> bool:
@@ -121,6 +132,7 @@ class ContinuityState:
         for i, thread in enumerate(self.open_plot_threads):
             if thread.id.lower() == thread_id.lower():
                 self.open_plot_threads.pop(i)
+                self.mark_dirty()
                 return True
         return False
     
@@ -0,0 +1,220 @@
+"""
+Enum Resolver Implementation
+
+This module implements a shared resolver that maps free-text names returned by
+the AI (e.g. "wise mentor", "Supporting character", "Rising Tenson") onto enum
+members. Each enum gets one resolver, built once, with a normalized-key table
+for O(1) lookup and a character trigram index for the fuzzy fallback.
+"""
+
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Set, Type
+
+# Minimum trigram similarity for a fuzzy match to be accepted by default
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Maximum number of memoized fallback lookups per resolver
+MAX_CACHED_LOOKUPS = 4096
+
+# Words shorter than this (e.g. the "e" of "Confidant(e)") are left out of partial and word matches
+MIN_MATCH_WORD_LENGTH = 3
+
+# Names the AI writes for a missing value; they never match a member
+PLACEHOLDER_NAMES = frozenset({"n a", "na", "none", "null", "nil", "unknown", "not applicable", "not specified", "tbd"})
+
+_NON_ALNUM_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase text, strip accents and collapse punctuation and whitespace into single spaces."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM_PATTERN.sub(" ", text).strip()
+
+
+def _significant_words(words: List[str]) -> List[str]:
+    """Drop the words too short to take part in partial and word matches."""
+    return [word for word in words if len(word) >= MIN_MATCH_WORD_LENGTH]
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the set of character trigrams of a normalized string."""
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(frozen=True)
+class EnumMatch:
+    """Result of resolving a name against an enum."""
+    member: Enum
+    confidence: float
+    method: str  # "exact", "normalized", "partial", "word" or "fuzzy"
+
+
+class EnumResolver:
+    """Resolves free-text names onto the members of a single enum."""
+
+    def __init__(self, enum_cls: Type[Enum]):
+        """
+        Build the lookup tables for an enum.
+
+        Args:
+            enum_cls: Enum whose member values are the canonical names
+        """
+        self.enum_cls = enum_cls
+        self._members: List[Enum] = list(enum_cls)
+        self._exact: Dict[str, Enum] = {member.value: member for member in self._members}
+        self._normalized: Dict[str, Enum] = {}
+        self._partial_values: List[str] = []
+        self._words: List[Set[str]] = []
+        self._trigram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for position, member in enumerate(self._members):
+            normalized = normalize_name(member.value)
+            self._normalized.setdefault(normalized, member)
+            self._normalized.setdefault(normalized.replace(" ", ""), member)
+            self._partial_values.append(" ".join(_significant_words(normalized.split())))
+            self._words.append(set(_significant_words(member.value.lower().split())))
+            grams = _trigrams(normalized)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+        self._cache: Dict[str, Optional[EnumMatch]] = {}
+        self._cache_lock = threading.Lock()
+
+    def match(self, text: str) -> Optional[EnumMatch]:
+        """
+        Find the best enum member for a name.
+
+        Lookup order mirrors the previous parser behaviour: exact value, then
+        normalized key, then partial (substring) match in enum order, then
+        word-level match, then trigram similarity. Only the normalized-key miss
+        path touches the trigram index, and its results are memoized.
+
+        Args:
+            text: Name to resolve
+
+        Returns:
+            EnumMatch describing the best candidate, or None if nothing is similar
+        """
+        if not text:
+            return None
+        member = self._exact.get(text)
+        if member is not None:
+            return EnumMatch(member, 1.0, "exact")
+
+        normalized = normalize_name(text)
+        if not normalized:
+            return None
+        member = self._normalized.get(normalized)
+        if member is not None:
+            return EnumMatch(member, 1.0, "normalized")
+        if normalized in PLACEHOLDER_NAMES or not _significant_words(normalized.split()):
+            return None
+
+        key = text.lower()
+        if key in self._cache:
+            return self._cache[key]
+        result = self._fallback(normalized, key)
+        with self._cache_lock:
+            if len(self._cache) >= MAX_CACHED_LOOKUPS:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def resolve(self, text: str, allow_partial: bool = True,
+                min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Optional[Enum]:
+        """
+        Resolve a name to an enum member.
+
+        Args:
+            text: Name to resolve
+            allow_partial: Accept substring and word-level matches regardless of confidence
+            min_confidence: Minimum trigram similarity for fuzzy matches
+
+        Returns:
+            The matching enum member, or None
+        """
+        match = self.match(text.strip() if text else text)
+        if match is None:
+            return None
+        if match.method in ("exact", "normalized"):
+            return match.member
+        if match.method in ("partial", "word"):
+            return match.member if allow_partial else None
+        return match.member if match.confidence >= min_confidence else None
+
+    def _fallback(self, normalized: str, lowered: str) -> Optional[EnumMatch]:
+        """
+        Resolve a name that has no direct key using the trigram index.
+
+        Args:
+            normalized: normalize_name() of the name
+            lowered: The name lowercased; its whitespace-split words are used for word matches
+        """
+        grams = _trigrams(normalized)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        # Partial match on the significant words - every substring shares at least
+        # one trigram with its container
+        partial = " ".join(_significant_words(normalized.split()))
+        for position in sorted(shared):
+            value = self._partial_values[position]
+            if value and (partial in value or value in partial):
+                shorter, longer = sorted((len(partial), len(value)))
+                return EnumMatch(self._members[position], shorter / longer, "partial")
+
+        # Word-level match (e.g. "Support Character" vs "Supporting Character")
+        words = set(_significant_words(lowered.split()))
+        for position, enum_words in enumerate(self._words):
+            if not words or not enum_words:
+                continue
+            if words <= enum_words or self._words_correspond(words, enum_words):
+                return EnumMatch(self._members[position], len(words) / len(enum_words | words), "word")
+
+        # Fuzzy match - Dice coefficient over character trigrams
+        best_position, best_score = -1, 0.0
+        for position, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._trigram_counts[position])
+            if score > best_score or (score == best_score and position < best_position):
+                best_position, best_score = position, score
+        if best_position < 0:
+            return None
+        return EnumMatch(self._members[best_position], best_score, "fuzzy")
+
+    @staticmethod
+    def _words_correspond(words: Set[str], enum_words: Set[str]) -> bool:
+        """Check whether every input word contains or is contained in one of the enum words."""
+        if len(words) != len(enum_words):
+            return False
+        for word in words:
+            if not any(word in enum_word or enum_word in word for enum_word in enum_words):
+                return False
+        return True
+
+
+# Global resolver instances, one per enum
+_resolvers: Dict[Type[Enum], EnumResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_enum_resolver(enum_cls: Type[Enum]) -> EnumResolver:
+    """Get or create the shared resolver for an enum."""
+    resolver = _resolvers.get(enum_cls)
+    if resolver is None:
+        with _resolvers_lock:
+            resolver = _resolvers.get(enum_cls)
+            if resolver is None:
+                resolver = EnumResolver(enum_cls)
+                _resolvers[enum_cls] = resolver
+    return resolver
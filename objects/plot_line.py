@@ -8,6 +8,7 @@ generated by AI based on story configuration.
 from typing import List, Dict, Any
 import json
 import re
+from .structured_data import decode_json_response
 
 
 class PlotLine:
@@ -40,7 +41,7 @@ def parse_plot_lines_from_ai_response(ai_response: str) -> List[PlotLine]:
     """
     Parse plot lines from AI response containing structured data.
     
-    The AI response should contain a JSON block with the format:
+    The AI response should be (or contain) a JSON block with the format:
     <STRUCTURED_DATA>
     {
       "plotlines": [
@@ -62,24 +63,12 @@ def parse_plot_lines_from_ai_response(ai_response: str) -> List[PlotLine]:
     plot_lines = []
     
     try:
-        # Extract the structured data section
-        pattern = r'<STRUCTURED_DATA>\s*({.*?})\s*</STRUCTURED_DATA>'
-        match = re.search(pattern, ai_response, re.DOTALL)
-        
-        if not match:
-            # Try without the tags in case AI doesn't include them
-            # Look for JSON-like structure
-            json_pattern = r'{\s*"plotlines"\s*:\s*\[.*?\]\s*}'
-            match = re.search(json_pattern, ai_response, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-            else:
-                return plot_lines
-        else:
-            json_str = match.group(1)
-        
-        # Parse the JSON
-        data = json.loads(json_str)
+        # Structured output responses are the JSON object itself
+        data = decode_json_response(ai_response)
+        if data is None:
+            data = _extract_structured_data(ai_response)
+        if data is None:
+            return plot_lines
         
         # Extract plot lines
         if 'plotlines' in data and isinstance(data['plotlines'], list):
@@ -96,4 +85,26 @@ def parse_plot_lines_from_ai_response(ai_response: str) -> List[PlotLine]:
         # In a production environment, you might want to log this error
         pass
     
-    return plot_lines
\ No newline at end of file
+    return plot_lines
+
+
+def _extract_structured_data(ai_response: str):
+    """Extract and decode the JSON block from a free-text response (fallback for responses without a schema)."""
+    # Extract the structured data section
+    pattern = r'<STRUCTURED_DATA>\s*({.*?})\s*</STRUCTURED_DATA>'
+    match = re.search(pattern, ai_response, re.DOTALL)
+    
+    if not match:
+        # Try without the tags in case AI doesn't include them
+        # Look for JSON-like structure
+        json_pattern = r'{\s*"plotlines"\s*:\s*\[.*?\]\s*}'
+        match = re.search(json_pattern, ai_response, re.DOTALL)
+        if match:
+            json_str = match.group(0)
+        else:
+            return None
+    else:
+        json_str = match.group(1)
+    
+    # Parse the JSON
+    return json.loads(json_str)
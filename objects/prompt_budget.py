@@ -0,0 +1,235 @@
+"""
+Prompt Token Budget
+
+Keeps the story context of a prompt inside a token budget. The context is
+built as PromptSections, each with a priority, its own token budget and a
+list of renderings from the full text down to the shortest acceptable
+summary (e.g. chapter outlines reduced to titles, backstories to their first
+sentence). TokenBudgeter.fit() first brings every section within its own
+budget, then, while the whole context is over the total budget, steps the
+lowest-priority section down to its next shorter rendering.
+
+Trimming only depends on the text, so the same story always gives the same
+prompt, and prompts that already fit are left exactly as they were. The
+fitted text is returned as a PromptText, a str that also carries the
+BudgetReport so callers can report the final size.
+
+Token counts are estimated (about four characters per token for English
+prose), which is close enough for budgeting and needs no tokenizer.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Estimated characters per token
+CHARS_PER_TOKEN = 4
+
+# Default token budget for the story context of a prompt
+DEFAULT_CONTEXT_TOKENS = 24000
+
+# Section priorities: lower priority sections are trimmed first
+PRIORITY_FIXED = 100
+PRIORITY_CONFIGURATION = 90
+PRIORITY_PLOT_LINE = 80
+PRIORITY_CHARACTERS = 60
+PRIORITY_EXPANDED_PLOT_LINE = 50
+PRIORITY_ARCHETYPES = 40
+PRIORITY_CHAPTERS = 30
+
+# Token budgets of individual sections (sections not listed only share the total)
+SECTION_TOKENS = {
+    "characters": 6000,
+    "chapters": 12000,
+    "expanded_plot_line": 4000,
+}
+
+# Renderings of the characters section, from the full text down
+CHARACTER_DETAIL_LEVELS = ("full", "short", "brief")
+SHORT_CHARACTER_DETAIL_TOKENS = 60
+
+# Renderings of the chapter structure as (older chapters, most recent chapters)
+RECENT_CHAPTERS = 3
+CHAPTER_DETAIL_LEVELS = (
+    ("full", "full"),
+    ("summary", "full"),
+    ("title", "full"),
+    ("omitted", "full"),
+    ("omitted", "summary"),
+    ("omitted", "title"),
+)
+SUMMARY_OVERVIEW_TOKENS = 60
+
+# Token budgets of the shortened renderings of the expanded plot line
+EXPANDED_PLOT_LINE_TOKENS = (2000, 500)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def first_sentences(text: str, max_tokens: int) -> str:
+    """
+    Shorten a text to its leading whole sentences within a token budget.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget of the result
+
+    Returns:
+        The text if it fits, otherwise as many leading sentences as fit (at
+        least the first one, cut at a word if needed) followed by " [...]"
+    """
+    text = (text or "").strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    for sentence in _SENTENCE_END.split(text):
+        if kept and estimate_tokens(" ".join(kept + [sentence])) > max_tokens:
+            break
+        kept.append(sentence)
+    shortened = " ".join(kept)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(shortened) > max_chars:
+        shortened = shortened[:max_chars].rsplit(" ", 1)[0]
+    return f"{shortened} [...]"
+
+
+@dataclass
+class PromptSection:
+    """One part of a prompt's story context and its shorter renderings."""
+
+    name: str
+    priority: int
+    # Renderings from the full text to the shortest summary
+    variants: List[str]
+    # Token budget of this section on its own (None for no limit)
+    max_tokens: Optional[int] = None
+    level: int = 0
+
+    @property
+    def text(self) -> str:
+        """The current rendering."""
+        return self.variants[self.level]
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the current rendering."""
+        return estimate_tokens(self.text)
+
+    def can_shrink(self) -> bool:
+        """Whether a shorter rendering is left."""
+        return self.level < len(self.variants) - 1
+
+    def shrink(self) -> None:
+        """Step down to the next shorter rendering."""
+        self.level += 1
+
+
+@dataclass
+class BudgetReport:
+    """Result of fitting sections into a budget."""
+
+    text: str
+    tokens: int
+    max_tokens: int
+    # Section name to (tokens, rendering level) after fitting
+    sections: Dict[str, tuple] = field(default_factory=dict)
+    trimmed: List[str] = field(default_factory=list)
+
+    @property
+    def over_budget(self) -> bool:
+        """True if even the shortest renderings did not fit."""
+        return self.tokens > self.max_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the report without the text."""
+        return {
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "over_budget": self.over_budget,
+            "trimmed": list(self.trimmed),
+            "sections": {name: {"tokens": tokens, "level": level} for name, (tokens, level) in self.sections.items()},
+        }
+
+
+class PromptText(str):
+    """Prompt text that carries the BudgetReport it was fitted with."""
+
+    budget: Optional[BudgetReport] = None
+    # Size report of a complete prompt, set by Prompt (prompt type, tokens, max_tokens, story_configuration)
+    size_report: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_report(cls, report: BudgetReport) -> "PromptText":
+        """Build the text of a budget report."""
+        text = cls(report.text)
+        text.budget = report
+        return text
+
+
+class TokenBudgeter:
+    """Fits prompt sections into a token budget by trimming low-priority sections first."""
+
+    def __init__(self, max_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        """
+        Initialize the budgeter.
+
+        Args:
+            max_tokens: Token budget for the joined sections
+        """
+        self.max_tokens = max_tokens
+
+    def fit(self, sections: List[PromptSection], separator: str = "\n") -> BudgetReport:
+        """
+        Choose a rendering of each section so the joined text fits the budget.
+
+        Args:
+            sections: Sections in prompt order (empty sections are left out)
+            separator: Text placed between sections
+
+        Returns:
+            BudgetReport with the joined text and each section's final size
+        """
+        sections = [section for section in sections if section.variants and section.variants[0]]
+
+        # Each section within its own budget first
+        for section in sections:
+            while section.max_tokens is not None and section.tokens > section.max_tokens and section.can_shrink():
+                section.shrink()
+
+        # Then the lowest priority first (the later section on ties) until the whole fits
+        total = self._total(sections, separator)
+        while total > self.max_tokens:
+            candidates = [(section.priority, -index) for index, section in enumerate(sections) if section.can_shrink()]
+            if not candidates:
+                break
+            sections[-min(candidates)[1]].shrink()
+            total = self._total(sections, separator)
+
+        return BudgetReport(
+            text=separator.join(section.text for section in sections),
+            tokens=total,
+            max_tokens=self.max_tokens,
+            sections={section.name: (section.tokens, section.level) for section in sections},
+            trimmed=[section.name for section in sections if section.level],
+        )
+
+    @staticmethod
+    def _total(sections: List[PromptSection], separator: str) -> int:
+        """Estimate the tokens of the joined sections."""
+        return estimate_tokens(separator.join(section.text for section in sections))
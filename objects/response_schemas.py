@@ -0,0 +1,167 @@
+"""
+Response Schemas
+
+JSON schemas for the structured data each prompt type asks for, derived from
+the type annotations of the objects the responses are parsed into (PlotLine,
+Character, Chapter and ContinuityState). They are sent as the completion's
+response_format, so the response is a bare, schema-valid JSON object that the
+parsers decode directly (see structured_data.decode_json_response()).
+
+The schemas follow the strict structured-outputs rules: every property is
+required, objects allow no additional properties and optional values are
+nullable. Enum-typed fields (archetype, functional role, emotional function,
+narrative function) are limited to the enum values, so a schema-valid
+response always resolves.
+"""
+
+import json
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+from prompt_types import PromptType
+from .plot_line import PlotLine
+from .character import Character
+from .chapter import Chapter
+from .continuity_state import ContinuityState
+
+# Fields of Chapter filled in by a chapter plan
+CHAPTER_PLAN_FIELDS = [
+    "chapter_number", "title", "overview", "character_impact", "point_of_view",
+    "narrative_function", "foreshadow_or_echo", "scene_highlights",
+]
+
+_PRIMITIVE_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def _object_schema(properties: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a strict object schema requiring all of the given properties."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def schema_for_type(annotation: Any) -> Dict[str, Any]:
+    """
+    Build the JSON schema for a type annotation.
+
+    Args:
+        annotation: str/int/float/bool, an Enum, a dataclass, or List/Optional of those
+
+    Returns:
+        JSON schema dictionary
+    """
+    origin = get_origin(annotation)
+    if origin is Union:
+        arguments = [argument for argument in get_args(annotation) if argument is not type(None)]
+        if len(arguments) != 1:
+            raise TypeError(f"Unsupported union type {annotation}")
+        return {"anyOf": [schema_for_type(arguments[0]), {"type": "null"}]}
+    if origin in (list, List):
+        return {"type": "array", "items": schema_for_type(get_args(annotation)[0])}
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return {"type": "string", "enum": [member.value for member in annotation]}
+    if annotation in _PRIMITIVE_TYPES:
+        return {"type": _PRIMITIVE_TYPES[annotation]}
+    if is_dataclass(annotation):
+        return schema_for_class(annotation)
+    raise TypeError(f"Unsupported type {annotation}")
+
+
+def schema_for_class(cls: type, names: Optional[List[str]] = None,
+                     overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build the object schema of a class from its annotations.
+
+    Dataclasses use their public fields; other classes use the arguments of
+    their constructor.
+
+    Args:
+        cls: Class the object is parsed into
+        names: Fields to include (defaults to all public fields)
+        overrides: Schemas for fields whose annotation is too loose to derive from
+
+    Returns:
+        JSON schema dictionary
+    """
+    overrides = overrides or {}
+    if is_dataclass(cls):
+        hints = get_type_hints(cls)
+        if names is None:
+            names = [field.name for field in fields(cls) if not field.name.startswith("_")]
+    else:
+        hints = get_type_hints(cls.__init__)
+        hints.pop("return", None)
+        if names is None:
+            names = list(hints)
+    return _object_schema({name: overrides.get(name) or schema_for_type(hints[name]) for name in names})
+
+
+def plot_lines_schema() -> Dict[str, Any]:
+    """Get the schema of a plot lines response."""
+    return _object_schema({"plotlines": {"type": "array", "items": schema_for_class(PlotLine)}})
+
+
+def characters_schema() -> Dict[str, Any]:
+    """Get the schema of a characters response."""
+    return _object_schema({
+        "expanded_plot_line": {"type": "string"},
+        "characters": {"type": "array", "items": schema_for_class(Character)},
+    })
+
+
+def chapter_plan_schema() -> Dict[str, Any]:
+    """Get the schema of a chapter plan response."""
+    character_impact = {
+        "type": "array",
+        "items": _object_schema({"character": {"type": "string"}, "effect": {"type": "string"}}),
+    }
+    chapter = schema_for_class(Chapter, CHAPTER_PLAN_FIELDS, {"character_impact": character_impact})
+    return _object_schema({"chapters": {"type": "array", "items": chapter}})
+
+
+def chapter_schema() -> Dict[str, Any]:
+    """Get the schema of a generated chapter response."""
+    return _object_schema({
+        "chapter_text": {"type": "string"},
+        "chapter_summary": {"type": "string"},
+        "continuity_state": schema_for_class(ContinuityState),
+    })
+
+
+RESPONSE_SCHEMAS = {
+    PromptType.PLOT_LINES: ("plot_lines", plot_lines_schema),
+    PromptType.CHARACTERS: ("characters", characters_schema),
+    PromptType.CHAPTER_OUTLINE: ("chapter_plan", chapter_plan_schema),
+    PromptType.CHAPTER: ("chapter", chapter_schema),
+}
+
+
+@lru_cache(maxsize=None)
+def _response_format(prompt_type: PromptType) -> Optional[str]:
+    """Build the response_format of a prompt type once, serialized so the cached value cannot be modified."""
+    entry = RESPONSE_SCHEMAS.get(prompt_type)
+    if entry is None:
+        return None
+    name, build_schema = entry
+    return json.dumps({
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": build_schema()},
+    })
+
+
+def get_response_format(prompt_type: PromptType) -> Optional[Dict[str, Any]]:
+    """
+    Get the chat completion response_format for a prompt type.
+
+    Args:
+        prompt_type: Prompt type of the completion
+
+    Returns:
+        A json_schema response_format, or None if the prompt type has no schema
+    """
+    response_format = _response_format(prompt_type)
+    return json.loads(response_format) if response_format else None
@@ -0,0 +1,306 @@
+"""
+Search Index Implementation
+
+This module implements a tokenized inverted index over the catalog registries
+(archetypes, styles, genres, sub-genres, story types and character functions).
+The index is built once when the catalog is loaded and supports exact, prefix
+and typo-tolerant lookup with ranked results.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Iterable, Any
+
+
+# Field weights - matches in names count for more than matches in descriptions
+NAME_WEIGHT = 3.0
+TEXT_WEIGHT = 1.0
+EXAMPLE_WEIGHT = 0.5
+
+# Score multipliers for the different kinds of term matches
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.4
+
+# Bonus for results whose name starts with the full query
+NAME_PREFIX_BONUS = 2.0
+
+# Terms shorter than this are never matched fuzzily
+MIN_FUZZY_LENGTH = 4
+
+STOP_WORDS = frozenset(
+    ["a", "an", "and", "the", "of", "or", "to", "in", "on", "for", "with", "by", "as", "is", "at", "their", "who"]
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens, dropping stop words."""
+    if not text:
+        return []
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _deletes(token: str) -> Set[str]:
+    """Return every variant of the token with one character removed."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _max_edits(token: str) -> int:
+    """Return how many typos are tolerated for a query term of this length."""
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    if len(token) < 8:
+        return 1
+    return 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    """Represents a single searchable catalog entry."""
+    kind: str
+    name: str
+    description: str = ""
+    parent: Optional[str] = None
+
+
+@dataclass
+class SearchResult:
+    """Represents a ranked search hit."""
+    kind: str
+    name: str
+    description: str
+    score: float
+    parent: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary representation."""
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'description': self.description,
+            'parent': self.parent,
+            'score': round(self.score, 4)
+        }
+
+
+@dataclass
+class SearchIndex:
+    """Tokenized inverted index with prefix and typo-tolerant lookup."""
+    documents: List[SearchDocument] = field(default_factory=list)
+    postings: Dict[str, Dict[int, float]] = field(default_factory=dict)
+    vocabulary: List[str] = field(default_factory=list)
+    delete_index: Dict[str, List[str]] = field(default_factory=dict)
+    idf: Dict[str, float] = field(default_factory=dict)
+
+    def add_document(self, document: SearchDocument, weighted_text: Iterable[Tuple[str, float]]) -> None:
+        """Add a document with (text, weight) pairs to the index. Call finalize() afterwards."""
+        doc_id = len(self.documents)
+        self.documents.append(document)
+        for text, weight in weighted_text:
+            for token in tokenize(text):
+                doc_postings = self.postings.setdefault(token, {})
+                doc_postings[doc_id] = doc_postings.get(doc_id, 0.0) + weight
+
+    def finalize(self) -> None:
+        """Build the sorted vocabulary, typo lookup table and IDF weights."""
+        self.vocabulary = sorted(self.postings)
+        total = max(len(self.documents), 1)
+        self.idf = {
+            token: math.log(1.0 + total / len(doc_postings))
+            for token, doc_postings in self.postings.items()
+        }
+        delete_index: Dict[str, Set[str]] = {}
+        for token in self.vocabulary:
+            if len(token) < MIN_FUZZY_LENGTH - 1:
+                continue
+            for variant in _deletes(token) | {token}:
+                delete_index.setdefault(variant, set()).add(token)
+        self.delete_index = {variant: sorted(tokens) for variant, tokens in delete_index.items()}
+
+    def _prefix_terms(self, term: str) -> List[str]:
+        """Return vocabulary terms that start with the given prefix (excluding the term itself)."""
+        start = bisect_left(self.vocabulary, term)
+        matches = []
+        for i in range(start, len(self.vocabulary)):
+            token = self.vocabulary[i]
+            if not token.startswith(term):
+                break
+            if token != term:
+                matches.append(token)
+        return matches
+
+    def _fuzzy_terms(self, term: str) -> List[str]:
+        """Return vocabulary terms within the allowed edit distance of the term."""
+        limit = _max_edits(term)
+        if limit == 0:
+            return []
+        candidates: Set[str] = set()
+        for variant in _deletes(term) | {term}:
+            candidates.update(self.delete_index.get(variant, ()))
+        candidates.discard(term)
+        return [token for token in candidates if _edit_distance(term, token, limit) <= limit]
+
+    def _score_term(self, term: str) -> Dict[int, float]:
+        """Score every document matching a single query term, keeping the best match per document."""
+        scores: Dict[int, float] = {}
+
+        def apply(token: str, multiplier: float) -> None:
+            weight = self.idf.get(token, 0.0) * multiplier
+            for doc_id, term_weight in self.postings.get(token, {}).items():
+                score = term_weight * weight
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+
+        if term in self.postings:
+            apply(term, EXACT_MATCH)
+        for token in self._prefix_terms(term):
+            apply(token, PREFIX_MATCH)
+        if not scores:
+            for token in self._fuzzy_terms(term):
+                apply(token, FUZZY_MATCH)
+        return scores
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[SearchResult]:
+        """
+        Search the index.
+
+        Every query term must match (exactly, by prefix, or within a small edit
+        distance). Results are ranked by field- and IDF-weighted score.
+
+        Args:
+            query: Free-text query, typically a partial word typed by the user
+            kinds: Optional document kinds to restrict results to (e.g. "archetype")
+            limit: Maximum number of results to return
+
+        Returns:
+            Ranked list of SearchResult objects
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        kind_filter = set(kinds) if kinds else None
+
+        totals: Optional[Dict[int, float]] = None
+        for term in terms:
+            term_scores = self._score_term(term)
+            if totals is None:
+                totals = term_scores
+            else:
+                totals = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in totals.items()
+                    if doc_id in term_scores
+                }
+            if not totals:
+                return []
+
+        normalized_query = " ".join(terms)
+        results = []
+        for doc_id, score in totals.items():
+            document = self.documents[doc_id]
+            if kind_filter and document.kind not in kind_filter:
+                continue
+            if " ".join(tokenize(document.name)).startswith(normalized_query):
+                score += NAME_PREFIX_BONUS
+            results.append(
+                SearchResult(
+                    kind=document.kind,
+                    name=document.name,
+                    description=document.description,
+                    score=score,
+                    parent=document.parent
+                )
+            )
+
+        results.sort(key=lambda result: (-result.score, result.name))
+        return results[:limit]
+
+    @classmethod
+    def from_catalog(cls, catalog) -> 'SearchIndex':
+        """Build an index covering every registry in the catalog."""
+        index = cls()
+
+        for archetype in catalog.archetypes.get_all_archetypes():
+            index.add_document(
+                SearchDocument('archetype', archetype.name, archetype.description),
+                [(archetype.name, NAME_WEIGHT), (archetype.description, TEXT_WEIGHT)]
+            )
+
+        for style in catalog.styles.get_all_styles():
+            index.add_document(
+                SearchDocument('style', style.name, style.description),
+                [(style.name, NAME_WEIGHT), (style.description, TEXT_WEIGHT)]
+                + [(characteristic, TEXT_WEIGHT) for characteristic in style.characteristics]
+                + [(example, EXAMPLE_WEIGHT) for example in style.examples]
+            )
+
+        for genre in catalog.genres.get_all_genres():
+            index.add_document(
+                SearchDocument('genre', genre.name, ", ".join(sub.name for sub in genre.subgenres)),
+                [(genre.name, NAME_WEIGHT)] + [(sub.name, EXAMPLE_WEIGHT) for sub in genre.subgenres]
+            )
+            for sub_genre in genre.subgenres:
+                index.add_document(
+                    SearchDocument('sub_genre', sub_genre.name, sub_genre.plot, parent=genre.name),
+                    [(sub_genre.name, NAME_WEIGHT), (sub_genre.plot, TEXT_WEIGHT)]
+                    + [(example, EXAMPLE_WEIGHT) for example in sub_genre.examples]
+                )
+
+        for story_type in catalog.story_types.get_all_story_types():
+            index.add_document(
+                SearchDocument('story_type', story_type.name, story_type.description),
+                [(story_type.name, NAME_WEIGHT), (story_type.description, TEXT_WEIGHT)]
+                + [(example, EXAMPLE_WEIGHT) for example in story_type.examples]
+            )
+            for subtype in story_type.subtypes:
+                index.add_document(
+                    SearchDocument('story_subtype', subtype.name, subtype.description, parent=story_type.name),
+                    [(subtype.name, NAME_WEIGHT), (subtype.description, TEXT_WEIGHT)]
+                    + [(example, EXAMPLE_WEIGHT) for example in subtype.examples]
+                )
+
+        for emotional_function in catalog.emotional_functions.get_all_emotional_functions():
+            index.add_document(
+                SearchDocument('emotional_function', emotional_function.name, emotional_function.description),
+                [(emotional_function.name, NAME_WEIGHT), (emotional_function.description, TEXT_WEIGHT)]
+            )
+
+        for functional_role in catalog.functional_roles.get_all_functional_roles():
+            index.add_document(
+                SearchDocument('functional_role', functional_role.name, functional_role.description),
+                [(functional_role.name, NAME_WEIGHT), (functional_role.description, TEXT_WEIGHT)]
+            )
+
+        for narrative_function in catalog.narrative_functions.get_all_narrative_functions():
+            index.add_document(
+                SearchDocument('narrative_function', narrative_function.name, narrative_function.description),
+                [(narrative_function.name, NAME_WEIGHT), (narrative_function.description, TEXT_WEIGHT)]
+            )
+
+        index.finalize()
+        return index
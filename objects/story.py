@@ -5,7 +5,7 @@ This module implements a Story object that backs user choices like genre and sub
 """
 
 import json
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Tuple
 from .genre import Genre, SubGenre, GenreRegistry
 from .archetype import ArchetypeRegistry, ArchetypeEnum
 from .style import Style, StyleRegistry
@@ -15,20 +15,44 @@ from .plot_line import PlotLine
 from .functional_role import FunctionalRole, FunctionalRoleRegistry
 from .character import Character
 from .chapter import Chapter
+from .catalog import Catalog, ArchetypePartition, get_catalog
+from .change_tracking import ChangeTracking
+from .prompt_budget import (
+    CHAPTER_DETAIL_LEVELS, CHARACTER_DETAIL_LEVELS, DEFAULT_CONTEXT_TOKENS, EXPANDED_PLOT_LINE_TOKENS,
+    PRIORITY_ARCHETYPES, PRIORITY_CHAPTERS, PRIORITY_CHARACTERS, PRIORITY_CONFIGURATION,
+    PRIORITY_EXPANDED_PLOT_LINE, PRIORITY_FIXED, PRIORITY_PLOT_LINE, RECENT_CHAPTERS, SECTION_TOKENS,
+    SHORT_CHARACTER_DETAIL_TOKENS, SUMMARY_OVERVIEW_TOKENS,
+    PromptSection, PromptText, TokenBudgeter, first_sentences,
+)
 
-class Story:
+class Story(ChangeTracking):
     """Represents a story with user-selected genre and sub-genre."""
     
-    def __init__(self):
-        """Initialize a new story."""
+    # Characters and chapters are persisted as separate rows and tracked individually
+    _untracked_fields = frozenset(['characters', 'chapters', 'catalog_version'])
+    _clean_characters: Optional[Tuple[Character, ...]] = None
+    _clean_chapters: Optional[Dict[int, Chapter]] = None
+    
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize a new story.
+        
+        Args:
+            catalog: Catalog snapshot to resolve selections against. Defaults to the
+                     shared process-wide catalog so registries are not re-parsed per story.
+        """
+        if catalog is None:
+            catalog = get_catalog()
         self.genre: Optional[Genre] = None
         self.sub_genre: Optional[SubGenre] = None
-        self._genre_registry = GenreRegistry()
-        self._archetype_registry = ArchetypeRegistry()
-        self._style_registry = StyleRegistry()
-        self._story_type_registry = StoryTypeRegistry()
-        self._emotional_function_registry = EmotionalFunctionRegistry()
-        self._functional_role_registry = FunctionalRoleRegistry()
+        self._catalog: Catalog = catalog
+        # Version of the catalog snapshot this story was resolved against
+        self.catalog_version: str = catalog.version
+        self._genre_registry: GenreRegistry = catalog.genres
+        self._archetype_registry: ArchetypeRegistry = catalog.archetypes
+        self._style_registry: StyleRegistry = catalog.styles
+        self._story_type_registry: StoryTypeRegistry = catalog.story_types
+        self._emotional_function_registry: EmotionalFunctionRegistry = catalog.emotional_functions
+        self._functional_role_registry: FunctionalRoleRegistry = catalog.functional_roles
 
         # Story type selections
         self.story_type_name: Optional[str] = None
@@ -135,8 +159,10 @@ class Story:
                     return False  # Chapter number already exists
             
             self.chapters.append(chapter)
-            # Sort chapters by chapter number to maintain order
-            self.chapters.sort(key=lambda c: c.chapter_number)
+            # Sort chapters by chapter number to maintain order (only needed when
+            # added out of order; hydration adds them in order)
+            if len(self.chapters) > 1 and self.chapters[-2].chapter_number > chapter.chapter_number:
+                self.chapters.sort(key=lambda c: c.chapter_number)
             return True
         return False
     
@@ -196,18 +222,82 @@ class Story:
             return self.genre.subgenres
         return []
     
+    def is_tracked(self) -> bool:
+        """Return True once the story has been marked clean after loading or saving."""
+        return self._clean_characters is not None
+
+    def mark_clean(self) -> None:
+        """Mark the story, its characters and its chapters as persisted."""
+        super().mark_clean()
+        object.__setattr__(self, "_clean_characters", tuple(self.characters))
+        object.__setattr__(self, "_clean_chapters", {chapter.chapter_number: chapter for chapter in self.chapters})
+        for character in self.characters:
+            character.mark_clean()
+        for chapter in self.chapters:
+            chapter.mark_clean()
+
+    def is_header_dirty(self) -> bool:
+        """Return True if any story-level selection changed since the last mark_clean()."""
+        return super().is_dirty()
+
+    def is_dirty(self) -> bool:
+        """Return True if anything in the story changed since the last mark_clean()."""
+        if self.is_header_dirty():
+            return True
+        changed_characters, character_count = self.get_character_changes()
+        if changed_characters or character_count is not None:
+            return True
+        changed_chapters, changed_continuity, removed_chapters = self.get_chapter_changes()
+        return bool(changed_chapters or changed_continuity or removed_chapters)
+
+    def get_character_changes(self) -> Tuple[Dict[int, Character], Optional[int]]:
+        """
+        Get the characters that changed since the last mark_clean().
+
+        Returns:
+            Tuple of (changed characters by position, new character count or None if unchanged)
+        """
+        clean = self._clean_characters or ()
+        changed = {
+            position: character for position, character in enumerate(self.characters)
+            if position >= len(clean) or character is not clean[position] or character.is_dirty()
+        }
+        count = len(self.characters) if len(self.characters) != len(clean) else None
+        return changed, count
+
+    def get_chapter_changes(self) -> Tuple[List[Chapter], List[Chapter], List[int]]:
+        """
+        Get the chapters that changed since the last mark_clean().
+
+        Returns:
+            Tuple of (chapters whose metadata or text changed, chapters whose continuity
+            state changed, numbers of chapters that were removed)
+        """
+        clean = self._clean_chapters or {}
+        changed_chapters = []
+        changed_continuity = []
+        for chapter in self.chapters:
+            is_new = clean.get(chapter.chapter_number) is not chapter
+            if is_new or chapter.is_dirty():
+                changed_chapters.append(chapter)
+            if is_new or chapter.is_continuity_dirty():
+                changed_continuity.append(chapter)
+        current_numbers = {chapter.chapter_number for chapter in self.chapters}
+        removed = sorted(number for number in clean if number not in current_numbers)
+        return changed_chapters, changed_continuity, removed
+
+    def get_archetype_partition(self) -> ArchetypePartition:
+        """Get the catalog's precomputed typical/other archetype partition for the current sub-genre."""
+        genre_name = self.genre.name if self.genre else ""
+        return self._catalog.get_archetype_partition(genre_name, self.sub_genre)
+
     def get_typical_archetypes(self) -> List[str]:
         """Get the typical archetypes for the current sub-genre."""
-        if self.sub_genre:
-            return self.sub_genre.archetypes
-        return []
+        return list(self.get_archetype_partition().typical_names)
     
     def get_other_archetypes(self) -> List[str]:
         """Get all archetypes that are not typical for the current sub-genre, sorted alphabetically."""
-        typical_archetypes = set(self.get_typical_archetypes())
-        all_archetypes = self._archetype_registry.list_archetype_names()
-        other_archetypes = [name for name in all_archetypes if name not in typical_archetypes]
-        return sorted(other_archetypes)
+        return list(self.get_archetype_partition().other_names)
     
     def set_protagonist_archetype(self, archetype: Union[str, ArchetypeEnum]) -> bool:
         """Set the protagonist archetype by name or enum. Returns True if successful."""
@@ -286,17 +376,100 @@ class Story:
     
     def to_prompt_text(self, exclude_selected_plot_line: bool = False, 
                        exclude_archetype_fallbacks: bool = False, 
-                       include_expanded_plot_line: bool = False) -> str:
+                       include_expanded_plot_line: bool = False,
+                       token_budget: Optional[int] = None) -> PromptText:
         """Convert story selections to a formatted text suitable for LLM prompts.
         
+        Low-priority sections are trimmed or summarized to fit the token budget
+        (see prompt_budget.py); the returned text's budget attribute reports the
+        final size.
+        
         Args:
             exclude_selected_plot_line: If True, excludes the selected_plot_line section
             exclude_archetype_fallbacks: If True, excludes protagonist_archetype and secondary_archetypes fallback fields
             include_expanded_plot_line: If True, includes the expanded_plot_line section
+            token_budget: Token budget for the text (defaults to DEFAULT_CONTEXT_TOKENS)
+        """
+        sections = self.get_prompt_sections(
+            exclude_selected_plot_line, exclude_archetype_fallbacks, include_expanded_plot_line
+        )
+        budgeter = TokenBudgeter(token_budget if token_budget is not None else DEFAULT_CONTEXT_TOKENS)
+        return PromptText.from_report(budgeter.fit(sections))
+
+    def get_prompt_sections(self, exclude_selected_plot_line: bool = False,
+                            exclude_archetype_fallbacks: bool = False,
+                            include_expanded_plot_line: bool = False) -> List[PromptSection]:
+        """
+        Build the sections of the prompt text, in order, with their priorities and shorter renderings.
+        
+        Args:
+            exclude_selected_plot_line: If True, excludes the selected_plot_line section
+            exclude_archetype_fallbacks: If True, excludes the archetype fallback section
+            include_expanded_plot_line: If True, includes the expanded_plot_line section
         """
+        sections = [PromptSection("header", PRIORITY_FIXED, ["STORY CONFIGURATION:\n" + "=" * 50])]
+        
+        configuration = self._configuration_prompt_lines()
+        if configuration:
+            sections.append(PromptSection("configuration", PRIORITY_CONFIGURATION, ["\n".join(configuration)]))
+        
+        # Character Archetypes with detailed descriptions
+        # Show full Character objects if they exist
+        if self.characters:
+            sections.append(PromptSection(
+                "characters", PRIORITY_CHARACTERS,
+                ["\n".join(self._character_prompt_lines(detail)) for detail in CHARACTER_DETAIL_LEVELS],
+                SECTION_TOKENS.get("characters"),
+            ))
+
+        # Plot Line Information (conditionally included)
+        if not exclude_selected_plot_line and self.selected_plot_line:
+            sections.append(PromptSection("selected_plot_line", PRIORITY_PLOT_LINE, ["\n".join([
+                "SELECTED PLOT LINE:",
+                f"Name: {self.selected_plot_line.name}",
+                f"Plot Line: {self.selected_plot_line.plotline}",
+                "",
+            ])]))
+
+        # Show archetype selections from web UI (protagonist_archetype and secondary_archetypes fields)
+        # These are separate from the Character objects and used by the current web UI
+        # Only show these if there are NO Character objects and not excluded
+        if (not exclude_archetype_fallbacks and not self.characters and 
+            (self.protagonist_archetype or self.secondary_archetypes)):
+            sections.append(PromptSection(
+                "archetypes", PRIORITY_ARCHETYPES,
+                ["\n".join(self._archetype_prompt_lines(descriptions)) for descriptions in (True, False)],
+            ))
+        
+        # Chapter Information
+        if self.chapters:
+            ordered_chapters = self.get_chapters_ordered()
+            sections.append(PromptSection(
+                "chapters", PRIORITY_CHAPTERS,
+                ["\n".join(self._chapter_prompt_lines(ordered_chapters, older, recent))
+                 for older, recent in CHAPTER_DETAIL_LEVELS],
+                SECTION_TOKENS.get("chapters"),
+            ))
+        # Add expanded plot line if requested
+        if include_expanded_plot_line and self.expanded_plot_line:
+            sections.append(PromptSection(
+                "expanded_plot_line", PRIORITY_EXPANDED_PLOT_LINE,
+                [f"EXPANDED PLOT LINE:\n{self.expanded_plot_line}\n"] + [
+                    f"EXPANDED PLOT LINE:\n{first_sentences(self.expanded_plot_line, max_tokens)}\n"
+                    for max_tokens in EXPANDED_PLOT_LINE_TOKENS
+                ],
+                SECTION_TOKENS.get("expanded_plot_line"),
+            ))
+        
+        # Add a footer note
+        sections.append(PromptSection("footer", PRIORITY_FIXED, [
+            "=" * 50 + "\nUse this configuration to guide the story creation process."
+        ]))
+        return sections
+
+    def _configuration_prompt_lines(self) -> List[str]:
+        """Get the prompt lines for the story type, genre and writing style."""
         lines = []
-        lines.append("STORY CONFIGURATION:")
-        lines.append("=" * 50)
         
         # Story Type and Subtype with detailed information
         if self.story_type_name and self.subtype_name:
@@ -367,157 +540,184 @@ class Story:
             
             lines.append("")
         
-        # Character Archetypes with detailed descriptions
-        # Show full Character objects if they exist
-        if self.characters:
-            lines.append("CHARACTER ARCHETYPES:")
-            
-            protagonist = self.get_protagonist()
-            if protagonist:
-                archetype_obj = self._archetype_registry.get_archetype(protagonist.archetype.value)
-                lines.append(f"Protagonist: {protagonist.name}")
-                lines.append(f"  Archetype: {protagonist.archetype.value}")
-                if archetype_obj:
-                    lines.append(f"  Description: {archetype_obj.description}")
-                lines.append(f"  Functional Role: {protagonist.functional_role.value}")
-                lines.append(f"  Emotional Function: {protagonist.emotional_function.value}")
-                emotion_func = self._emotional_function_registry.get_emotional_function(protagonist.emotional_function.value)
-                if emotion_func:
-                    lines.append(f"    Description: {emotion_func.description}")
-                if protagonist.backstory:
-                    lines.append(f"  Backstory: {protagonist.backstory}")
-                if protagonist.character_arc:
-                    lines.append(f"  Character Arc: {protagonist.character_arc}")
-            
-            secondary_chars = self.get_secondary_characters()
-            if secondary_chars:
-                lines.append("Secondary Characters:")
-                for character in secondary_chars:
-                    archetype_obj = self._archetype_registry.get_archetype(character.archetype.value)
-                    lines.append(f"  • {character.name}")
-                    lines.append(f"    Archetype: {character.archetype.value}")
-                    if archetype_obj:
-                        lines.append(f"    Description: {archetype_obj.description}")
-                    lines.append(f"    Functional Role: {character.functional_role.value}")
-                    lines.append(f"    Emotional Function: {character.emotional_function.value}")
-                    emotion_func = self._emotional_function_registry.get_emotional_function(character.emotional_function.value)
-                    if emotion_func:
-                        lines.append(f"      Description: {emotion_func.description}")
-                    if character.backstory:
-                        lines.append(f"    Backstory: {character.backstory}")
-                    if character.character_arc:
-                        lines.append(f"    Character Arc: {character.character_arc}")
-            elif protagonist and self.sub_genre:
-                # If no secondary characters are defined, suggest typical ones for the sub-genre
-                typical_secondary = [arch for arch in self.get_typical_archetypes() 
-                                   if arch != protagonist.archetype.value]
-                if typical_secondary:
-                    lines.append("Suggested Secondary Characters (typical for this genre):")
-                    for archetype_name in typical_secondary:
-                        archetype = self._archetype_registry.get_archetype(archetype_name)
-                        lines.append(f"  • {archetype_name}")
-                        if archetype:
-                            lines.append(f"    Description: {archetype.description}")
-            
-            lines.append("")
+        return lines
+
+    def _character_prompt_lines(self, detail: str) -> List[str]:
+        """
+        Get the prompt lines for the story's characters.
+        
+        Args:
+            detail: "full", "short" (backstories and arcs cut to their first sentence)
+                    or "brief" (names, archetypes and roles only)
+        """
+        lines = ["CHARACTER ARCHETYPES:"]
+        
+        def add_details(character, indent):
+            if detail == "brief":
+                return
+            backstory, character_arc = character.backstory, character.character_arc
+            if detail == "short":
+                backstory = first_sentences(backstory, SHORT_CHARACTER_DETAIL_TOKENS)
+                character_arc = first_sentences(character_arc, SHORT_CHARACTER_DETAIL_TOKENS)
+            if backstory:
+                lines.append(f"{indent}Backstory: {backstory}")
+            if character_arc:
+                lines.append(f"{indent}Character Arc: {character_arc}")
+        
+        protagonist = self.get_protagonist()
+        if protagonist:
+            archetype_obj = self._archetype_registry.get_archetype(protagonist.archetype.value)
+            lines.append(f"Protagonist: {protagonist.name}")
+            lines.append(f"  Archetype: {protagonist.archetype.value}")
+            if archetype_obj and detail != "brief":
+                lines.append(f"  Description: {archetype_obj.description}")
+            lines.append(f"  Functional Role: {protagonist.functional_role.value}")
+            lines.append(f"  Emotional Function: {protagonist.emotional_function.value}")
+            emotion_func = self._emotional_function_registry.get_emotional_function(protagonist.emotional_function.value)
+            if emotion_func and detail != "brief":
+                lines.append(f"    Description: {emotion_func.description}")
+            add_details(protagonist, "  ")
         
+        secondary_chars = self.get_secondary_characters()
+        if secondary_chars:
+            lines.append("Secondary Characters:")
+            for character in secondary_chars:
+                archetype_obj = self._archetype_registry.get_archetype(character.archetype.value)
+                lines.append(f"  • {character.name}")
+                lines.append(f"    Archetype: {character.archetype.value}")
+                if archetype_obj and detail != "brief":
+                    lines.append(f"    Description: {archetype_obj.description}")
+                lines.append(f"    Functional Role: {character.functional_role.value}")
+                lines.append(f"    Emotional Function: {character.emotional_function.value}")
+                emotion_func = self._emotional_function_registry.get_emotional_function(character.emotional_function.value)
+                if emotion_func and detail != "brief":
+                    lines.append(f"      Description: {emotion_func.description}")
+                add_details(character, "    ")
+        elif protagonist and self.sub_genre:
+            # If no secondary characters are defined, suggest typical ones for the sub-genre
+            typical_secondary = [(name, archetype) for name, archetype in self.get_archetype_partition().typical_entries
+                                 if name != protagonist.archetype.value]
+            if typical_secondary:
+                lines.append("Suggested Secondary Characters (typical for this genre):")
+                for archetype_name, archetype in typical_secondary:
+                    lines.append(f"  • {archetype_name}")
+                    if archetype and detail != "brief":
+                        lines.append(f"    Description: {archetype.description}")
+        
+        lines.append("")
+        return lines
 
-        # Plot Line Information (conditionally included)
-        if not exclude_selected_plot_line and self.selected_plot_line:
-            lines.append("SELECTED PLOT LINE:")
-            lines.append(f"Name: {self.selected_plot_line.name}")
-            lines.append(f"Plot Line: {self.selected_plot_line.plotline}")
-            lines.append("")
+    def _archetype_prompt_lines(self, descriptions: bool) -> List[str]:
+        """
+        Get the prompt lines for the archetypes selected in the web UI.
+        
+        Args:
+            descriptions: If False, archetype descriptions are left out
+        """
+        lines = ["CHARACTER ARCHETYPES:"]
+        
+        # Show protagonist archetype
+        if self.protagonist_archetype:
+            archetype_obj = self._archetype_registry.get_archetype(self.protagonist_archetype.value)
+            lines.append(f"Protagonist Archetype: {self.protagonist_archetype.value}")
+            if archetype_obj and descriptions:
+                lines.append(f"  Description: {archetype_obj.description}")
+        
+        # Show secondary archetypes
+        if self.secondary_archetypes:
+            lines.append("Secondary Character Archetypes:")
+            for archetype_enum in self.secondary_archetypes:
+                archetype_obj = self._archetype_registry.get_archetype(archetype_enum.value)
+                lines.append(f"  • {archetype_enum.value}")
+                if archetype_obj and descriptions:
+                    lines.append(f"    Description: {archetype_obj.description}")
+        
+        # If no secondary archetypes are selected, suggest typical ones for the sub-genre
+        elif not self.secondary_archetypes and self.protagonist_archetype and self.sub_genre:
+            typical_secondary = [(name, archetype) for name, archetype in self.get_archetype_partition().typical_entries
+                                 if name != self.protagonist_archetype.value]
+            if typical_secondary:
+                lines.append("Suggested Secondary Character Archetypes (typical for this genre):")
+                for archetype_name, archetype in typical_secondary:
+                    lines.append(f"  • {archetype_name}")
+                    if archetype and descriptions:
+                        lines.append(f"    Description: {archetype.description}")
+        
+        lines.append("")
+        return lines
 
-        # Show archetype selections from web UI (protagonist_archetype and secondary_archetypes fields)
-        # These are separate from the Character objects and used by the current web UI
-        # Only show these if there are NO Character objects and not excluded
-        if (not exclude_archetype_fallbacks and not self.characters and 
-            (self.protagonist_archetype or self.secondary_archetypes)):
-            lines.append("CHARACTER ARCHETYPES:")
+    @staticmethod
+    def _chapter_prompt_lines(chapters: List[Chapter], older: str, recent: str) -> List[str]:
+        """
+        Get the prompt lines for the chapter structure.
+        
+        The last RECENT_CHAPTERS chapters are rendered with the recent detail
+        level and the ones before them with the older level.
+        
+        Args:
+            chapters: Chapters in order
+            older: "full", "summary" (title and a short overview), "title" or "omitted"
+            recent: Detail level of the most recent chapters
+        """
+        lines = ["CHAPTER STRUCTURE:"]
+        split = max(0, len(chapters) - RECENT_CHAPTERS)
+        if older == "omitted" and split:
+            lines.append(f"(Chapters {chapters[0].chapter_number}-{chapters[split - 1].chapter_number} omitted for length)")
+            lines.append("")
+        for index, chapter in enumerate(chapters):
+            detail = older if index < split else recent
+            if detail == "omitted":
+                continue
+            if index == split and older in ("title", "summary"):
+                lines.append("")  # Empty line after the shortened older chapters
+            lines.append(f"Chapter {chapter.chapter_number}: {chapter.title}")
+            if detail == "title":
+                continue
+            if detail == "summary":
+                lines.append(f"  Overview: {first_sentences(chapter.overview, SUMMARY_OVERVIEW_TOKENS)}")
+                continue
+            lines.append(f"  Overview: {chapter.overview}")
             
-            # Show protagonist archetype
-            if self.protagonist_archetype:
-                archetype_obj = self._archetype_registry.get_archetype(self.protagonist_archetype.value)
-                lines.append(f"Protagonist Archetype: {self.protagonist_archetype.value}")
-                if archetype_obj:
-                    lines.append(f"  Description: {archetype_obj.description}")
+            if chapter.narrative_function:
+                lines.append(f"  Narrative Function: {chapter.narrative_function.value}")
             
-            # Show secondary archetypes
-            if self.secondary_archetypes:
-                lines.append("Secondary Character Archetypes:")
-                for archetype_enum in self.secondary_archetypes:
-                    archetype_obj = self._archetype_registry.get_archetype(archetype_enum.value)
-                    lines.append(f"  • {archetype_enum.value}")
-                    if archetype_obj:
-                        lines.append(f"    Description: {archetype_obj.description}")
+            if chapter.point_of_view:
+                lines.append(f"  Point of View: {chapter.point_of_view}")
             
-            # If no secondary archetypes are selected, suggest typical ones for the sub-genre
-            elif not self.secondary_archetypes and self.protagonist_archetype and self.sub_genre:
-                typical_secondary = [arch for arch in self.get_typical_archetypes() 
-                                   if arch != self.protagonist_archetype.value]
-                if typical_secondary:
-                    lines.append("Suggested Secondary Character Archetypes (typical for this genre):")
-                    for archetype_name in typical_secondary:
-                        archetype = self._archetype_registry.get_archetype(archetype_name)
-                        lines.append(f"  • {archetype_name}")
-                        if archetype:
-                            lines.append(f"    Description: {archetype.description}")
+            if chapter.character_impact:
+                lines.append("  Character Impact:")
+                for impact in chapter.character_impact:
+                    character = impact.get('character', 'Unknown')
+                    effect = impact.get('effect', 'No effect described')
+                    lines.append(f"    • {character}: {effect}")
             
+            if chapter.foreshadow_or_echo:
+                lines.append(f"  Foreshadow/Echo: {chapter.foreshadow_or_echo}")
+            
+            if chapter.scene_highlights:
+                lines.append(f"  Scene Highlights: {chapter.scene_highlights}")
+            
+            lines.append("")  # Empty line between chapters
+        if lines[-1] != "":
             lines.append("")
-        
-        # Chapter Information
-        if self.chapters:
-            lines.append("CHAPTER STRUCTURE:")
-            ordered_chapters = self.get_chapters_ordered()
-            for chapter in ordered_chapters:
-                lines.append(f"Chapter {chapter.chapter_number}: {chapter.title}")
-                lines.append(f"  Overview: {chapter.overview}")
-                
-                if chapter.narrative_function:
-                    lines.append(f"  Narrative Function: {chapter.narrative_function.value}")
-                
-                if chapter.point_of_view:
-                    lines.append(f"  Point of View: {chapter.point_of_view}")
-                
-                if chapter.character_impact:
-                    lines.append("  Character Impact:")
-                    for impact in chapter.character_impact:
-                        character = impact.get('character', 'Unknown')
-                        effect = impact.get('effect', 'No effect described')
-                        lines.append(f"    • {character}: {effect}")
-                
-                if chapter.foreshadow_or_echo:
-                    lines.append(f"  Foreshadow/Echo: {chapter.foreshadow_or_echo}")
-                
-                if chapter.scene_highlights:
-                    lines.append(f"  Scene Highlights: {chapter.scene_highlights}")
-                
-                lines.append("")  # Empty line between chapters
-        # Add expanded plot line if requested
-        if include_expanded_plot_line and self.expanded_plot_line:
-            lines.append("EXPANDED PLOT LINE:")
-            lines.append(self.expanded_plot_line)
-            lines.append("")
-        
-        # Add a footer note
-        lines.append("=" * 50)
-        lines.append("Use this configuration to guide the story creation process.")
-        
-        return "\n".join(lines)
+        return lines
 
-    def to_prompt_text_for_chapter_outline(self) -> str:
+    def to_prompt_text_for_chapter_outline(self, token_budget: Optional[int] = None) -> PromptText:
         """
         Convert story selections to a formatted text suitable for chapter outline prompts.
         This version excludes protagonist_archetype, secondary_archetypes, and selected_plot_line fields.
+        
+        Args:
+            token_budget: Token budget for the text (see to_prompt_text())
         """
         return self.to_prompt_text(
             exclude_selected_plot_line=True,
             exclude_archetype_fallbacks=True,
-            include_expanded_plot_line=True
+            include_expanded_plot_line=True,
+            token_budget=token_budget
         )
     
-    def to_prompt_text_for_chapter(self, n: int) -> str:
+    def to_prompt_text_for_chapter(self, n: int, token_budget: Optional[int] = None) -> PromptText:
         """
         Convert story selections to a formatted text suitable for chapter generation prompts.
         This version excludes protagonist_archetype, secondary_archetypes, and selected_plot_line fields.
@@ -525,6 +725,7 @@ class Story:
         
         Args:
             n: The chapter number to generate. Only chapters 1 to n-1 will be included.
+            token_budget: Token budget for the text (see to_prompt_text())
         """
         # Create a temporary copy of the story with filtered chapters
         original_chapters = self.chapters
@@ -539,7 +740,8 @@ class Story:
             return self.to_prompt_text(
                 exclude_selected_plot_line=True,
                 exclude_archetype_fallbacks=True,
-                include_expanded_plot_line=True
+                include_expanded_plot_line=True,
+                token_budget=token_budget
             )
         finally:
             # Restore original chapters
@@ -571,9 +773,15 @@ class Story:
         """Clear the expanded plot line."""
         self.expanded_plot_line = None
     
-    def to_json(self) -> str:
-        """Serialize story to JSON string."""
-        data = {
+    def to_dict(self, include_chapters: bool = True) -> Dict[str, Any]:
+        """
+        Convert story to the dictionary written by to_json().
+        
+        Args:
+            include_chapters: If False, 'chapters' is left empty (for exporters that
+                              stream chapters one at a time)
+        """
+        return {
             'story_type_name': self.story_type_name,
             'subtype_name': self.subtype_name,
             'key_theme': self.key_theme,
@@ -584,17 +792,26 @@ class Story:
             'protagonist_archetype': self.protagonist_archetype.value if self.protagonist_archetype else None,
             'secondary_archetypes': [archetype.value for archetype in self.secondary_archetypes],
             'characters': [char.to_dict() for char in self.characters],
-            'chapters': [chapter.to_dict() for chapter in self.chapters],
+            'chapters': [chapter.to_dict() for chapter in self.chapters] if include_chapters else [],
             'selected_plot_line': self.selected_plot_line.to_dict() if self.selected_plot_line else None,
             'expanded_plot_line': self.expanded_plot_line
         }
-        return json.dumps(data, indent=2)
+    
+    def to_json(self) -> str:
+        """Serialize story to JSON string."""
+        return json.dumps(self.to_dict(), indent=2)
     
     def from_json(self, json_str: str) -> bool:
         """Load story from JSON string. Returns True if successful."""
         try:
             data = json.loads(json_str)
-            
+        except (json.JSONDecodeError, TypeError):
+            return False
+        return self.from_dict(data)
+    
+    def from_dict(self, data: Dict[str, Any]) -> bool:
+        """Load story from a dictionary in the format written by to_dict(). Returns True if successful."""
+        try:
             # Ensure data is a dictionary
             if not isinstance(data, dict):
                 return False
@@ -658,5 +875,5 @@ class Story:
                 self.set_secondary_archetypes(secondary_archetypes_strs)
                 
             return True
-        except (json.JSONDecodeError, KeyError, TypeError):
+        except (KeyError, TypeError):
             return False
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Structured Data Decoding
+
+Responses generated with a JSON schema response_format are a bare JSON object
+instead of a <STRUCTURED_DATA> block inside free text. The parsers decode
+those directly and only fall back to extracting the block with regular
+expressions for older cached responses or completions made without a schema.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+
+def decode_json_response(ai_response: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a response that is a bare JSON object, as structured outputs return.
+
+    Args:
+        ai_response: The full AI response text
+
+    Returns:
+        The decoded object, or None if the response is not a bare JSON object
+        (the caller then falls back to extracting the <STRUCTURED_DATA> block)
+    """
+    if not ai_response:
+        return None
+    text = ai_response.strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
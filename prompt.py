@@ -8,19 +8,31 @@ by combining template files with story configuration data.
 import os
 from typing import Optional
 from objects.story import Story
+from objects.prompt_budget import PromptText, estimate_tokens
+from prompt_types import PromptType
+
+# Default token budget for a whole prompt (templates and story configuration);
+# set KRAITIF_PROMPT_MAX_TOKENS to change it
+DEFAULT_PROMPT_TOKENS = 32000
 
 
 class Prompt:
     """Handles generation of LLM prompts by combining template files with story data."""
     
-    def __init__(self, prompts_dir: str = "prompts"):
+    def __init__(self, prompts_dir: str = "prompts", max_prompt_tokens: Optional[int] = None):
         """
         Initialize the Prompt generator.
         
         Args:
             prompts_dir: Directory containing prompt template files
+            max_prompt_tokens: Token budget for each generated prompt; the story configuration
+                               is trimmed to what the rest of the prompt leaves of it
+                               (defaults to KRAITIF_PROMPT_MAX_TOKENS or DEFAULT_PROMPT_TOKENS)
         """
         self.prompts_dir = prompts_dir
+        if max_prompt_tokens is None:
+            max_prompt_tokens = int(os.environ.get("KRAITIF_PROMPT_MAX_TOKENS", DEFAULT_PROMPT_TOKENS))
+        self.max_prompt_tokens = max_prompt_tokens
     
     def _read_template_file(self, filename: str) -> str:
         """
@@ -39,7 +51,51 @@ class Prompt:
         except (FileNotFoundError, IOError):
             return ""
     
-    def generate_plot_prompt(self, story: Story) -> str:
+    def _context_budget(self, *other_parts: str) -> int:
+        """
+        Get the token budget left for the story configuration.
+        
+        Args:
+            other_parts: The other parts of the prompt
+            
+        Returns:
+            max_prompt_tokens less the estimated tokens of the other parts
+        """
+        return max(0, self.max_prompt_tokens - sum(estimate_tokens(part.strip()) for part in other_parts))
+    
+    def _report_size(self, prompt_type: PromptType, prompt_text: str, story_config: str) -> PromptText:
+        """
+        Log the final size of a generated prompt and attach its size report.
+        
+        The report travels with the returned text rather than being kept on
+        this instance, which app.py shares across request threads.
+        
+        Args:
+            prompt_type: Type of the generated prompt
+            prompt_text: The complete prompt
+            story_config: The story configuration in it (a PromptText carrying its budget report)
+            
+        Returns:
+            The prompt as a PromptText whose size_report holds the prompt type, estimated
+            tokens, budget and the story configuration's budget report
+        """
+        tokens = estimate_tokens(prompt_text)
+        budget = getattr(story_config, "budget", None)
+        text = PromptText(prompt_text)
+        text.budget = budget
+        text.size_report = {
+            "prompt_type": prompt_type.value,
+            "tokens": tokens,
+            "max_tokens": self.max_prompt_tokens,
+            "story_configuration": budget.to_dict() if budget else None,
+        }
+        trimmed = f", trimmed: {', '.join(budget.trimmed)}" if budget and budget.trimmed else ""
+        print(f"[PROMPT SIZE] {prompt_type.value}: ~{tokens} of {self.max_prompt_tokens} tokens{trimmed}")
+        if tokens > self.max_prompt_tokens:
+            print(f"Warning: {prompt_type.value} prompt is over its token budget even after trimming")
+        return text
+    
+    def generate_plot_prompt(self, story: Story) -> PromptText:
         """
         Generate a complete plot prompt by concatenating pre-text, story configuration, and post-text.
         
@@ -53,8 +109,11 @@ class Prompt:
         pre_text = self._read_template_file("plot_lines_pre.txt")
         post_text = self._read_template_file("plot_lines_post.txt")
         
-        # Get the story configuration
+        # Get the story configuration, trimmed further if the templates leave less than its own budget
         story_config = story.to_prompt_text()
+        context_budget = self._context_budget(pre_text, post_text)
+        if estimate_tokens(story_config) > context_budget:
+            story_config = story.to_prompt_text(token_budget=context_budget)
         
         # Combine all parts
         parts = []
@@ -69,9 +128,10 @@ class Prompt:
             parts.append(post_text.strip())
         
         # Join with double newlines for clear separation
-        return "\n\n".join(parts)
+        prompt_text = "\n\n".join(parts)
+        return self._report_size(PromptType.PLOT_LINES, prompt_text, story_config)
     
-    def generate_character_prompt(self, story: Story) -> str:
+    def generate_character_prompt(self, story: Story) -> PromptText:
         """
         Generate a complete character prompt by concatenating pre-text, story configuration, and post-text.
         
@@ -85,8 +145,11 @@ class Prompt:
         pre_text = self._read_template_file("characters_pre.txt")
         post_text = self._read_template_file("characters_post.txt")
         
-        # Get the story configuration
+        # Get the story configuration, trimmed further if the templates leave less than its own budget
         story_config = story.to_prompt_text()
+        context_budget = self._context_budget(pre_text, post_text)
+        if estimate_tokens(story_config) > context_budget:
+            story_config = story.to_prompt_text(token_budget=context_budget)
         
         # Combine all parts
         parts = []
@@ -101,9 +164,10 @@ class Prompt:
             parts.append(post_text.strip())
         
         # Join with double newlines for clear separation
-        return "\n\n".join(parts)
+        prompt_text = "\n\n".join(parts)
+        return self._report_size(PromptType.CHARACTERS, prompt_text, story_config)
 
-    def generate_chapter_outline_prompt(self, story: Story) -> str:
+    def generate_chapter_outline_prompt(self, story: Story) -> PromptText:
         """
         Generate a complete chapter outline prompt by concatenating pre-text, story configuration, and post-text.
         This uses a modified version of the story configuration that excludes protagonist_archetype, 
@@ -119,8 +183,11 @@ class Prompt:
         pre_text = self._read_template_file("chapter_outline_pre.txt")
         post_text = self._read_template_file("chapter_outline_post.txt")
         
-        # Get the story configuration (excluding specified fields)
+        # Get the story configuration (excluding specified fields), trimmed further if needed
         story_config = story.to_prompt_text_for_chapter_outline()
+        context_budget = self._context_budget(pre_text, post_text)
+        if estimate_tokens(story_config) > context_budget:
+            story_config = story.to_prompt_text_for_chapter_outline(token_budget=context_budget)
         
         # Combine all parts
         parts = []
@@ -135,8 +202,9 @@ class Prompt:
             parts.append(post_text.strip())
         
         # Join with double newlines for clear separation
-        return "\n\n".join(parts)
-    def generate_chapter_prompt(self, story: Story, n: int) -> str:
+        prompt_text = "\n\n".join(parts)
+        return self._report_size(PromptType.CHAPTER_OUTLINE, prompt_text, story_config)
+    def generate_chapter_prompt(self, story: Story, n: int) -> PromptText:
         """
         Generate a complete chapter prompt by concatenating pre-text, story configuration, and post-text.
         This uses a modified version of the story configuration that excludes protagonist_archetype, 
@@ -154,9 +222,6 @@ class Prompt:
         pre_text = self._read_template_file("chapter_pre.txt")
         post_text = self._read_template_file("chapter_post.txt")
         
-        # Get the story configuration (excluding specified fields and filtering chapters)
-        story_config = story.to_prompt_text_for_chapter(n)
-        
         # Get continuity information from the previous chapter (if not chapter 1)
         continuity_info = ""
         if n > 1:
@@ -192,6 +257,13 @@ Point of View: {target_chapter.point_of_view or 'Not specified'}
             if target_chapter.scene_highlights:
                 chapter_info += f"\nScene Highlights: {target_chapter.scene_highlights}\n"
         
+        # Get the story configuration (excluding specified fields and filtering chapters),
+        # trimmed further if the rest of the prompt leaves less than its own budget
+        story_config = story.to_prompt_text_for_chapter(n)
+        context_budget = self._context_budget(pre_text, post_text, continuity_info, chapter_info)
+        if estimate_tokens(story_config) > context_budget:
+            story_config = story.to_prompt_text_for_chapter(n, token_budget=context_budget)
+        
         # Combine all parts
         parts = []
         
@@ -211,4 +283,5 @@ Point of View: {target_chapter.point_of_view or 'Not specified'}
             parts.append(post_text.strip())
         
         # Join with double newlines for clear separation
-        return "\n\n".join(parts)
\ No newline at end of file
+        prompt_text = "\n\n".join(parts)
+        return self._report_size(PromptType.CHAPTER, prompt_text, story_config)
\ No newline at end of file
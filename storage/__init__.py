@@ -0,0 +1,17 @@
+"""
+Storage package for Kraitif - pluggable persistence backends for story data.
+"""
+
+from .story_store import StoryStore, StoryPatch, StoryVersionConflict, create_story_store, get_story_store
+from .file_store import FileStoryStore
+from .sqlite_store import SqliteStoryStore
+from .story_cache import StoryCache, get_story_cache
+from .janitor import StoryJanitor, get_story_janitor
+
+__all__ = [
+    'StoryStore', 'StoryPatch', 'StoryVersionConflict', 'create_story_store', 'get_story_store',
+    'FileStoryStore',
+    'SqliteStoryStore',
+    'StoryCache', 'get_story_cache',
+    'StoryJanitor', 'get_story_janitor'
+]
@@ -0,0 +1,252 @@
+"""
+Story Codec
+
+This module implements the compact binary encoding used for stored story data.
+JSON remains the export format (Story.to_json() and the /save download); the
+codec only changes how the story store keeps data at rest.
+
+An encoded value is laid out as:
+
+    magic "KRST" | format version (u8) | flags (u8)
+    skeleton length (u32) | skeleton (compact JSON)
+    text length (u32) | text bytes | ... (to the end)
+
+The skeleton is the data with two kinds of values pulled out of it:
+
+- Enum values (archetypes, roles, emotional and narrative functions) are
+  replaced by their index in the format version's fixed symbol table, built
+  from the Enum classes, so rows carry small integers and no table of their
+  own. Strings the table does not know are stored as-is.
+- chapter_text values are replaced by integers indexing the text section,
+  where each text is stored as raw UTF-8 or, with FLAG_COMPRESSED_TEXT, as a
+  zlib stream.
+
+A row without texts whose enum indexes save fewer bytes than the header costs
+would only grow, so it is stored as compact JSON instead, which decode() reads
+like the rows written before the codec.
+
+decode() also accepts plain JSON text, so data written before the codec
+existed is read without a migration.
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Tuple, Union
+
+from objects.archetype import ArchetypeEnum
+from objects.emotional_function import EmotionalFunctionEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.narrative_function import NarrativeFunctionEnum
+
+MAGIC = b"KRST"
+
+# Bump when the layout or the symbol table changes; decode() rejects versions it does not know
+FORMAT_VERSION = 1
+
+
+def _enum_symbols() -> Tuple[str, ...]:
+    """Get the enum values in a fixed order: the symbol table of the current format version."""
+    return tuple(member.value for enum_cls in (ArchetypeEnum, FunctionalRoleEnum, EmotionalFunctionEnum,
+                                                NarrativeFunctionEnum)
+                 for member in enum_cls)
+
+
+# Symbol table of each format version. Changing an enum changes the current
+# table, so FORMAT_VERSION must be bumped and the old table kept here as a
+# literal (tests/test_story_codec.py pins its checksum)
+SYMBOL_TABLES: Dict[int, Tuple[str, ...]] = {FORMAT_VERSION: _enum_symbols()}
+
+# Flag bits
+FLAG_COMPRESSED_TEXT = 0x01
+
+# Keys whose string values (or lists of string values) are enum values
+ENUM_KEYS = frozenset({
+    "archetype",
+    "functional_role",
+    "emotional_function",
+    "narrative_function",
+    "protagonist_archetype",
+    "secondary_archetypes",
+})
+
+# Keys whose string values are stored in the text section
+TEXT_KEYS = frozenset({"chapter_text"})
+
+# zlib level for chapter texts: level 1 is ~4x faster than the default for ~15% more bytes
+COMPRESSION_LEVEL = 1
+
+_SYMBOL_INDEX: Dict[str, int] = {value: index for index, value in enumerate(SYMBOL_TABLES[FORMAT_VERSION])}
+
+_HEADER = struct.Struct("<4sBBI")
+_LENGTH = struct.Struct("<I")
+
+
+class CodecError(ValueError):
+    """Raised when encoded story data is malformed or of an unknown version."""
+
+
+class _Encoder:
+    """Collects texts while rewriting a value into its skeleton."""
+
+    def __init__(self, compress_text: bool):
+        self.compress_text = compress_text
+        self.texts: List[bytes] = []
+
+    @staticmethod
+    def symbol(value: Any) -> Any:
+        """Replace an enum string by its symbol index (other values are stored as-is)."""
+        index = _SYMBOL_INDEX.get(value) if isinstance(value, str) else None
+        if index is None:
+            return value if value is None else {"v": value}
+        return index
+
+    def text(self, value: Any) -> Any:
+        """Replace a text by its index in the text section (other values are stored as-is)."""
+        if not isinstance(value, str):
+            return value if value is None else {"v": value}
+        raw = value.encode("utf-8")
+        self.texts.append(zlib.compress(raw, COMPRESSION_LEVEL) if self.compress_text else raw)
+        return len(self.texts) - 1
+
+    def walk(self, value: Any) -> Any:
+        """Rewrite a value into its skeleton."""
+        if isinstance(value, dict):
+            skeleton = {}
+            for key, item in value.items():
+                if key in ENUM_KEYS:
+                    if isinstance(item, list):
+                        skeleton[key] = [self.symbol(element) for element in item]
+                    else:
+                        skeleton[key] = self.symbol(item)
+                elif key in TEXT_KEYS:
+                    skeleton[key] = self.text(item)
+                else:
+                    skeleton[key] = self.walk(item)
+            return skeleton
+        if isinstance(value, (list, tuple)):
+            return [self.walk(item) for item in value]
+        return value
+
+
+class _Decoder:
+    """Restores a value from its skeleton, symbol table and texts."""
+
+    def __init__(self, symbols: Tuple[str, ...], texts: List[str]):
+        self.symbols = symbols
+        self.texts = texts
+
+    @staticmethod
+    def lookup(table, reference: Any) -> Any:
+        """Resolve an index into table ({"v": value} holds a value that was stored as-is)."""
+        if isinstance(reference, int) and not isinstance(reference, bool):
+            try:
+                return table[reference]
+            except IndexError:
+                raise CodecError(f"Reference {reference} out of range") from None
+        if isinstance(reference, dict) and "v" in reference:
+            return reference["v"]
+        if reference is None:
+            return None
+        raise CodecError(f"Invalid reference: {reference!r}")
+
+    def walk(self, skeleton: Any) -> Any:
+        """Restore a value from its skeleton."""
+        if isinstance(skeleton, dict):
+            value = {}
+            for key, item in skeleton.items():
+                if key in ENUM_KEYS:
+                    if isinstance(item, list):
+                        value[key] = [self.lookup(self.symbols, element) for element in item]
+                    else:
+                        value[key] = self.lookup(self.symbols, item)
+                elif key in TEXT_KEYS:
+                    value[key] = self.lookup(self.texts, item)
+                else:
+                    value[key] = self.walk(item)
+            return value
+        if isinstance(skeleton, list):
+            return [self.walk(item) for item in skeleton]
+        return skeleton
+
+
+def encode(data: Any, compress_text: bool = True) -> bytes:
+    """
+    Encode story data (or any part of it) in the binary format.
+
+    Args:
+        data: JSON-compatible value to encode
+        compress_text: Store chapter texts as zlib streams
+
+    Returns:
+        Encoded bytes (compact JSON when that is not larger)
+    """
+    encoder = _Encoder(compress_text)
+    skeleton = encoder.walk(data)
+    skeleton_bytes = json.dumps(skeleton, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    flags = FLAG_COMPRESSED_TEXT if compress_text else 0
+    if not encoder.texts:
+        plain = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(plain) <= _HEADER.size + len(skeleton_bytes):
+            return plain
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(skeleton_bytes)), skeleton_bytes]
+    for text in encoder.texts:
+        parts.append(_LENGTH.pack(len(text)))
+        parts.append(text)
+    return b"".join(parts)
+
+
+def is_encoded(blob: Union[bytes, bytearray, memoryview, str]) -> bool:
+    """Check whether a stored value is in the binary format (rather than legacy JSON)."""
+    return isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:len(MAGIC)]) == MAGIC
+
+
+def decode(blob: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode a value produced by encode(), or legacy JSON text.
+
+    Args:
+        blob: Encoded bytes, or JSON as text or bytes
+
+    Returns:
+        The decoded value
+
+    Raises:
+        CodecError: If the data is malformed or uses an unknown format version
+    """
+    if not is_encoded(blob):
+        try:
+            return json.loads(blob)
+        except (TypeError, ValueError) as e:
+            raise CodecError(f"Not encoded story data: {e}") from None
+
+    view = memoryview(blob)
+    try:
+        _magic, version, flags, skeleton_length = _HEADER.unpack_from(view, 0)
+        symbols = SYMBOL_TABLES.get(version)
+        if symbols is None:
+            raise CodecError(f"Unsupported story codec version: {version}")
+        offset = _HEADER.size
+        if offset + skeleton_length > len(view):
+            raise CodecError("Truncated skeleton")
+        skeleton = json.loads(bytes(view[offset:offset + skeleton_length]).decode("utf-8"))
+        offset += skeleton_length
+
+        texts = []
+        while offset < len(view):
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            if offset + length > len(view):
+                raise CodecError("Truncated text section")
+            raw = bytes(view[offset:offset + length])
+            offset += length
+            if flags & FLAG_COMPRESSED_TEXT:
+                raw = zlib.decompress(raw)
+            texts.append(raw.decode("utf-8"))
+    except (struct.error, zlib.error, UnicodeDecodeError, ValueError) as e:
+        if isinstance(e, CodecError):
+            raise
+        raise CodecError(f"Malformed story data: {e}") from None
+
+    return _Decoder(symbols, texts).walk(skeleton)
@@ -0,0 +1,192 @@
+"""
+File Story Store
+
+This module implements the original story persistence: one JSON file per story
+in a directory. Without an explicit directory a temporary one is created and
+removed when the process exits, so stories do not survive restarts.
+
+Writes go to a temporary file in the same directory that is renamed over the
+story file, so readers only ever see a complete file. Writers serialize on a
+per-story advisory lock: story IDs are hashed onto a fixed set of lock files
+(plus a matching in-process lock), which keeps the number of lock files
+bounded while letting writes to different stories proceed in parallel.
+"""
+
+import atexit
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .story_store import StoryStore, StoryPatch, StoryVersionConflict, DEFAULT_MAX_AGE_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locks only
+    fcntl = None
+
+# Number of lock files story IDs are hashed onto
+LOCK_STRIPES = 64
+
+# File version: (inode, modification time in ns, size); renames always change it
+FileVersion = Tuple[int, int, int]
+
+
+class FileStoryStore(StoryStore):
+    """Stores each story as an indented JSON file."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the file store.
+
+        Args:
+            directory: Directory for story files (a temporary directory if omitted)
+        """
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="kraitif_stories_")
+            atexit.register(shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.lock_directory = os.path.join(directory, ".locks")
+        os.makedirs(self.lock_directory, exist_ok=True)
+        self._thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def get_path(self, story_id: str) -> str:
+        """Get the file path for a story ID."""
+        return os.path.join(self.directory, f"story_{story_id}.json")
+
+    @contextmanager
+    def lock(self, story_id: str) -> Iterator[None]:
+        """Hold the story's advisory lock, excluding other threads and processes."""
+        stripe = zlib.crc32(story_id.encode("utf-8")) % LOCK_STRIPES
+        with self._thread_locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            lock_path = os.path.join(self.lock_directory, f"stripe_{stripe:02d}.lock")
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _version_of(stat: os.stat_result) -> FileVersion:
+        """Build a version token from file metadata."""
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def get_version(self, story_id: str) -> Optional[FileVersion]:
+        """Use the story file's inode, modification time and size as its version."""
+        try:
+            return self._version_of(os.stat(self.get_path(story_id)))
+        except OSError:
+            return None
+
+    def load(self, story_id: str) -> Dict[str, Any]:
+        """Load story data from file."""
+        return self.load_versioned(story_id)[0]
+
+    def load_versioned(self, story_id: str,
+                       include_details: bool = True) -> Tuple[Dict[str, Any], Optional[FileVersion]]:
+        """Load story data and the version of the exact file that was read (always with chapter details)."""
+        try:
+            with open(self.get_path(story_id), "r", encoding="utf-8") as f:
+                version = self._version_of(os.fstat(f.fileno()))
+                return json.load(f), version
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Failed to load story {story_id}: {e}")
+        return {}, None
+
+    def save(self, story_id: str, story_data: Dict[str, Any],
+             expected_version: Optional[FileVersion] = None) -> Optional[FileVersion]:
+        """Save story data to a temporary file and rename it over the story file."""
+        with self.lock(story_id):
+            if expected_version is not None:
+                actual = self.get_version(story_id)
+                if actual != expected_version:
+                    raise StoryVersionConflict(story_id, expected_version, actual)
+            return self._write(story_id, story_data)
+
+    def apply_patch(self, story_id: str, patch: StoryPatch,
+                    expected_version: Optional[FileVersion] = None) -> Optional[FileVersion]:
+        """Apply a patch by rewriting the story file under its lock."""
+        with self.lock(story_id):
+            story_data, version = self.load_versioned(story_id)
+            if not story_data:
+                return None
+            if expected_version is not None and version != expected_version:
+                raise StoryVersionConflict(story_id, expected_version, version)
+            return self._write(story_id, patch.apply(story_data))
+
+    def _write(self, story_id: str, story_data: Dict[str, Any]) -> Optional[FileVersion]:
+        """Atomically replace the story file (caller holds the story's lock)."""
+        fd, temp_path = tempfile.mkstemp(prefix=f".story_{story_id}.", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(story_data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.get_path(story_id))
+        except (IOError, OSError, TypeError, ValueError) as e:
+            print(f"Warning: Failed to save story {story_id}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+        return self.get_version(story_id)
+
+    def delete(self, story_id: str) -> bool:
+        """Delete a story file."""
+        with self.lock(story_id):
+            try:
+                os.remove(self.get_path(story_id))
+                return True
+            except OSError:
+                return False
+
+    def list_updated(self) -> Dict[str, float]:
+        """List the modification time of every story file."""
+        updated = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return updated
+        for entry in entries:
+            name = entry.name
+            if name.startswith("story_") and name.endswith(".json"):
+                try:
+                    updated[name[len("story_"):-len(".json")]] = entry.stat().st_mtime
+                except OSError:
+                    pass  # Removed meanwhile
+        return updated
+
+    def delete_if_idle(self, story_id: str, cutoff: float) -> bool:
+        """Delete a story file if it was last modified before cutoff."""
+        file_path = self.get_path(story_id)
+        with self.lock(story_id):
+            try:
+                if os.path.getmtime(file_path) >= cutoff:
+                    return False
+                os.remove(file_path)
+                return True
+            except OSError:
+                return False
+
+    def cleanup(self, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> int:
+        """Remove story files older than max_age_seconds."""
+        count = 0
+        cutoff_time = time.time() - max_age_seconds
+        for file_path in glob.glob(os.path.join(self.directory, "story_*.json")):
+            story_id = os.path.basename(file_path)[len("story_"):-len(".json")]
+            if self.delete_if_idle(story_id, cutoff_time):
+                count += 1
+        return count
@@ -0,0 +1,263 @@
+"""
+Story Janitor
+
+This module implements the background janitor that removes stories idle for
+longer than the maximum age. Expiry used to run on every save and scan every
+stored story; the janitor keeps a time-bucketed expiry index instead and
+sweeps it on a daemon thread, so no expiry work happens on the request path.
+
+The index maps each story to the bucket its expiry time falls in. Saving a
+story moves it to a later bucket in O(1); a sweep only looks at buckets that
+have fully expired. Stories written by other processes are not seen by this
+process's index, so every deletion is re-checked against the store with
+delete_if_idle(), and the index is re-seeded from the store periodically.
+"""
+
+import heapq
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+from .story_store import StoryStore, DEFAULT_MAX_AGE_SECONDS, get_story_store
+
+# Seconds between sweeps
+DEFAULT_SWEEP_INTERVAL = 60.0
+
+# Width of an expiry bucket in seconds
+DEFAULT_BUCKET_SECONDS = 60.0
+
+# Sweeps between re-seeding the index from the store
+RESEED_EVERY_SWEEPS = 60
+
+# Upper bounds (seconds) of the sweep duration histogram buckets
+SWEEP_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class StoryJanitor:
+    """Expires idle stories from a time-bucketed index on a background thread."""
+
+    def __init__(self, store: StoryStore, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+                 interval: float = DEFAULT_SWEEP_INTERVAL, bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+                 autostart: bool = False):
+        """
+        Initialize the janitor.
+
+        Args:
+            store: Story store to expire stories from
+            max_age_seconds: Idle time after which a story is removed
+            interval: Seconds between sweeps
+            bucket_seconds: Width of an expiry bucket in seconds
+            autostart: Start the background thread on the first touch()
+        """
+        self.store = store
+        self.max_age_seconds = max_age_seconds
+        self.interval = interval
+        self.bucket_seconds = bucket_seconds
+        self.autostart = autostart
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Set[str]] = {}
+        self._story_buckets: Dict[str, int] = {}
+        self._bucket_heap: list = []
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+        # Metrics
+        self.sweeps = 0
+        self.stories_reclaimed = 0
+        self.last_sweep_reclaimed = 0
+        self.last_sweep_seconds = 0.0
+        self.max_sweep_seconds = 0.0
+        self.total_sweep_seconds = 0.0
+        self._sweep_bucket_counts = [0] * len(SWEEP_BUCKETS)
+
+    def _bucket_for(self, expires_at: float) -> int:
+        """Get the bucket number an expiry time falls in."""
+        return int(expires_at // self.bucket_seconds)
+
+    def _add(self, story_id: str, updated_at: float) -> None:
+        """Index a story by its expiry time (caller holds the lock)."""
+        bucket = self._bucket_for(updated_at + self.max_age_seconds)
+        current = self._story_buckets.get(story_id)
+        if current == bucket:
+            return
+        if current is not None:
+            self._buckets[current].discard(story_id)
+        if bucket not in self._buckets:
+            self._buckets[bucket] = set()
+            heapq.heappush(self._bucket_heap, bucket)
+        self._buckets[bucket].add(story_id)
+        self._story_buckets[story_id] = bucket
+
+    def touch(self, story_id: str, updated_at: Optional[float] = None) -> None:
+        """
+        Record that a story was written.
+
+        Args:
+            story_id: Story identifier
+            updated_at: Time of the write (defaults to now)
+        """
+        if self.autostart:
+            self.start()
+        with self._lock:
+            self._add(story_id, time.time() if updated_at is None else updated_at)
+
+    def forget(self, story_id: str) -> None:
+        """Remove a deleted story from the index."""
+        with self._lock:
+            bucket = self._story_buckets.pop(story_id, None)
+            if bucket is not None:
+                self._buckets[bucket].discard(story_id)
+
+    def seed(self) -> None:
+        """Index every stored story by its last write time."""
+        updated = self.store.list_updated()
+        with self._lock:
+            for story_id, updated_at in updated.items():
+                self._add(story_id, updated_at)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Delete the stories in every fully expired bucket.
+
+        Args:
+            now: Current time (defaults to now)
+
+        Returns:
+            Number of stories deleted
+        """
+        start = time.perf_counter()
+        now = time.time() if now is None else now
+        cutoff = now - self.max_age_seconds
+        due_before = self._bucket_for(now)
+
+        # Collect the due stories without holding the lock during store access
+        candidates = []
+        with self._lock:
+            while self._bucket_heap and self._bucket_heap[0] < due_before:
+                bucket = heapq.heappop(self._bucket_heap)
+                for story_id in self._buckets.pop(bucket, ()):
+                    del self._story_buckets[story_id]
+                    candidates.append(story_id)
+
+        reclaimed = 0
+        for story_id in candidates:
+            if self.store.delete_if_idle(story_id, cutoff):
+                reclaimed += 1
+            else:
+                # Written meanwhile (possibly by another process): its real expiry
+                # is later than now, so check it again at most max_age from now
+                with self._lock:
+                    if story_id not in self._story_buckets:
+                        self._add(story_id, now)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.sweeps += 1
+            self.stories_reclaimed += reclaimed
+            self.last_sweep_reclaimed = reclaimed
+            self.last_sweep_seconds = elapsed
+            self.max_sweep_seconds = max(self.max_sweep_seconds, elapsed)
+            self.total_sweep_seconds += elapsed
+            for index, bound in enumerate(SWEEP_BUCKETS):
+                if elapsed <= bound:
+                    self._sweep_bucket_counts[index] += 1
+                    break
+        if reclaimed:
+            print(f"Story janitor: reclaimed {reclaimed} stories in {elapsed * 1000:.1f} ms")
+        return reclaimed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get sweep counters and timings (sweep_seconds is a histogram with cumulative bucket counts)."""
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(SWEEP_BUCKETS, self._sweep_bucket_counts):
+                running += count
+                cumulative.append((bound, running))
+            return {
+                "sweeps": self.sweeps,
+                "stories_reclaimed": self.stories_reclaimed,
+                "last_sweep_reclaimed": self.last_sweep_reclaimed,
+                "last_sweep_seconds": self.last_sweep_seconds,
+                "max_sweep_seconds": self.max_sweep_seconds,
+                "total_sweep_seconds": self.total_sweep_seconds,
+                "indexed_stories": len(self._story_buckets),
+                "sweep_seconds": {"buckets": cumulative, "count": self.sweeps, "sum": self.total_sweep_seconds},
+            }
+
+    def collect_metrics(self, writer: Any) -> None:
+        """
+        Add the janitor's metric families to a Prometheus exposition.
+
+        Args:
+            writer: Exposition writer with family(), sample() and histogram() (MetricsRegistry.add_collector())
+        """
+        metrics = self.get_metrics()
+        writer.family("kraitif_story_janitor_reclaimed_total", "counter", "Idle stories deleted by the story janitor.")
+        writer.sample("kraitif_story_janitor_reclaimed_total", {}, metrics["stories_reclaimed"])
+        writer.family("kraitif_story_janitor_sweep_duration_seconds", "histogram", "Duration of story janitor sweeps.")
+        writer.histogram("kraitif_story_janitor_sweep_duration_seconds", {}, metrics["sweep_seconds"])
+        writer.family("kraitif_story_janitor_indexed_stories", "gauge", "Stories in the janitor's expiry index.")
+        writer.sample("kraitif_story_janitor_indexed_stories", {}, metrics["indexed_stories"])
+
+    def _run(self) -> None:
+        """Seed the index, then sweep every interval until stopped."""
+        sweeps_since_seed = RESEED_EVERY_SWEEPS
+        while True:
+            try:
+                if sweeps_since_seed >= RESEED_EVERY_SWEEPS:
+                    self.seed()
+                    sweeps_since_seed = 0
+                self.sweep()
+                sweeps_since_seed += 1
+            except Exception as e:
+                print(f"Warning: Story janitor sweep failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> threading.Thread:
+        """
+        Start the background sweep thread if it is not running in this process.
+
+        Returns:
+            The janitor thread
+        """
+        if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+            return self._thread
+        with self._lock:
+            # Threads do not survive fork(), so each worker process starts its own
+            if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="story-janitor", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        """Stop the background sweep thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
+# Global story janitor instance
+_story_janitor: Optional[StoryJanitor] = None
+_story_janitor_lock = threading.Lock()
+
+
+def get_story_janitor() -> StoryJanitor:
+    """Get or create the janitor for the process-wide story store."""
+    global _story_janitor
+    if _story_janitor is None:
+        with _story_janitor_lock:
+            if _story_janitor is None:
+                _story_janitor = StoryJanitor(
+                    get_story_store(),
+                    max_age_seconds=float(os.environ.get("KRAITIF_STORY_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)),
+                    interval=float(os.environ.get("KRAITIF_STORY_JANITOR_INTERVAL", DEFAULT_SWEEP_INTERVAL)),
+                    autostart=os.environ.get("KRAITIF_STORY_JANITOR", "1") != "0",
+                )
+    return _story_janitor
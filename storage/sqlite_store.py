@@ -0,0 +1,452 @@
+"""
+SQLite Story Store
+
+This module implements story persistence in a SQLite database running in WAL
+mode. The story header, each character, each chapter, each chapter's text and
+each chapter's continuity state are stored as separate rows, so saving a story
+only rewrites rows whose content changed and a StoryPatch touches only the rows
+it names. Loading without details skips the text and continuity rows entirely.
+
+WAL mode lets any number of readers (threads or worker processes) read while a
+single writer commits. Each thread uses its own connection.
+
+Rows hold data in the binary format from storage/codec.py; rows written as
+JSON text by earlier versions are still read.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from . import codec
+from .story_store import (
+    StoryStore, StoryPatch, StoryVersionConflict, CHARACTERS_KEY, CHAPTERS_KEY, DEFAULT_MAX_AGE_SECONDS
+)
+
+# Stored in PRAGMA user_version; bump when the table layout changes (and upgrade older databases)
+SCHEMA_VERSION = 1
+
+# Seconds to wait for another writer before giving up
+BUSY_TIMEOUT_SECONDS = 30.0
+
+CONTINUITY_STATE_KEY = "continuity_state"
+CHAPTER_TEXT_KEY = "chapter_text"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    story_id TEXT PRIMARY KEY,
+    header BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_stories_updated_at ON stories (updated_at);
+
+CREATE TABLE IF NOT EXISTS characters (
+    story_id TEXT NOT NULL REFERENCES stories (story_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (story_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS chapters (
+    story_id TEXT NOT NULL REFERENCES stories (story_id) ON DELETE CASCADE,
+    chapter_number INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (story_id, chapter_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS continuity_states (
+    story_id TEXT NOT NULL,
+    chapter_number INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (story_id, chapter_number),
+    FOREIGN KEY (story_id, chapter_number)
+        REFERENCES chapters (story_id, chapter_number) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS chapter_texts (
+    story_id TEXT NOT NULL,
+    chapter_number INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (story_id, chapter_number),
+    FOREIGN KEY (story_id, chapter_number)
+        REFERENCES chapters (story_id, chapter_number) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+
+def _encode(data: Any) -> bytes:
+    """Encode a row value with the story codec."""
+    return codec.encode(data)
+
+
+def _decode(data: Any) -> Any:
+    """Decode a row value (codec bytes, or JSON text from before the codec)."""
+    return codec.decode(data)
+
+
+class SqliteStoryStore(StoryStore):
+    """Stores stories as rows in a SQLite database in WAL mode."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store, creating the database and tables if needed.
+
+        Args:
+            path: Location of the SQLite database file
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        connection = self._connection()
+        if connection.execute("PRAGMA user_version").fetchone()[0] == 0:
+            connection.executescript(_SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use (or after a fork)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,  # Transactions are managed explicitly
+            check_same_thread=False,  # Only used by its own thread; close() may run elsewhere
+        )
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def get_version(self, story_id: str) -> Optional[int]:
+        """Get the story's write counter."""
+        try:
+            row = self._connection().execute(
+                "SELECT version FROM stories WHERE story_id = ?", (story_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to read version of story {story_id}: {e}")
+            return None
+        return row[0] if row else None
+
+    def load(self, story_id: str) -> Dict[str, Any]:
+        """Load a story's header, characters and chapters in one read transaction."""
+        return self.load_versioned(story_id)[0]
+
+    def load_versioned(self, story_id: str,
+                       include_details: bool = True) -> Tuple[Dict[str, Any], Optional[int]]:
+        """Load a story and its write counter in one read transaction (optionally without chapter details)."""
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN")
+            try:
+                row = connection.execute(
+                    "SELECT header, version FROM stories WHERE story_id = ?", (story_id,)
+                ).fetchone()
+                if row is None:
+                    return {}, None
+                character_rows = connection.execute(
+                    "SELECT data FROM characters WHERE story_id = ? ORDER BY position", (story_id,)
+                ).fetchall()
+                if include_details:
+                    chapter_rows = connection.execute(
+                        "SELECT c.data, t.data, s.data FROM chapters c "
+                        "LEFT JOIN chapter_texts t "
+                        "ON t.story_id = c.story_id AND t.chapter_number = c.chapter_number "
+                        "LEFT JOIN continuity_states s "
+                        "ON s.story_id = c.story_id AND s.chapter_number = c.chapter_number "
+                        "WHERE c.story_id = ? ORDER BY c.chapter_number",
+                        (story_id,)
+                    ).fetchall()
+                else:
+                    chapter_rows = connection.execute(
+                        "SELECT data, NULL, NULL FROM chapters WHERE story_id = ? ORDER BY chapter_number",
+                        (story_id,)
+                    ).fetchall()
+            finally:
+                connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to load story {story_id}: {e}")
+            return {}, None
+
+        try:
+            story_data = _decode(row[0])
+            story_data[CHARACTERS_KEY] = [_decode(data) for (data,) in character_rows]
+            chapters = []
+            for chapter_row, text_row, continuity_row in chapter_rows:
+                chapter = _decode(chapter_row)
+                if text_row is not None:
+                    chapter.update(_decode(text_row))
+                if continuity_row is not None:
+                    chapter[CONTINUITY_STATE_KEY] = _decode(continuity_row)
+                chapters.append(chapter)
+        except codec.CodecError as e:
+            print(f"Warning: Failed to decode story {story_id}: {e}")
+            return {}, None
+        story_data[CHAPTERS_KEY] = chapters
+        return story_data, row[1]
+
+    def load_chapter_details(self, story_id: str, chapter_number: int) -> Optional[Dict[str, Any]]:
+        """Load one chapter's text and continuity state rows."""
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN")
+            try:
+                text_row = connection.execute(
+                    "SELECT data FROM chapter_texts WHERE story_id = ? AND chapter_number = ?",
+                    (story_id, chapter_number)
+                ).fetchone()
+                continuity_row = connection.execute(
+                    "SELECT data FROM continuity_states WHERE story_id = ? AND chapter_number = ?",
+                    (story_id, chapter_number)
+                ).fetchone()
+            finally:
+                connection.execute("COMMIT")
+            details = _decode(text_row[0]) if text_row else {}
+            if continuity_row:
+                details[CONTINUITY_STATE_KEY] = _decode(continuity_row[0])
+            return details
+        except (sqlite3.Error, codec.CodecError) as e:
+            print(f"Warning: Failed to load chapter {chapter_number} of story {story_id}: {e}")
+            return None
+
+    def save(self, story_id: str, story_data: Dict[str, Any],
+             expected_version: Optional[int] = None) -> Optional[int]:
+        """Store a story, rewriting only the rows whose content changed."""
+        header = {
+            key: value for key, value in story_data.items()
+            if key not in (CHARACTERS_KEY, CHAPTERS_KEY)
+        }
+        characters = story_data.get(CHARACTERS_KEY) or []
+        chapters = story_data.get(CHAPTERS_KEY) or []
+        now = time.time()
+
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if expected_version is not None:
+                    self._check_version(connection, story_id, expected_version)
+                connection.execute(
+                    "INSERT INTO stories (story_id, header, created_at, updated_at, version) VALUES (?, ?, ?, ?, 1) "
+                    "ON CONFLICT (story_id) DO UPDATE SET header = excluded.header, "
+                    "updated_at = excluded.updated_at, version = stories.version + 1",
+                    (story_id, _encode(header), now, now)
+                )
+
+                connection.executemany(
+                    "INSERT INTO characters (story_id, position, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT (story_id, position) DO UPDATE SET data = excluded.data "
+                    "WHERE characters.data IS NOT excluded.data",
+                    [(story_id, position, _encode(character)) for position, character in enumerate(characters)]
+                )
+                connection.execute(
+                    "DELETE FROM characters WHERE story_id = ? AND position >= ?", (story_id, len(characters))
+                )
+
+                chapter_numbers = [chapter.get("chapter_number") for chapter in chapters]
+                connection.execute(
+                    f"DELETE FROM chapters WHERE story_id = ? AND chapter_number NOT IN "
+                    f"({', '.join('?' * len(chapter_numbers))})",
+                    (story_id, *chapter_numbers)
+                )
+                for chapter in chapters:
+                    self._write_chapter(connection, story_id, chapter)
+
+                version = self._read_version(connection, story_id)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return version
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to save story {story_id}: {e}")
+            return None
+
+    def apply_patch(self, story_id: str, patch: StoryPatch,
+                    expected_version: Optional[int] = None) -> Optional[int]:
+        """Write only the rows named in the patch."""
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT header, version FROM stories WHERE story_id = ?", (story_id,)
+                ).fetchone()
+                if row is None:
+                    connection.execute("ROLLBACK")
+                    return None
+                if expected_version is not None and row[1] != expected_version:
+                    raise StoryVersionConflict(story_id, expected_version, row[1])
+
+                if patch.header:
+                    header = _decode(row[0])
+                    header.update(patch.header)
+                    connection.execute(
+                        "UPDATE stories SET header = ?, updated_at = ?, version = version + 1 WHERE story_id = ?",
+                        (_encode(header), time.time(), story_id)
+                    )
+                else:
+                    connection.execute(
+                        "UPDATE stories SET updated_at = ?, version = version + 1 WHERE story_id = ?",
+                        (time.time(), story_id)
+                    )
+
+                connection.executemany(
+                    "INSERT INTO characters (story_id, position, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT (story_id, position) DO UPDATE SET data = excluded.data "
+                    "WHERE characters.data IS NOT excluded.data",
+                    [(story_id, position, _encode(character)) for position, character in patch.characters.items()]
+                )
+                if patch.character_count is not None:
+                    connection.execute(
+                        "DELETE FROM characters WHERE story_id = ? AND position >= ?",
+                        (story_id, patch.character_count)
+                    )
+
+                connection.executemany(
+                    "DELETE FROM chapters WHERE story_id = ? AND chapter_number = ?",
+                    [(story_id, number) for number in patch.removed_chapters]
+                )
+                for chapter in patch.chapters:
+                    self._write_chapter_row(connection, story_id, chapter)
+                for chapter_number, continuity_state in patch.continuity_states.items():
+                    self._write_continuity_row(connection, story_id, chapter_number, continuity_state)
+
+                version = self._read_version(connection, story_id)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return version
+        except (sqlite3.Error, codec.CodecError) as e:
+            print(f"Warning: Failed to update story {story_id}: {e}")
+            return None
+
+    @staticmethod
+    def _check_version(connection: sqlite3.Connection, story_id: str, expected_version: int) -> None:
+        """Raise StoryVersionConflict unless the story is at expected_version (inside a write transaction)."""
+        row = connection.execute("SELECT version FROM stories WHERE story_id = ?", (story_id,)).fetchone()
+        actual = row[0] if row else None
+        if actual != expected_version:
+            raise StoryVersionConflict(story_id, expected_version, actual)
+
+    @staticmethod
+    def _read_version(connection: sqlite3.Connection, story_id: str) -> int:
+        """Read a story's write counter inside the current transaction."""
+        return connection.execute("SELECT version FROM stories WHERE story_id = ?", (story_id,)).fetchone()[0]
+
+    @classmethod
+    def _write_chapter(cls, connection: sqlite3.Connection, story_id: str, chapter_data: Dict[str, Any]) -> None:
+        """Upsert a chapter row and its continuity state row."""
+        cls._write_chapter_row(connection, story_id, chapter_data)
+        cls._write_continuity_row(
+            connection, story_id, chapter_data.get("chapter_number"), chapter_data.get(CONTINUITY_STATE_KEY)
+        )
+
+    @staticmethod
+    def _write_chapter_row(connection: sqlite3.Connection, story_id: str, chapter_data: Dict[str, Any]) -> None:
+        """Upsert a chapter row and, if present in chapter_data, its text row, skipping unchanged content."""
+        chapter_number = chapter_data.get("chapter_number")
+        chapter = {
+            key: value for key, value in chapter_data.items()
+            if key not in (CONTINUITY_STATE_KEY, CHAPTER_TEXT_KEY)
+        }
+        connection.execute(
+            "INSERT INTO chapters (story_id, chapter_number, data) VALUES (?, ?, ?) "
+            "ON CONFLICT (story_id, chapter_number) DO UPDATE SET data = excluded.data "
+            "WHERE chapters.data IS NOT excluded.data",
+            (story_id, chapter_number, _encode(chapter))
+        )
+        if CHAPTER_TEXT_KEY not in chapter_data:
+            return
+        chapter_text = chapter_data[CHAPTER_TEXT_KEY]
+        if chapter_text is None:
+            connection.execute(
+                "DELETE FROM chapter_texts WHERE story_id = ? AND chapter_number = ?", (story_id, chapter_number)
+            )
+        else:
+            connection.execute(
+                "INSERT INTO chapter_texts (story_id, chapter_number, data) VALUES (?, ?, ?) "
+                "ON CONFLICT (story_id, chapter_number) DO UPDATE SET data = excluded.data "
+                "WHERE chapter_texts.data IS NOT excluded.data",
+                (story_id, chapter_number, _encode({CHAPTER_TEXT_KEY: chapter_text}))
+            )
+
+    @staticmethod
+    def _write_continuity_row(connection: sqlite3.Connection, story_id: str, chapter_number: int,
+                              continuity_state: Optional[Dict[str, Any]]) -> None:
+        """Upsert or remove a chapter's continuity state row, skipping unchanged content."""
+        if continuity_state is None:
+            connection.execute(
+                "DELETE FROM continuity_states WHERE story_id = ? AND chapter_number = ?",
+                (story_id, chapter_number)
+            )
+        else:
+            connection.execute(
+                "INSERT INTO continuity_states (story_id, chapter_number, data) VALUES (?, ?, ?) "
+                "ON CONFLICT (story_id, chapter_number) DO UPDATE SET data = excluded.data "
+                "WHERE continuity_states.data IS NOT excluded.data",
+                (story_id, chapter_number, _encode(continuity_state))
+            )
+
+    def delete(self, story_id: str) -> bool:
+        """Delete a story and all of its rows."""
+        try:
+            cursor = self._connection().execute("DELETE FROM stories WHERE story_id = ?", (story_id,))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to delete story {story_id}: {e}")
+            return False
+
+    def list_updated(self) -> Dict[str, float]:
+        """List the last write time of every story."""
+        try:
+            return dict(self._connection().execute("SELECT story_id, updated_at FROM stories").fetchall())
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to list stories: {e}")
+            return {}
+
+    def delete_if_idle(self, story_id: str, cutoff: float) -> bool:
+        """Delete a story if its last write precedes cutoff."""
+        try:
+            cursor = self._connection().execute(
+                "DELETE FROM stories WHERE story_id = ? AND updated_at < ?", (story_id, cutoff)
+            )
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to expire story {story_id}: {e}")
+            return False
+
+    def cleanup(self, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> int:
+        """Delete stories that have not been saved for longer than max_age_seconds."""
+        try:
+            cursor = self._connection().execute(
+                "DELETE FROM stories WHERE updated_at < ?", (time.time() - max_age_seconds,)
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Warning: Story cleanup failed: {e}")
+            return 0
+
+    def close(self) -> None:
+        """Close every connection opened by this store."""
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
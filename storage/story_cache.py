@@ -0,0 +1,172 @@
+"""
+Story Cache
+
+This module implements a bounded, in-process LRU cache of hydrated Story
+objects keyed by story ID. Rebuilding a Story re-parses every character,
+chapter and continuity state, so hot sessions reuse the object built on a
+previous request instead.
+
+Each entry records the store version and catalog version it was built from and
+is only returned while both still match, so writes from other processes or a
+catalog reload invalidate it. Entries are checked out while a request uses
+them: a story is never shared by two concurrent requests, and one that was
+modified but not saved is simply not put back.
+
+Entries are evicted least recently used first once either the entry count or
+the estimated total size exceeds its limit.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+# Default limits (override with KRAITIF_STORY_CACHE_ENTRIES / KRAITIF_STORY_CACHE_MB)
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Rough per-object overhead added to the text size of a story
+OBJECT_OVERHEAD_BYTES = 512
+
+
+def estimate_story_size(story: Any) -> int:
+    """
+    Estimate the memory held by a hydrated story from its text fields.
+
+    Args:
+        story: Story object
+
+    Returns:
+        Approximate size in bytes
+    """
+    size = OBJECT_OVERHEAD_BYTES + len(story.expanded_plot_line or "")
+    for character in story.characters:
+        size += OBJECT_OVERHEAD_BYTES + len(character.backstory or "") + len(character.character_arc or "")
+    for chapter in story.chapters:
+        # Details that were never loaded take no memory (and must not be loaded here)
+        size += OBJECT_OVERHEAD_BYTES + len(chapter.overview or "") + len(chapter.summary or "")
+        if chapter.is_loaded("chapter_text"):
+            size += len(chapter.chapter_text or "")
+        if chapter.is_loaded("continuity_state") and chapter.continuity_state:
+            size += OBJECT_OVERHEAD_BYTES
+    return size
+
+
+class CacheEntry(NamedTuple):
+    """A cached story and the versions it was built from."""
+    story: Any
+    version: Hashable
+    catalog_version: str
+    size: int
+
+
+class StoryCache:
+    """Thread-safe LRU cache of hydrated stories with checkout semantics."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached stories
+            max_bytes: Maximum estimated total size of cached stories
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def checkout(self, story_id: str, version: Optional[Hashable], catalog_version: str) -> Optional[Any]:
+        """
+        Remove and return the cached story if it matches both versions.
+
+        The caller owns the returned story until it checks it back in.
+
+        Args:
+            story_id: Story identifier
+            version: Current store version of the story (None never matches)
+            catalog_version: Version of the catalog the request is using
+
+        Returns:
+            The cached Story, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.pop(story_id, None)
+            if entry is not None:
+                self._total_bytes -= entry.size
+            if (entry is None or version is None or entry.version != version
+                    or entry.catalog_version != catalog_version):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.story
+
+    def checkin(self, story_id: str, story: Any, version: Optional[Hashable]) -> None:
+        """
+        Cache a story that matches the stored data at the given version.
+
+        Args:
+            story_id: Story identifier
+            story: Story object identical to what is stored
+            version: Store version the story corresponds to (None is not cached)
+        """
+        if version is None or self.max_entries <= 0:
+            return
+        size = estimate_story_size(story)
+        if size > self.max_bytes:
+            return
+        entry = CacheEntry(story, version, story.catalog_version, size)
+        with self._lock:
+            previous = self._entries.pop(story_id, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._entries[story_id] = entry
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+                self.evictions += 1
+
+    def discard(self, story_id: str) -> None:
+        """Drop a story from the cache."""
+        with self._lock:
+            entry = self._entries.pop(story_id, None)
+            if entry is not None:
+                self._total_bytes -= entry.size
+
+    def clear(self) -> None:
+        """Drop every cached story."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        """Number of cached stories."""
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Estimated total size of cached stories."""
+        return self._total_bytes
+
+
+# Global story cache instance
+_story_cache: Optional[StoryCache] = None
+_story_cache_lock = threading.Lock()
+
+
+def get_story_cache() -> StoryCache:
+    """Get or create the process-wide story cache."""
+    global _story_cache
+    if _story_cache is None:
+        with _story_cache_lock:
+            if _story_cache is None:
+                _story_cache = StoryCache(
+                    max_entries=int(os.environ.get("KRAITIF_STORY_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    max_bytes=int(float(os.environ.get("KRAITIF_STORY_CACHE_MB", DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+                )
+    return _story_cache
@@ -0,0 +1,306 @@
+"""
+Story Store Interface
+
+This module defines the interface used by the Flask app to persist story data
+and the factory that selects a backend. Stories are exchanged as the same plain
+dictionaries that save_story_to_session() builds (header fields plus
+"characters" and "chapters" lists), so backends are interchangeable.
+
+Backends:
+    sqlite  SQLite database in WAL mode, one row per header, character, chapter
+            and continuity state (default, survives restarts)
+    file    One JSON file per story in a directory (the original behaviour)
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Story data keys stored as separate rows rather than in the story header
+CHARACTERS_KEY = "characters"
+CHAPTERS_KEY = "chapters"
+
+# Bulky chapter fields a store may leave out of a load_versioned(include_details=False)
+# result; they are fetched per chapter with load_chapter_details()
+CHAPTER_DETAIL_KEYS = ("chapter_text", "continuity_state")
+
+# Default maximum idle age of a stored story before cleanup removes it
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Opaque token that changes whenever a stored story is written (compared for equality only)
+StoryVersion = Hashable
+
+# Default location of the SQLite story database
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "stories.db")
+
+
+class StoryVersionConflict(Exception):
+    """Raised when a story was written by someone else since the expected version."""
+
+    def __init__(self, story_id: str, expected: Optional[StoryVersion], actual: Optional[StoryVersion]):
+        super().__init__(f"Story {story_id} is at version {actual}, expected {expected}")
+        self.story_id = story_id
+        self.expected = expected
+        self.actual = actual
+
+
+@dataclass
+class StoryPatch:
+    """Partial update of a stored story, built from the story's change tracking."""
+    header: Optional[Dict[str, Any]] = None  # Changed header fields (merged into the stored header)
+    characters: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # Changed characters by position
+    character_count: Optional[int] = None  # New number of characters, or None if unchanged
+    # Changed chapters (without continuity_state; without chapter_text if the text is unchanged)
+    chapters: List[Dict[str, Any]] = field(default_factory=list)
+    continuity_states: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # Changed states by chapter number
+    removed_chapters: List[int] = field(default_factory=list)  # Numbers of deleted chapters
+
+    def is_empty(self) -> bool:
+        """Return True if the patch changes nothing."""
+        return (not self.header and not self.characters and self.character_count is None
+                and not self.chapters and not self.continuity_states and not self.removed_chapters)
+
+    def apply(self, story_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply the patch to a full story data dictionary.
+
+        Args:
+            story_data: Story data as returned by StoryStore.load()
+
+        Returns:
+            The updated story data
+        """
+        if self.header:
+            story_data = dict(story_data, **self.header)
+
+        characters = list(story_data.get(CHARACTERS_KEY, []))
+        if self.character_count is not None:
+            characters = characters[:self.character_count]
+        for position, character in sorted(self.characters.items()):
+            if position < len(characters):
+                characters[position] = character
+            else:
+                characters.append(character)
+
+        chapters = {
+            chapter.get("chapter_number"): chapter for chapter in story_data.get(CHAPTERS_KEY, [])
+            if chapter.get("chapter_number") not in self.removed_chapters
+        }
+        for chapter in self.chapters:
+            # Keys missing from the patched chapter (continuity state, unchanged text) are kept
+            previous = chapters.get(chapter.get("chapter_number"), {})
+            chapters[chapter.get("chapter_number")] = dict(previous, **chapter)
+        for chapter_number, continuity_state in self.continuity_states.items():
+            if chapter_number in chapters:
+                chapters[chapter_number] = dict(chapters[chapter_number], continuity_state=continuity_state)
+
+        story_data[CHARACTERS_KEY] = characters
+        story_data[CHAPTERS_KEY] = [chapters[number] for number in sorted(chapters)]
+        return story_data
+
+
+class StoryStore:
+    """Interface for story persistence backends."""
+
+    def load(self, story_id: str) -> Dict[str, Any]:
+        """
+        Load the stored data for a story.
+
+        Args:
+            story_id: Story identifier
+
+        Returns:
+            Story data dictionary, or an empty dictionary if the story is not stored
+        """
+        raise NotImplementedError
+
+    def get_version(self, story_id: str) -> Optional[StoryVersion]:
+        """
+        Get the current version of a stored story without loading it.
+
+        Args:
+            story_id: Story identifier
+
+        Returns:
+            Version token, or None if the story is not stored
+        """
+        raise NotImplementedError
+
+    def load_versioned(self, story_id: str,
+                       include_details: bool = True) -> Tuple[Dict[str, Any], Optional[StoryVersion]]:
+        """
+        Load the stored data for a story together with its version.
+
+        The default implementation reads the version before the data, so a
+        concurrent write can only make the version look older than the data
+        (which makes callers reload) rather than newer. It always includes
+        chapter details.
+
+        Args:
+            story_id: Story identifier
+            include_details: If False, the store may omit CHAPTER_DETAIL_KEYS from
+                             chapters; callers fetch them with load_chapter_details()
+
+        Returns:
+            Tuple of (story data or empty dictionary, version or None)
+        """
+        version = self.get_version(story_id)
+        story_data = self.load(story_id)
+        return story_data, version if story_data else None
+
+    def load_chapter_details(self, story_id: str, chapter_number: int) -> Optional[Dict[str, Any]]:
+        """
+        Load the text and continuity state of one stored chapter.
+
+        Args:
+            story_id: Story identifier
+            chapter_number: Chapter number
+
+        Returns:
+            Dictionary with the CHAPTER_DETAIL_KEYS the chapter has stored (empty if the
+            chapter is not stored), or None if the store could not be read
+        """
+        for chapter in self.load(story_id).get(CHAPTERS_KEY, []):
+            if chapter.get("chapter_number") == chapter_number:
+                return {key: chapter[key] for key in CHAPTER_DETAIL_KEYS if key in chapter}
+        return {}
+
+    def save(self, story_id: str, story_data: Dict[str, Any],
+             expected_version: Optional[StoryVersion] = None) -> Optional[StoryVersion]:
+        """
+        Store the complete data for a story, replacing what was stored before.
+
+        Args:
+            story_id: Story identifier
+            story_data: Story data dictionary
+            expected_version: If given, only store the data if the story is still at
+                              this version (checked atomically with the write)
+
+        Returns:
+            The story's new version (always truthy), or None if the data was not stored
+
+        Raises:
+            StoryVersionConflict: If the story is not at expected_version
+        """
+        raise NotImplementedError
+
+    def apply_patch(self, story_id: str, patch: StoryPatch,
+                    expected_version: Optional[StoryVersion] = None) -> Optional[StoryVersion]:
+        """
+        Apply a partial update to an already stored story.
+
+        The default implementation loads the story, applies the patch and saves
+        it again (checking that nothing was written in between); backends that
+        store rows separately override it to write only the rows in the patch.
+
+        Args:
+            story_id: Story identifier
+            patch: Changes to apply
+            expected_version: If given, only apply the patch if the story is still
+                              at this version
+
+        Returns:
+            The story's new version, or None if the story is not stored
+
+        Raises:
+            StoryVersionConflict: If the story is not at expected_version
+        """
+        story_data, version = self.load_versioned(story_id)
+        if not story_data:
+            return None
+        if expected_version is not None and version != expected_version:
+            raise StoryVersionConflict(story_id, expected_version, version)
+        return self.save(story_id, patch.apply(story_data), expected_version=version)
+
+    def delete(self, story_id: str) -> bool:
+        """
+        Delete a stored story.
+
+        Args:
+            story_id: Story identifier
+
+        Returns:
+            True if a story was deleted
+        """
+        raise NotImplementedError
+
+    def list_updated(self) -> Dict[str, float]:
+        """
+        List when each stored story was last written.
+
+        Returns:
+            Dictionary mapping story IDs to last write times (seconds since the epoch)
+        """
+        raise NotImplementedError
+
+    def delete_if_idle(self, story_id: str, cutoff: float) -> bool:
+        """
+        Delete a story only if it was last written before cutoff.
+
+        The check and the delete are atomic with respect to writes, so a story
+        saved by another thread or process in the meantime is kept.
+
+        Args:
+            story_id: Story identifier
+            cutoff: Time (seconds since the epoch) the last write must precede
+
+        Returns:
+            True if the story was deleted
+        """
+        raise NotImplementedError
+
+    def cleanup(self, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> int:
+        """
+        Delete stories that have not been saved for longer than max_age_seconds.
+
+        Args:
+            max_age_seconds: Maximum idle age in seconds
+
+        Returns:
+            Number of stories deleted
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+def create_story_store(backend: Optional[str] = None, path: Optional[str] = None) -> StoryStore:
+    """
+    Create a story store.
+
+    Args:
+        backend: "sqlite" or "file" (defaults to KRAITIF_STORY_STORE, then "sqlite")
+        path: Database file (sqlite) or directory (file); defaults to
+              KRAITIF_STORY_DB / a temporary directory respectively
+
+    Returns:
+        A StoryStore instance
+    """
+    if backend is None:
+        backend = os.environ.get("KRAITIF_STORY_STORE", "sqlite")
+    backend = backend.lower()
+
+    if backend == "sqlite":
+        from .sqlite_store import SqliteStoryStore
+        return SqliteStoryStore(path or os.environ.get("KRAITIF_STORY_DB", DEFAULT_DB_PATH))
+    if backend == "file":
+        from .file_store import FileStoryStore
+        return FileStoryStore(path)
+    raise ValueError(f"Unknown story store backend: {backend}")
+
+
+# Global story store instance
+_story_store: Optional[StoryStore] = None
+_story_store_lock = threading.Lock()
+
+
+def get_story_store() -> StoryStore:
+    """Get or create the process-wide story store."""
+    global _story_store
+    if _story_store is None:
+        with _story_store_lock:
+            if _story_store is None:
+                _story_store = create_story_store()
+    return _story_store
@@ -0,0 +1,73 @@
+"""
+Story builders shared by the test modules.
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.character import Character
+from objects.continuity_state import ContinuityState
+from objects.plot_line import PlotLine
+from objects.archetype import ArchetypeEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.emotional_function import EmotionalFunctionEnum
+
+# Chapter text template, with markup and non-ASCII text for the exporters and the codec
+CHAPTER_TEXT = "First paragraph of {number}.\n\nSecond paragraph of {number} <b> — café."
+
+
+def chapter_text(number, text=CHAPTER_TEXT):
+    """Get the text make_story() gives chapter number."""
+    return text.format(number=number)
+
+
+def make_character(name):
+    """Build a character for testing."""
+    return Character(
+        name=name,
+        archetype=ArchetypeEnum.CHOSEN_ONE,
+        functional_role=FunctionalRoleEnum.PROTAGONIST,
+        emotional_function=EmotionalFunctionEnum.SYMPATHETIC_CHARACTER,
+        backstory="Raised by wolves & owls.",
+    )
+
+
+def make_story(chapter_count=3, characters=("Aria", "Borin"), text=CHAPTER_TEXT, unwritten_chapter=False):
+    """
+    Build a story with characters and chapters with texts and continuity states.
+
+    Args:
+        chapter_count: Number of written chapters
+        characters: Names of the characters
+        text: Chapter text, formatted with the chapter number (None for chapters without text)
+        unwritten_chapter: Add a planned chapter without text after the written ones
+
+    Returns:
+        The story
+    """
+    story = Story()
+    story.story_type_name = "The Quest"
+    story.subtype_name = "Spiritual Quest"
+    story.set_genre("Fantasy")
+    story.set_selected_plot_line(PlotLine(name="The Long Road", plotline="A journey <home>."))
+    story.set_expanded_plot_line("The long version of the journey.")
+    for name in characters:
+        story.add_character(make_character(name))
+    for number in range(1, chapter_count + 1):
+        state = ContinuityState()
+        state.add_location(f"Location {number}")
+        story.add_chapter(Chapter(
+            chapter_number=number, title=f"Chapter {number}", overview=f"Overview {number}",
+            chapter_text=None if text is None else chapter_text(number, text), continuity_state=state,
+        ))
+    if unwritten_chapter:
+        story.add_chapter(Chapter(chapter_number=chapter_count + 1, title="Unwritten", overview="Still to come"))
+    return story
+
+
+def make_story_data(chapter_count=3, **kwargs):
+    """Build a story data dictionary like save_story_to_session() produces (make_story() arguments)."""
+    return make_story(chapter_count, **kwargs).to_dict()
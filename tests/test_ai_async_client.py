@@ -0,0 +1,126 @@
+"""
+Test suite for the asyncio AI client path and its event loop worker.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+import ai.async_client as async_client
+from ai.async_client import AIEventLoop, get_ai_response_async, stream_ai_response_async
+from prompt_types import PromptType
+
+
+def make_fake_async_client(content="async ai response", delay=0.0, error=None):
+    """Build a fake AsyncAzureOpenAI client whose completions wait delay seconds."""
+
+    async def create(**kwargs):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        response = MagicMock()
+        response.choices[0].message.content = content
+        return response
+
+    client = MagicMock()
+    client.chat.completions.create = create
+    return client
+
+
+class TestAsyncAIClient(unittest.TestCase):
+    """Test cases for get_ai_response_async() and the AI event loop."""
+
+    def setUp(self):
+        """Reset the global async client and bypass the cache and debug files."""
+        self.original_client = async_client._async_client
+        async_client._async_client = None
+        self.patches = [
+            patch.object(ai_client, "USE_CACHE", False),
+            patch.object(ai_client, "_save_debug_files"),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+        self.event_loop = AIEventLoop(max_in_flight=8)
+
+    def tearDown(self):
+        """Stop the event loop and restore the global client."""
+        self.event_loop.stop()
+        for active_patch in self.patches:
+            active_patch.stop()
+        async_client._async_client = self.original_client
+
+    def test_response_text(self):
+        """Test that the async path returns the completion text like the sync path."""
+        with patch("ai.async_client._create_async_ai_client", return_value=make_fake_async_client()):
+            result = self.event_loop.run(get_ai_response_async("prompt", PromptType.PLOT_LINES))
+        self.assertEqual(result, "async ai response")
+
+    def test_errors_are_returned_as_text(self):
+        """Test that a failed completion returns an error message instead of raising."""
+        fake_client = make_fake_async_client(error=RuntimeError("upstream unavailable"))
+        with patch("ai.async_client._create_async_ai_client", return_value=fake_client):
+            result = self.event_loop.run(get_ai_response_async("prompt", PromptType.CHAPTER))
+        self.assertEqual(result, "Error: upstream unavailable")
+
+    def test_concurrent_completions_share_the_loop(self):
+        """Test that many request threads wait on overlapping completions instead of queueing."""
+        fake_client = make_fake_async_client(delay=0.2)
+        with patch("ai.async_client._create_async_ai_client", return_value=fake_client):
+            self.event_loop.run(get_ai_response_async("warm up", PromptType.CHAPTER))
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                results = list(pool.map(
+                    lambda n: self.event_loop.run(get_ai_response_async(f"prompt {n}", PromptType.CHAPTER)),
+                    range(32),
+                ))
+            elapsed = time.perf_counter() - start
+        self.assertEqual(results, ["async ai response"] * 32)
+        # 32 completions of 0.2s, at most 8 at a time: 4 rounds, not 32
+        self.assertLess(elapsed, 2.0)
+
+    def test_in_flight_limit(self):
+        """Test that no more than max_in_flight coroutines run at once."""
+        peak = []
+
+        async def work():
+            peak.append(self.event_loop.in_flight)
+            await asyncio.sleep(0.05)
+
+        futures = [self.event_loop.submit(work()) for _ in range(20)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(max(peak), 8)
+        self.assertEqual(self.event_loop.in_flight, 0)
+
+    def test_stream_pieces(self):
+        """Test that streamed pieces are passed on as they arrive and the complete text is returned."""
+
+        async def create(**kwargs):
+            async def chunks():
+                for piece in ["Once", " upon", " a time"]:
+                    await asyncio.sleep(0.01)
+                    chunk = MagicMock()
+                    chunk.choices[0].delta.content = piece
+                    chunk.choices[0].finish_reason = None
+                    yield chunk
+            return chunks()
+
+        fake_client = MagicMock()
+        fake_client.chat.completions.create = create
+        pieces = []
+        with patch("ai.async_client._create_async_ai_client", return_value=fake_client):
+            response = self.event_loop.run(stream_ai_response_async("prompt", PromptType.CHAPTER, pieces.append))
+        self.assertEqual(pieces[:3], ["Once", " upon", " a time"])
+        self.assertTrue(response.startswith("Once upon a time"))
+        self.assertEqual("".join(pieces), response)
+
+
+if __name__ == "__main__":
+    unittest.main()
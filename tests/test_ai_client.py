@@ -0,0 +1,89 @@
+"""
+Test suite for lazy AI client construction and background warm-up.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+from ai.ai_cache import AIResponseCache
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyAIClient(unittest.TestCase):
+    """Test cases for fast-start mode and AI client warm-up."""
+
+    def setUp(self):
+        """Reset the global client."""
+        self.original_client = ai_client._client
+        ai_client._client = None
+
+    def tearDown(self):
+        """Restore the global client."""
+        ai_client._client = self.original_client
+
+    def _modules_loaded_after_app_import(self, fast_start):
+        """Import the app in a fresh interpreter and report which SDKs were loaded."""
+        env = dict(os.environ, KRAITIF_FAST_START=fast_start)
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                "-c",
+                "import sys, app; print('openai' in sys.modules, 'azure.identity' in sys.modules)",
+            ],
+            cwd=ROOT_DIR,
+            env=env,
+        )
+        return output.decode("utf-8").split()
+
+    def test_fast_start_does_not_import_ai_sdk(self):
+        """Test that importing the app in fast-start mode leaves the AI SDK unloaded."""
+        self.assertEqual(self._modules_loaded_after_app_import("1"), ["False", "False"])
+
+    def test_client_is_created_once(self):
+        """Test that the client is built on first use and then reused."""
+        fake_client = MagicMock()
+        with patch("ai.ai_client._create_ai_client", return_value=fake_client) as mock_create:
+            self.assertIs(ai_client.get_ai_client(), fake_client)
+            self.assertIs(ai_client.get_ai_client(), fake_client)
+        mock_create.assert_called_once()
+
+    def test_warmup_thread_builds_client(self):
+        """Test that the background warm-up thread prepares the client."""
+        fake_client = MagicMock()
+        ready = MagicMock()
+        with patch("ai.ai_client._create_ai_client", return_value=fake_client):
+            thread = ai_client.start_ai_warmup_thread(wait_until_ready=ready)
+            thread.join(timeout=5)
+        ready.assert_called_once()
+        self.assertIs(ai_client._client, fake_client)
+
+    def test_warmup_failure_is_not_fatal(self):
+        """Test that a failed warm-up leaves the client unset for a later retry."""
+        with patch("ai.ai_client._create_ai_client", side_effect=Exception("no credentials")):
+            self.assertFalse(ai_client.warm_up_ai_client())
+        self.assertIsNone(ai_client._client)
+
+
+class TestAIResponseCacheScope(unittest.TestCase):
+    """Test cases for catalog-version scoped cache keys."""
+
+    def test_scoped_entries_are_separate(self):
+        """Test that responses cached under one catalog version are not reused by another."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = AIResponseCache(cache_dir)
+            cache.set("prompt", "old response", scope="v1")
+            self.assertEqual(cache.get("prompt", scope="v1"), "old response")
+            self.assertIsNone(cache.get("prompt", scope="v2"))
+            self.assertIsNone(cache.get("prompt"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+"""
+Test suite for retries, backoff and circuit breaking around AI completions.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+from ai.resilience import (
+    AIError,
+    AIRequestFailed,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    RetryPolicy,
+    classify_error,
+    parse_retry_after,
+)
+from prompt_types import PromptType
+
+
+class Headers(dict):
+    """Response headers with case-insensitive get(), like the SDK's."""
+
+    def __init__(self, headers=None):
+        super().__init__({name.lower(): value for name, value in (headers or {}).items()})
+
+    def get(self, name, default=None):
+        return super().get(name.lower(), default)
+
+
+class APIStatusError(Exception):
+    """Stand-in for the SDK's HTTP error exceptions (status_code and response.headers)."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(headers=Headers(headers))
+
+
+class APITimeoutError(Exception):
+    """Stand-in for the SDK's timeout exception, recognised by class name."""
+
+
+class APIConnectionError(Exception):
+    """Stand-in for the SDK's connection exception, recognised by class name."""
+
+
+def api_error(status_code, headers=None):
+    """Build the exception raised for an HTTP error response."""
+    return APIStatusError(status_code, headers)
+
+
+def failing_then(results):
+    """Build a call that raises or returns the given results in order."""
+    results = list(results)
+    calls = []
+
+    def call():
+        calls.append(1)
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    call.calls = calls
+    return call
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestErrorClassification(unittest.TestCase):
+    """Test cases for classify_error() and parse_retry_after()."""
+
+    def test_sdk_errors(self):
+        """Test that SDK exceptions map to their kinds and Retry-After delays."""
+        self.assertEqual(classify_error(api_error(429, {"retry-after": "7"})), ("rate_limited", 429, 7.0))
+        self.assertEqual(classify_error(api_error(503)), ("server_error", 503, None))
+        self.assertEqual(classify_error(api_error(400)), ("client_error", 400, None))
+        self.assertEqual(classify_error(APITimeoutError())[0], "timeout")
+        self.assertEqual(classify_error(APIConnectionError())[0], "connection")
+        self.assertEqual(classify_error(RuntimeError("boom")), ("unknown", None, None))
+
+    def test_retry_after_formats(self):
+        """Test that milliseconds, seconds and HTTP dates are understood."""
+        self.assertEqual(parse_retry_after(Headers({"retry-after-ms": "1500", "retry-after": "9"})), 1.5)
+        self.assertEqual(parse_retry_after(Headers({"Retry-After": "3"})), 3.0)
+        delay = parse_retry_after(Headers({"retry-after": formatdate(time.time() + 30, usegmt=True)}))
+        self.assertAlmostEqual(delay, 30, delta=2)
+        self.assertIsNone(parse_retry_after(Headers({"retry-after": "soon"})))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for backoff delays."""
+
+    def test_backoff_is_bounded_and_jittered(self):
+        """Test that delays stay under the doubling ceiling and the maximum."""
+        policy = RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=5.0)
+        for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (6, 5.0)]:
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= ceiling for delay in delays))
+            self.assertGreater(len(set(delays)), 100)
+        self.assertIsNone(policy.backoff(10))
+
+    def test_retry_after_is_honoured(self):
+        """Test that Retry-After sets a floor, and too long a wait gives up."""
+        policy = RetryPolicy(base_delay=1.0, max_retry_after=60.0)
+        self.assertGreaterEqual(policy.backoff(1, retry_after=12.0), 12.0)
+        self.assertIsNone(policy.backoff(1, retry_after=120.0))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the per-deployment circuit breaker."""
+
+    def setUp(self):
+        """Create a breaker on a hand-driven clock."""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("gpt", failure_threshold=3, reset_timeout=30.0, clock=self.clock)
+
+    def test_opens_after_consecutive_transient_failures(self):
+        """Test that the breaker opens at the threshold and ignores client errors."""
+        self.breaker.record_failure("client_error")
+        self.breaker.record_failure("rate_limited")
+        self.breaker.record_failure("server_error")
+        self.assertIsNone(self.breaker.allow())
+        self.breaker.record_failure("timeout")
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.allow(), 30.0)
+
+    def test_half_open_probe(self):
+        """Test that one probe goes through after the cool-down and its outcome decides the state."""
+        for _ in range(3):
+            self.breaker.record_failure("server_error")
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertIsNone(self.breaker.allow())
+        self.assertIsNotNone(self.breaker.allow())  # Only one probe at a time
+
+        self.breaker.record_failure("server_error")
+        self.assertEqual(self.breaker.state, "open")
+
+        self.clock.now += 30
+        self.assertIsNone(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertIsNone(self.breaker.allow())
+
+
+class TestResilientCaller(unittest.TestCase):
+    """Test cases for retrying calls and recording decisions."""
+
+    def setUp(self):
+        """Create a caller whose sleeps are recorded instead of slept."""
+        self.caller = ResilientCaller(RetryPolicy(max_attempts=4, base_delay=0.5), failure_threshold=3)
+        self.sleeps = []
+
+    def decisions(self):
+        """Get the recorded decisions as (kind, decision, count) tuples."""
+        return [(entry["kind"], entry["decision"], entry["count"]) for entry in self.caller.get_metrics()["decisions"]]
+
+    def test_transient_failures_are_retried(self):
+        """Test that 429 and 5xx are retried, waiting at least the Retry-After delay."""
+        call = failing_then([api_error(429, {"retry-after": "2"}), api_error(502), "completion"])
+        self.assertEqual(self.caller.call("gpt", call, sleep=self.sleeps.append), "completion")
+        self.assertEqual(len(call.calls), 3)
+        self.assertGreaterEqual(self.sleeps[0], 2.0)
+        self.assertLessEqual(self.sleeps[1], 1.0)
+        self.assertEqual(self.decisions(), [("rate_limited", "retry", 1), ("server_error", "retry", 1)])
+        self.assertEqual(self.caller.get_metrics()["attempts"], {"gpt": 3})
+        self.assertEqual(self.caller.get_metrics()["circuit_breakers"]["gpt"]["state"], "closed")
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a bad request fails at once with its kind and status."""
+        call = failing_then([api_error(400)])
+        with self.assertRaises(AIRequestFailed) as raised:
+            self.caller.call("gpt", call, sleep=self.sleeps.append)
+        self.assertEqual((raised.exception.kind, raised.exception.status_code), ("client_error", 400))
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(self.decisions(), [("client_error", "give_up", 1)])
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that retries stop at the attempt limit."""
+        call = failing_then([api_error(503)] * 4)
+        with self.assertRaises(AIRequestFailed) as raised:
+            self.caller.call("gpt-a", call, sleep=self.sleeps.append)
+        self.assertEqual(raised.exception.attempts, 3)
+        self.assertEqual(len(self.sleeps), 2)
+
+        # The third failure opened the breaker, so the next completion is rejected without a call
+        with self.assertRaises(CircuitOpenError):
+            self.caller.call("gpt-a", failing_then(["unused"]), sleep=self.sleeps.append)
+        self.assertIn(("circuit_open", "rejected", 1), self.decisions())
+        # Other deployments are unaffected
+        self.assertEqual(self.caller.call("gpt-b", failing_then(["ok"]), sleep=self.sleeps.append), "ok")
+
+    def test_async_retries(self):
+        """Test that call_async() retries like call(), sleeping with the given coroutine."""
+        call = failing_then([APITimeoutError(), "completion"])
+
+        async def attempt():
+            return call()
+
+        async def sleep(delay):
+            self.sleeps.append(delay)
+
+        self.assertEqual(asyncio.run(self.caller.call_async("gpt", attempt, sleep)), "completion")
+        self.assertEqual(len(call.calls), 2)
+        self.assertEqual(len(self.sleeps), 1)
+
+
+class TestTypedErrorResults(unittest.TestCase):
+    """Test cases for the AIError results of failed completions."""
+
+    def setUp(self):
+        """Bypass the cache and debug files and use a caller that does not sleep."""
+        self.caller = ResilientCaller(RetryPolicy(max_attempts=2, base_delay=0.0))
+        self.patches = [
+            patch.object(ai_client, "USE_CACHE", False),
+            patch.object(ai_client, "_save_debug_files"),
+            patch("ai.ai_client.get_resilient_caller", return_value=self.caller),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_get_ai_response_retries_then_returns_ai_error(self, mock_get_client):
+        """Test that an exhausted rate limit becomes a typed, still string-compatible error."""
+        mock_get_client.return_value.chat.completions.create.side_effect = api_error(429)
+        response = ai_client.get_ai_response("prompt", PromptType.CHAPTER)
+        self.assertIsInstance(response, AIError)
+        self.assertTrue(response.startswith("Error: "))
+        self.assertEqual((response.kind, response.attempts, response.retryable), ("rate_limited", 2, True))
+        self.assertEqual(mock_get_client.return_value.chat.completions.create.call_count, 2)
+        self.assertEqual(response.to_dict()["error_kind"], "rate_limited")
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_retry_then_success(self, mock_get_client):
+        """Test that a transient failure followed by a completion returns the text."""
+        completion = MagicMock()
+        completion.choices[0].message.content = "Once upon a time"
+        mock_get_client.return_value.chat.completions.create.side_effect = [api_error(500), completion]
+        self.assertEqual(ai_client.get_ai_response("prompt", PromptType.CHAPTER), "Once upon a time")
+
+    def test_failed_plan_keeps_existing_chapters(self):
+        """Test that a failed chapter plan generation reports the error without clearing the plan."""
+        import app as app_module
+        from objects.story import Story
+        from objects.chapter import Chapter
+
+        story = Story()
+        story.add_chapter(Chapter(chapter_number=1, title="Leaving", overview="Aria leaves."))
+        result = app_module.finish_chapter_plan(story, AIError("server_error", "HTTP 503", 503))
+        self.assertEqual(result["error_kind"], "server_error")
+        self.assertFalse(result["success"])
+        self.assertEqual(len(story.chapters), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
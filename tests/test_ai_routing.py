@@ -0,0 +1,155 @@
+"""
+Test suite for per-PromptType model routing.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+from ai.routing import (
+    DEFAULT_ROUTES,
+    FAST_DEPLOYMENT,
+    ModelRoute,
+    ModelRouter,
+    complete_structured_data,
+    load_routes,
+)
+from prompt_types import PromptType
+
+# A structured response whose closing tag was cut off by the stop sequence
+STOPPED_RESPONSE = '<STRUCTURED_DATA>\n{"plotlines": []}\n'
+
+
+class TestRoutingTable(unittest.TestCase):
+    """Test cases for the default routes and loading overrides."""
+
+    def write_routes(self, data):
+        """Write a routes file and return its path."""
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_defaults(self):
+        """Test that every prompt type has a route and the short answers use the fast deployment."""
+        routes = load_routes()
+        self.assertEqual(set(routes), set(PromptType))
+        self.assertEqual(routes[PromptType.PLOT_LINES].deployment, FAST_DEPLOYMENT)
+        self.assertEqual(max(routes.values(), key=lambda route: route.max_tokens), routes[PromptType.CHAPTER])
+        for route in routes.values():
+            self.assertEqual(route.stop, ["</STRUCTURED_DATA>"])
+
+    def test_overrides_are_merged_per_field(self):
+        """Test that a routes file overrides only the fields it names."""
+        path = self.write_routes({
+            "chapter": {"deployment": "gpt-4o_2024-11-20", "max_tokens": 12000},
+            "plot_lines": {"stop": "END", "colour": "blue"},
+            "poems": {"max_tokens": 10},
+        })
+        routes = load_routes(path)
+        chapter = routes[PromptType.CHAPTER]
+        self.assertEqual((chapter.deployment, chapter.max_tokens), ("gpt-4o_2024-11-20", 12000))
+        self.assertEqual(chapter.timeout, DEFAULT_ROUTES[PromptType.CHAPTER].timeout)
+        self.assertEqual(routes[PromptType.PLOT_LINES].stop, ["END"])
+        # The defaults themselves are untouched
+        self.assertEqual(DEFAULT_ROUTES[PromptType.CHAPTER].max_tokens, 8000)
+
+    def test_unreadable_file_keeps_defaults(self):
+        """Test that a broken routes file falls back to the default routes."""
+        self.assertEqual(load_routes(self.write_routes("{not json")), load_routes())
+        self.assertEqual(load_routes(self.write_routes("[]")), load_routes())
+
+    def test_request_options(self):
+        """Test that unset settings are left out of the request."""
+        self.assertEqual(ModelRoute("model", stop=[]).request_options(), {"model": "model"})
+        options = DEFAULT_ROUTES[PromptType.CHAPTER].request_options()
+        self.assertEqual(set(options), {"model", "max_tokens", "temperature", "timeout", "stop"})
+
+    def test_closing_tag_is_restored(self):
+        """Test that only a structured data block left open gets its closing tag back."""
+        route = ModelRoute()
+        self.assertEqual(complete_structured_data(STOPPED_RESPONSE, route), STOPPED_RESPONSE + "</STRUCTURED_DATA>")
+        closed = STOPPED_RESPONSE + "</STRUCTURED_DATA>"
+        self.assertEqual(complete_structured_data(closed, route), closed)
+        self.assertEqual(complete_structured_data("Error: no data", route), "Error: no data")
+        self.assertEqual(complete_structured_data(STOPPED_RESPONSE, ModelRoute(stop=[])), STOPPED_RESPONSE)
+
+    def test_latency_histogram(self):
+        """Test that latencies land in cumulative buckets per route."""
+        router = ModelRouter(load_routes())
+        router.observe(PromptType.CHAPTER, 0.5)
+        router.observe(PromptType.CHAPTER, 42.0)
+        router.observe(PromptType.CHAPTER, 400.0, ok=False)
+        latency = router.get_metrics()["chapter"]["latency"]
+        buckets = dict(latency["buckets"])
+        self.assertEqual((buckets[1.0], buckets[45.0], buckets[300.0]), (1, 2, 2))
+        self.assertEqual((latency["count"], latency["errors"], latency["max"]), (3, 1, 400.0))
+        self.assertEqual(router.get_metrics()["plot_lines"]["latency"]["count"], 0)
+
+
+class TestRoutedCompletions(unittest.TestCase):
+    """Test cases for completions sent along their routes."""
+
+    def setUp(self):
+        """Use a fresh router and bypass the cache and debug files."""
+        self.router = ModelRouter(load_routes())
+        self.patches = [
+            patch.object(ai_client, "USE_CACHE", False),
+            patch.object(ai_client, "_save_debug_files"),
+            patch("ai.ai_client.get_model_router", return_value=self.router),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_route_settings_are_sent(self, mock_get_client):
+        """Test that the prompt type's route sets the request and its latency is recorded."""
+        completion = MagicMock()
+        completion.choices[0].message.content = STOPPED_RESPONSE
+        completion.choices[0].finish_reason = "stop"
+        create = mock_get_client.return_value.chat.completions.create
+        create.return_value = completion
+
+        response = ai_client.get_ai_response("prompt", PromptType.PLOT_LINES)
+        self.assertEqual(response, STOPPED_RESPONSE + "</STRUCTURED_DATA>")
+        kwargs = create.call_args.kwargs
+        route = DEFAULT_ROUTES[PromptType.PLOT_LINES]
+        self.assertEqual(kwargs["model"], FAST_DEPLOYMENT)
+        self.assertEqual((kwargs["max_tokens"], kwargs["temperature"]), (route.max_tokens, route.temperature))
+        self.assertEqual(kwargs["timeout"], route.timeout)
+        # The schema constrains the output, so no stop sequence is sent alongside it
+        self.assertEqual(kwargs["response_format"]["type"], "json_schema")
+        self.assertNotIn("stop", kwargs)
+        self.assertEqual(self.router.get_metrics()["plot_lines"]["latency"]["count"], 1)
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_stream_relays_restored_tag(self, mock_get_client):
+        """Test that a stream ends with the closing tag the stop sequence cut off."""
+        chunks = []
+        for piece, finish_reason in [("<STRUCTURED_DATA>\n", None), ('{"a": 1}\n', None), (None, "stop")]:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = piece
+            chunk.choices[0].finish_reason = finish_reason
+            chunks.append(chunk)
+        mock_get_client.return_value.chat.completions.create.return_value = iter(chunks)
+
+        pieces = list(ai_client.stream_ai_response("prompt", PromptType.CHAPTER))
+        self.assertEqual("".join(pieces), '<STRUCTURED_DATA>\n{"a": 1}\n</STRUCTURED_DATA>')
+        self.assertEqual(pieces[-1], "</STRUCTURED_DATA>")
+        self.assertEqual(self.router.get_metrics()["chapter"]["latency"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
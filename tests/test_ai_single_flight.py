@@ -0,0 +1,181 @@
+"""
+Test suite for single-flight coalescing of identical in-flight prompts.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+from ai.single_flight import SingleFlight, fcntl
+from prompt_types import PromptType
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.005)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the SingleFlight coalescer."""
+
+    def setUp(self):
+        """Create a coalescer."""
+        self.single_flight = SingleFlight()
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that callers arriving while the leader computes get its result."""
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "shared result"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(self.single_flight.do, "key", compute) for _ in range(8)]
+            wait_for(lambda: self.single_flight.get_metrics()["followers"] == 7)
+            release.set()
+            results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(results, ["shared result"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.single_flight.in_flight, 0)
+        # Once finished, the next call computes again
+        self.assertEqual(self.single_flight.do("key", lambda: "fresh"), "fresh")
+
+    def test_different_keys_are_independent(self):
+        """Test that only identical keys are coalesced."""
+        results = [self.single_flight.do(key, lambda key=key: key.upper()) for key in ("a", "b")]
+        self.assertEqual(results, ["A", "B"])
+        self.assertEqual(self.single_flight.get_metrics()["followers"], 0)
+
+    def test_leader_error_reaches_followers(self):
+        """Test that a failed computation fails its followers too and frees the key."""
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise RuntimeError("upstream down")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(self.single_flight.do, "key", compute) for _ in range(2)]
+            wait_for(lambda: self.single_flight.get_metrics()["followers"] == 1)
+            release.set()
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=5)
+        self.assertEqual(self.single_flight.in_flight, 0)
+
+    def test_abandoned_flight_lets_followers_compute(self):
+        """Test that followers of a leader that gave up compute the result themselves."""
+        flight, leader = self.single_flight.claim("key")
+        self.assertTrue(leader)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self.single_flight.do, "key", lambda: "own result")
+            wait_for(lambda: self.single_flight.get_metrics()["followers"] == 1)
+            flight.abandon()
+            self.assertEqual(future.result(timeout=5), "own result")
+
+    @unittest.skipIf(fcntl is None, "File locks need fcntl")
+    def test_cross_process_leader_is_waited_for(self):
+        """Test that a leader holding the key's lock file in another process is waited for and rechecked."""
+        with tempfile.TemporaryDirectory() as lock_directory:
+            other_process = SingleFlight(lock_directory)
+            this_process = SingleFlight(lock_directory)
+            stored = {}
+            calls = []
+
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                with other_process.process_lock("key"):
+                    future = pool.submit(
+                        this_process.do, "key", lambda: calls.append(1) or "computed", lambda: stored.get("key")
+                    )
+                    wait_for(lambda: this_process.get_metrics()["process_waits"] == 1)
+                    # The other leader caches its result before releasing the lock
+                    stored["key"] = "from the other process"
+                self.assertEqual(future.result(timeout=5), "from the other process")
+            self.assertEqual(calls, [])
+
+
+class TestCoalescedAIResponses(unittest.TestCase):
+    """Test cases for coalescing get_ai_response() and stream_ai_response()."""
+
+    def setUp(self):
+        """Use a fresh coalescer and bypass the cache and debug files."""
+        self.single_flight = SingleFlight()
+        self.patches = [
+            patch.object(ai_client, "USE_CACHE", False),
+            patch.object(ai_client, "_save_debug_files"),
+            patch("ai.ai_client.get_single_flight", return_value=self.single_flight),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    def slow_client(self, mock_get_client, release):
+        """Make the mocked client's completions wait for release."""
+        completion = MagicMock()
+        completion.choices[0].message.content = "Once upon a time"
+
+        def create(**kwargs):
+            release.wait(5)
+            return completion
+
+        mock_get_client.return_value.chat.completions.create.side_effect = create
+        return mock_get_client.return_value.chat.completions.create
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_identical_prompts_make_one_upstream_call(self, mock_get_client):
+        """Test that concurrent identical prompts share one completion and different ones do not."""
+        release = threading.Event()
+        create = self.slow_client(mock_get_client, release)
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            same = [pool.submit(ai_client.get_ai_response, "prompt", PromptType.PLOT_LINES, catalog_version="v1")
+                    for _ in range(5)]
+            other = pool.submit(ai_client.get_ai_response, "prompt", PromptType.PLOT_LINES, catalog_version="v2")
+            wait_for(lambda: self.single_flight.get_metrics()["followers"] == 4)
+            release.set()
+            results = [future.result(timeout=5) for future in same + [other]]
+
+        self.assertEqual(results, ["Once upon a time"] * 6)
+        self.assertEqual(create.call_count, 2)
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_stream_follower_gets_complete_text(self, mock_get_client):
+        """Test that a stream joining an in-flight completion yields its text in one piece."""
+        release = threading.Event()
+        create = self.slow_client(mock_get_client, release)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(ai_client.get_ai_response, "prompt", PromptType.CHAPTER)
+            wait_for(lambda: self.single_flight.in_flight == 1)
+            follower = pool.submit(lambda: list(ai_client.stream_ai_response("prompt", PromptType.CHAPTER)))
+            wait_for(lambda: self.single_flight.get_metrics()["followers"] == 1)
+            release.set()
+            pieces = follower.result(timeout=5)
+            self.assertEqual(leader.result(timeout=5), "Once upon a time")
+
+        self.assertEqual(pieces, ["Once upon a time"])
+        self.assertEqual(create.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
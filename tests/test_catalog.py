@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Test the shared, read-only catalog snapshot.
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import objects.catalog as catalog_module
+from objects.catalog import (
+    Catalog,
+    get_catalog,
+    reload_catalog,
+    start_catalog_watcher,
+    build_bundle,
+    load_bundle,
+    load_catalog,
+    compute_source_hash,
+)
+from objects.story import Story
+from objects.archetype import ArchetypeEnum
+
+
+class TestCatalog(unittest.TestCase):
+    """Test cases for the process-wide catalog."""
+
+    def test_get_catalog_returns_same_instance(self):
+        """Test that the catalog is only loaded once per process."""
+        self.assertIs(get_catalog(), get_catalog())
+
+    def test_catalog_contains_all_registries(self):
+        """Test that every registry is loaded into the catalog."""
+        catalog = get_catalog()
+        self.assertEqual(len(catalog.story_types.get_all_story_types()), 7)
+        self.assertEqual(len(catalog.archetypes.get_all_archetypes()), 108)
+        self.assertEqual(len(catalog.styles.get_all_styles()), 15)
+        self.assertEqual(len(catalog.emotional_functions.get_all_emotional_functions()), 8)
+        self.assertEqual(len(catalog.functional_roles.get_all_functional_roles()), 20)
+        self.assertEqual(len(catalog.narrative_functions.get_all_narrative_functions()), 23)
+        self.assertTrue(catalog.genres.get_all_genres())
+
+    def test_catalog_is_read_only(self):
+        """Test that registries cannot be replaced on the snapshot."""
+        catalog = get_catalog()
+        with self.assertRaises(AttributeError):
+            catalog.genres = None
+        with self.assertRaises(AttributeError):
+            del catalog.styles
+
+    def test_stories_share_catalog_registries(self):
+        """Test that stories reuse the shared registries instead of building new ones."""
+        catalog = get_catalog()
+        story_a = Story()
+        story_b = Story()
+        self.assertIs(story_a._genre_registry, catalog.genres)
+        self.assertIs(story_b._genre_registry, catalog.genres)
+        self.assertIs(story_a._archetype_registry, story_b._archetype_registry)
+
+    def test_story_accepts_explicit_catalog(self):
+        """Test that a story can be bound to a specific catalog snapshot."""
+        catalog = Catalog()
+        story = Story(catalog=catalog)
+        self.assertIs(story._style_registry, catalog.styles)
+        self.assertTrue(story.set_genre("Fantasy"))
+
+    def test_app_pins_catalog_per_request(self):
+        """Test that each Flask request resolves against the current catalog snapshot."""
+        import app
+        with app.app.test_request_context("/"):
+            app.bind_request_catalog()
+            self.assertIs(app.get_request_catalog(), get_catalog())
+
+
+class TestArchetypePartitions(unittest.TestCase):
+    """Test cases for the precomputed sub-genre archetype partitions."""
+
+    def setUp(self):
+        """Create a story with a sub-genre selected."""
+        self.catalog = get_catalog()
+        self.story = Story()
+        self.story.set_genre("Fantasy")
+        self.story.set_sub_genre("High Fantasy")
+
+    def test_every_sub_genre_is_partitioned(self):
+        """Test that a partition exists for every genre/sub-genre pair."""
+        for genre in self.catalog.genres.get_all_genres():
+            for sub_genre in genre.subgenres:
+                self.assertIn((genre.name, sub_genre.name), self.catalog.archetype_partitions)
+
+    def test_partition_matches_registry(self):
+        """Test that typical and other archetypes cover the registry without overlap."""
+        partition = self.story.get_archetype_partition()
+        self.assertEqual(list(partition.typical_names), self.story.sub_genre.archetypes)
+        self.assertEqual([a.name for a in partition.typical], ["Chosen One", "Wise Mentor", "Loyal Companion"])
+        self.assertEqual(list(partition.other_names), sorted(partition.other_names))
+        self.assertFalse(set(partition.typical_names) & set(partition.other_names))
+        self.assertEqual(
+            len(partition.typical) + len(partition.other),
+            len(self.catalog.archetypes.get_all_archetypes())
+        )
+
+    def test_partition_is_shared(self):
+        """Test that stories read the same precomputed partition."""
+        other_story = Story()
+        other_story.set_genre("Fantasy")
+        other_story.set_sub_genre("High Fantasy")
+        self.assertIs(self.story.get_archetype_partition(), other_story.get_archetype_partition())
+
+    def test_duplicate_sub_genre_names_are_kept_apart(self):
+        """Test that sub-genres sharing a name in different genres have their own partitions."""
+        romance = self.catalog.get_archetype_partition("Romance", self.catalog.genres.get_genre("Romance").get_subgenre("Romantic Comedy"))
+        comedy = self.catalog.get_archetype_partition("Comedy", self.catalog.genres.get_genre("Comedy").get_subgenre("Romantic Comedy"))
+        self.assertNotEqual(romance.typical_names, comedy.typical_names)
+
+    def test_story_without_sub_genre(self):
+        """Test that a story without a sub-genre gets an empty typical list."""
+        story = Story()
+        self.assertEqual(story.get_typical_archetypes(), [])
+        self.assertEqual(story.get_archetype_partition().typical, ())
+
+    def test_invalid_names_are_recorded(self):
+        """Test that names ArchetypeEnum cannot represent are recorded at load."""
+        for names in self.catalog.invalid_archetype_names.values():
+            for name in names:
+                with self.assertRaises(ValueError):
+                    ArchetypeEnum(name)
+
+
+class TestCatalogReload(unittest.TestCase):
+    """Test cases for versioned, hot-reloadable catalog snapshots."""
+
+    def setUp(self):
+        """Remember the current snapshot so it can be restored."""
+        self.original = get_catalog()
+
+    def tearDown(self):
+        """Restore the original snapshot."""
+        catalog_module._catalog = self.original
+
+    def test_catalog_version_tracks_source_hash(self):
+        """Test that the catalog version is derived from the data files."""
+        self.assertEqual(get_catalog().version, compute_source_hash()[:catalog_module.VERSION_LENGTH])
+
+    def test_story_records_catalog_version(self):
+        """Test that a story remembers the catalog version it was built against."""
+        self.assertEqual(Story().catalog_version, get_catalog().version)
+        self.assertEqual(Story(catalog=Catalog(version="test")).catalog_version, "test")
+
+    def test_reload_skips_unchanged_data(self):
+        """Test that reloading unchanged data keeps the current snapshot."""
+        self.assertFalse(reload_catalog())
+        self.assertIs(get_catalog(), self.original)
+
+    def test_reload_swaps_snapshot_atomically(self):
+        """Test that a reload installs a new snapshot while existing holders keep the old one."""
+        story = Story()
+        new_catalog = Catalog(version="next")
+        with patch("objects.catalog.compute_source_hash", return_value="f" * 64), \
+             patch("objects.catalog.load_catalog", return_value=new_catalog):
+            self.assertTrue(reload_catalog())
+        self.assertIs(get_catalog(), new_catalog)
+        self.assertEqual(story.catalog_version, self.original.version)
+        self.assertIs(story._genre_registry, self.original.genres)
+        self.assertEqual(Story().catalog_version, "next")
+
+    def test_failed_reload_keeps_current_snapshot(self):
+        """Test that a broken data file does not replace the working catalog."""
+        with patch("objects.catalog.load_catalog", side_effect=ValueError("bad json")):
+            self.assertFalse(reload_catalog(force=True))
+        self.assertIs(get_catalog(), self.original)
+
+    def test_request_keeps_pinned_snapshot(self):
+        """Test that an in-flight request keeps the snapshot it started with."""
+        import app
+        with app.app.test_request_context("/"):
+            app.bind_request_catalog()
+            catalog_module._catalog = Catalog(version="next")
+            self.assertIs(app.get_request_catalog(), self.original)
+
+    def test_watcher_reloads_on_change(self):
+        """Test that the watcher triggers a reload when file mtimes change."""
+        reloaded = threading.Event()
+        stop = threading.Event()
+        mtimes = iter([(1,), (1,), (2,)])
+        with patch("objects.catalog._source_mtimes", side_effect=lambda: next(mtimes, (2,))), \
+             patch("objects.catalog.reload_catalog", side_effect=reloaded.set):
+            thread = start_catalog_watcher(interval=0.01, stop_event=stop)
+            self.assertTrue(reloaded.wait(timeout=5))
+            stop.set()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+
+class TestCatalogBundle(unittest.TestCase):
+    """Test cases for the compiled catalog bundle."""
+
+    def setUp(self):
+        """Create a temporary bundle location."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.bundle_path = os.path.join(self.temp_dir, "catalog.bundle")
+
+    def tearDown(self):
+        """Remove the temporary bundle location."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_source_hash_is_stable(self):
+        """Test that the source hash only depends on file contents."""
+        self.assertEqual(compute_source_hash(), compute_source_hash())
+
+    def test_build_and_load_bundle(self):
+        """Test that a freshly built bundle round-trips the catalog."""
+        build_bundle(self.bundle_path)
+        catalog = load_bundle(self.bundle_path)
+        self.assertIsInstance(catalog, Catalog)
+        self.assertEqual(len(catalog.archetypes.get_all_archetypes()), 108)
+        self.assertIsNotNone(catalog.story_types.get_story_type("The Quest"))
+        with self.assertRaises(AttributeError):
+            catalog.styles = None
+
+    def test_stale_bundle_is_rejected(self):
+        """Test that a bundle with a different source hash is not used."""
+        build_bundle(self.bundle_path, source_hash="stale")
+        self.assertIsNone(load_bundle(self.bundle_path))
+
+    def test_corrupt_bundle_is_rejected(self):
+        """Test that an unreadable bundle falls back to None."""
+        with open(self.bundle_path, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(load_bundle(self.bundle_path))
+
+    def test_load_catalog_rebuilds_stale_bundle(self):
+        """Test that load_catalog rebuilds a stale bundle automatically."""
+        build_bundle(self.bundle_path, source_hash="stale")
+        catalog = load_catalog(use_bundle=True, path=self.bundle_path)
+        self.assertEqual(len(catalog.styles.get_all_styles()), 15)
+        self.assertIsNotNone(load_bundle(self.bundle_path))
+
+    def test_load_catalog_without_bundle(self):
+        """Test that the bundle can be bypassed entirely."""
+        catalog = load_catalog(use_bundle=False, path=self.bundle_path)
+        self.assertEqual(len(catalog.styles.get_all_styles()), 15)
+        self.assertFalse(os.path.exists(self.bundle_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
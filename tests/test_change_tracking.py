@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test change tracking on story objects and patch-based story saving.
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.chapter import Chapter
+from objects.continuity_state import ContinuityState
+from storage import SqliteStoryStore, StoryVersionConflict
+from story_factory import make_character, make_story
+
+
+class TestChangeTracking(unittest.TestCase):
+    """Test cases for dirty tracking on story objects."""
+
+    def test_objects_start_dirty(self):
+        """Test that new objects are dirty until marked clean."""
+        character = make_character("Aria")
+        self.assertTrue(character.is_dirty())
+        character.mark_clean()
+        self.assertFalse(character.is_dirty())
+
+    def test_assigning_same_value_keeps_object_clean(self):
+        """Test that only real changes mark an object dirty."""
+        chapter = Chapter(chapter_number=1, title="One", overview="Overview")
+        chapter.mark_clean()
+        chapter.title = "One"
+        self.assertFalse(chapter.is_dirty())
+        chapter.title = "Two"
+        self.assertTrue(chapter.is_dirty())
+
+    def test_list_mutators_mark_dirty(self):
+        """Test that methods mutating lists in place mark the object dirty."""
+        chapter = Chapter(chapter_number=1, title="One", overview="Overview")
+        chapter.mark_clean()
+        chapter.add_character_impact("Aria", "Grows braver")
+        self.assertTrue(chapter.is_dirty())
+
+        state = ContinuityState()
+        state.mark_clean()
+        state.add_location("Castle")
+        self.assertTrue(state.is_dirty())
+
+    def test_continuity_tracked_separately_from_chapter(self):
+        """Test that continuity changes do not dirty the chapter row and vice versa."""
+        chapter = Chapter(chapter_number=1, title="One", overview="Overview", continuity_state=ContinuityState())
+        chapter.mark_clean()
+        chapter.continuity_state.add_location("Castle")
+        self.assertFalse(chapter.is_dirty())
+        self.assertTrue(chapter.is_continuity_dirty())
+
+        chapter.mark_clean()
+        chapter.continuity_state = ContinuityState()
+        self.assertFalse(chapter.is_dirty())
+        self.assertTrue(chapter.is_continuity_dirty())
+
+    def test_story_reports_changed_parts(self):
+        """Test that a story reports exactly which characters and chapters changed."""
+        story = make_story(chapter_count=5)
+        self.assertFalse(story.is_tracked())
+        story.mark_clean()
+        self.assertTrue(story.is_tracked())
+        self.assertFalse(story.is_dirty())
+
+        story.characters[1].backstory = "A new backstory"
+        story.get_chapter(3).chapter_text = "Generated text"
+        story.remove_chapter(5)
+
+        self.assertTrue(story.is_dirty())
+        self.assertFalse(story.is_header_dirty())
+        changed_characters, character_count = story.get_character_changes()
+        self.assertEqual(list(changed_characters), [1])
+        self.assertIsNone(character_count)
+        changed_chapters, changed_continuity, removed = story.get_chapter_changes()
+        self.assertEqual([c.chapter_number for c in changed_chapters], [3])
+        self.assertEqual(changed_continuity, [])
+        self.assertEqual(removed, [5])
+
+    def test_replaced_characters_are_detected(self):
+        """Test that replacing the character list reports new positions and the new count."""
+        story = make_story()
+        story.mark_clean()
+        story.characters.clear()
+        story.add_character(make_character("Cara"))
+        changed_characters, character_count = story.get_character_changes()
+        self.assertEqual(list(changed_characters), [0])
+        self.assertEqual(character_count, 1)
+
+    def test_header_change(self):
+        """Test that story-level selections mark the header dirty."""
+        story = make_story()
+        story.mark_clean()
+        story.expanded_plot_line = "Expanded"
+        self.assertTrue(story.is_header_dirty())
+
+
+class TestPatchSaving(unittest.TestCase):
+    """Test cases for saving only what changed through the app."""
+
+    def setUp(self):
+        """Use a temporary SQLite store for the app."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.store_patch = patch.object(app_module, "story_store", self.store)
+        self.store_patch.start()
+
+    def tearDown(self):
+        """Restore the app's store and remove the database."""
+        self.store_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_unchanged_story_is_not_written(self):
+        """Test that saving an unchanged loaded story writes nothing."""
+        with app.test_request_context():
+            save_story_to_session(make_story(chapter_count=10))
+            story = get_story_from_session()
+            connection = self.store._connection()
+            before = connection.total_changes
+            save_story_to_session(story)
+            self.assertEqual(connection.total_changes - before, 0)
+
+    def test_generated_chapter_writes_only_its_rows(self):
+        """Test that generating one chapter writes only that chapter, its state and the timestamp."""
+        with app.test_request_context():
+            save_story_to_session(make_story(chapter_count=10))
+            story = get_story_from_session()
+            chapter = story.get_chapter(4)
+            chapter.chapter_text = "Generated text"
+            chapter.continuity_state = ContinuityState()
+            chapter.continuity_state.add_location("Castle")
+
+            connection = self.store._connection()
+            before = connection.total_changes
+            save_story_to_session(story)
+            # stories.updated_at + chapter 4 + its continuity state
+            self.assertEqual(connection.total_changes - before, 3)
+
+            loaded = get_story_from_session()
+            self.assertEqual(loaded.get_chapter(4).chapter_text, "Generated text")
+            self.assertEqual(loaded.get_chapter(4).continuity_state.locations_visited, ["Castle"])
+            self.assertEqual(len(loaded.chapters), 10)
+
+    def test_concurrent_change_is_refused(self):
+        """Test that a save based on an outdated story raises a conflict instead of overwriting."""
+        with app.test_request_context():
+            save_story_to_session(make_story())
+            story_id = app_module.get_story_id()
+
+        with app.test_request_context():
+            app_module.session["story_id"] = story_id
+            first = get_story_from_session()
+            # A separate app context gives the concurrent request its own g
+            with app.app_context(), app.test_request_context():
+                app_module.session["story_id"] = story_id
+                second = get_story_from_session()
+                second.get_chapter(2).chapter_text = "Generated text"
+                save_story_to_session(second)
+            first.key_theme = "Courage"
+            first.characters.pop()
+            with patch.object(app_module.story_cache, "discard") as mock_discard:
+                with self.assertRaises(StoryVersionConflict):
+                    save_story_to_session(first)
+            mock_discard.assert_called_once_with(story_id)
+
+        with app.test_request_context():
+            app_module.session["story_id"] = story_id
+            stored = get_story_from_session()
+            self.assertNotEqual(stored.key_theme, "Courage")
+            self.assertEqual(len(stored.characters), 2)
+            self.assertEqual(stored.get_chapter(2).chapter_text, "Generated text")
+
+    def test_conflict_response(self):
+        """Test that a JSON route answers a refused change with 409 and a page route redirects."""
+        client = app.test_client()
+        with app.test_request_context():
+            save_story_to_session(make_story())
+            story_id = app_module.get_story_id()
+        with client.session_transaction() as session:
+            session["story_id"] = story_id
+
+        conflict = StoryVersionConflict(story_id, 1, 2)
+        with patch.object(app_module, "save_story_to_session", side_effect=conflict):
+            response = client.post("/select-plot-line", json={"name": "Other", "plotline": "Another road."})
+            self.assertEqual(response.status_code, 409)
+            self.assertTrue(response.get_json()["conflict"])
+
+            response = client.post("/key-theme-selection", data={"key_theme": "Courage"},
+                                   headers={"Referer": "/key-theme-selection"})
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response.location.endswith("/key-theme-selection"))
+
+    def test_failed_patch_is_not_saved_in_full(self):
+        """Test that a patch failing for a stored story does not fall back to an unchecked full save."""
+        with app.test_request_context():
+            save_story_to_session(make_story())
+            story = get_story_from_session()
+            story.key_theme = "Courage"
+            with patch.object(self.store, "apply_patch", return_value=None), \
+                    patch.object(self.store, "save") as mock_save:
+                save_story_to_session(story)
+            mock_save.assert_not_called()
+
+    def test_vanished_story_is_saved_in_full(self):
+        """Test that a patch for a story removed from the store falls back to a full save."""
+        with app.test_request_context():
+            save_story_to_session(make_story())
+            story = get_story_from_session()
+            self.store.delete(app_module.get_story_id())
+            story.key_theme = "Courage"
+            save_story_to_session(story)
+
+            loaded = get_story_from_session()
+            self.assertEqual(loaded.key_theme, "Courage")
+            self.assertEqual(len(loaded.chapters), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
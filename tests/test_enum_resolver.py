@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test the shared enum resolver used when parsing AI responses.
+"""
+
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects.enum_resolver import EnumResolver, get_enum_resolver, normalize_name
+from objects.archetype import ArchetypeEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.emotional_function import EmotionalFunctionEnum
+from objects.narrative_function import NarrativeFunctionEnum
+from objects.character_parser import (
+    _find_archetype_enum,
+    _find_functional_role_enum,
+    _find_emotional_function_enum,
+)
+from objects.chapter import Chapter
+
+
+class TestEnumResolver(unittest.TestCase):
+    """Test cases for EnumResolver lookup stages."""
+
+    def test_resolver_is_shared_per_enum(self):
+        """Test that each enum gets exactly one resolver."""
+        self.assertIs(get_enum_resolver(ArchetypeEnum), get_enum_resolver(ArchetypeEnum))
+        self.assertIsNot(get_enum_resolver(ArchetypeEnum), get_enum_resolver(FunctionalRoleEnum))
+
+    def test_normalize_name(self):
+        """Test that normalization folds case, accents and punctuation."""
+        self.assertEqual(normalize_name("  Naïve   Genius "), "naive genius")
+        self.assertEqual(normalize_name("Guardian / Gatekeeper"), "guardian gatekeeper")
+
+    def test_exact_and_normalized_matches(self):
+        """Test the O(1) lookup stages."""
+        resolver = EnumResolver(FunctionalRoleEnum)
+        self.assertEqual(resolver.match("Mentor").method, "exact")
+        match = resolver.match("anti hero")
+        self.assertEqual(match.member, FunctionalRoleEnum.ANTI_HERO)
+        self.assertEqual(match.method, "normalized")
+        self.assertEqual(match.confidence, 1.0)
+        self.assertEqual(resolver.resolve("Antihero"), FunctionalRoleEnum.ANTI_HERO)
+        self.assertEqual(resolver.resolve("Confidante"), FunctionalRoleEnum.CONFIDANT)
+
+    def test_partial_and_word_matches(self):
+        """Test the matches carried over from the previous parser behaviour."""
+        resolver = EnumResolver(FunctionalRoleEnum)
+        self.assertEqual(resolver.match("Supporting").method, "partial")
+        self.assertEqual(resolver.resolve("Supporting"), FunctionalRoleEnum.SUPPORTING_CHARACTER)
+        self.assertEqual(resolver.match("Support Character").method, "word")
+        self.assertEqual(resolver.resolve("Support Character"), FunctionalRoleEnum.SUPPORTING_CHARACTER)
+        self.assertIsNone(resolver.resolve("Supporting", allow_partial=False))
+
+    def test_fuzzy_match_confidence(self):
+        """Test that misspellings resolve with a confidence score."""
+        resolver = EnumResolver(NarrativeFunctionEnum)
+        match = resolver.match("Rising Tenson")
+        self.assertEqual(match.member, NarrativeFunctionEnum.RISING_TENSION)
+        self.assertEqual(match.method, "fuzzy")
+        self.assertGreater(match.confidence, 0.75)
+        self.assertLess(match.confidence, 1.0)
+        self.assertIsNone(resolver.resolve("Invalid Function"))
+        self.assertIsNone(resolver.resolve(""))
+
+    def test_fallback_results_are_memoized(self):
+        """Test that repeated misses reuse the cached fallback result."""
+        resolver = EnumResolver(ArchetypeEnum)
+        first = resolver.match("Wise Mentr")
+        self.assertIs(resolver.match("wise mentr"), first)
+
+
+class TestParserResolution(unittest.TestCase):
+    """Test cases for the parser and chapter entry points."""
+
+    def test_parser_helpers(self):
+        """Test the character parser helpers use the resolver."""
+        self.assertEqual(_find_archetype_enum("wise mentor"), ArchetypeEnum.WISE_MENTOR)
+        self.assertEqual(_find_archetype_enum("Naïve Genius"), ArchetypeEnum.NAIVE_GENIUS)
+        self.assertIsNone(_find_archetype_enum("NonExistentArchetype"))
+        self.assertEqual(_find_functional_role_enum("Support Character"), FunctionalRoleEnum.SUPPORTING_CHARACTER)
+        self.assertEqual(_find_emotional_function_enum("sympathetic"), EmotionalFunctionEnum.SYMPATHETIC_CHARACTER)
+
+    def test_junk_and_placeholders_do_not_match(self):
+        """Test that short words and placeholders never pick a member."""
+        for name in ("Father figure", "Mysterious stranger", "N/A", "none", "-"):
+            self.assertIsNone(_find_functional_role_enum(name), name)
+            self.assertIsNone(_find_archetype_enum(name), name)
+            self.assertIsNone(_find_emotional_function_enum(name), name)
+        self.assertEqual(_find_functional_role_enum("Confidant"), FunctionalRoleEnum.CONFIDANT)
+        self.assertEqual(_find_functional_role_enum("Confidant(e)"), FunctionalRoleEnum.CONFIDANT)
+
+    def test_chapter_narrative_function(self):
+        """Test that chapters accept normalized and misspelled names but not partial ones."""
+        chapter = Chapter(chapter_number=1, title="Test", overview="Overview")
+        self.assertTrue(chapter.set_narrative_function("rising tension"))
+        self.assertEqual(chapter.narrative_function, NarrativeFunctionEnum.RISING_TENSION)
+        self.assertTrue(chapter.set_narrative_function("Theme Reinforcment"))
+        self.assertEqual(chapter.narrative_function, NarrativeFunctionEnum.THEME_REINFORCEMENT)
+        self.assertFalse(chapter.set_narrative_function("Midpoint"))
+        self.assertFalse(chapter.set_narrative_function("Invalid Function"))
+        self.assertEqual(chapter.narrative_function, NarrativeFunctionEnum.THEME_REINFORCEMENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
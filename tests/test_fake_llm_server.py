@@ -0,0 +1,215 @@
+"""
+Test suite for the fake LLM server used for offline load testing.
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai
+
+import ai.ai_client as ai_client
+import ai.async_client as async_client
+from ai.async_client import AIEventLoop, stream_ai_response_async
+from ai.fake_llm_server import (
+    FakeLLMConfig, break_response, detect_prompt_type, render_response, start_fake_llm_server,
+)
+from ai.resilience import RATE_LIMITED, classify_error
+from objects.archetype import ArchetypeEnum
+from objects.chapter import Chapter
+from objects.chapter_parser import parse_chapters_from_ai_response, parse_single_chapter_from_ai_response
+from objects.character import Character
+from objects.character_parser import parse_characters_from_ai_response
+from objects.emotional_function import EmotionalFunctionEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.plot_line import parse_plot_lines_from_ai_response
+from objects.response_schemas import get_response_format
+from objects.story import Story
+from prompt import Prompt
+from prompt_types import PromptType
+
+# No waiting, so the tests only measure the pipeline
+FAST = dict(latency="fixed", latency_seconds=0.0, tokens_per_second=0, seed=3)
+
+
+def build_story():
+    """Build a story ready for every generation step."""
+    story = Story()
+    story.story_type_name = "The Quest"
+    story.subtype_name = "Spiritual Quest"
+    story.expanded_plot_line = "Aria and Bram cross the marsh."
+    story.add_character(Character("Aria", ArchetypeEnum.CHOSEN_ONE, FunctionalRoleEnum.PROTAGONIST,
+                                  EmotionalFunctionEnum.SYMPATHETIC_CHARACTER, "Raised in the marsh.", "Learns to lead."))
+    story.add_character(Character("Bram", ArchetypeEnum.WISE_MENTOR, FunctionalRoleEnum.MENTOR,
+                                  EmotionalFunctionEnum.CATALYST, "An exiled scholar.", "Forgives himself."))
+    story.add_chapter(Chapter(1, "Departure", "Aria leaves the marsh."))
+    story.add_chapter(Chapter(2, "The Crossing", "Aria and Bram cross the river."))
+    return story
+
+
+def raw_client(server):
+    """Build an SDK client for a server without the app's retries."""
+    return openai.AzureOpenAI(azure_endpoint=server.url, api_key="fake", api_version=ai_client.AI_API_VERSION,
+                              max_retries=0)
+
+
+class TestResponses(unittest.TestCase):
+    """Test cases for choosing and rendering responses."""
+
+    def test_detect_prompt_type(self):
+        """Test that the schema name, or else the prompt's output format, gives the prompt type."""
+        prompt = Prompt()
+        story = build_story()
+        prompts = {
+            PromptType.PLOT_LINES: prompt.generate_plot_prompt(story),
+            PromptType.CHARACTERS: prompt.generate_character_prompt(story),
+            PromptType.CHAPTER_OUTLINE: prompt.generate_chapter_outline_prompt(story),
+            PromptType.CHAPTER: prompt.generate_chapter_prompt(story, 2),
+        }
+        for prompt_type, text in prompts.items():
+            self.assertEqual(detect_prompt_type(text), prompt_type)
+            self.assertEqual(detect_prompt_type("", get_response_format(prompt_type)), prompt_type)
+
+    def test_render_and_break(self):
+        """Test tagged output cut at the stop sequence and the malformed modes."""
+        text = render_response({"a": 1}, structured=False, stop=["</STRUCTURED_DATA>"])
+        self.assertTrue(text.startswith("<STRUCTURED_DATA>"))
+        self.assertNotIn("</STRUCTURED_DATA>", text)
+        self.assertEqual(json.loads(render_response({"a": 1}, structured=True)), {"a": 1})
+
+        text = render_response({"a": "x", "b": "y"}, structured=True)
+        self.assertEqual(break_response(text, "truncated")[1], "length")
+        with self.assertRaises(ValueError):
+            json.loads(break_response(text, "invalid_json")[0])
+        self.assertTrue(break_response(text, "commentary")[0].startswith("Sure!"))
+
+
+class TestFakeLLMServer(unittest.TestCase):
+    """Test cases for the app's AI client talking to the fake server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a server without delays."""
+        cls.server = start_fake_llm_server(FakeLLMConfig(**FAST))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the server."""
+        cls.server.stop()
+
+    def setUp(self):
+        """Point the AI client at the server, without the response cache."""
+        self.patches = [
+            patch.object(ai_client, "AI_ENDPOINT", self.server.url),
+            patch.object(ai_client, "AI_API_KEY", "fake"),
+            patch.object(ai_client, "_client", None),
+            patch.object(ai_client, "USE_CACHE", False),
+            patch.object(ai_client, "_save_debug_files"),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+        self.prompt = Prompt()
+        self.story = build_story()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    def test_every_prompt_type_parses(self):
+        """Test that each prompt type's response parses and uses the story's characters."""
+        response = ai_client.get_ai_response(self.prompt.generate_plot_prompt(self.story), PromptType.PLOT_LINES)
+        self.assertEqual(len(parse_plot_lines_from_ai_response(response)), 5)
+
+        response = ai_client.get_ai_response(self.prompt.generate_character_prompt(self.story), PromptType.CHARACTERS)
+        expanded_plot_line, characters = parse_characters_from_ai_response(response)
+        self.assertTrue(expanded_plot_line)
+        self.assertEqual(characters[0].functional_role, FunctionalRoleEnum.PROTAGONIST)
+
+        response = ai_client.get_ai_response(self.prompt.generate_chapter_outline_prompt(self.story),
+                                             PromptType.CHAPTER_OUTLINE)
+        chapters = parse_chapters_from_ai_response(response)
+        self.assertEqual([chapter.chapter_number for chapter in chapters], list(range(1, 13)))
+        self.assertIn(chapters[0].point_of_view, ("Aria", "Bram"))
+        self.assertIsNotNone(chapters[0].narrative_function)
+
+        response = ai_client.get_ai_response(self.prompt.generate_chapter_prompt(self.story, 2), PromptType.CHAPTER)
+        chapter = parse_single_chapter_from_ai_response(response, 2)
+        self.assertGreaterEqual(len(chapter.chapter_text.split()), 1000)
+        self.assertIn("chapter 2", chapter.summary)
+        self.assertEqual({character.name for character in chapter.continuity_state.characters}, {"Aria", "Bram"})
+
+    def test_streaming(self):
+        """Test that a streamed completion arrives in pieces and reports its usage."""
+        with patch("ai.ai_client.get_metrics_registry") as mock_registry:
+            stream = ai_client.stream_ai_response(self.prompt.generate_plot_prompt(self.story), PromptType.PLOT_LINES)
+            pieces = []
+            try:
+                while True:
+                    pieces.append(next(stream))
+            except StopIteration as stop:
+                response = stop.value
+        self.assertGreater(len(pieces), 10)
+        self.assertEqual("".join(pieces), response)
+        self.assertEqual(len(parse_plot_lines_from_ai_response(response)), 5)
+        usage = mock_registry.return_value.record_usage.call_args[0][1]
+        self.assertGreater(usage.completion_tokens, 0)
+
+    def test_async_streaming(self):
+        """Test that the AsyncAzureOpenAI path streams the same kind of response from the event loop."""
+        event_loop = AIEventLoop()
+        pieces = []
+        try:
+            with patch.object(async_client, "_async_client", None):
+                response = event_loop.run(stream_ai_response_async(
+                    self.prompt.generate_plot_prompt(self.story), PromptType.PLOT_LINES, pieces.append
+                ), timeout=30)
+        finally:
+            event_loop.stop()
+        self.assertGreater(len(pieces), 10)
+        self.assertEqual("".join(pieces), response)
+        self.assertEqual(len(parse_plot_lines_from_ai_response(response)), 5)
+
+    def test_max_tokens(self):
+        """Test that a completion longer than max_tokens stops with finish_reason length."""
+        completion = raw_client(self.server).chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": "Write a plot line."}], max_tokens=50,
+        )
+        self.assertEqual(completion.choices[0].finish_reason, "length")
+        self.assertLessEqual(completion.usage.completion_tokens, 50)
+
+
+class TestFaults(unittest.TestCase):
+    """Test cases for configured failures."""
+
+    def test_rate_limit(self):
+        """Test that rate limited requests get 429 with the configured Retry-After."""
+        server = start_fake_llm_server(FakeLLMConfig(rate_limit_rate=1.0, retry_after_seconds=0.25, **FAST))
+        try:
+            with self.assertRaises(openai.RateLimitError) as context:
+                raw_client(server).chat.completions.create(model="fake", messages=[{"role": "user", "content": "Hi"}])
+            self.assertEqual(classify_error(context.exception), (RATE_LIMITED, 429, 0.25))
+            self.assertEqual(server.get_stats()["prompt_types"]["plot_lines"], {"rate_limited": 1})
+        finally:
+            server.stop()
+
+    def test_malformed(self):
+        """Test that every response is broken when the malformed rate is 1."""
+        server = start_fake_llm_server(FakeLLMConfig(malformed_rate=1.0, **FAST))
+        try:
+            client = raw_client(server)
+            for _ in range(8):
+                client.chat.completions.create(model="fake", messages=[{"role": "user", "content": "Hi"}])
+            counts = server.get_stats()["prompt_types"]["plot_lines"]
+            self.assertNotIn("ok", counts)
+            self.assertEqual(sum(counts.values()), 8)
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
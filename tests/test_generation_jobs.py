@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Test generation jobs: completions run on the AI event loop while the page polls for them.
+"""
+
+import unittest
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from ai.async_client import AIEventLoop
+from ai.generation_jobs import GenerationJobs
+from prompt_types import PromptType
+from storage import SqliteStoryStore
+from story_factory import make_story
+from test_generation_streaming import CHAPTER_RESPONSE, OUTLINE_RESPONSE, split_randomly
+
+PLOT_LINES_RESPONSE = json.dumps({"plotlines": [
+    {"name": f"Road {number}", "plotline": f"Journey number {number}."} for number in range(1, 4)
+]})
+
+# Headers of a generation request that polls for its result
+ASYNC_HEADERS = {"Prefer": "respond-async"}
+
+
+def fake_async_stream(response, release=None, delay=0.0):
+    """Build a stand-in for stream_ai_response_async() that streams a fixed response."""
+
+    async def stream(prompt, prompt_type, on_text, *args, **kwargs):
+        if release is not None:
+            await asyncio.to_thread(release.wait, 5)
+        await asyncio.sleep(delay)
+        for piece in split_randomly(response):
+            on_text(piece)
+            await asyncio.sleep(0)
+        return response
+
+    return stream
+
+
+class TestGenerationJobs(unittest.TestCase):
+    """Test cases for the generation job registry."""
+
+    def setUp(self):
+        """Create a registry on its own event loop."""
+        self.event_loop = AIEventLoop(max_in_flight=500)
+        self.jobs = GenerationJobs(event_loop=self.event_loop)
+
+    def tearDown(self):
+        """Stop the event loop."""
+        self.event_loop.stop()
+
+    def wait(self, job):
+        """Wait for a job's completion to end."""
+        deadline = time.time() + 5
+        while not job.done and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(job.done)
+
+    def test_job_relays_field_and_keeps_response(self):
+        """Test that the field's pieces are kept in order and the complete response is stored."""
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(OUTLINE_RESPONSE)):
+            job = self.jobs.submit("prompt", PromptType.CHAPTER_OUTLINE, "story-1", field="title")
+            self.wait(job)
+        titles = {}
+        for event in job.get_events():
+            titles[event["index"]] = titles.get(event["index"], "") + event["text"]
+        self.assertEqual(titles, {index: f'Part {index + 1}: "Leaving"' for index in range(3)})
+        self.assertEqual(job.response, OUTLINE_RESPONSE)
+        self.assertEqual(job.get_events(len(job.get_events())), [])
+
+    def test_only_owner_gets_job(self):
+        """Test that a job is only handed to the story it was started for."""
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE)):
+            job = self.jobs.submit("prompt", PromptType.CHAPTER, "story-1")
+            self.wait(job)
+        self.assertIs(self.jobs.get(job.job_id, "story-1"), job)
+        self.assertIsNone(self.jobs.get(job.job_id, "story-2"))
+        self.assertIsNone(self.jobs.get("unknown", "story-1"))
+
+    def test_prune(self):
+        """Test that finished jobs are forgotten after their time to live."""
+        self.jobs.ttl_seconds = 0.0
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE)):
+            job = self.jobs.submit("prompt", PromptType.CHAPTER, "story-1")
+            self.wait(job)
+        time.sleep(0.01)
+        self.assertEqual(self.jobs.prune(), 1)
+        self.assertIsNone(self.jobs.get(job.job_id, "story-1"))
+
+    def test_hundreds_of_jobs_share_the_loop(self):
+        """Test that hundreds of slow completions run at once without a thread each."""
+        threads = threading.active_count()
+        start = time.perf_counter()
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE, delay=0.5)):
+            jobs = [self.jobs.submit(f"prompt {n}", PromptType.CHAPTER, "story-1") for n in range(300)]
+            self.assertEqual(self.jobs.get_metrics()["running"], 300)
+            # The event loop thread is the only new thread
+            self.assertLessEqual(threading.active_count(), threads + 1)
+            for job in jobs:
+                self.wait(job)
+        # 300 completions of 0.5s: one round, not 300
+        self.assertLess(time.perf_counter() - start, 4.0)
+        self.assertEqual(self.jobs.get_metrics(), {"running": 0, "finished": 300})
+
+
+class TestGenerationJobRoutes(unittest.TestCase):
+    """Test cases for generation routes answered with a job and the poll route."""
+
+    def setUp(self):
+        """Store a story ready for generation and open a client session for it."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.event_loop = AIEventLoop(max_in_flight=8)
+        self.patches = [
+            patch.object(app_module, "story_store", self.store),
+            patch.object(app_module, "generation_jobs", GenerationJobs(event_loop=self.event_loop)),
+            patch.object(app_module.prompt_generator, "generate_plot_prompt", return_value="plot prompt"),
+            patch.object(app_module.prompt_generator, "generate_chapter_prompt", return_value="chapter prompt"),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+        self.story_id = self.create_story()
+        self.client = self.open_client(self.story_id)
+
+    def tearDown(self):
+        """Stop the event loop, restore the app and remove the database."""
+        self.event_loop.stop()
+        for active_patch in self.patches:
+            active_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def create_story(self):
+        """Store a story with a planned, unwritten chapter, returning its ID."""
+        with app.test_request_context():
+            save_story_to_session(make_story(chapter_count=0, unwritten_chapter=True))
+            return app_module.get_story_id()
+
+    def open_client(self, story_id):
+        """Open a client session for a story."""
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["story_id"] = story_id
+        return client
+
+    def load_story(self, story_id):
+        """Hydrate a stored story from scratch."""
+        app_module.story_cache.discard(story_id)
+        with app.test_request_context():
+            app_module.session["story_id"] = story_id
+            return get_story_from_session().to_dict()
+
+    def poll(self, poll_url):
+        """Poll a job until it is done, returning the pieces received and the last status."""
+        events = []
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            status = self.client.get(f"{poll_url}?after={len(events)}").get_json()
+            events.extend(status["events"])
+            self.assertEqual(status["next"], len(events))
+            if status["done"]:
+                return events, status
+            time.sleep(0.01)
+        self.fail("The generation job did not finish")
+
+    def test_chapter_job(self):
+        """Test that a chapter job answers at once, relays the prose and stores the chapter once."""
+        release = threading.Event()
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE, release)):
+            response = self.client.post("/generate-chapter/1", headers=ASYNC_HEADERS)
+            self.assertEqual(response.status_code, 202)
+            poll_url = response.get_json()["poll_url"]
+            # The request returned while the completion still waits upstream
+            self.assertFalse(self.client.get(poll_url).get_json()["done"])
+            release.set()
+            with patch.object(app_module, "save_story_to_session", wraps=save_story_to_session) as mock_save:
+                events, status = self.poll(poll_url)
+                self.assertEqual(self.client.get(poll_url).get_json()["result"], status["result"])
+            mock_save.assert_called_once()
+
+        result = status["result"]
+        self.assertTrue(result["success"])
+        self.assertEqual("".join(event["text"] for event in events), result["chapter"]["chapter_text"])
+        job_story = self.load_story(self.story_id)
+        self.assertEqual(job_story["chapters"][0]["chapter_text"], result["chapter"]["chapter_text"])
+
+        # The same response through the JSON route
+        json_story_id = self.create_story()
+        with patch.object(app_module, "get_ai_response", return_value=CHAPTER_RESPONSE):
+            json_result = self.open_client(json_story_id).post("/generate-chapter/1").get_json()
+        self.assertEqual(result, json_result)
+
+    def test_plot_lines_job(self):
+        """Test that a plot line job finishes with the JSON route's payload."""
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(PLOT_LINES_RESPONSE)):
+            response = self.client.post("/generate-plot-lines", headers=ASYNC_HEADERS)
+            events, status = self.poll(response.get_json()["poll_url"])
+        self.assertEqual(events, [])
+        self.assertEqual([plot_line["name"] for plot_line in status["result"]["plot_lines"]],
+                         ["Road 1", "Road 2", "Road 3"])
+
+    def test_other_session_cannot_poll(self):
+        """Test that a job cannot be polled from a session with another story."""
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE)):
+            poll_url = self.client.post("/generate-chapter/1", headers=ASYNC_HEADERS).get_json()["poll_url"]
+            response = self.open_client(self.create_story()).get(poll_url)
+            self.assertEqual(response.status_code, 404)
+            self.assertTrue(self.poll(poll_url)[1]["result"]["success"])
+
+    def test_story_saved_meanwhile_is_refused(self):
+        """Test that a result for a story saved while the job ran is refused rather than stored."""
+        release = threading.Event()
+        with patch("ai.generation_jobs.stream_ai_response_async", fake_async_stream(CHAPTER_RESPONSE, release)):
+            poll_url = self.client.post("/generate-chapter/1", headers=ASYNC_HEADERS).get_json()["poll_url"]
+            self.client.post("/key-theme-selection", data={"key_theme": "Courage"})
+            release.set()
+            _events, status = self.poll(poll_url)
+        self.assertTrue(status["result"]["conflict"])
+        story = self.load_story(self.story_id)
+        self.assertEqual(story["key_theme"], "Courage")
+        self.assertIsNone(story["chapters"][0]["chapter_text"])
+
+    def test_validation_errors_are_answered_at_once(self):
+        """Test that a request the route refuses gets no job."""
+        response = self.client.post("/generate-chapter/5", headers=ASYNC_HEADERS)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(app_module.generation_jobs.get_metrics(), {"running": 0, "finished": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Test Server-Sent Events streaming of chapter and chapter plan generation.
+"""
+
+import unittest
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import ai.ai_client as ai_client
+from app import app, get_story_from_session, save_story_to_session
+from ai.response_stream import StreamingFieldExtractor
+from objects.story import Story
+from objects.chapter import Chapter
+from objects.character import Character
+from objects.archetype import ArchetypeEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.emotional_function import EmotionalFunctionEnum
+from prompt_types import PromptType
+from storage import SqliteStoryStore
+
+CHAPTER_RESPONSE = "<STRUCTURED_DATA>\n" + json.dumps({
+    "chapter_text": "Aria left at dawn.\n\n\"Don't wait,\" she said — and the café door closed. 🌄",
+    "chapter_summary": "Aria leaves home.",
+    "continuity_state": {
+        "characters": [{"name": "Aria", "current_location": "The road", "status": "Resolute", "inventory": []}],
+        "objects": [],
+        "locations_visited": ["Home"],
+        "open_plot_threads": [],
+    },
+}, indent=2) + "\n</STRUCTURED_DATA>"
+
+OUTLINE_RESPONSE = "<STRUCTURED_DATA>\n" + json.dumps({
+    "chapters": [
+        {"chapter_number": number, "title": f"Part {number}: \"Leaving\"", "overview": f"Overview {number}",
+         "character_impact": [{"character": "Aria", "effect": "Grows"}], "point_of_view": "Aria"}
+        for number in range(1, 4)
+    ],
+}, indent=2) + "\n</STRUCTURED_DATA>"
+
+
+def split_randomly(text, seed=0):
+    """Split text into small pieces like a streamed completion."""
+    generator = random.Random(seed)
+    pieces = []
+    position = 0
+    while position < len(text):
+        size = generator.randint(1, 9)
+        pieces.append(text[position:position + size])
+        position += size
+    return pieces
+
+
+def fake_stream(response):
+    """Build a stand-in for stream_ai_response() that streams a fixed response."""
+
+    def stream(prompt, prompt_type, *args, **kwargs):
+        yield from split_randomly(response)
+        return response
+
+    return stream
+
+
+def parse_events(body):
+    """Parse a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for message in body.split("\n\n"):
+        if not message:
+            continue
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestStreamingFieldExtractor(unittest.TestCase):
+    """Test cases for extracting string fields from a streamed response."""
+
+    def extract(self, text, field, seed=0):
+        """Feed text in random pieces and join the extracted values by occurrence."""
+        extractor = StreamingFieldExtractor(field)
+        values = {}
+        for piece in split_randomly(text, seed):
+            for index, value in extractor.feed(piece):
+                values[index] = values.get(index, "") + value
+        return values
+
+    def test_decodes_escapes_split_across_pieces(self):
+        """Test that escapes and surrogate pairs split between pieces decode like json.loads."""
+        expected = json.loads(CHAPTER_RESPONSE.split("\n", 1)[1].rsplit("\n", 1)[0])["chapter_text"]
+        for seed in range(50):
+            self.assertEqual(self.extract(CHAPTER_RESPONSE, "chapter_text", seed), {0: expected})
+        ascii_response = json.dumps({"chapter_text": expected})
+        self.assertEqual(self.extract(ascii_response, "chapter_text"), {0: expected})
+
+    def test_every_occurrence_is_reported(self):
+        """Test that each value of the field gets its own index."""
+        titles = self.extract(OUTLINE_RESPONSE, "title")
+        self.assertEqual(titles, {0: 'Part 1: "Leaving"', 1: 'Part 2: "Leaving"', 2: 'Part 3: "Leaving"'})
+
+    def test_ignores_values_and_non_strings(self):
+        """Test that the field name as a value, or a non-string field, is not extracted."""
+        text = json.dumps({"summary": "title", "list": ["title"], "title": 5, "other": {"title": "Real"}})
+        self.assertEqual(self.extract(text, "title"), {0: "Real"})
+
+
+class TestStreamAIResponse(unittest.TestCase):
+    """Test cases for ai_client.stream_ai_response()."""
+
+    def setUp(self):
+        """Bypass the cache and debug files."""
+        self.patches = [patch.object(ai_client, "USE_CACHE", False), patch.object(ai_client, "_save_debug_files")]
+        for active_patch in self.patches:
+            active_patch.start()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    def run_stream(self, stream):
+        """Collect a stream's pieces and its return value."""
+        pieces = []
+        while True:
+            try:
+                pieces.append(next(stream))
+            except StopIteration as stop:
+                return pieces, stop.value
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_pieces_and_complete_response(self, mock_get_client):
+        """Test that deltas are yielded and the joined text is returned."""
+        chunks = []
+        for piece in ["Hello", None, " world"]:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = piece
+            chunks.append(chunk)
+        mock_get_client.return_value.chat.completions.create.return_value = iter(chunks)
+
+        pieces, response = self.run_stream(ai_client.stream_ai_response("prompt", PromptType.CHAPTER))
+        self.assertEqual(pieces, ["Hello", " world"])
+        self.assertEqual(response, "Hello world")
+        self.assertTrue(mock_get_client.return_value.chat.completions.create.call_args.kwargs["stream"])
+
+    @patch("ai.ai_client.get_ai_client")
+    def test_errors_return_error_text(self, mock_get_client):
+        """Test that a failed completion ends the stream with the same error text as get_ai_response()."""
+        mock_get_client.side_effect = Exception("AI service error")
+        pieces, response = self.run_stream(ai_client.stream_ai_response("prompt", PromptType.CHAPTER))
+        self.assertEqual(pieces, [])
+        self.assertEqual(response, "Error: AI service error")
+
+
+class TestStreamingRoutes(unittest.TestCase):
+    """Test cases for the streaming generation routes."""
+
+    def setUp(self):
+        """Store a story ready for chapter generation and open a client session for it."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.patches = [
+            patch.object(app_module, "story_store", self.store),
+            patch.object(app_module.prompt_generator, "generate_chapter_prompt", return_value="chapter prompt"),
+            patch.object(app_module.prompt_generator, "generate_chapter_outline_prompt", return_value="outline prompt"),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+        self.story_id = self.create_story()
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session["story_id"] = self.story_id
+
+    def tearDown(self):
+        """Restore the app and remove the database."""
+        for active_patch in self.patches:
+            active_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def create_story(self):
+        """Store a story with characters and a chapter plan, returning its ID."""
+        story = Story()
+        story.set_story_type_selection("The Quest", "Spiritual Quest")
+        story.set_expanded_plot_line("A long journey.")
+        story.add_character(Character(
+            name="Aria", archetype=ArchetypeEnum.CHOSEN_ONE, functional_role=FunctionalRoleEnum.PROTAGONIST,
+            emotional_function=EmotionalFunctionEnum.SYMPATHETIC_CHARACTER,
+        ))
+        story.add_chapter(Chapter(chapter_number=1, title="Leaving", overview="Aria leaves."))
+        with app.test_request_context():
+            save_story_to_session(story)
+            return app_module.get_story_id()
+
+    def load_story(self, story_id):
+        """Hydrate a stored story from scratch."""
+        app_module.story_cache.discard(story_id)
+        with app.test_request_context():
+            app_module.session["story_id"] = story_id
+            return get_story_from_session().to_dict()
+
+    def test_chapter_stream_matches_json_response(self):
+        """Test that the streamed chapter prose and final result match the non-streaming route."""
+        with patch.object(app_module, "stream_ai_response", fake_stream(CHAPTER_RESPONSE)):
+            response = self.client.post("/generate-chapter/1", headers={"Accept": "text/event-stream"})
+            # The body is generated while it is read
+            events = parse_events(response.get_data(as_text=True))
+        self.assertTrue(response.headers["Content-Type"].startswith("text/event-stream"))
+        self.assertEqual(events[0][0], "start")
+        self.assertEqual(events[-1][0], "result")
+        prose = "".join(data["text"] for event, data in events if event == "text")
+        self.assertGreater(len([event for event, _data in events if event == "text"]), 5)
+        streamed_result = events[-1][1]
+        self.assertTrue(streamed_result["success"])
+        self.assertEqual(prose, streamed_result["chapter"]["chapter_text"])
+        streamed_story = self.load_story(self.story_id)
+
+        # The same response through the JSON route
+        json_story_id = self.create_story()
+        with self.client.session_transaction() as session:
+            session["story_id"] = json_story_id
+        with patch.object(app_module, "get_ai_response", return_value=CHAPTER_RESPONSE):
+            json_result = self.client.post("/generate-chapter/1").get_json()
+        self.assertEqual(streamed_result, json_result)
+        self.assertEqual(streamed_story, self.load_story(json_story_id))
+
+    def test_chapter_plan_streams_titles(self):
+        """Test that chapter plan generation streams one title per index and stores the plan."""
+        with patch.object(app_module, "stream_ai_response", fake_stream(OUTLINE_RESPONSE)):
+            response = self.client.post("/generate-chapters", headers={"Accept": "text/event-stream"})
+            events = parse_events(response.get_data(as_text=True))
+        titles = {}
+        for event, data in events:
+            if event == "text":
+                titles[data["index"]] = titles.get(data["index"], "") + data["text"]
+        self.assertEqual(titles, {index: f'Part {index + 1}: "Leaving"' for index in range(3)})
+        self.assertTrue(events[-1][1]["success"])
+        self.assertEqual(len(self.load_story(self.story_id)["chapters"]), 3)
+
+    def test_failed_generation_reports_result(self):
+        """Test that an unparseable response ends the stream with the same error as the JSON route."""
+        with patch.object(app_module, "stream_ai_response", fake_stream("Error: upstream unavailable")):
+            response = self.client.post("/generate-chapter/1", headers={"Accept": "text/event-stream"})
+            events = parse_events(response.get_data(as_text=True))
+        self.assertEqual(events[-1], ("result", {"success": False, "error": "Failed to parse chapter from AI response"}))
+
+    def test_json_is_default(self):
+        """Test that requests without an event-stream Accept header still get JSON."""
+        with patch.object(app_module, "get_ai_response", return_value=CHAPTER_RESPONSE):
+            response = self.client.post("/generate-chapter/1")
+        self.assertEqual(response.headers["Content-Type"], "application/json")
+        self.assertTrue(response.get_json()["success"])
+
+
+if __name__ == '__main__':
+    unittest.main()
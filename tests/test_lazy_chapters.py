@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test lazy loading of chapter texts and continuity states.
+"""
+
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.chapter import Chapter
+from storage import SqliteStoryStore
+from storage.story_cache import estimate_story_size
+from story_factory import chapter_text, make_story
+
+
+class TestLazyChapter(unittest.TestCase):
+    """Test cases for chapters whose details are loaded on first access."""
+
+    def setUp(self):
+        """Create a chapter without its details and a loader that counts its calls."""
+        self.calls = 0
+
+        def loader():
+            self.calls += 1
+            return {"chapter_text": "Stored text", "continuity_state": {"locations_visited": ["Castle"]}}
+
+        self.chapter = Chapter.from_dict(
+            {"chapter_number": 1, "title": "Chapter 1", "overview": "Overview"}, detail_loader=loader
+        )
+        self.chapter.mark_clean()
+
+    def test_details_load_on_first_access(self):
+        """Test that the text and continuity state are fetched together, once."""
+        self.assertFalse(self.chapter.is_loaded("chapter_text"))
+        self.assertEqual(self.chapter.title, "Chapter 1")
+        self.assertEqual(self.calls, 0)
+
+        self.assertEqual(self.chapter.chapter_text, "Stored text")
+        self.assertEqual(self.chapter.continuity_state.locations_visited, ["Castle"])
+        self.assertEqual(self.calls, 1)
+
+    def test_loaded_details_are_clean(self):
+        """Test that loading details does not count as a change."""
+        self.chapter.load_details()
+        self.assertFalse(self.chapter.is_dirty())
+        self.assertFalse(self.chapter.is_continuity_dirty())
+
+    def test_assignment_does_not_load(self):
+        """Test that replacing an unloaded text neither loads it nor loses the change."""
+        self.chapter.chapter_text = "New text"
+        self.assertEqual(self.calls, 0)
+        self.assertTrue(self.chapter.is_dirty())
+        self.assertEqual(self.chapter.chapter_text, "New text")
+        # The continuity state is still fetched when it is read
+        self.assertEqual(self.chapter.continuity_state.locations_visited, ["Castle"])
+        self.assertEqual(self.chapter.chapter_text, "New text")
+
+    def test_to_dict(self):
+        """Test that to_dict() loads details unless asked not to."""
+        self.assertNotIn("chapter_text", self.chapter.to_dict(load_details=False))
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self.chapter.to_dict()["chapter_text"], "Stored text")
+
+    def test_failed_load(self):
+        """Test that a failed load leaves empty details."""
+        chapter = Chapter.from_dict(
+            {"chapter_number": 1, "title": "Chapter 1", "overview": "Overview"}, detail_loader=lambda: None
+        )
+        self.assertIsNone(chapter.chapter_text)
+        self.assertEqual(chapter.continuity_state.locations_visited, [])
+
+
+class TestAppLazyChapters(unittest.TestCase):
+    """Test cases for lazily hydrated stories in the app."""
+
+    def setUp(self):
+        """Use a temporary store that counts chapter detail loads."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.detail_loads = []
+        load_chapter_details = self.store.load_chapter_details
+
+        def counting_load(story_id, chapter_number):
+            self.detail_loads.append(chapter_number)
+            return load_chapter_details(story_id, chapter_number)
+
+        self.store.load_chapter_details = counting_load
+        self.store_patch = patch.object(app_module, "story_store", self.store)
+        self.store_patch.start()
+        self.context = app.test_request_context()
+        self.context.push()
+        save_story_to_session(make_story(chapter_count=5))
+
+    def tearDown(self):
+        """Restore the app's store and remove the database."""
+        self.context.pop()
+        self.store_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def load_story(self):
+        """Hydrate the story from the store, bypassing the cache."""
+        app_module.story_cache.discard(app_module.get_story_id())
+        return get_story_from_session()
+
+    def test_hydration_skips_details(self):
+        """Test that hydrating a story and estimating its size load no chapter details."""
+        story = self.load_story()
+        self.assertEqual([chapter.title for chapter in story.chapters][-1], "Chapter 5")
+        estimate_story_size(story)
+        self.assertEqual(self.detail_loads, [])
+
+        self.assertEqual(story.get_chapter(3).chapter_text, chapter_text(3))
+        self.assertEqual(story.get_chapter(3).continuity_state.locations_visited, ["Location 3"])
+        self.assertEqual(self.detail_loads, [3])
+
+    def test_metadata_change_keeps_unloaded_text(self):
+        """Test that saving a chapter whose text was never loaded keeps the stored text."""
+        story = self.load_story()
+        story.get_chapter(2).summary = "A new summary"
+        connection = self.store._connection()
+        before = connection.total_changes
+        save_story_to_session(story)
+        # stories.updated_at + chapter 2's row; the text row is left alone
+        self.assertEqual(connection.total_changes - before, 2)
+        self.assertEqual(self.detail_loads, [])
+
+        reloaded = self.load_story()
+        self.assertEqual(reloaded.get_chapter(2).summary, "A new summary")
+        self.assertEqual(reloaded.get_chapter(2).chapter_text, chapter_text(2))
+
+    def test_export_includes_details(self):
+        """Test that the JSON export contains every chapter's text and continuity state."""
+        exported = json.loads(self.load_story().to_json())
+        self.assertEqual([chapter["chapter_text"] for chapter in exported["chapters"]],
+                         [chapter_text(number) for number in range(1, 6)])
+        self.assertEqual(exported["chapters"][0]["continuity_state"]["locations_visited"], ["Location 1"])
+
+    def get_page(self, url):
+        """Request a page for the story with a fresh client."""
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["story_id"] = app_module.get_story_id()
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=True)
+
+    def test_chapter_pages_load_details_in_bulk(self):
+        """Test that the pages showing every chapter's details do not load them chapter by chapter."""
+        save_story_to_session(make_story(chapter_count=5, unwritten_chapter=True))
+        for url in ("/chapter-plan", "/chapter/2"):
+            app_module.story_cache.discard(app_module.get_story_id())
+            page = self.get_page(url)
+            self.assertIn("Location 2", page)
+            self.assertIn("Generate chapter 6", page)
+            self.assertEqual(self.detail_loads, [], url)
+
+    def test_cached_lazy_story_is_reloaded_with_details(self):
+        """Test that a cached story with unloaded details is loaded again in one read."""
+        story = self.load_story()
+        story.get_chapter(1).load_details()
+        story_id = app_module.get_story_id()
+        app_module.story_cache.checkin(story_id, story, self.store.get_version(story_id))
+
+        self.assertIn("Second paragraph of 5", self.get_page("/chapter-plan"))
+        self.assertEqual(self.detail_loads, [1])
+        # The fully loaded story is cached for the next page
+        self.get_page("/chapter/3")
+        self.assertEqual(self.detail_loads, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
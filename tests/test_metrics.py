@@ -0,0 +1,156 @@
+"""
+Test suite for the metrics registry and the /metrics endpoint.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.ai_client as ai_client
+from ai.metrics import MetricsRegistry
+from prompt_types import PromptType
+from storage import StoryJanitor
+
+
+def sample(text, line_start):
+    """Get the value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No sample starting with {line_start}")
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for recording and rendering metrics."""
+
+    def setUp(self):
+        """Create an empty registry."""
+        self.registry = MetricsRegistry()
+
+    def test_counters_and_token_histograms(self):
+        """Test that cache lookups, parses and token counts render per prompt type."""
+        self.registry.record_cache_lookup(PromptType.CHAPTER, True)
+        self.registry.record_cache_lookup(PromptType.CHAPTER, False)
+        self.registry.record_cache_lookup(PromptType.CHAPTER, False)
+        self.registry.record_parse(PromptType.PLOT_LINES, False)
+        self.registry.record_usage(PromptType.CHAPTER, MagicMock(prompt_tokens=1200, completion_tokens=3000))
+        self.registry.record_usage(PromptType.CHAPTER, None)
+
+        text = self.registry.render()
+        self.assertEqual(sample(text, 'kraitif_ai_cache_lookups_total{prompt_type="chapter",result="miss"}'), 2)
+        self.assertEqual(sample(text, 'kraitif_ai_parses_total{prompt_type="plot_lines",result="failure"}'), 1)
+        tokens = 'kraitif_ai_tokens_bucket{prompt_type="chapter",kind="completion",'
+        self.assertEqual(sample(text, tokens + 'le="2000"}'), 0)
+        self.assertEqual(sample(text, tokens + 'le="4000"}'), 1)
+        self.assertEqual(sample(text, 'kraitif_ai_tokens_sum{prompt_type="chapter",kind="prompt"}'), 1200)
+
+    def test_story_janitor_collector(self):
+        """Test that stories reclaimed and sweep durations render from a registered janitor."""
+        janitor = StoryJanitor(MagicMock())
+        janitor.store.delete_if_idle.return_value = True
+        janitor.touch("s1", 0.0)
+        janitor.touch("s2", 0.0)
+        janitor.sweep(now=janitor.max_age_seconds + 1000)
+        janitor.sweep(now=janitor.max_age_seconds + 2000)
+        self.assertNotIn("kraitif_story_janitor", self.registry.render())
+
+        self.registry.add_collector(janitor.collect_metrics)
+        text = self.registry.render()
+        self.assertEqual(sample(text, "kraitif_story_janitor_reclaimed_total "), 2)
+        self.assertEqual(sample(text, 'kraitif_story_janitor_sweep_duration_seconds_bucket{le="+Inf"}'), 2)
+        self.assertEqual(sample(text, 'kraitif_story_janitor_sweep_duration_seconds_bucket{le="10.0"}'), 2)
+        self.assertEqual(sample(text, "kraitif_story_janitor_sweep_duration_seconds_count "), 2)
+        self.assertEqual(sample(text, "kraitif_story_janitor_indexed_stories "), 0)
+
+    def test_exposition_format(self):
+        """Test that every sample belongs to a declared family and label values are escaped."""
+        self.registry.observe_request('/a"b', "GET", 200, 0.02)
+        text = self.registry.render()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn('route="/a\\"b"', text)
+        self.assertEqual(sample(text, 'kraitif_http_request_duration_seconds_bucket{route="/a\\"b",method="GET",le="+Inf"}'), 1)
+
+        families = set()
+        for line in text.splitlines():
+            if line.startswith("# TYPE "):
+                families.add(line.split()[2])
+            elif not line.startswith("#"):
+                name = line.split("{")[0].split(" ")[0]
+                base = name
+                for suffix in ("_bucket", "_sum", "_count"):
+                    if name.endswith(suffix) and name[:-len(suffix)] in families:
+                        base = name[:-len(suffix)]
+                self.assertIn(base, families)
+
+
+class TestRecordedMetrics(unittest.TestCase):
+    """Test cases for the metrics recorded by the AI client and the app."""
+
+    def setUp(self):
+        """Record into a fresh registry."""
+        self.registry = MetricsRegistry()
+        self.patches = [
+            patch("ai.ai_client.get_metrics_registry", return_value=self.registry),
+            patch("app.get_metrics_registry", return_value=self.registry),
+            patch.object(ai_client, "_save_debug_files"),
+            patch.object(ai_client, "CACHE_DELAY_SECONDS", 0),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+    def tearDown(self):
+        """Remove the patches."""
+        for active_patch in self.patches:
+            active_patch.stop()
+
+    @patch("ai.ai_client.get_cache")
+    @patch("ai.ai_client.get_ai_client")
+    def test_completion_records_usage_and_cache_lookups(self, mock_get_client, mock_get_cache):
+        """Test that a miss, a completion's usage and a later hit are recorded."""
+        completion = MagicMock()
+        completion.choices[0].message.content = "Once upon a time"
+        completion.choices[0].finish_reason = "stop"
+        completion.usage = MagicMock(prompt_tokens=10, completion_tokens=20)
+        mock_get_client.return_value.chat.completions.create.return_value = completion
+        mock_get_cache.return_value.get.side_effect = [None, "Once upon a time"]
+        mock_get_cache.return_value._hash_prompt.return_value = "key"
+
+        ai_client.get_ai_response("prompt", PromptType.PLOT_LINES)
+        ai_client.get_ai_response("prompt", PromptType.PLOT_LINES)
+
+        metrics = self.registry.get_metrics()
+        self.assertEqual(metrics["cache_lookups"], {("plot_lines", "miss"): 1, ("plot_lines", "hit"): 1})
+        self.assertEqual(metrics["tokens"][("plot_lines", "completion")]["sum"], 20)
+
+    def test_endpoint(self):
+        """Test that /metrics serves the exposition and parse results and request latency are recorded."""
+        import app as app_module
+        from objects.story import Story
+
+        with patch.object(app_module, "save_story_to_session"):
+            app_module.finish_chapter_plan(Story(), "no structured data here")
+        response = app_module.app.test_client().get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        text = response.get_data(as_text=True)
+        self.assertEqual(sample(text, 'kraitif_ai_parses_total{prompt_type="chapter_outline",result="failure"}'), 1)
+        self.assertIn("kraitif_ai_upstream_latency_seconds_bucket", text)
+
+        text = app_module.app.test_client().get("/metrics").get_data(as_text=True)
+        self.assertEqual(sample(text, 'kraitif_http_responses_total{route="/metrics",method="GET",status="200"}'), 1)
+
+    def test_app_registers_story_janitor(self):
+        """Test that the app adds the story janitor's families to the process-wide registry."""
+        import app as app_module
+        from ai.metrics import get_metrics_registry
+
+        text = get_metrics_registry().render()
+        self.assertEqual(sample(text, "kraitif_story_janitor_reclaimed_total "),
+                         app_module.story_janitor.get_metrics()["stories_reclaimed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
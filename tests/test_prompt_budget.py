@@ -0,0 +1,112 @@
+"""
+Test suite for the prompt token budgeter and budgeted story prompt text.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects.archetype import ArchetypeEnum
+from objects.chapter import Chapter
+from objects.character import Character
+from objects.emotional_function import EmotionalFunctionEnum
+from objects.functional_role import FunctionalRoleEnum
+from objects.prompt_budget import PromptSection, TokenBudgeter, estimate_tokens, first_sentences
+from objects.story import Story
+from prompt import Prompt
+
+LONG_OVERVIEW = "The heroes cross the marsh at night. " + "They argue about the route and the map. " * 40
+
+
+def build_long_story(chapter_count=60):
+    """Build a story whose chapter plan and plot line are far over a small budget."""
+    story = Story()
+    story.story_type_name = "The Quest"
+    story.subtype_name = "Spiritual Quest"
+    story.add_character(Character(
+        "Aria", ArchetypeEnum.CHOSEN_ONE, FunctionalRoleEnum.PROTAGONIST,
+        EmotionalFunctionEnum.SYMPATHETIC_CHARACTER, "Raised in the marsh. " * 50, "Learns to lead. " * 50,
+    ))
+    for number in range(1, chapter_count + 1):
+        story.add_chapter(Chapter(number, f"Chapter title {number}", LONG_OVERVIEW))
+    story.expanded_plot_line = "A long journey unfolds. " * 2000
+    return story
+
+
+class TestTokenBudgeter(unittest.TestCase):
+    """Test cases for fitting sections into a budget."""
+
+    def test_estimates(self):
+        """Test the token estimate and sentence trimming."""
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+        self.assertEqual(first_sentences("One. Two.", 100), "One. Two.")
+        self.assertEqual(first_sentences("One two three. Four five six seven.", 5), "One two three. [...]")
+        self.assertLessEqual(estimate_tokens(first_sentences("word " * 100, 10)), 12)
+
+    def test_sections_that_fit_are_untouched(self):
+        """Test that a context within budget is joined unchanged."""
+        sections = [PromptSection("a", 10, ["aaaa", "a"]), PromptSection("b", 20, ["bbbb", "b"])]
+        report = TokenBudgeter(100).fit(sections)
+        self.assertEqual((report.text, report.trimmed), ("aaaa\nbbbb", []))
+
+    def test_lowest_priority_is_trimmed_first(self):
+        """Test that the lowest priority section is shortened before the others, one step at a time."""
+        sections = [
+            PromptSection("high", 90, ["h" * 400, "h" * 40]),
+            PromptSection("low", 10, ["l" * 400, "l" * 200, "l" * 40]),
+        ]
+        report = TokenBudgeter(140).fit(sections)
+        self.assertEqual(report.trimmed, ["low"])
+        self.assertEqual(report.sections["low"][1], 2)
+        self.assertFalse(report.over_budget)
+
+    def test_section_budget_and_over_budget_report(self):
+        """Test that a section is kept within its own budget and an impossible budget is reported."""
+        report = TokenBudgeter(1000).fit([PromptSection("capped", 50, ["x" * 800, "x" * 80], max_tokens=50)])
+        self.assertEqual(report.sections["capped"], (20, 1))
+        report = TokenBudgeter(1).fit([PromptSection("fixed", 100, ["y" * 40])])
+        self.assertTrue(report.over_budget)
+
+
+class TestBudgetedStoryPrompt(unittest.TestCase):
+    """Test cases for trimming a long story's prompt text."""
+
+    def test_long_story_is_trimmed_deterministically(self):
+        """Test that the chapter prompt context fits its budget, keeping recent chapters and the configuration."""
+        story = build_long_story()
+        text = story.to_prompt_text_for_chapter(61, token_budget=3000)
+        self.assertLessEqual(estimate_tokens(text), 3000)
+        self.assertEqual(text, story.to_prompt_text_for_chapter(61, token_budget=3000))
+        self.assertIn("Story Type: The Quest", text)
+        self.assertIn("Chapter 60: Chapter title 60", text)
+        self.assertIn("CHAPTER STRUCTURE:", text)
+        self.assertIn("chapters", text.budget.trimmed)
+        self.assertTrue(text.endswith("Use this configuration to guide the story creation process."))
+
+    def test_default_budget_caps_unbounded_sections(self):
+        """Test that without an explicit budget the section budgets still bound a huge plot line."""
+        text = build_long_story(chapter_count=2).to_prompt_text_for_chapter_outline()
+        self.assertIn("expanded_plot_line", text.budget.trimmed)
+        self.assertIn("[...]", text)
+
+    def test_prompt_reports_final_size(self):
+        """Test that generated prompts are trimmed to the prompt budget and their size is reported."""
+        prompt = Prompt(max_prompt_tokens=4000)
+        prompt_text = prompt.generate_chapter_prompt(build_long_story(), 30)
+        report = prompt_text.size_report
+        self.assertEqual(report["prompt_type"], "chapter")
+        self.assertEqual(report["tokens"], estimate_tokens(prompt_text))
+        self.assertLessEqual(report["tokens"], 4000)
+        self.assertIn("chapters", report["story_configuration"]["trimmed"])
+
+        # Each prompt keeps its own report when one Prompt is shared
+        plot_report = prompt.generate_plot_prompt(Story()).size_report
+        self.assertEqual((plot_report["prompt_type"], plot_report["story_configuration"]["trimmed"]), ("plot_lines", []))
+        self.assertEqual(prompt_text.size_report, report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the ranked inverted-index catalog search.
+"""
+
+import unittest
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects.catalog import get_catalog
+from objects.search_index import SearchIndex, SearchDocument, tokenize, NAME_WEIGHT, TEXT_WEIGHT
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for index construction and ranking."""
+
+    def setUp(self):
+        """Build a small index for ranking tests."""
+        self.index = SearchIndex()
+        self.index.add_document(
+            SearchDocument('archetype', 'Wise Mentor', 'An experienced guide'),
+            [('Wise Mentor', NAME_WEIGHT), ('An experienced guide', TEXT_WEIGHT)]
+        )
+        self.index.add_document(
+            SearchDocument('archetype', 'Reluctant Hero', 'Guided by a wise elder'),
+            [('Reluctant Hero', NAME_WEIGHT), ('Guided by a wise elder', TEXT_WEIGHT)]
+        )
+        self.index.add_document(
+            SearchDocument('style', 'Minimalist', 'Sparse prose'),
+            [('Minimalist', NAME_WEIGHT), ('Sparse prose', TEXT_WEIGHT)]
+        )
+        self.index.finalize()
+
+    def test_tokenize_drops_stop_words(self):
+        """Test that tokenization lowercases and removes stop words."""
+        self.assertEqual(tokenize("The Hero of the Story"), ["hero", "story"])
+
+    def test_name_matches_rank_above_description_matches(self):
+        """Test that name matches outrank description matches."""
+        results = self.index.search("wise")
+        self.assertEqual([r.name for r in results], ["Wise Mentor", "Reluctant Hero"])
+
+    def test_prefix_lookup(self):
+        """Test that partial words match by prefix."""
+        self.assertEqual([r.name for r in self.index.search("minim")], ["Minimalist"])
+
+    def test_typo_tolerance(self):
+        """Test that misspelled terms still match."""
+        self.assertEqual(self.index.search("mentr")[0].name, "Wise Mentor")
+        self.assertEqual(self.index.search("minimailst")[0].name, "Minimalist")
+
+    def test_all_terms_must_match(self):
+        """Test that multi-term queries use AND semantics."""
+        self.assertEqual([r.name for r in self.index.search("wise experienced")], ["Wise Mentor"])
+        self.assertEqual(self.index.search("wise sparse"), [])
+
+    def test_kind_filter_and_limit(self):
+        """Test restricting results by kind and count."""
+        self.assertEqual(self.index.search("sparse", kinds=["archetype"]), [])
+        self.assertEqual(len(self.index.search("wise", limit=1)), 1)
+
+    def test_empty_query(self):
+        """Test that empty or stop-word-only queries return nothing."""
+        self.assertEqual(self.index.search(""), [])
+        self.assertEqual(self.index.search("the of"), [])
+
+
+class TestCatalogSearch(unittest.TestCase):
+    """Test cases for searching the full catalog."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the shared catalog once."""
+        cls.catalog = get_catalog()
+
+    def test_covers_all_registries(self):
+        """Test that every registry is indexed."""
+        kinds = {document.kind for document in self.catalog.search_index.documents}
+        self.assertEqual(
+            kinds,
+            {'archetype', 'style', 'genre', 'sub_genre', 'story_type', 'story_subtype',
+             'emotional_function', 'functional_role', 'narrative_function'}
+        )
+
+    def test_archetype_search(self):
+        """Test searching archetypes with a typo."""
+        names = [r.name for r in self.catalog.search("detectve", kinds=["archetype"])]
+        self.assertIn("Skeptic Detective", names)
+        self.assertTrue(all(r.kind == "archetype" for r in self.catalog.search("detective", kinds=["archetype"])))
+
+    def test_genre_and_story_type_search(self):
+        """Test that genres and story types are searchable."""
+        self.assertEqual(self.catalog.search("fantas", kinds=["genre"])[0].name, "Fantasy")
+        self.assertEqual(self.catalog.search("tragedy", kinds=["story_type"])[0].name, "Tragedy")
+
+    def test_search_endpoint(self):
+        """Test the JSON search endpoint."""
+        from app import app
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            response = client.get('/api/search?q=mentor&kind=archetype&limit=5')
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(data['query'], 'mentor')
+            self.assertTrue(data['results'])
+            self.assertLessEqual(len(data['results']), 5)
+            self.assertTrue(all(r['kind'] == 'archetype' for r in data['results']))
+
+            response = client.get('/api/search?q=')
+            self.assertEqual(response.get_json()['results'], [])
+
+
+class TestSearchLatency(unittest.TestCase):
+    """Latency tests for bulk queries against the full catalog."""
+
+    QUERIES = [
+        "mentor", "hero", "detectve", "wise men", "trick", "noir", "roman",
+        "fantasy", "epic quest", "minimalist", "gothic", "comedy", "revenge",
+        "trag", "villain", "mysterious stranger", "science ficton", "love",
+        "betrayal", "coming of age",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the shared catalog once."""
+        cls.catalog = get_catalog()
+
+    def _time_queries(self, queries):
+        """Return the total time in seconds to run all queries."""
+        start = time.perf_counter()
+        for query in queries:
+            self.catalog.search(query)
+        return time.perf_counter() - start
+
+    def test_bulk_query_latency(self):
+        """Test that thousands of queries complete well within interactive latency."""
+        queries = self.QUERIES * 100
+        elapsed = self._time_queries(queries)
+        average_ms = elapsed / len(queries) * 1000
+        self.assertLess(average_ms, 5.0, f"average query latency {average_ms:.3f} ms")
+
+    def test_keystroke_prefix_latency(self):
+        """Test latency of the prefix queries produced while a user types."""
+        queries = []
+        for word in ("protagonist", "detective", "minimalist", "adventure", "mentor"):
+            queries.extend(word[:i] for i in range(1, len(word) + 1))
+        elapsed = self._time_queries(queries * 20)
+        average_ms = elapsed / (len(queries) * 20) * 1000
+        self.assertLess(average_ms, 5.0, f"average prefix query latency {average_ms:.3f} ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test the in-process cache of hydrated stories.
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from flask import session
+from app import app, get_story_from_session, save_story_to_session
+from storage import SqliteStoryStore, StoryCache
+from storage.story_cache import estimate_story_size
+from story_factory import make_story
+
+
+@contextmanager
+def story_request(story_id="s1"):
+    """Run a request whose session belongs to the given story."""
+    with app.test_request_context():
+        session["story_id"] = story_id
+        yield
+
+
+class TestStoryCache(unittest.TestCase):
+    """Test cases for the StoryCache class."""
+
+    def setUp(self):
+        """Create a cache and a story."""
+        self.cache = StoryCache(max_entries=2)
+        self.story = make_story()
+
+    def test_hit_requires_matching_versions(self):
+        """Test that a story is only returned for the version and catalog it was cached with."""
+        self.cache.checkin("s1", self.story, 1)
+        self.assertIsNone(self.cache.checkout("s1", 2, self.story.catalog_version))
+
+        self.cache.checkin("s1", self.story, 1)
+        self.assertIsNone(self.cache.checkout("s1", 1, "other-catalog"))
+
+        self.cache.checkin("s1", self.story, 1)
+        self.assertIs(self.cache.checkout("s1", 1, self.story.catalog_version), self.story)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_checkout_removes_entry(self):
+        """Test that a checked out story is not handed to a second caller."""
+        self.cache.checkin("s1", self.story, 1)
+        self.assertIsNotNone(self.cache.checkout("s1", 1, self.story.catalog_version))
+        self.assertIsNone(self.cache.checkout("s1", 1, self.story.catalog_version))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_unversioned_story_is_not_cached(self):
+        """Test that stories without a store version are ignored."""
+        self.cache.checkin("s1", self.story, None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evicts_least_recently_used_by_count(self):
+        """Test that the oldest entry is evicted once the entry limit is exceeded."""
+        for story_id in ("s1", "s2", "s3"):
+            self.cache.checkin(story_id, make_story(), 1)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNone(self.cache.checkout("s1", 1, self.story.catalog_version))
+        self.assertIsNotNone(self.cache.checkout("s3", 1, self.story.catalog_version))
+
+    def test_evicts_by_size(self):
+        """Test that entries are evicted to stay under the size limit."""
+        large = make_story(chapter_count=2, text="x" * 10000)
+        cache = StoryCache(max_entries=10, max_bytes=estimate_story_size(large) * 2)
+        for story_id in ("s1", "s2", "s3"):
+            cache.checkin(story_id, make_story(chapter_count=2, text="x" * 10000), 1)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+        cache.checkin("huge", make_story(chapter_count=10, text="x" * 10000), 1)
+        self.assertIsNone(cache.checkout("huge", 1, large.catalog_version))
+
+
+class TestAppStoryCache(unittest.TestCase):
+    """Test cases for story reuse across requests."""
+
+    def setUp(self):
+        """Use a temporary store and an empty cache for the app."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.cache = StoryCache()
+        self.patches = [
+            patch.object(app_module, "story_store", self.store),
+            patch.object(app_module, "story_cache", self.cache),
+        ]
+        for p in self.patches:
+            p.start()
+        with story_request():
+            save_story_to_session(make_story(chapter_count=5))
+
+    def tearDown(self):
+        """Restore the app's store and cache."""
+        for p in self.patches:
+            p.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_story_is_reused_across_requests(self):
+        """Test that an unchanged story is hydrated once and then reused."""
+        with story_request():
+            first = get_story_from_session()
+        with story_request():
+            second = get_story_from_session()
+        self.assertIs(first, second)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_saved_story_is_reused(self):
+        """Test that a story saved by a request is reused by the next one."""
+        with story_request():
+            story = get_story_from_session()
+            story.get_chapter(2).chapter_text = "Generated text"
+            save_story_to_session(story)
+        with story_request():
+            self.assertIs(get_story_from_session(), story)
+
+    def test_unsaved_changes_are_not_reused(self):
+        """Test that a story modified without saving is rebuilt from the store."""
+        with story_request():
+            story = get_story_from_session()
+            story.key_theme = "Unsaved"
+        with story_request():
+            reloaded = get_story_from_session()
+        self.assertIsNot(reloaded, story)
+        self.assertIsNone(reloaded.key_theme)
+
+    def test_external_write_invalidates(self):
+        """Test that a write by another process makes the cached story stale."""
+        with story_request():
+            story = get_story_from_session()
+        data = self.store.load("s1")
+        data["key_theme"] = "Written elsewhere"
+        self.store.save("s1", data)
+        with story_request():
+            reloaded = get_story_from_session()
+        self.assertIsNot(reloaded, story)
+        self.assertEqual(reloaded.key_theme, "Written elsewhere")
+
+
+if __name__ == '__main__':
+    unittest.main()
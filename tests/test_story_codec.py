@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the binary story codec.
+"""
+
+import unittest
+import json
+import os
+import struct
+import sys
+import zlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import codec
+from storage.codec import CodecError, decode, encode
+from story_factory import make_story_data
+
+CHAPTER_TEXT = "The road wound on through the hills. " * 200
+
+
+class TestStoryCodec(unittest.TestCase):
+    """Test cases for encode() and decode()."""
+
+    def test_round_trip(self):
+        """Test that encoding and decoding returns equal data."""
+        story = make_story_data(text=CHAPTER_TEXT)
+        self.assertEqual(decode(encode(story)), story)
+        self.assertEqual(decode(encode(story, compress_text=False)), story)
+
+    def test_round_trip_of_rows(self):
+        """Test that parts of a story and unusual values round trip."""
+        for value in ({}, [], {"chapter_text": None}, {"archetype": 3}, {"secondary_archetypes": [None, 7]},
+                      {"chapter_text": ["odd"]}, {"nested": {"archetype": "The Hero", "v": 1}}):
+            self.assertEqual(decode(encode(value)), value)
+
+    def test_enum_values_are_not_stored(self):
+        """Test that enum strings are replaced by indexes into the fixed symbol table."""
+        encoded = encode(make_story_data(text=CHAPTER_TEXT))
+        self.assertNotIn(b"Chosen One", encoded)
+        self.assertNotIn(b"Protagonist", encoded)
+
+    def test_symbol_table_is_pinned(self):
+        """Test that the symbol table is unchanged (changing an enum needs a new FORMAT_VERSION)."""
+        table = codec.SYMBOL_TABLES[codec.FORMAT_VERSION]
+        self.assertEqual(zlib.crc32("\n".join(table).encode("utf-8")), 1825933809)
+
+    def test_rows_are_not_larger_than_json(self):
+        """Test that character and header rows shrink, and rows without enums do not grow."""
+        story = make_story_data(1, text=CHAPTER_TEXT)
+        header = {key: value for key, value in story.items() if key not in ("characters", "chapters")}
+        header.update(protagonist_archetype="Chosen One", secondary_archetypes=["Wise Mentor"])
+        for row in (story["characters"][0], header):
+            compact_json = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.assertLess(len(encode(row)), len(compact_json))
+
+        row = {"chapter_number": 1, "title": "Departure", "narrative_function": None}
+        self.assertEqual(encode(row), json.dumps(row, separators=(",", ":")).encode("utf-8"))
+        self.assertEqual(decode(encode(row)), row)
+
+    def test_text_is_compressed(self):
+        """Test that chapter texts are compressed unless disabled."""
+        story = make_story_data(text=CHAPTER_TEXT)
+        compressed = encode(story)
+        plain = encode(story, compress_text=False)
+        self.assertLess(len(compressed), len(plain))
+        self.assertIn(CHAPTER_TEXT.encode("utf-8"), plain)
+        self.assertNotIn(CHAPTER_TEXT.encode("utf-8"), compressed)
+
+    def test_smaller_than_json(self):
+        """Test that the encoding is smaller than compact JSON."""
+        story = make_story_data(10, text=CHAPTER_TEXT)
+        compact_json = json.dumps(story, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.assertLess(len(encode(story)), len(compact_json) / 5)
+
+    def test_encoding_is_deterministic(self):
+        """Test that equal data encodes to equal bytes (the store compares rows by content)."""
+        self.assertEqual(encode(make_story_data(text=CHAPTER_TEXT)), encode(make_story_data(text=CHAPTER_TEXT)))
+
+    def test_legacy_json_is_decoded(self):
+        """Test that JSON text and bytes written before the codec are accepted."""
+        story = make_story_data(1, text=CHAPTER_TEXT)
+        self.assertEqual(decode(json.dumps(story)), story)
+        self.assertEqual(decode(json.dumps(story).encode("utf-8")), story)
+
+    def test_rejects_bad_data(self):
+        """Test that malformed data and unknown versions raise CodecError."""
+        encoded = encode(make_story_data(1, text=CHAPTER_TEXT))
+        with self.assertRaises(CodecError):
+            decode(b"XXXX" + encoded[4:])
+        with self.assertRaises(CodecError):
+            decode(encoded[:4] + struct.pack("<B", codec.FORMAT_VERSION + 1) + encoded[5:])
+        with self.assertRaises(CodecError):
+            decode(encoded[:-10])
+        with self.assertRaises(CodecError):
+            decode(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the streaming story exports served by /save.
+"""
+
+import unittest
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, get_story_from_session, save_story_to_session
+from objects.story import Story
+from export import get_exporter, get_export_formats
+from storage import SqliteStoryStore
+from story_factory import chapter_text, make_story
+
+
+class TestExporters(unittest.TestCase):
+    """Test cases for the export formats."""
+
+    def setUp(self):
+        """Build a story to export."""
+        self.story = make_story(unwritten_chapter=True)
+
+    def test_formats_are_registered(self):
+        """Test that every format is available by name."""
+        self.assertEqual(sorted(get_export_formats()), ["epub", "html", "json", "md"])
+        self.assertIsNone(get_exporter("docx"))
+
+    def test_json_matches_to_json(self):
+        """Test that the streamed JSON is identical to Story.to_json()."""
+        exporter = get_exporter("json")
+        self.assertEqual(exporter.export(self.story).decode("utf-8"), self.story.to_json())
+        self.assertGreater(len(list(exporter.iter_chunks(self.story))), len(self.story.chapters))
+
+        empty = Story()
+        self.assertEqual(exporter.export(empty).decode("utf-8"), empty.to_json())
+
+    def test_markdown(self):
+        """Test that the Markdown manuscript holds the title, characters and chapter texts."""
+        text = get_exporter("md").export(self.story).decode("utf-8")
+        self.assertTrue(text.startswith("# The Long Road\n"))
+        self.assertIn("- **Genre:** Fantasy", text)
+        self.assertIn("- **Aria** (", text)
+        self.assertIn(f"## Chapter 2: Chapter 2\n\n{chapter_text(2)}\n", text)
+        self.assertIn("## Chapter 4: Unwritten\n\n*Still to come*\n", text)
+
+    def test_html_escapes_text(self):
+        """Test that the HTML manuscript escapes story content."""
+        text = get_exporter("html").export(self.story).decode("utf-8")
+        self.assertTrue(text.startswith("<!DOCTYPE html>"))
+        self.assertIn("<p>Second paragraph of 1 &lt;b&gt; — café.</p>", text)
+        self.assertIn("Raised by wolves &amp; owls.", text)
+        self.assertTrue(text.rstrip().endswith("</html>"))
+
+    def test_epub_archive(self):
+        """Test that the EPUB is a valid archive with the mimetype first and one document per chapter."""
+        data = get_exporter("epub").export(self.story)
+        self.assertEqual(data[30:38], b"mimetype")
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            names = archive.namelist()
+            self.assertEqual(names[0], "mimetype")
+            self.assertEqual(archive.getinfo("mimetype").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.read("mimetype"), b"application/epub+zip")
+            for number in range(1, 5):
+                self.assertIn(f"OEBPS/chapter_{number}.xhtml", names)
+            chapter = archive.read("OEBPS/chapter_2.xhtml").decode("utf-8")
+            self.assertIn("<p>First paragraph of 2.</p>", chapter)
+            package = archive.read("OEBPS/content.opf").decode("utf-8")
+            self.assertIn('<itemref idref="chapter-4"/>', package)
+
+
+class TestSaveRoute(unittest.TestCase):
+    """Test cases for downloading exports from /save."""
+
+    def setUp(self):
+        """Store a story in a temporary store and open a client session for it."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.store_patch = patch.object(app_module, "story_store", self.store)
+        self.store_patch.start()
+        with app.test_request_context():
+            save_story_to_session(make_story(chapter_count=5, unwritten_chapter=True))
+            self.story_id = app_module.get_story_id()
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session["story_id"] = self.story_id
+
+    def tearDown(self):
+        """Restore the app's store and remove the database."""
+        self.store_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_json_download(self):
+        """Test that the default download is the JSON save file."""
+        response = self.client.get("/save")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "application/json")
+        self.assertIn("kraitif_story.json", response.headers["Content-Disposition"])
+        data = json.loads(response.data)
+        self.assertEqual(data["chapters"][4]["chapter_text"], chapter_text(5))
+
+        with app.test_request_context():
+            app_module.session["story_id"] = self.story_id
+            app_module.story_cache.discard(self.story_id)
+            self.assertEqual(response.data.decode("utf-8"), get_story_from_session().to_json())
+
+    def test_manuscript_downloads(self):
+        """Test that each manuscript format is served with its content type and file name."""
+        for export_format, content_type in (("md", "text/markdown"), ("html", "text/html"),
+                                            ("epub", "application/epub+zip")):
+            response = self.client.get(f"/save?format={export_format}")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["Content-Type"].startswith(content_type))
+            self.assertIn(f"kraitif_story.{export_format}", response.headers["Content-Disposition"])
+            self.assertTrue(response.is_streamed)
+            self.assertIn(b"Second paragraph of 5", response.data if export_format != "epub"
+                          else zipfile.ZipFile(io.BytesIO(response.data)).read("OEBPS/chapter_5.xhtml"))
+
+    def test_export_does_not_keep_chapter_texts(self):
+        """Test that exporting a lazily loaded story leaves its chapter texts unloaded."""
+        with app.test_request_context():
+            app_module.session["story_id"] = self.story_id
+            app_module.story_cache.discard(self.story_id)
+            story = get_story_from_session()
+            get_exporter("md").export(story)
+            self.assertFalse(any(chapter.is_loaded("chapter_text") for chapter in story.chapters))
+
+    def test_unknown_format(self):
+        """Test that an unknown format redirects instead of downloading."""
+        response = self.client.get("/save?format=docx")
+        self.assertEqual(response.status_code, 302)
+
+
+if __name__ == '__main__':
+    unittest.main()
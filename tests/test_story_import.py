@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Test the streaming, size-bounded story import used by /load.
+"""
+
+import unittest
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, build_story_header, get_story_from_session, save_story_to_session
+from objects.story import Story
+from objects.chapter import Chapter
+from export import JsonStreamReader, JsonStreamError, StoryImporter, StoryImportError, get_exporter
+from storage import SqliteStoryStore
+from story_factory import chapter_text, make_story
+
+
+class CountingStream(io.BytesIO):
+    """Byte stream that records how much of it was read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TestJsonStreamReader(unittest.TestCase):
+    """Test cases for the incremental JSON reader."""
+
+    def reader(self, text, chunk_size=3, **kwargs):
+        """Create a reader over text with a tiny chunk size so values span chunks."""
+        return JsonStreamReader(io.BytesIO(text.encode("utf-8")), chunk_size=chunk_size, **kwargs)
+
+    def test_walks_objects_and_arrays_across_chunks(self):
+        """Test that keys, items and values split over chunk boundaries decode correctly."""
+        document = {"name": "café 📖", "count": 1234567, "items": [{"a": [1, 2.5e3]}, None, True, "x"]}
+        reader = self.reader(json.dumps(document, indent=2))
+        result = {}
+        for key in reader.iter_object():
+            result[key] = list(reader.iter_array()) if key == "items" else reader.read_value()
+        reader.expect_end()
+        self.assertEqual(result, document)
+
+    def test_chunk_size_sweep(self):
+        """Test that numbers and strings cut at every chunk boundary decode like json.loads()."""
+        documents = ["[1.5]", "[1e5]", "[1E+5]", "[-0.25e-3, 10]"]
+        documents.append(json.dumps({"number": 2.5e-3, "floats": [0.1, -2.5e-7, 3e20, 12.0], "ints": [0, -17, 10 ** 12],
+                                     "text": "café 📖 \\u263a", "flags": [True, False, None]}))
+        for document in documents:
+            for chunk_size in range(1, 24):
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    reader = self.reader(document, chunk_size=chunk_size)
+                    if reader.peek() == "[":
+                        value = list(reader.iter_array())
+                    else:
+                        value = {key: list(reader.iter_array()) if reader.peek() == "[" else reader.read_value()
+                                 for key in reader.iter_object()}
+                    reader.expect_end()
+                    self.assertEqual(value, json.loads(document))
+
+    def test_empty_containers(self):
+        """Test empty objects and arrays."""
+        reader = self.reader('{"a": [], "b": {}}')
+        keys = []
+        for key in reader.iter_object():
+            keys.append(key)
+            self.assertEqual(list(reader.iter_array()) if key == "a" else reader.read_value(), [] if key == "a" else {})
+        self.assertEqual(keys, ["a", "b"])
+
+    def test_syntax_errors(self):
+        """Test that malformed documents raise JsonStreamError."""
+        for text in ('{"a": 1,}', '{"a" 1}', '{"a": [1 2]}', '{"a": 1} x', '{"a": "unterminated', '[1]'):
+            with self.subTest(text=text):
+                with self.assertRaises(JsonStreamError):
+                    reader = self.reader(text)
+                    for key in reader.iter_object():
+                        if key == "a" and reader.peek() == "[":
+                            list(reader.iter_array())
+                        else:
+                            reader.read_value()
+                    reader.expect_end()
+
+    def test_invalid_utf8(self):
+        """Test that undecodable bytes raise JsonStreamError."""
+        reader = JsonStreamReader(io.BytesIO(b'{"a": "\xff"}'), chunk_size=4)
+        with self.assertRaises(JsonStreamError):
+            for _key in reader.iter_object():
+                reader.read_value()
+
+    def test_limits(self):
+        """Test the document and value size limits."""
+        with self.assertRaises(JsonStreamError):
+            list(self.reader(json.dumps(list(range(100))), max_bytes=50).iter_array())
+        with self.assertRaises(JsonStreamError):
+            self.reader(json.dumps("x" * 100), max_value_bytes=50).read_value()
+        self.assertEqual(self.reader(json.dumps("x" * 40), max_value_bytes=50).read_value(), "x" * 40)
+
+    def test_stops_at_invalid_value_without_reading_on(self):
+        """Test that a syntax error mid-document is reported without reading the rest of the stream."""
+        stream = CountingStream(b'[{"a": 1}, {"a": ]' + b" " * 100000 + b"]")
+        reader = JsonStreamReader(stream, chunk_size=1024)
+        with self.assertRaises(JsonStreamError):
+            list(reader.iter_array())
+        self.assertLess(stream.bytes_read, 4096)
+
+
+class TestStoryImporter(unittest.TestCase):
+    """Test cases for importing save files into a story store."""
+
+    def setUp(self):
+        """Create a temporary store and an importer with small batches."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.importer = StoryImporter(batch_size=2)
+
+    def tearDown(self):
+        """Remove the database."""
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def import_bytes(self, data, importer=None):
+        """Import a save file into the store under a fixed ID."""
+        return (importer or self.importer).import_story(io.BytesIO(data), self.store, "imported", build_story_header)
+
+    def test_round_trip(self):
+        """Test that an exported save file is stored exactly as the story would save it."""
+        story = make_story(chapter_count=5)
+        self.assertEqual(self.import_bytes(get_exporter("json").export(story)), 5)
+        with app.test_request_context():
+            expected = app_module.build_story_data(story)
+        self.assertEqual(self.store.load("imported"), expected)
+
+    def test_fields_after_chapters(self):
+        """Test that story fields and characters after the chapters list are stored too."""
+        story = make_story(chapter_count=2)
+        data = story.to_dict()
+        reordered = {"chapters": data.pop("chapters"), **data}
+        self.import_bytes(json.dumps(reordered).encode("utf-8"))
+        stored = self.store.load("imported")
+        self.assertEqual(stored["genre_name"], "Fantasy")
+        self.assertEqual(stored["selected_plot_line"]["name"], "The Long Road")
+        self.assertEqual([character["name"] for character in stored["characters"]], ["Aria", "Borin"])
+        self.assertEqual(len(stored["chapters"]), 2)
+
+    def test_invalid_chapter_stops_import(self):
+        """Test that the first invalid chapter rejects the file and leaves nothing stored."""
+        data = make_story(chapter_count=3).to_dict()
+        data["chapters"][1] = {"chapter_number": 2, "title": "No overview"}
+        data["chapters"].extend(Chapter(chapter_number=n, title="T", overview="O").to_dict() for n in range(4, 2000))
+        stream = CountingStream(json.dumps(data).encode("utf-8"))
+        with self.assertRaisesRegex(StoryImportError, "Chapter 2"):
+            self.importer.import_story(stream, self.store, "imported", build_story_header)
+        self.assertEqual(self.store.load("imported"), {})
+        self.assertLess(stream.bytes_read, len(stream.getvalue()) // 2)
+
+    def test_invalid_records(self):
+        """Test that invalid characters, duplicate chapters and non-object files are rejected."""
+        data = make_story(chapter_count=2).to_dict()
+        bad_character = dict(data, characters=[{"name": "Nobody"}])
+        duplicate = dict(data, chapters=data["chapters"] + [data["chapters"][0]])
+        for document in (bad_character, duplicate, ["not", "a", "story"]):
+            with self.subTest(document=str(document)[:40]):
+                with self.assertRaises(StoryImportError):
+                    self.import_bytes(json.dumps(document).encode("utf-8"))
+                self.assertEqual(self.store.load("imported"), {})
+        with self.assertRaises(StoryImportError):
+            self.import_bytes(b'{"chapters": [')
+
+    def test_limits(self):
+        """Test the upload size and chapter count limits."""
+        data = get_exporter("json").export(make_story(chapter_count=4))
+        with self.assertRaisesRegex(StoryImportError, "more than 3 chapters"):
+            self.import_bytes(data, StoryImporter(max_chapters=3))
+        with self.assertRaisesRegex(StoryImportError, "larger than"):
+            self.import_bytes(data, StoryImporter(max_bytes=len(data) // 2))
+        self.assertEqual(self.store.load("imported"), {})
+
+
+class TestLoadRoute(unittest.TestCase):
+    """Test cases for uploading save files to /load."""
+
+    def setUp(self):
+        """Store a current story and open a client session for it."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.store_patch = patch.object(app_module, "story_store", self.store)
+        self.store_patch.start()
+        with app.test_request_context():
+            current = Story()
+            current.story_type_name = "Rebirth"
+            save_story_to_session(current)
+            self.story_id = app_module.get_story_id()
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session["story_id"] = self.story_id
+
+    def tearDown(self):
+        """Restore the app's store and remove the database."""
+        self.store_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def upload(self, data, filename="story.json"):
+        """Post a save file to /load."""
+        return self.client.post("/load", data={"file": (io.BytesIO(data), filename)},
+                                content_type="multipart/form-data")
+
+    def test_load_replaces_current_story(self):
+        """Test that a valid upload becomes the session's story and the old one is removed."""
+        response = self.upload(get_exporter("json").export(make_story(chapter_count=3)))
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as session:
+            new_story_id = session["story_id"]
+        self.assertNotEqual(new_story_id, self.story_id)
+        self.assertEqual(self.store.load(self.story_id), {})
+
+        with app.test_request_context():
+            app_module.session["story_id"] = new_story_id
+            story = get_story_from_session()
+            self.assertEqual(story.story_type_name, "The Quest")
+            self.assertEqual(len(story.chapters), 3)
+            self.assertEqual(story.chapters[2].chapter_text, chapter_text(3))
+
+    def test_invalid_upload_keeps_current_story(self):
+        """Test that a rejected upload leaves the current story in place."""
+        data = make_story().to_dict()
+        data["chapters"][0] = {"title": "No number"}
+        response = self.upload(json.dumps(data).encode("utf-8"))
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as session:
+            self.assertEqual(session["story_id"], self.story_id)
+            self.assertIn("Chapter 1", str(session.get("_flashes")))
+        self.assertEqual(self.store.load(self.story_id)["story_type_name"], "Rebirth")
+
+    def test_invalid_format_message(self):
+        """Test that a file that is not a story flashes the import error as it is."""
+        self.upload(b'["not", "a", "story"]')
+        with self.client.session_transaction() as session:
+            self.assertEqual(session.get("_flashes"), [("error", "Invalid story file format")])
+
+    def test_oversized_request_is_rejected(self):
+        """Test that a request over MAX_CONTENT_LENGTH is refused before it is read."""
+        with patch.dict(app.config, {"MAX_CONTENT_LENGTH": 1024}):
+            response = self.upload(b" " * 4096)
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as session:
+            self.assertIn("too large", str(session.get("_flashes")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test the background janitor that expires idle stories.
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SqliteStoryStore, StoryJanitor
+
+MAX_AGE = 1000.0
+
+
+def make_story():
+    """Build a minimal story data dictionary."""
+    return {"story_type_name": "The Quest", "characters": [], "chapters": []}
+
+
+class TestStoryJanitor(unittest.TestCase):
+    """Test cases for the StoryJanitor class."""
+
+    def setUp(self):
+        """Create a store and a janitor with a short maximum age."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SqliteStoryStore(os.path.join(self.temp_dir, "stories.db"))
+        self.janitor = StoryJanitor(self.store, max_age_seconds=MAX_AGE, bucket_seconds=10.0)
+
+    def tearDown(self):
+        """Stop the janitor and remove the database."""
+        self.janitor.stop()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def save(self, story_id, updated_at):
+        """Store a story as if it was last written at updated_at."""
+        self.store.save(story_id, make_story())
+        self.store._connection().execute(
+            "UPDATE stories SET updated_at = ? WHERE story_id = ?", (updated_at, story_id)
+        )
+        self.janitor.touch(story_id, updated_at)
+
+    def test_sweep_removes_only_expired_stories(self):
+        """Test that stories are removed once their bucket has fully expired."""
+        now = time.time()
+        self.save("old", now - MAX_AGE - 100)
+        self.save("new", now - 10)
+        self.assertEqual(self.janitor.sweep(now), 1)
+        self.assertEqual(self.store.load("old"), {})
+        self.assertTrue(self.store.load("new"))
+        self.assertEqual(self.janitor.sweep(now + MAX_AGE + 100), 1)
+        self.assertEqual(self.store.load("new"), {})
+
+    def test_touch_moves_story_to_later_bucket(self):
+        """Test that saving a story again postpones its expiry."""
+        now = time.time()
+        self.save("s1", now - MAX_AGE - 100)
+        self.save("s1", now)
+        self.assertEqual(self.janitor.sweep(now), 0)
+        self.assertTrue(self.store.load("s1"))
+
+    def test_story_written_elsewhere_is_kept(self):
+        """Test that a story saved by another process after indexing survives the sweep."""
+        now = time.time()
+        self.janitor.touch("s1", now - MAX_AGE - 100)
+        # Written by another process: the store is newer than this janitor's index
+        self.store.save("s1", make_story())
+        self.assertEqual(self.janitor.sweep(now), 0)
+        self.assertTrue(self.store.load("s1"))
+        self.assertEqual(self.janitor.get_metrics()["indexed_stories"], 1)
+
+    def test_seed_indexes_existing_stories(self):
+        """Test that stories left from earlier runs are found by seeding."""
+        now = time.time()
+        self.save("left-over", now - MAX_AGE - 100)
+        janitor = StoryJanitor(self.store, max_age_seconds=MAX_AGE)
+        janitor.seed()
+        self.assertEqual(janitor.sweep(now), 1)
+
+    def test_forget(self):
+        """Test that forgotten stories are not swept."""
+        now = time.time()
+        self.save("s1", now - MAX_AGE - 100)
+        self.janitor.forget("s1")
+        self.assertEqual(self.janitor.sweep(now), 0)
+
+    def test_metrics(self):
+        """Test that sweeps are counted and timed."""
+        now = time.time()
+        self.save("a", now - MAX_AGE - 100)
+        self.save("b", now - MAX_AGE - 100)
+        self.janitor.sweep(now)
+        self.janitor.sweep(now)
+        metrics = self.janitor.get_metrics()
+        self.assertEqual(metrics["sweeps"], 2)
+        self.assertEqual(metrics["stories_reclaimed"], 2)
+        self.assertEqual(metrics["last_sweep_reclaimed"], 0)
+        self.assertGreater(metrics["total_sweep_seconds"], 0)
+        self.assertEqual(metrics["indexed_stories"], 0)
+
+    def test_background_thread_sweeps(self):
+        """Test that the background thread seeds and sweeps on its own."""
+        self.store.save("old", make_story())
+        self.store._connection().execute("UPDATE stories SET updated_at = 0")
+        janitor = StoryJanitor(self.store, max_age_seconds=MAX_AGE, interval=0.05)
+        janitor.start()
+        try:
+            deadline = time.time() + 5
+            while self.store.load("old") and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(self.store.load("old"), {})
+            self.assertIs(janitor.start(), janitor.start())
+        finally:
+            janitor.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Test the pluggable story store backends.
+"""
+
+import unittest
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import FileStoryStore, SqliteStoryStore, StoryPatch, StoryVersionConflict, create_story_store
+from story_factory import make_story_data
+
+
+def make_chapter(number, text=""):
+    """Build a chapter dictionary like Chapter.to_dict() produces."""
+    return {
+        "chapter_number": number,
+        "title": f"Chapter {number}",
+        "overview": f"Overview {number}",
+        "character_impact": [],
+        "point_of_view": None,
+        "narrative_function": None,
+        "foreshadow_or_echo": None,
+        "scene_highlights": None,
+        "summary": None,
+        "continuity_state": {"characters": [], "objects": [], "plot_threads": []},
+        "chapter_text": text,
+    }
+
+
+class StoryStoreTests:
+    """Behaviour shared by every backend."""
+
+    def test_missing_story_loads_empty(self):
+        """Test that an unknown story loads as an empty dictionary."""
+        self.assertEqual(self.store.load("missing"), {})
+
+    def test_save_and_load_round_trip(self):
+        """Test that stored data is returned unchanged."""
+        story = make_story_data()
+        self.assertTrue(self.store.save("s1", story))
+        self.assertEqual(self.store.load("s1"), story)
+
+    def test_save_replaces_previous_data(self):
+        """Test that removed characters and chapters disappear on save."""
+        self.store.save("s1", make_story_data(chapter_count=3))
+        story = make_story_data(chapter_count=1)
+        story["characters"] = story["characters"][:1]
+        self.store.save("s1", story)
+        self.assertEqual(self.store.load("s1"), story)
+
+    def test_apply_patch(self):
+        """Test that a patch updates only the named parts of a story."""
+        story = make_story_data()
+        self.store.save("s1", story)
+        chapter = make_chapter(2, "Generated text")
+        del chapter["continuity_state"]
+        patch = StoryPatch(
+            header={"story_type_name": "Rags to Riches", "genre_name": "Fantasy", "secondary_archetypes": []},
+            characters={1: {"name": "Borin", "archetype": "Trickster"}},
+            chapters=[chapter, dict(make_chapter(4), continuity_state=None)],
+            continuity_states={4: {"characters": [], "objects": ["Sword"], "plot_threads": []}},
+            removed_chapters=[3],
+        )
+        self.assertTrue(self.store.apply_patch("s1", patch))
+
+        loaded = self.store.load("s1")
+        self.assertEqual(loaded["story_type_name"], "Rags to Riches")
+        self.assertEqual(loaded["secondary_archetypes"], [])
+        self.assertEqual(loaded["characters"][0], story["characters"][0])
+        self.assertEqual(loaded["characters"][1]["archetype"], "Trickster")
+        self.assertEqual([c["chapter_number"] for c in loaded["chapters"]], [1, 2, 4])
+        self.assertEqual(loaded["chapters"][1]["chapter_text"], "Generated text")
+        # Continuity state of a patched chapter is kept unless the patch replaces it
+        self.assertEqual(loaded["chapters"][1]["continuity_state"], story["chapters"][1]["continuity_state"])
+        self.assertEqual(loaded["chapters"][2]["continuity_state"]["objects"], ["Sword"])
+
+    def test_load_chapter_details(self):
+        """Test that one chapter's text and continuity state can be loaded on their own."""
+        story = make_story_data()
+        story["chapters"][1]["chapter_text"] = "Generated text"
+        self.store.save("s1", story)
+        self.assertEqual(self.store.load_chapter_details("s1", 2), {
+            "chapter_text": "Generated text",
+            "continuity_state": story["chapters"][1]["continuity_state"],
+        })
+        self.assertEqual(self.store.load_chapter_details("s1", 9), {})
+
+    def test_apply_patch_truncates_characters(self):
+        """Test that a patch with a smaller character count removes trailing characters."""
+        self.store.save("s1", make_story_data())
+        self.assertTrue(self.store.apply_patch("s1", StoryPatch(character_count=1)))
+        self.assertEqual([c["name"] for c in self.store.load("s1")["characters"]], ["Aria"])
+
+    def test_apply_patch_to_missing_story(self):
+        """Test that patching an unknown story fails without creating it."""
+        self.assertFalse(self.store.apply_patch("missing", StoryPatch(chapters=[make_chapter(1)])))
+        self.assertEqual(self.store.load("missing"), {})
+
+    def test_versions_change_on_write(self):
+        """Test that every write returns a new version matching get_version()."""
+        self.assertIsNone(self.store.get_version("s1"))
+        first = self.store.save("s1", make_story_data())
+        self.assertTrue(first)
+        self.assertEqual(self.store.get_version("s1"), first)
+        self.assertEqual(self.store.load_versioned("s1"), (make_story_data(), first))
+
+        story = make_story_data()
+        story["genre_name"] = "Science Fiction"
+        second = self.store.save("s1", story)
+        self.assertNotEqual(second, first)
+        self.assertEqual(self.store.load_versioned("missing"), ({}, None))
+
+    def test_header_patch_merges_fields(self):
+        """Test that a header patch only replaces the fields it contains."""
+        self.store.save("s1", make_story_data())
+        self.store.apply_patch("s1", StoryPatch(header={"genre_name": "Science Fiction"}))
+        loaded = self.store.load("s1")
+        self.assertEqual(loaded["genre_name"], "Science Fiction")
+        self.assertEqual(loaded["story_type_name"], "The Quest")
+
+    def test_expected_version_conflicts(self):
+        """Test that writes expecting an outdated version are rejected."""
+        first = self.store.save("s1", make_story_data())
+        second = self.store.apply_patch("s1", StoryPatch(header={"genre_name": "Horror"}), expected_version=first)
+        self.assertTrue(second)
+
+        with self.assertRaises(StoryVersionConflict) as context:
+            self.store.apply_patch("s1", StoryPatch(header={"genre_name": "Romance"}), expected_version=first)
+        self.assertEqual(context.exception.actual, second)
+        with self.assertRaises(StoryVersionConflict):
+            self.store.save("s1", make_story_data(), expected_version=first)
+        self.assertEqual(self.store.load("s1")["genre_name"], "Horror")
+        self.assertEqual(self.store.get_version("s1"), second)
+
+    def test_concurrent_patches_are_not_lost(self):
+        """Test that patches from many threads to one story all survive."""
+        self.store.save("s1", make_story_data(chapter_count=0))
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(10):
+                    chapter = make_chapter(worker * 100 + i, "text " * 200)
+                    del chapter["continuity_state"]
+                    self.assertTrue(self.store.apply_patch("s1", StoryPatch(chapters=[chapter])))
+            except Exception as e:  # Reported on the main thread
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.store.load("s1")["chapters"]), 40)
+
+    def test_delete_if_idle(self):
+        """Test that only stories last written before the cutoff are deleted."""
+        self.store.save("s1", make_story_data())
+        updated = self.store.list_updated()
+        self.assertEqual(list(updated), ["s1"])
+        self.assertFalse(self.store.delete_if_idle("s1", updated["s1"] - 1))
+        self.assertTrue(self.store.delete_if_idle("s1", time.time() + 1))
+        self.assertEqual(self.store.list_updated(), {})
+
+    def test_delete(self):
+        """Test deleting a story."""
+        self.store.save("s1", make_story_data())
+        self.assertTrue(self.store.delete("s1"))
+        self.assertEqual(self.store.load("s1"), {})
+
+
+class TestSqliteStoryStore(StoryStoreTests, unittest.TestCase):
+    """Test cases for the SQLite backend."""
+
+    def setUp(self):
+        """Create a store in a temporary database."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "stories.db")
+        self.store = SqliteStoryStore(self.path)
+
+    def tearDown(self):
+        """Close the store and remove the database."""
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        """Test that the database runs in WAL mode."""
+        mode = self.store._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_rows_are_stored_separately(self):
+        """Test that header, characters, chapters, texts and continuity states are separate rows."""
+        self.store.save("s1", make_story_data(chapter_count=3))
+        connection = self.store._connection()
+        for table, expected in (("stories", 1), ("characters", 2), ("chapters", 3), ("chapter_texts", 3),
+                                ("continuity_states", 3)):
+            count = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            self.assertEqual(count, expected, table)
+
+    def test_patch_touches_only_named_rows(self):
+        """Test that patching one chapter writes only that chapter's row and the story timestamp."""
+        self.store.save("s1", make_story_data(chapter_count=10))
+        connection = self.store._connection()
+        before = connection.total_changes
+        chapter = make_chapter(4, "Generated text")
+        del chapter["continuity_state"]
+        self.store.apply_patch("s1", StoryPatch(chapters=[chapter]))
+        # stories.updated_at + chapter 4's text
+        self.assertEqual(connection.total_changes - before, 2)
+
+    def test_load_without_details(self):
+        """Test that chapter texts and continuity states can be left out of a load."""
+        story = make_story_data()
+        story["chapters"][1]["chapter_text"] = "Generated text"
+        version = self.store.save("s1", story)
+        loaded, loaded_version = self.store.load_versioned("s1", include_details=False)
+        self.assertEqual(loaded_version, version)
+        for chapter in loaded["chapters"]:
+            self.assertNotIn("chapter_text", chapter)
+            self.assertNotIn("continuity_state", chapter)
+        self.assertEqual(loaded["chapters"][1]["title"], "Chapter 2")
+
+    def test_patch_without_text_keeps_text(self):
+        """Test that a patched chapter without chapter_text keeps its stored text."""
+        story = make_story_data()
+        story["chapters"][1]["chapter_text"] = "Generated text"
+        self.store.save("s1", story)
+        chapter = make_chapter(2)
+        del chapter["continuity_state"]
+        del chapter["chapter_text"]
+        chapter["summary"] = "New summary"
+        self.store.apply_patch("s1", StoryPatch(chapters=[chapter]))
+        loaded = self.store.load("s1")["chapters"][1]
+        self.assertEqual(loaded["summary"], "New summary")
+        self.assertEqual(loaded["chapter_text"], "Generated text")
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        """Test that saving an unchanged story only updates the header row."""
+        story = make_story_data(chapter_count=10)
+        self.store.save("s1", story)
+        connection = self.store._connection()
+        before = connection.total_changes
+        self.store.save("s1", story)
+        self.assertEqual(connection.total_changes - before, 1)
+
+    def test_json_rows_are_still_read(self):
+        """Test that rows written as JSON text before the binary codec are loaded."""
+        connection = self.store._connection()
+        connection.execute("INSERT INTO stories VALUES ('s1', '{\"key_theme\": \"Old\"}', 0, 0, 1)")
+        connection.execute("INSERT INTO chapters VALUES ('s1', 1, '{\"chapter_number\": 1, \"chapter_text\": \"Hi\"}')")
+        story = self.store.load("s1")
+        self.assertEqual(story["key_theme"], "Old")
+        self.assertEqual(story["chapters"], [{"chapter_number": 1, "chapter_text": "Hi"}])
+
+        self.store.apply_patch("s1", StoryPatch(header={"core_arc": "New"}))
+        self.assertEqual(self.store.load("s1")["key_theme"], "Old")
+        self.assertEqual(self.store.load("s1")["core_arc"], "New")
+
+    def test_stories_survive_restart(self):
+        """Test that a new store on the same database sees saved stories."""
+        story = make_story_data()
+        self.store.save("s1", story)
+        self.store.close()
+        reopened = SqliteStoryStore(self.path)
+        try:
+            self.assertEqual(reopened.load("s1"), story)
+        finally:
+            reopened.close()
+
+    def test_readers_are_not_blocked_by_writer(self):
+        """Test that a reader on another connection sees committed data during a write."""
+        self.store.save("s1", make_story_data())
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute("DELETE FROM stories WHERE story_id = 's1'")
+            # Uncommitted delete is invisible and does not block the reader
+            self.assertEqual(self.store.load("s1"), make_story_data())
+            writer.execute("ROLLBACK")
+        finally:
+            writer.close()
+
+    def test_cleanup_removes_idle_stories(self):
+        """Test that cleanup deletes stories and their rows after max age."""
+        self.store.save("old", make_story_data())
+        self.store.save("new", make_story_data())
+        connection = self.store._connection()
+        connection.execute("UPDATE stories SET updated_at = ? WHERE story_id = 'old'", (time.time() - 100,))
+        self.assertEqual(self.store.cleanup(max_age_seconds=50), 1)
+        self.assertEqual(self.store.load("old"), {})
+        self.assertTrue(self.store.load("new"))
+        orphans = connection.execute("SELECT COUNT(*) FROM chapters WHERE story_id = 'old'").fetchone()[0]
+        self.assertEqual(orphans, 0)
+
+
+class TestFileStoryStore(StoryStoreTests, unittest.TestCase):
+    """Test cases for the JSON file backend."""
+
+    def setUp(self):
+        """Create a store in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = FileStoryStore(self.temp_dir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_replaces_file_atomically(self):
+        """Test that saving renames a complete temporary file over the story file."""
+        self.store.save("s1", make_story_data())
+        first_inode = os.stat(self.store.get_path("s1")).st_ino
+        self.store.save("s1", make_story_data(chapter_count=1))
+        self.assertNotEqual(os.stat(self.store.get_path("s1")).st_ino, first_inode)
+        leftovers = [name for name in os.listdir(self.temp_dir) if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_failed_save_keeps_previous_file(self):
+        """Test that a save that cannot be encoded leaves the stored story intact."""
+        self.store.save("s1", make_story_data())
+        story = make_story_data()
+        story["unencodable"] = object()
+        self.assertIsNone(self.store.save("s1", story))
+        self.assertEqual(self.store.load("s1"), make_story_data())
+
+
+class TestCreateStoryStore(unittest.TestCase):
+    """Test cases for backend selection."""
+
+    def test_backend_selection(self):
+        """Test that backends are selected by name."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sqlite_store = create_story_store("sqlite", os.path.join(temp_dir, "stories.db"))
+            self.assertIsInstance(sqlite_store, SqliteStoryStore)
+            sqlite_store.close()
+            self.assertIsInstance(create_story_store("file", temp_dir), FileStoryStore)
+        with self.assertRaises(ValueError):
+            create_story_store("redis")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Test suite for JSON schema structured outputs and decoding them in the parsers.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.routing import ModelRoute
+from objects.archetype import ArchetypeEnum
+from objects.chapter_parser import parse_chapters_from_ai_response, parse_single_chapter_from_ai_response
+from objects.character_parser import parse_characters_from_ai_response
+from objects.plot_line import parse_plot_lines_from_ai_response
+from objects.response_schemas import get_response_format
+from objects.structured_data import decode_json_response
+from prompt_types import PromptType
+
+
+def walk_objects(schema):
+    """Yield every object schema nested in a schema."""
+    if isinstance(schema, dict):
+        if schema.get("type") == "object":
+            yield schema
+        for value in schema.values():
+            yield from walk_objects(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from walk_objects(value)
+
+
+class TestResponseSchemas(unittest.TestCase):
+    """Test cases for the response_format schemas."""
+
+    def test_every_prompt_type_has_a_strict_schema(self):
+        """Test that every object requires all its properties and allows no others."""
+        for prompt_type in PromptType:
+            response_format = get_response_format(prompt_type)
+            self.assertEqual(response_format["type"], "json_schema")
+            self.assertTrue(response_format["json_schema"]["strict"])
+            for schema in walk_objects(response_format["json_schema"]["schema"]):
+                self.assertEqual(set(schema["required"]), set(schema["properties"]))
+                self.assertFalse(schema["additionalProperties"])
+
+    def test_enums_are_constrained(self):
+        """Test that enum fields only allow the enum values."""
+        schema = get_response_format(PromptType.CHARACTERS)["json_schema"]["schema"]
+        archetype = schema["properties"]["characters"]["items"]["properties"]["archetype"]
+        self.assertEqual(archetype["enum"], [member.value for member in ArchetypeEnum])
+
+    def test_returned_format_is_a_copy(self):
+        """Test that changing a returned response_format does not change the cached one."""
+        get_response_format(PromptType.CHAPTER)["json_schema"]["name"] = "changed"
+        self.assertEqual(get_response_format(PromptType.CHAPTER)["json_schema"]["name"], "chapter")
+
+    def test_request_options(self):
+        """Test that the schema replaces the stop sequence unless the route opts out."""
+        response_format = get_response_format(PromptType.PLOT_LINES)
+        options = ModelRoute().request_options(response_format)
+        self.assertEqual(options["response_format"], response_format)
+        self.assertNotIn("stop", options)
+
+        options = ModelRoute(structured_output=False).request_options(response_format)
+        self.assertNotIn("response_format", options)
+        self.assertEqual(options["stop"], ["</STRUCTURED_DATA>"])
+
+
+class TestDirectDecoding(unittest.TestCase):
+    """Test cases for parsing bare JSON responses and the tagged fallback."""
+
+    def test_decode_json_response(self):
+        """Test that only a bare JSON object is decoded."""
+        self.assertEqual(decode_json_response(' {"a": 1}\n'), {"a": 1})
+        self.assertIsNone(decode_json_response('<STRUCTURED_DATA>{"a": 1}</STRUCTURED_DATA>'))
+        self.assertIsNone(decode_json_response("{not json"))
+        self.assertIsNone(decode_json_response(""))
+
+    def test_plot_lines(self):
+        """Test that plot lines parse from bare JSON and from a tagged block."""
+        data = {"plotlines": [{"name": "The Heist", "plotline": "A crew plans one last job."}]}
+        for response in (json.dumps(data), f"Here you go:\n<STRUCTURED_DATA>\n{json.dumps(data)}\n</STRUCTURED_DATA>"):
+            plot_lines = parse_plot_lines_from_ai_response(response)
+            self.assertEqual([plot_line.name for plot_line in plot_lines], ["The Heist"])
+
+    def test_characters(self):
+        """Test that characters parse from bare JSON and from a tagged block."""
+        data = {
+            "expanded_plot_line": "A longer plot.",
+            "characters": [{
+                "name": "Aria",
+                "archetype": "Chosen One",
+                "functional_role": "Protagonist",
+                "emotional_function": "Sympathetic Character",
+                "backstory": "Raised by wolves.",
+                "character_arc": "Learns to trust.",
+            }],
+        }
+        for response in (json.dumps(data), f"<STRUCTURED_DATA>\n{json.dumps(data)}\n</STRUCTURED_DATA>"):
+            expanded_plot_line, characters = parse_characters_from_ai_response(response)
+            self.assertEqual(expanded_plot_line, "A longer plot.")
+            self.assertEqual(characters[0].name, "Aria")
+            self.assertEqual(characters[0].archetype, ArchetypeEnum.CHOSEN_ONE)
+
+    def test_chapters(self):
+        """Test that a chapter plan and a generated chapter parse from bare JSON."""
+        plan = {"chapters": [{
+            "chapter_number": 1,
+            "title": "Leaving",
+            "overview": "Aria leaves home.",
+            "character_impact": [{"character": "Aria", "effect": "Homesick"}],
+            "point_of_view": "Aria",
+            "narrative_function": None,
+            "foreshadow_or_echo": "",
+            "scene_highlights": "The gate.",
+        }]}
+        chapters = parse_chapters_from_ai_response(json.dumps(plan))
+        self.assertEqual([chapter.title for chapter in chapters], ["Leaving"])
+
+        generated = {
+            "chapter_text": "Aria walked out.",
+            "chapter_summary": "Aria left.",
+            "continuity_state": {"characters": [], "objects": [], "locations_visited": ["Home"],
+                                 "open_plot_threads": []},
+        }
+        chapter = parse_single_chapter_from_ai_response(json.dumps(generated), 1)
+        self.assertEqual((chapter.chapter_text, chapter.summary), ("Aria walked out.", "Aria left."))
+        self.assertEqual(chapter.continuity_state.locations_visited, ["Home"])
+
+
+if __name__ == "__main__":
+    unittest.main()